@@ -0,0 +1,99 @@
+import { describe, it, expect, beforeEach, jest } from '@jest/globals';
+import { getTenantId } from '../../utils/tenantContext';
+
+// Capture each named process callback when the queue registers it
+const processCallbacks: Record<string, (...args: any[]) => Promise<void>> = {};
+
+jest.mock('bull', () => {
+  return jest.fn().mockImplementation(() => ({
+    process: jest.fn((name: string, cb: any) => {
+      processCallbacks[name] = cb;
+    }),
+    on: jest.fn(),
+    add: jest.fn(),
+    close: jest.fn().mockResolvedValue(undefined as any),
+    getRepeatableJobs: jest.fn().mockResolvedValue([] as any),
+    removeRepeatableByKey: jest.fn(),
+  }));
+});
+
+// Must mock before importing the queue — set NODE_ENV to non-test so the real Bull path runs
+const originalEnv = process.env.NODE_ENV;
+process.env.NODE_ENV = 'production';
+
+// Mock agingService
+const mockGetOverdueAgents = jest.fn();
+jest.mock('../../services/agingService', () => ({
+  __esModule: true,
+  default: {
+    refreshAll: jest.fn(),
+    getOverdueAgents: (...args: any[]) => mockGetOverdueAgents(...args),
+  },
+}));
+
+// Mock notificationService, recording the tenant context each call runs in
+const mockNotifyAdminsOverdueCollections = jest.fn();
+const notifiedTenants: (string | null)[] = [];
+jest.mock('../../services/notificationService', () => ({
+  notifyAdminsOverdueCollections: (...args: any[]) => {
+    notifiedTenants.push(getTenantId());
+    return mockNotifyAdminsOverdueCollections(...args);
+  },
+}));
+
+// Mock logger
+const mockLogger = {
+  info: jest.fn(),
+  warn: jest.fn(),
+  error: jest.fn(),
+};
+jest.mock('../../utils/logger', () => ({
+  __esModule: true,
+  default: mockLogger,
+}));
+
+// Now import the queue — this triggers process() registration
+import '../../queues/agingQueue';
+
+// Restore NODE_ENV
+process.env.NODE_ENV = originalEnv;
+
+const makeAgent = (agentId: number, tenantId: string) => ({
+  agentId,
+  agentName: `Agent ${agentId}`,
+  tenantId,
+  totalBalance: 500,
+  warningAmount: 200,
+  criticalAmount: 300,
+});
+
+describe('agingQueue notify-overdue-collections', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+    notifiedTenants.length = 0;
+    (mockNotifyAdminsOverdueCollections as any).mockResolvedValue(undefined);
+  });
+
+  it('notifies each tenant once, with only its agents, inside its tenant context', async () => {
+    const tenantA = [makeAgent(1, 'tenant-a'), makeAgent(3, 'tenant-a')];
+    const tenantB = [makeAgent(2, 'tenant-b')];
+    (mockGetOverdueAgents as any).mockResolvedValue([tenantA[0], tenantB[0], tenantA[1]]);
+
+    await processCallbacks['notify-overdue-collections']();
+
+    expect(mockNotifyAdminsOverdueCollections).toHaveBeenCalledTimes(2);
+    expect(mockNotifyAdminsOverdueCollections).toHaveBeenNthCalledWith(1, tenantA);
+    expect(mockNotifyAdminsOverdueCollections).toHaveBeenNthCalledWith(2, tenantB);
+    expect(notifiedTenants).toEqual(['tenant-a', 'tenant-b']);
+    expect(getTenantId()).toBeNull();
+  });
+
+  it('does not notify anyone when no agents are overdue', async () => {
+    (mockGetOverdueAgents as any).mockResolvedValue([]);
+
+    await processCallbacks['notify-overdue-collections']();
+
+    expect(mockNotifyAdminsOverdueCollections).not.toHaveBeenCalled();
+    expect(mockLogger.info).toHaveBeenCalledWith('No overdue collections found.');
+  });
+});
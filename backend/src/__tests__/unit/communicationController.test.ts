@@ -63,11 +63,24 @@ describe('Communication Controller', () => {
         limit: 10,
         channel: 'sms',
         status: 'sent',
+        orderId: undefined,
+        customerId: undefined,
         startDate: undefined,
         endDate: undefined,
       });
     });
 
+    it('should pass order and customer filters to service', async () => {
+      mockReq.query = { customerId: '42', orderId: '7' };
+      (communicationService.getMessages as jest.Mock).mockResolvedValue({ data: [], pagination: {} });
+
+      await communicationController.getMessages(mockReq as AuthRequest, mockRes as Response);
+
+      expect(communicationService.getMessages).toHaveBeenCalledWith(
+        expect.objectContaining({ customerId: 42, orderId: 7 })
+      );
+    });
+
     it('should return 500 on service error', async () => {
       (communicationService.getMessages as jest.Mock).mockRejectedValue(new Error('DB error'));
 
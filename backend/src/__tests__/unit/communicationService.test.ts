@@ -342,21 +342,23 @@ describe('CommunicationService', () => {
       it('should return paginated opt-out customers', async () => {
         const mockCustomers = [
           { id: 1, firstName: 'John', lastName: 'Doe', phoneNumber: '+233241111111', smsOptOut: true, whatsappOptOut: false },
+          { id: 2, firstName: 'Jane', lastName: 'Doe', phoneNumber: '+233242222222', smsOptOut: false, whatsappOptOut: false, emailOptOut: true },
         ];
         (prismaMock.customer.findMany as jest.Mock).mockResolvedValue(mockCustomers);
-        (prismaMock.customer.count as jest.Mock).mockResolvedValue(1);
+        (prismaMock.customer.count as jest.Mock).mockResolvedValue(2);
 
         const result = await communicationService.getOptOutCustomers(1, 20);
 
         expect(prismaMock.customer.findMany).toHaveBeenCalledWith(
           expect.objectContaining({
-            where: { OR: [{ smsOptOut: true }, { whatsappOptOut: true }] },
+            where: { OR: [{ smsOptOut: true }, { whatsappOptOut: true }, { emailOptOut: true }] },
             skip: 0,
             take: 20,
+            orderBy: [{ firstName: 'asc' }, { id: 'asc' }],
           }),
         );
         expect(result.customers).toEqual(mockCustomers);
-        expect(result.pagination).toEqual({ page: 1, limit: 20, total: 1, totalPages: 1 });
+        expect(result.pagination).toEqual({ page: 1, limit: 20, total: 2, totalPages: 1 });
       });
 
       it('should use default pagination values', async () => {
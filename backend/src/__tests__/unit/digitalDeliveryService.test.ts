@@ -0,0 +1,78 @@
+import { describe, it, expect, beforeEach, jest } from '@jest/globals';
+import { prismaMock } from '../mocks/prisma.mock';
+
+// Mock logger
+jest.mock('../../utils/logger', () => ({
+  __esModule: true,
+  default: {
+    info: jest.fn(),
+    warn: jest.fn(),
+    error: jest.fn(),
+    debug: jest.fn(),
+  },
+}));
+
+// Mock outbound channels so importing the service has no side effects
+jest.mock('../../services/emailService', () => ({
+  sendEmail: jest.fn(),
+}));
+jest.mock('../../services/whatsappService', () => ({
+  whatsappService: { sendText: jest.fn() },
+}));
+
+import { digitalDeliveryService } from '../../services/digitalDeliveryService';
+
+const digitalOrder = {
+  id: 42,
+  orderItems: [
+    { product: { name: 'Printed Guide', productType: 'physical', digitalFileUrl: null } },
+    { product: { name: 'Ebook', productType: 'digital', digitalFileUrl: 'https://files.example.com/ebook.pdf' } },
+  ],
+};
+
+describe('digitalDeliveryService.validateAndGetDownloadUrl', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+  });
+
+  it('increments the token with physical table and column names', async () => {
+    (prismaMock.$queryRaw as any).mockResolvedValue([{ id: 7, orderId: 42 }]);
+    (prismaMock.order.findUnique as any).mockResolvedValue(digitalOrder);
+
+    await digitalDeliveryService.validateAndGetDownloadUrl('tok-abc123456');
+
+    expect(prismaMock.$queryRaw).toHaveBeenCalledTimes(1);
+    const [strings, ...values] = (prismaMock.$queryRaw as any).mock.calls[0];
+    const sql = (strings as string[]).join('$');
+    expect(sql).toContain('UPDATE "download_tokens"');
+    expect(sql).toContain('SET "download_count" = "download_count" + 1');
+    expect(sql).toContain('"is_revoked" = false');
+    expect(sql).toContain('"expires_at" > NOW()');
+    expect(sql).toContain('"download_count" < "max_downloads"');
+    expect(sql).toContain('RETURNING "id", "order_id" AS "orderId"');
+    expect(sql).not.toMatch(/"(DownloadToken|downloadCount|isRevoked|expiresAt|maxDownloads)"/);
+    expect(values).toEqual(['tok-abc123456']);
+  });
+
+  it('loads the order from the returned orderId and returns its digital file', async () => {
+    (prismaMock.$queryRaw as any).mockResolvedValue([{ id: 7, orderId: 42 }]);
+    (prismaMock.order.findUnique as any).mockResolvedValue(digitalOrder);
+
+    const result = await digitalDeliveryService.validateAndGetDownloadUrl('tok-abc123456');
+
+    expect(prismaMock.order.findUnique).toHaveBeenCalledWith({
+      where: { id: 42 },
+      include: { orderItems: { include: { product: true } } },
+    });
+    expect(result).toEqual({ fileUrl: 'https://files.example.com/ebook.pdf', productName: 'Ebook' });
+  });
+
+  it('returns null without loading an order when no token row is updated', async () => {
+    (prismaMock.$queryRaw as any).mockResolvedValue([]);
+
+    const result = await digitalDeliveryService.validateAndGetDownloadUrl('expired-token');
+
+    expect(result).toBeNull();
+    expect(prismaMock.order.findUnique).not.toHaveBeenCalled();
+  });
+});
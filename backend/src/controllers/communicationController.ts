@@ -72,7 +72,7 @@ const updateOptOutSchema = z
 
 export const getMessages = async (req: AuthRequest, res: Response): Promise<void> => {
   try {
-    const { page, limit, channel, status, startDate, endDate } = req.query;
+    const { page, limit, channel, status, orderId, customerId, startDate, endDate } = req.query;
     if (channel && !validChannels.includes(channel as MessageChannel)) {
       res.status(400).json({ error: `Invalid channel. Must be one of: ${validChannels.join(', ')}` });
       return;
@@ -86,6 +86,8 @@ export const getMessages = async (req: AuthRequest, res: Response): Promise<void
       limit: limit ? Number(limit) : undefined,
       channel: channel as MessageChannel | undefined,
       status: status as MessageStatus | undefined,
+      orderId: orderId ? Number(orderId) : undefined,
+      customerId: customerId ? Number(customerId) : undefined,
       startDate: startDate as string | undefined,
       endDate: endDate as string | undefined,
     });
@@ -2,6 +2,7 @@ import Bull from 'bull';
 import agingService from '../services/agingService';
 import { notifyAdminsOverdueCollections } from '../services/notificationService';
 import logger from '../utils/logger';
+import { tenantStorage } from '../utils/tenantContext';
 
 const redisConfig = {
     host: process.env.REDIS_HOST || 'localhost',
@@ -45,8 +46,21 @@ agingQueue.process('notify-overdue-collections', async () => {
     try {
         const overdueAgents = await agingService.getOverdueAgents();
         if (overdueAgents.length > 0) {
-            await notifyAdminsOverdueCollections(overdueAgents);
-            logger.info(`Notified admins about ${overdueAgents.length} agents with overdue collections.`);
+            // The cron has no tenant context, so group by the agent's tenant and
+            // notify each tenant's own admins inside that context. Otherwise every
+            // admin on the platform gets every tenant's agents and balances, and
+            // the notifications are stored with tenant_id = NULL where no tenant
+            // user can see them.
+            const byTenant = new Map<string | null, typeof overdueAgents>();
+            for (const agent of overdueAgents) {
+                const group = byTenant.get(agent.tenantId) || [];
+                group.push(agent);
+                byTenant.set(agent.tenantId, group);
+            }
+            for (const [tenantId, agents] of byTenant) {
+                await tenantStorage.run({ tenantId }, () => notifyAdminsOverdueCollections(agents));
+            }
+            logger.info(`Notified admins of ${byTenant.size} tenant(s) about ${overdueAgents.length} agents with overdue collections.`);
         } else {
             logger.info('No overdue collections found.');
         }
@@ -290,7 +290,7 @@ export class AgingService {
    * Get agents with overdue collections (4-7 day or 8+ day buckets)
    * Used by the notification job to alert admins
    */
-  async getOverdueAgents(): Promise<{ agentId: number; agentName: string; totalBalance: number; warningAmount: number; criticalAmount: number }[]> {
+  async getOverdueAgents(): Promise<{ agentId: number; agentName: string; tenantId: string | null; totalBalance: number; warningAmount: number; criticalAmount: number }[]> {
     const overdueBuckets = await (prisma as any).agentAgingBucket.findMany({
       where: {
         OR: [
@@ -300,7 +300,7 @@ export class AgingService {
       },
       include: {
         agent: {
-          select: { id: true, firstName: true, lastName: true }
+          select: { id: true, firstName: true, lastName: true, tenantId: true }
         }
       }
     });
@@ -308,6 +308,7 @@ export class AgingService {
     return overdueBuckets.map((bucket: any) => ({
       agentId: bucket.agentId,
       agentName: `${bucket.agent.firstName} ${bucket.agent.lastName}`,
+      tenantId: bucket.agent.tenantId ?? null,
       totalBalance: parseFloat(bucket.totalBalance.toString()),
       warningAmount: parseFloat(bucket.bucket_4_7.toString()),
       criticalAmount: parseFloat(bucket.bucket_8_plus.toString()),
@@ -372,25 +372,28 @@ export const communicationService = {
     return prisma.emailTemplate.delete({ where: { id } });
   },
 
+  // Every channel's opt-outs, including email unsubscribes from the public
+  // link. id breaks firstName ties so offset pages never repeat or skip rows.
   async getOptOutCustomers(page = 1, limit = 20) {
+    const where = { OR: [{ smsOptOut: true }, { whatsappOptOut: true }, { emailOptOut: true }] };
     const [customers, total] = await Promise.all([
       prisma.customer.findMany({
-        where: { OR: [{ smsOptOut: true }, { whatsappOptOut: true }] },
+        where,
         select: {
           id: true,
           firstName: true,
           lastName: true,
           phoneNumber: true,
+          email: true,
           smsOptOut: true,
           whatsappOptOut: true,
+          emailOptOut: true,
         },
         skip: (page - 1) * limit,
         take: limit,
-        orderBy: { firstName: 'asc' },
-      }),
-      prisma.customer.count({
-        where: { OR: [{ smsOptOut: true }, { whatsappOptOut: true }] },
+        orderBy: [{ firstName: 'asc' }, { id: 'asc' }],
       }),
+      prisma.customer.count({ where }),
     ]);
     return {
       customers,
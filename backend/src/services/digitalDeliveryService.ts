@@ -46,15 +46,16 @@ export const digitalDeliveryService = {
   async validateAndGetDownloadUrl(token: string): Promise<{ fileUrl: string; productName: string } | null> {
     // Atomic check-and-increment: prevents TOCTOU race condition where concurrent
     // requests could exceed maxDownloads. Uses raw SQL because Prisma updateMany
-    // doesn't support comparing two columns in a WHERE clause.
+    // doesn't support comparing two columns in a WHERE clause. Raw SQL bypasses
+    // @@map/@map, so it must use the physical table and column names.
     const updated: { id: number; orderId: number }[] = await prisma.$queryRaw`
-      UPDATE "DownloadToken"
-      SET "downloadCount" = "downloadCount" + 1
+      UPDATE "download_tokens"
+      SET "download_count" = "download_count" + 1
       WHERE "token" = ${token}
-        AND "isRevoked" = false
-        AND "expiresAt" > NOW()
-        AND "downloadCount" < "maxDownloads"
-      RETURNING "id", "orderId"
+        AND "is_revoked" = false
+        AND "expires_at" > NOW()
+        AND "download_count" < "max_downloads"
+      RETURNING "id", "order_id" AS "orderId"
     `;
 
     if (!updated || updated.length === 0) {
@@ -774,16 +774,17 @@ const OptOutsTab: React.FC = () => {
                 <th className="px-4 py-3 text-left text-xs font-medium text-gray-500 uppercase">Phone</th>
                 <th className="px-4 py-3 text-center text-xs font-medium text-gray-500 uppercase">SMS Opt-out</th>
                 <th className="px-4 py-3 text-center text-xs font-medium text-gray-500 uppercase">WhatsApp Opt-out</th>
+                <th className="px-4 py-3 text-center text-xs font-medium text-gray-500 uppercase">Email</th>
               </tr>
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
               {isLoadingOptOuts ? (
                 <tr>
-                  <td colSpan={4} className="px-4 py-8 text-center text-gray-500">Loading...</td>
+                  <td colSpan={5} className="px-4 py-8 text-center text-gray-500">Loading...</td>
                 </tr>
               ) : optOutCustomers.length === 0 ? (
                 <tr>
-                  <td colSpan={4} className="px-4 py-8 text-center text-gray-500">No customers found</td>
+                  <td colSpan={5} className="px-4 py-8 text-center text-gray-500">No customers found</td>
                 </tr>
               ) : (
                 optOutCustomers.map((c) => (
@@ -820,6 +821,15 @@ const OptOutsTab: React.FC = () => {
                         />
                       </button>
                     </td>
+                    {/* Email opt-out is set by the customer's own unsubscribe link and the
+                        opt-out API only toggles SMS/WhatsApp, so it is read-only here. */}
+                    <td className="px-4 py-3 text-center text-sm">
+                      {c.emailOptOut ? (
+                        <span className="text-red-600 font-medium">Unsubscribed</span>
+                      ) : (
+                        <span className="text-gray-400">—</span>
+                      )}
+                    </td>
                   </tr>
                 ))
               )}
@@ -1,9 +1,30 @@
 """QA Reconnaissance - Take screenshots of key pages to identify selectors"""
 from playwright.sync_api import sync_playwright
+import argparse
 import os
+import sys
 
 SCREENSHOTS_DIR = '/tmp/qa-screenshots'
-os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--screenshot-store', metavar='DIR',
+                    help='keep only screenshots that changed since the last run, with the changes outlined')
+args = parser.parse_args()
+
+store = None
+if args.screenshot_store:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts', 'perf'))
+    from screenshot_store import ScreenshotStore
+    store = ScreenshotStore(args.screenshot_store)
+else:
+    os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
+
+def screenshot(page, name):
+    """Full-page screenshot to SCREENSHOTS_DIR, or into the screenshot store (kept only if it changed)"""
+    if store:
+        store.capture(page, f'qa-{name}')
+    else:
+        page.screenshot(path=f'{SCREENSHOTS_DIR}/{name}.png', full_page=True)
 
 BASE_URL = 'http://localhost:5173'
 API_URL = 'http://localhost:3000'
@@ -15,7 +36,7 @@ with sync_playwright() as p:
     page = browser.new_page(viewport={'width': 1280, 'height': 800})
     page.goto(f'{BASE_URL}/login')
     page.wait_for_load_state('networkidle')
-    page.screenshot(path=f'{SCREENSHOTS_DIR}/01-login.png', full_page=True)
+    screenshot(page, '01-login')
 
     # Login
     page.fill('input[type="email"]', 'admin@codadmin.com')
@@ -23,35 +44,35 @@ with sync_playwright() as p:
     page.click('button[type="submit"]')
     page.wait_for_load_state('networkidle')
     page.wait_for_timeout(2000)
-    page.screenshot(path=f'{SCREENSHOTS_DIR}/02-dashboard.png', full_page=True)
+    screenshot(page, '02-dashboard')
     print(f"Dashboard URL: {page.url}")
 
     # === 2. Navigate to Products page (digital products - PR #157) ===
     page.goto(f'{BASE_URL}/products')
     page.wait_for_load_state('networkidle')
     page.wait_for_timeout(1000)
-    page.screenshot(path=f'{SCREENSHOTS_DIR}/03-products.png', full_page=True)
+    screenshot(page, '03-products')
     print(f"Products URL: {page.url}")
 
     # === 3. Navigate to Checkout Forms (PR #158) ===
     page.goto(f'{BASE_URL}/checkout-forms')
     page.wait_for_load_state('networkidle')
     page.wait_for_timeout(1000)
-    page.screenshot(path=f'{SCREENSHOTS_DIR}/04-checkout-forms.png', full_page=True)
+    screenshot(page, '04-checkout-forms')
     print(f"Checkout Forms URL: {page.url}")
 
     # === 4. Navigate to Orders page ===
     page.goto(f'{BASE_URL}/orders')
     page.wait_for_load_state('networkidle')
     page.wait_for_timeout(1000)
-    page.screenshot(path=f'{SCREENSHOTS_DIR}/05-orders.png', full_page=True)
+    screenshot(page, '05-orders')
     print(f"Orders URL: {page.url}")
 
     # === 5. Navigate to Settings ===
     page.goto(f'{BASE_URL}/settings')
     page.wait_for_load_state('networkidle')
     page.wait_for_timeout(1000)
-    page.screenshot(path=f'{SCREENSHOTS_DIR}/06-settings.png', full_page=True)
+    screenshot(page, '06-settings')
     print(f"Settings URL: {page.url}")
 
     # === 6. Check a public checkout form ===
@@ -59,7 +80,7 @@ with sync_playwright() as p:
     page2.goto(f'{BASE_URL}/checkout/test')
     page2.wait_for_load_state('networkidle')
     page2.wait_for_timeout(1000)
-    page2.screenshot(path=f'{SCREENSHOTS_DIR}/07-public-checkout.png', full_page=True)
+    screenshot(page2, '07-public-checkout')
     print(f"Public checkout URL: {page2.url}")
     page2.close()
 
@@ -68,7 +89,7 @@ with sync_playwright() as p:
     page3.goto(f'{BASE_URL}/register')
     page3.wait_for_load_state('networkidle')
     page3.wait_for_timeout(1000)
-    page3.screenshot(path=f'{SCREENSHOTS_DIR}/08-register.png', full_page=True)
+    screenshot(page3, '08-register')
     print(f"Register URL: {page3.url}")
     page3.close()
 
@@ -89,5 +110,7 @@ with sync_playwright() as p:
         print(f"  [{status}] {h}: {val}")
 
     browser.close()
-    print(f"\nScreenshots saved to {SCREENSHOTS_DIR}/")
+    if store:
+        store.close()
+    print(f"\nScreenshots saved to {args.screenshot_store or SCREENSHOTS_DIR}/")
     print("Recon complete.")
@@ -1,9 +1,29 @@
 """Comprehensive QA Tests for PRs #157, #158, #159, #160"""
 from playwright.sync_api import sync_playwright
-import json, os, requests
+import argparse, json, os, requests, sys
 
 SCREENSHOTS_DIR = '/tmp/qa-screenshots'
-os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('--screenshot-store', metavar='DIR',
+                    help='keep only screenshots that changed since the last run, with the changes outlined')
+args = parser.parse_args()
+
+store = None
+if args.screenshot_store:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts', 'perf'))
+    from screenshot_store import ScreenshotStore
+    store = ScreenshotStore(args.screenshot_store)
+else:
+    os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
+
+def screenshot(page, name):
+    """Full-page screenshot to SCREENSHOTS_DIR, or into the screenshot store (kept only if it changed)"""
+    if store:
+        store.capture(page, f'qa-{name}')
+    else:
+        page.screenshot(path=f'{SCREENSHOTS_DIR}/{name}.png', full_page=True)
+
 BASE_URL = 'http://localhost:5173'
 API_URL = 'http://localhost:3000'
 results = []
@@ -53,7 +73,7 @@ with sync_playwright() as p:
         rows.first.click()
         page.wait_for_load_state('networkidle')
         page.wait_for_timeout(1500)
-        page.screenshot(path=f'{SCREENSHOTS_DIR}/10-form-editor.png', full_page=True)
+        screenshot(page, '10-form-editor')
 
         # Check for color picker / styling controls
         color_inputs = page.locator('input[type="color"]').count()
@@ -82,7 +102,7 @@ with sync_playwright() as p:
                 page2.goto(f'{BASE_URL}/checkout/{slug}')
                 page2.wait_for_load_state('networkidle')
                 page2.wait_for_timeout(2000)
-                page2.screenshot(path=f'{SCREENSHOTS_DIR}/11-public-checkout-real.png', full_page=True)
+                screenshot(page2, '11-public-checkout-real')
 
                 # Check form fields render
                 inputs = page2.locator('input, select, textarea').count()
@@ -132,7 +152,7 @@ with sync_playwright() as p:
     if add_btn.count() > 0:
         add_btn.first.click()
         page.wait_for_timeout(1500)
-        page.screenshot(path=f'{SCREENSHOTS_DIR}/12-add-product.png', full_page=True)
+        screenshot(page, '12-add-product')
 
         # Check for product type selector (digital vs physical)
         type_selector = page.locator('select, [role="combobox"], input[type="radio"], [class*="toggle"]')
@@ -197,12 +217,12 @@ with sync_playwright() as p:
     page.fill('input[placeholder*="Jane"], input[placeholder*="Name"], input[placeholder*="name"]', 'QA Tester')
     page.fill('input[type="email"], input[placeholder*="email"]', f'qatest{os.getpid()}@example.com')
     page.fill('input[type="password"]', 'TestPass123!')
-    page.screenshot(path=f'{SCREENSHOTS_DIR}/13-register-filled.png', full_page=True)
+    screenshot(page, '13-register-filled')
 
     # Submit registration
     submit_btn.first.click()
     page.wait_for_timeout(3000)
-    page.screenshot(path=f'{SCREENSHOTS_DIR}/14-after-register.png', full_page=True)
+    screenshot(page, '14-after-register')
     post_register_url = page.url
     print(f"  After registration URL: {post_register_url}")
 
@@ -213,7 +233,7 @@ with sync_playwright() as p:
     if is_onboarding:
         # Check onboarding wizard content
         page.wait_for_timeout(1000)
-        page.screenshot(path=f'{SCREENSHOTS_DIR}/15-onboarding-wizard.png', full_page=True)
+        screenshot(page, '15-onboarding-wizard')
         onboarding_text = page.inner_text('body')
         has_steps = 'step' in onboarding_text.lower() or 'next' in onboarding_text.lower() or 'logo' in onboarding_text.lower() or 'brand' in onboarding_text.lower()
         log("Onboarding wizard shows setup steps", has_steps)
@@ -275,6 +295,9 @@ cors_origin = resp.headers.get('access-control-allow-origin', '')
 log("CORS blocks unknown origins", cors_origin != '*' and 'evil.com' not in cors_origin,
     f"Allow-Origin: {cors_origin or 'none'}")
 
+if store:
+    store.close()
+
 # ============================================================
 print("\n\n========================================")
 print("         QA TEST SUMMARY")
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Agent inventory transaction contention benchmark.
+
+agentInventoryService runs allocateStock, transferStock, returnStock and
+adjustStock in prisma.$transaction, and recordOrderFulfillment inside the order
+status transaction. At dispatch, stock is allocated to hundreds of agents from
+the same product rows. This benchmark reproduces that through the
+/api/agent-inventory routes:
+
+  1. Dispatch wave: every seeded agent gets an allocation of every product at
+     once, so all transactions queue on the same products rows.
+  2. Mixed load for a fixed duration: allocations, agent-to-agent transfers
+     (including opposite-direction pairs, the classic deadlock shape), returns,
+     adjustments, and order fulfillments (PATCH /api/orders/:id/status to
+     out_for_delivery for orders assigned to the agents).
+
+It reports throughput and latency per operation, and counts deadlocks and
+serialization failures from pg_stat_database, 5xx responses and backend log
+markers. Then it checks the books:
+
+  - stock is conserved per product:
+    warehouse + with agents + in transit + units fulfilled from the warehouse
+    equals the starting total
+  - no agent_stock quantity went negative (the in-transaction re-read is a
+    plain SELECT, not SELECT ... FOR UPDATE)
+  - each agent_stock row's quantity equals its counters and the quantity
+    rebuilt from inventory_transfers
+  - GET /summary and GET /product/:id agree with the tables, for quantity
+    and total_in_transit
+
+Seeded agents are perf-agent-<n>@perf-inventory.local; products are
+PERF-INV-<n>.
+
+Usage:
+    python scripts/perf/bench_agent_inventory.py --agents 400 --products 5 --duration 60
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import datetime
+
+from perf_common import (
+    ADMIN_EMAIL, API_URL, LatencyStats, connect_db, copy_rows, count_log_markers, ensure_perf_product,
+    format_ghana_phone, ghana_local_number, log_offset, login, new_session, print_checks, print_header,
+    print_latency_table, query_all, query_one, random_area, run_concurrent, run_for_duration, save_results,
+    tenant_id_for, timed_request,
+)
+
+AGENT_DOMAIN = 'perf-inventory.local'
+ORDER_NOTE = 'perf: agent inventory'
+OK_STATUSES = (200, 201, 400)  # 400 is a business rejection (insufficient stock), not a failure
+LOG_MARKERS = ['deadlock detected', 'could not serialize access', 'P2034', 'Transaction already closed']
+MIX = [('allocate', 35), ('transfer', 25), ('return', 10), ('adjust', 10), ('fulfill', 20)]
+
+
+def seed_agents(conn, tenant_id, count):
+    password_hash = query_one(conn, 'SELECT password FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+    existing = query_one(conn, 'SELECT COUNT(*) FROM users WHERE email LIKE %s', (f'%@{AGENT_DOMAIN}',))[0]
+    now = datetime.now()
+    rows = ((f'perf-agent-{i}@{AGENT_DOMAIN}', password_hash, 'delivery_agent', 'Perf', f'Agent{i}',
+             tenant_id, now, now) for i in range(existing, count))
+    copy_rows(conn, 'users', ['email', 'password', 'role', 'first_name', 'last_name',
+                              'tenant_id', 'created_at', 'updated_at'], rows)
+    ids = [r[0] for r in query_all(conn, 'SELECT id FROM users WHERE email LIKE %s ORDER BY id',
+                                   (f'%@{AGENT_DOMAIN}',))]
+    return ids[:count]
+
+
+def create_assigned_orders(session, product_ids, agent_ids, count, workers, rng):
+    """Orders for one customer, each assigned to a random seeded agent"""
+    state, area = random_area(rng)
+    customer_id = None
+    ids = []
+    lock = threading.Lock()
+
+    def create(i):
+        nonlocal customer_id
+        product_id = product_ids[i % len(product_ids)]
+        payload = {
+            'customerName': 'Perf Inventory',
+            'orderItems': [{'productId': product_id, 'quantity': 1, 'unitPrice': 150}],
+            'subtotal': 150, 'totalAmount': 150,
+            'deliveryAddress': f'{area} junction', 'deliveryState': state, 'deliveryArea': area,
+            'notes': ORDER_NOTE,
+        }
+        if customer_id:
+            payload['customerId'] = customer_id
+        else:
+            payload['customerPhone'] = format_ghana_phone(ghana_local_number(rng), 'local')
+        resp, _, err = timed_request(session, 'POST', '/api/orders', json=payload)
+        if err or resp.status_code != 201:
+            return
+        order_id = resp.json()['order']['id']
+        customer_id = customer_id or resp.json()['order']['customerId']
+        agent_id = agent_ids[i % len(agent_ids)]
+        timed_request(session, 'PATCH', f'/api/orders/{order_id}/assign-agent', json={'deliveryAgentId': agent_id})
+        with lock:
+            ids.append(order_id)
+
+    create(0)
+    run_concurrent(create, range(1, count), workers)
+    return ids
+
+
+def stock_totals(conn, product_ids):
+    """Warehouse, with-agents and in-transit units per product"""
+    rows = query_all(conn, """
+        SELECT p.id, p.stock_quantity,
+               COALESCE(SUM(s.quantity), 0), COALESCE(SUM(s.total_in_transit), 0)
+        FROM products p LEFT JOIN agent_stock s ON s.product_id = p.id
+        WHERE p.id = ANY(%s) GROUP BY p.id
+    """, (product_ids,))
+    return {pid: {'warehouse': w, 'agents': int(a), 'in_transit': int(t)} for pid, w, a, t in rows}
+
+
+def db_conflict_counters(conn):
+    return query_one(conn, """
+        SELECT deadlocks, conflicts, xact_rollback FROM pg_stat_database WHERE datname = current_database()
+    """)
+
+
+def dispatch_wave(session, product_ids, agent_ids, workers, rng):
+    stats = LatencyStats('dispatch allocate')
+    jobs = [(p, a) for a in agent_ids for p in product_ids]
+    rng.shuffle(jobs)
+
+    def allocate(job):
+        product_id, agent_id = job
+        resp, ms, err = timed_request(session, 'POST', '/api/agent-inventory/allocate', json={
+            'productId': product_id, 'agentId': agent_id, 'quantity': 20, 'notes': ORDER_NOTE})
+        stats.record_response(resp, ms, err, ok_statuses=(201,))
+
+    start = time.perf_counter()
+    run_concurrent(allocate, jobs, workers)
+    return stats, len(jobs) / (time.perf_counter() - start)
+
+
+def mixed_load(session, product_ids, agent_ids, order_ids, workers, duration_s, hot_pairs):
+    stats = {name: LatencyStats(name) for name, _ in MIX}
+    names = [n for n, _ in MIX]
+    weights = [w for _, w in MIX]
+    orders = list(order_ids)
+    fulfilled = []
+    lock = threading.Lock()
+    # Pairs that transfer in both directions concurrently lock agent_stock rows in opposite order
+    pairs = [(agent_ids[2 * i], agent_ids[2 * i + 1]) for i in range(min(hot_pairs, len(agent_ids) // 2))]
+
+    rngs = [random.Random(i) for i in range(workers)]
+
+    def op(worker):
+        rng = rngs[worker]
+        name = rng.choices(names, weights)[0]
+        product_id = rng.choice(product_ids)
+        if name == 'fulfill':
+            with lock:
+                order_id = orders.pop() if orders else None
+            if order_id is None:
+                name = 'allocate'
+            else:
+                resp, ms, err = timed_request(session, 'PATCH', f'/api/orders/{order_id}/status',
+                                              json={'status': 'out_for_delivery', 'notes': ORDER_NOTE})
+                stats['fulfill'].record_response(resp, ms, err, ok_statuses=OK_STATUSES)
+                if not err and resp.status_code == 200:
+                    with lock:
+                        fulfilled.append(order_id)
+                return
+        if name == 'allocate':
+            path, body = '/allocate', {'agentId': rng.choice(agent_ids), 'quantity': rng.randint(1, 10)}
+        elif name == 'transfer':
+            a, b = rng.choice(pairs) if pairs and rng.random() < 0.5 else rng.sample(agent_ids, 2)
+            if rng.random() < 0.5:
+                a, b = b, a
+            path, body = '/transfer', {'fromAgentId': a, 'toAgentId': b, 'quantity': rng.randint(1, 5)}
+        elif name == 'return':
+            path, body = '/return', {'agentId': rng.choice(agent_ids), 'quantity': rng.randint(1, 5)}
+        else:
+            path, body = '/adjust', {'agentId': rng.choice(agent_ids), 'newQuantity': rng.randint(0, 40)}
+        resp, ms, err = timed_request(session, 'POST', f'/api/agent-inventory{path}',
+                                      json={**body, 'productId': product_id, 'notes': ORDER_NOTE})
+        stats[name].record_response(resp, ms, err, ok_statuses=OK_STATUSES)
+
+    start = time.perf_counter()
+    run_for_duration(op, workers, duration_s)
+    return stats, fulfilled, time.perf_counter() - start
+
+
+def warehouse_fulfilled_units(conn, order_ids):
+    """Units of the given orders that were deducted from the warehouse, not from agent stock"""
+    if not order_ids:
+        return {}
+    rows = query_all(conn, """
+        SELECT oi.product_id, SUM(oi.quantity) - COALESCE(SUM(t.quantity), 0)
+        FROM order_items oi
+        LEFT JOIN inventory_transfers t
+          ON t.order_id = oi.order_id AND t.product_id = oi.product_id AND t.transfer_type = 'order_fulfillment'
+        WHERE oi.order_id = ANY(%s)
+        GROUP BY oi.product_id
+    """, (order_ids,))
+    return {pid: int(units) for pid, units in rows}
+
+
+def check_rows(conn, product_ids, agent_ids):
+    """agent_stock rows that are negative, disagree with their counters, or with the transfer log"""
+    negative = query_all(conn, """
+        SELECT agent_id, product_id, quantity FROM agent_stock
+        WHERE product_id = ANY(%s) AND agent_id = ANY(%s) AND quantity < 0
+    """, (product_ids, agent_ids))
+    counter_mismatch = query_all(conn, """
+        SELECT agent_id, product_id, quantity,
+               total_allocated + total_transfer_in - total_transfer_out - total_returned
+                 - total_in_transit - total_fulfilled
+        FROM agent_stock
+        WHERE product_id = ANY(%s) AND agent_id = ANY(%s)
+          AND quantity <> total_allocated + total_transfer_in - total_transfer_out - total_returned
+                          - total_in_transit - total_fulfilled
+    """, (product_ids, agent_ids))
+    ledger_mismatch = query_all(conn, """
+        WITH moves AS (
+            SELECT to_agent_id AS agent_id, product_id, quantity AS delta FROM inventory_transfers
+            WHERE to_agent_id IS NOT NULL
+            UNION ALL
+            SELECT from_agent_id, product_id, -quantity FROM inventory_transfers
+            WHERE from_agent_id IS NOT NULL
+        )
+        SELECT s.agent_id, s.product_id, s.quantity, COALESCE(SUM(m.delta), 0)
+        FROM agent_stock s
+        LEFT JOIN moves m ON m.agent_id = s.agent_id AND m.product_id = s.product_id
+        WHERE s.product_id = ANY(%s) AND s.agent_id = ANY(%s)
+        GROUP BY s.agent_id, s.product_id, s.quantity
+        HAVING s.quantity <> COALESCE(SUM(m.delta), 0)
+    """, (product_ids, agent_ids))
+    return negative, counter_mismatch, ledger_mismatch
+
+
+def check_api_totals(session, conn, tenant_id, product_ids):
+    """Compare /summary and /product/:id with the agent_stock table"""
+    sql_total, sql_rows = query_one(conn, """
+        SELECT COALESCE(SUM(s.quantity), 0), COUNT(*) FROM agent_stock s
+        JOIN users u ON u.id = s.agent_id
+        WHERE u.tenant_id = %s AND (s.quantity > 0 OR s.total_in_transit > 0)
+    """, (tenant_id,))
+    resp, summary_ms, err = timed_request(session, 'GET', '/api/agent-inventory/summary')
+    summary = resp.json() if not err and resp.status_code == 200 else {}
+    result = {
+        'summary_ms': round(summary_ms, 1),
+        'summary_total_quantity': summary.get('totalQuantity'),
+        'sql_total_quantity': int(sql_total),
+        'agent_stock_rows': sql_rows,
+        'products': [],
+    }
+    for product_id in product_ids:
+        resp, ms, err = timed_request(session, 'GET', f'/api/agent-inventory/product/{product_id}')
+        body = resp.json() if not err and resp.status_code == 200 else {}
+        sql = query_one(conn, """
+            SELECT COALESCE(SUM(quantity), 0), COALESCE(SUM(total_in_transit), 0)
+            FROM agent_stock WHERE product_id = %s
+        """, (product_id,))
+        result['products'].append({
+            'product_id': product_id,
+            'ms': round(ms, 1),
+            'api_with_agents': body.get('totalWithAgents'),
+            'sql_with_agents': int(sql[0]),
+            'api_in_transit': sum(a.get('totalInTransit', 0) for a in body.get('agents', [])),
+            'sql_in_transit': int(sql[1]),
+        })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--agents', type=int, default=400)
+    parser.add_argument('--products', type=int, default=5)
+    parser.add_argument('--orders', type=int, default=1000, help='agent-assigned orders to fulfill')
+    parser.add_argument('--workers', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=60, help='mixed-load seconds')
+    parser.add_argument('--hot-pairs', type=int, default=10, help='agent pairs transferring both ways')
+    parser.add_argument('--seed', type=int, default=32)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print_header('🚚 Agent Inventory - Transaction Contention Benchmark', target=API_URL,
+                 agents=args.agents, products=args.products, orders=args.orders,
+                 workers=args.workers, duration=f'{args.duration:.0f}s')
+
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    session = new_session(login(), pool_size=args.workers + 8)
+
+    print('\n[Phase 1] Seeding agents, products and assigned orders...')
+    agent_ids = seed_agents(conn, tenant_id, args.agents)
+    product_ids = [ensure_perf_product(conn, tenant_id, sku=f'PERF-INV-{i}', stock=1_000_000)
+                   for i in range(args.products)]
+    order_ids = create_assigned_orders(session, product_ids, agent_ids, args.orders, args.workers, rng)
+    print(f'  {len(agent_ids):,} agents, {len(product_ids)} products, {len(order_ids):,} orders')
+
+    before = stock_totals(conn, product_ids)
+    counters_before = db_conflict_counters(conn)
+    offset = log_offset()
+
+    print(f'\n[Phase 2] Dispatch wave: {len(agent_ids) * len(product_ids):,} concurrent allocations...')
+    dispatch_stats, dispatch_rps = dispatch_wave(session, product_ids, agent_ids, args.workers, rng)
+    print(f'  {dispatch_rps:.1f} allocations/s')
+
+    print(f'\n[Phase 3] Mixed load for {args.duration:.0f}s...')
+    mixed_stats, fulfilled, elapsed = mixed_load(session, product_ids, agent_ids, order_ids,
+                                                 args.workers, args.duration, args.hot_pairs)
+    summaries = [dispatch_stats.summary()] + [s.summary() for s in mixed_stats.values() if s.samples]
+    print_latency_table(summaries)
+    ops = sum(len(s.samples) for s in mixed_stats.values())
+    print(f'  Mixed throughput: {ops / elapsed:.1f} ops/s')
+
+    counters_after = db_conflict_counters(conn)
+    conflicts = {
+        'deadlocks': counters_after[0] - counters_before[0],
+        'serialization_conflicts': counters_after[1] - counters_before[1],
+        'rollbacks': counters_after[2] - counters_before[2],
+    }
+    server_errors = sum(n for s in [dispatch_stats, *mixed_stats.values()]
+                        for status, n in s.status_counts.items() if isinstance(status, int) and status >= 500)
+    markers = count_log_markers(offset, LOG_MARKERS)
+    print(f"  Deadlocks: {conflicts['deadlocks']}, conflicts: {conflicts['serialization_conflicts']}, "
+          f"rollbacks: {conflicts['rollbacks']}, 5xx responses: {server_errors}")
+    if markers:
+        print(f'  Backend log markers: {markers}')
+
+    print('\n[Phase 4] Checking stock conservation and API totals...')
+    after = stock_totals(conn, product_ids)
+    from_warehouse = warehouse_fulfilled_units(conn, fulfilled)
+    conservation = []
+    for pid in product_ids:
+        b, a = before[pid], after[pid]
+        start_total = b['warehouse'] + b['agents'] + b['in_transit']
+        end_total = a['warehouse'] + a['agents'] + a['in_transit'] + from_warehouse.get(pid, 0)
+        conservation.append({'product_id': pid, 'before': start_total, 'after': end_total, **a,
+                             'fulfilled_from_warehouse': from_warehouse.get(pid, 0)})
+        flag = '✅' if start_total == end_total else '❌'
+        print(f'  {flag} product {pid}: {start_total:,} -> {end_total:,} '
+              f"(warehouse {a['warehouse']:,}, agents {a['agents']:,}, in transit {a['in_transit']:,})")
+    negative, counter_mismatch, ledger_mismatch = check_rows(conn, product_ids, agent_ids)
+    api = check_api_totals(session, conn, tenant_id, product_ids)
+    print(f"  /summary totalQuantity {api['summary_total_quantity']} vs SQL {api['sql_total_quantity']} "
+          f"({api['agent_stock_rows']:,} rows, {api['summary_ms']:.0f}ms)")
+
+    passed = print_checks([
+        ('No 5xx responses', server_errors == 0),
+        ('No deadlocks', conflicts['deadlocks'] == 0),
+        ('Stock conserved per product', all(c['before'] == c['after'] for c in conservation)),
+        ('No negative agent stock', not negative),
+        ('agent_stock counters consistent', not counter_mismatch),
+        ('agent_stock matches the transfer log', not ledger_mismatch),
+        ('/summary total matches agent_stock', api['summary_total_quantity'] == api['sql_total_quantity']),
+        ('/product/:id quantities and in-transit match agent_stock',
+         all(p['api_with_agents'] == p['sql_with_agents'] and p['api_in_transit'] == p['sql_in_transit']
+             for p in api['products'])),
+    ])
+    if api['agent_stock_rows'] > 5000:
+        print(f"  ℹ️  getSummary reads at most 5000 agent_stock rows; tenant has {api['agent_stock_rows']:,}")
+
+    save_results('agent-inventory', {
+        'timestamp': datetime.now().isoformat(),
+        'settings': vars(args),
+        'dispatch_allocations_per_sec': round(dispatch_rps, 1),
+        'mixed_ops_per_sec': round(ops / elapsed, 1),
+        'latency': summaries,
+        'conflicts': conflicts,
+        'server_errors': server_errors,
+        'log_markers': markers,
+        'conservation': conservation,
+        'negative_rows': [list(r) for r in negative],
+        'counter_mismatches': [list(r) for r in counter_mismatch],
+        'ledger_mismatches': [list(r) for r in ledger_mismatch],
+        'api_totals': api,
+        'passed': passed,
+    })
+
+
+if __name__ == '__main__':
+    main()
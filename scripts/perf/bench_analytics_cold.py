@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Analytics endpoint cold-path benchmark across date ranges and tenant sizes.
+
+Every /api/analytics endpoint sits behind middleware/cache.ts, an in-process
+Map keyed on method, path, tenant and the JSON of the query string, with a
+300s TTL (600s for customer-insights). A dashboard that reloads within the TTL
+never sees the aggregation cost. Each request here carries a unique `_cb`
+query parameter, which the controllers ignore but the cache key includes, so
+every timed request is a cache miss.
+
+The tenant is grown in 10x steps (--sizes) so that the 7-day and 90-day windows
+always cover the same orders (--daily-orders a day over the last 90 days) and
+only older history grows. An aggregation whose 7d or 90d latency still climbs
+with tenant size is reading the whole history instead of the window; an
+all-history window that grows linearly needs a precomputed rollup. At each step
+every endpoint is timed cold on each window:
+
+    7d, 90d     startDate/endDate (sales-trends also gets days)
+    all         from the oldest seeded order, --years back
+
+customer-insights takes no dates, so it is timed once per step as `all`.
+
+Per endpoint and window the log-log slope of cold latency against tenant
+orders is reported with a verdict: flat (< 0.3), sublinear (< 0.8) or linear
+(needs a rollup). Seeded orders, order items and customers stay in the tenant
+between steps; the x-axis is the tenant's actual order count, so anything
+already in it is counted. The analytics routes allow 500 requests per 15
+minutes per IP outside development; keep --repeats low against production-
+like builds.
+
+Usage:
+    python scripts/perf/bench_analytics_cold.py --sizes 10000,100000,1000000
+    python scripts/perf/bench_analytics_cold.py --sizes 20000,200000 --repeats 5 --years 5
+"""
+import argparse
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from perf_common import (
+    ADMIN_EMAIL, API_URL, GHANA_AREAS, GHANA_PREFIXES, connect_db, ensure_perf_product, login, loglog_slope,
+    new_session, percentile, print_checks, print_header, query_all, query_one, save_results, scaling_verdict,
+    tenant_id_for, timed_request,
+)
+
+SEED_DOMAIN = 'perf-analytics.local'
+ORDER_NOTE = 'perf: analytics history'
+RECENT_DAYS = 90
+ENDPOINTS = ['dashboard', 'sales-trends', 'conversion-funnel', 'rep-performance', 'agent-performance',
+             'customer-insights', 'product-performance', 'area-distribution']
+UNDATED = {'customer-insights'}
+
+
+def seed_users(conn, tenant_id, role, count):
+    slug = 'rep' if role == 'sales_rep' else 'agent'
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO users (email, password, role, first_name, last_name, tenant_id, created_at, updated_at)
+            SELECT 'perf-analytics-' || %s || '-' || g || '@' || %s,
+                   (SELECT password FROM users WHERE email = %s), %s, 'Perf', 'Analytics' || g, %s, NOW(), NOW()
+            FROM generate_series(1, %s) g
+            ON CONFLICT (email) DO NOTHING
+        """, (slug, SEED_DOMAIN, ADMIN_EMAIL, role, tenant_id, count))
+    return [r[0] for r in query_all(conn, 'SELECT id FROM users WHERE email LIKE %s ORDER BY id',
+                                    (f'perf-analytics-{slug}-%@{SEED_DOMAIN}',))]
+
+
+def seed_customers(conn, tenant_id, count):
+    pairs = [(state, area) for state, areas in GHANA_AREAS.items() for area in areas]
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO customers (first_name, last_name, phone_number, address, state, area, notes,
+                                   tenant_id, created_at, updated_at)
+            SELECT 'Perf', 'Analytics' || g,
+                   '0' || (%(prefixes)s::text[])[1 + g %% cardinality(%(prefixes)s::text[])]
+                       || lpad(((g::bigint * 104729) %% 10000000)::text, 7, '0'),
+                   'Street ' || g, (%(states)s::text[])[1 + g %% %(n)s], (%(areas)s::text[])[1 + g %% %(n)s],
+                   %(note)s, %(tenant)s, NOW(), NOW()
+            FROM generate_series(1, %(count)s) g
+            ON CONFLICT DO NOTHING
+        """, {'prefixes': GHANA_PREFIXES, 'states': [s for s, _ in pairs], 'areas': [a for _, a in pairs],
+              'n': len(pairs), 'note': ORDER_NOTE, 'tenant': tenant_id, 'count': count})
+
+
+def insert_orders(conn, tenant_id, count, newest_days, oldest_days, reps, agents, products):
+    """`count` orders spread uniformly between newest_days and oldest_days ago, one item each"""
+    if count <= 0:
+        return 0
+    pairs = [(state, area) for state, areas in GHANA_AREAS.items() for area in areas]
+    with conn.cursor() as cur:
+        cur.execute("""
+            WITH c AS (SELECT array_agg(id) AS ids FROM customers WHERE tenant_id = %(tenant)s AND notes = %(note)s),
+            ins AS (
+                INSERT INTO orders (customer_id, customer_rep_id, delivery_agent_id, status, subtotal, total_amount,
+                                    cod_amount, delivery_state, delivery_area, delivery_address, notes, source,
+                                    tenant_id, created_at, updated_at)
+                SELECT c.ids[1 + floor(random() * cardinality(c.ids))::int],
+                       (%(reps)s::int[])[1 + floor(random() * cardinality(%(reps)s::int[]))::int],
+                       (%(agents)s::int[])[1 + floor(random() * cardinality(%(agents)s::int[]))::int],
+                       (CASE WHEN x.r < 0.62 THEN 'delivered' WHEN x.r < 0.70 THEN 'cancelled'
+                             WHEN x.r < 0.76 THEN 'returned' WHEN x.r < 0.82 THEN 'pending_confirmation'
+                             WHEN x.r < 0.88 THEN 'confirmed' WHEN x.r < 0.94 THEN 'out_for_delivery'
+                             ELSE 'failed_delivery' END)::"OrderStatus",
+                       x.amount, x.amount, x.amount, (%(states)s::text[])[1 + x.pi], (%(areas)s::text[])[1 + x.pi],
+                       'Perf analytics', %(note)s, (ARRAY['manual', 'webform', 'webhook'])[1 + x.pi %% 3],
+                       %(tenant)s, x.ts, x.ts + INTERVAL '2 days'
+                FROM c, (
+                    SELECT random() AS r, (ARRAY[120, 150, 180, 250])[1 + floor(random() * 4)::int] AS amount,
+                           NOW() - (%(newest)s + random() * (%(oldest)s - %(newest)s)) * INTERVAL '1 day' AS ts,
+                           floor(random() * %(npairs)s)::int AS pi
+                    FROM generate_series(1, %(count)s)
+                ) x
+                RETURNING id, total_amount, created_at
+            )
+            INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price, created_at)
+            SELECT ins.id, (%(products)s::int[])[1 + ins.id %% cardinality(%(products)s::int[])], 1,
+                   ins.total_amount, ins.total_amount, ins.created_at
+            FROM ins
+        """, {'tenant': tenant_id, 'note': ORDER_NOTE, 'reps': reps, 'agents': agents, 'products': products,
+              'count': count, 'newest': newest_days, 'oldest': oldest_days, 'npairs': len(pairs),
+              'states': [s for s, _ in pairs], 'areas': [a for _, a in pairs]})
+        cur.execute('ANALYZE orders')
+        cur.execute('ANALYZE order_items')
+    return count
+
+
+def windows(years):
+    now = datetime.now()
+    return {
+        '7d': (now - timedelta(days=7), now, 7),
+        '90d': (now - timedelta(days=RECENT_DAYS), now, RECENT_DAYS),
+        'all': (now - timedelta(days=365 * years + 1), now, 365 * years + 1),
+    }
+
+
+def endpoint_params(endpoint, window):
+    start, end, days = window
+    params = {'_cb': uuid.uuid4().hex}
+    if endpoint in UNDATED:
+        return params
+    params.update(startDate=start.isoformat(), endDate=end.isoformat())
+    if endpoint == 'sales-trends':
+        params.update(period='daily', days=days)
+    return params
+
+
+def server_rss(session):
+    resp, _, err = timed_request(session, 'GET', f'{API_URL}/metrics', timeout=5)
+    if err or resp.status_code != 200:
+        return None
+    for line in resp.text.splitlines():
+        if line.startswith('process_resident_memory_bytes '):
+            return float(line.split()[1])
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='seeded tenant order counts, ascending')
+    parser.add_argument('--daily-orders', type=int, default=80, help='orders per day in the last 90 days')
+    parser.add_argument('--years', type=int, default=3, help='span of the seeded history')
+    parser.add_argument('--customers', type=int, default=50_000)
+    parser.add_argument('--reps', type=int, default=30)
+    parser.add_argument('--agents', type=int, default=40)
+    parser.add_argument('--products', type=int, default=25)
+    parser.add_argument('--repeats', type=int, default=3, help='cold requests per endpoint, window and step')
+    parser.add_argument('--budget-ms', type=float, default=2000, help='cold budget for the 7d and 90d windows')
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    recent = args.daily_orders * RECENT_DAYS
+    if sizes[0] < recent:
+        raise SystemExit(f'Smallest size must hold the {recent:,} recent orders (--daily-orders x {RECENT_DAYS})')
+    print_header('📈 Analytics Cold-Path Benchmark', target=API_URL, sizes=sizes, recent_orders=f'{recent:,}',
+                 history=f'{args.years}y', repeats=args.repeats)
+
+    token = login()
+    session = new_session(token)
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+
+    print('\n[Phase 1] Seeding roster, catalog and the recent 90 days')
+    reps = seed_users(conn, tenant_id, 'sales_rep', args.reps)
+    agents = seed_users(conn, tenant_id, 'delivery_agent', args.agents)
+    products = [ensure_perf_product(conn, tenant_id, sku=f'PERF-ANALYTICS-{i:03d}', price=150.0)
+                for i in range(args.products)]
+    seed_customers(conn, tenant_id, args.customers)
+    seeded = dict(query_all(conn, """
+        SELECT created_at >= NOW() - %s * INTERVAL '1 day', COUNT(*) FROM orders
+        WHERE tenant_id = %s AND notes = %s GROUP BY 1
+    """, (RECENT_DAYS, tenant_id, ORDER_NOTE)))
+    added = insert_orders(conn, tenant_id, recent - seeded.get(True, 0), 0, RECENT_DAYS, reps, agents, products)
+    print(f'  {added:,} recent orders added ({seeded.get(True, 0):,} already seeded)')
+
+    wins = windows(args.years)
+    series = {}
+    steps = []
+    rss_start = server_rss(session)
+    for phase, size in enumerate(sizes, start=2):
+        archive = size - recent
+        have = query_one(conn, """
+            SELECT COUNT(*) FROM orders
+            WHERE tenant_id = %s AND notes = %s AND created_at < NOW() - %s * INTERVAL '1 day'
+        """, (tenant_id, ORDER_NOTE, RECENT_DAYS))[0]
+        start = time.perf_counter()
+        added = insert_orders(conn, tenant_id, archive - have, RECENT_DAYS, 365 * args.years, reps, agents,
+                              products)
+        tenant_orders = query_one(conn, 'SELECT COUNT(*) FROM orders WHERE tenant_id = %s AND deleted_at IS NULL',
+                                  (tenant_id,))[0]
+        print(f'\n[Phase {phase}] Tenant at {tenant_orders:,} orders '
+              f'({added:,} history rows added in {time.perf_counter() - start:.1f}s)')
+        window_rows = {name: query_one(conn, """
+            SELECT COUNT(*) FROM orders WHERE tenant_id = %s AND deleted_at IS NULL AND created_at >= %s
+        """, (tenant_id, w[0]))[0] for name, w in wins.items()}
+
+        step = {'size': size, 'tenant_orders': tenant_orders, 'window_rows': window_rows, 'results': []}
+        print(f"  {'endpoint':<20} {'window':>6} {'rows':>10} {'cold p50':>10} {'cold max':>10} {'warm':>8}")
+        for endpoint in ENDPOINTS:
+            for name, window in wins.items():
+                if endpoint in UNDATED and name != 'all':
+                    continue
+                cold, statuses, errors = [], {}, []
+                params = None
+                for _ in range(args.repeats):
+                    params = endpoint_params(endpoint, window)
+                    resp, ms, err = timed_request(session, 'GET', f'/api/analytics/{endpoint}', params=params,
+                                                  timeout=300)
+                    status = resp.status_code if resp is not None else 'error'
+                    statuses[status] = statuses.get(status, 0) + 1
+                    if err:
+                        errors.append(err)
+                    if status == 200:
+                        cold.append(ms)
+                resp, warm_ms, _ = timed_request(session, 'GET', f'/api/analytics/{endpoint}', params=params)
+                cold.sort()
+                p50 = percentile(cold, 50) if cold else None
+                result = {'endpoint': endpoint, 'window': name, 'window_rows': window_rows[name],
+                          'cold_p50_ms': round(p50, 1) if p50 else None,
+                          'cold_max_ms': round(cold[-1], 1) if cold else None,
+                          'warm_ms': round(warm_ms, 1), 'statuses': {str(k): v for k, v in statuses.items()},
+                          'errors': sorted(set(errors))}
+                step['results'].append(result)
+                series.setdefault((endpoint, name), []).append((tenant_orders, p50))
+                cold_txt = f'{p50:>8.0f}ms' if p50 else f"{'fail':>10}"
+                max_txt = f'{cold[-1]:>8.0f}ms' if cold else f"{'':>10}"
+                print(f'  {endpoint:<20} {name:>6} {window_rows[name]:>10,} {cold_txt} {max_txt} {warm_ms:>6.0f}ms')
+                for message in sorted(set(errors)):
+                    print(f'    transport error: {message}')
+                if 429 in statuses:
+                    print('  ⚠️  Rate limited (429); results for this step are incomplete')
+        steps.append(step)
+    rss_end = server_rss(session)
+
+    print(f'\n[Phase {len(sizes) + 2}] Scaling curves (cold p50 ms by tenant orders)')
+    header = ''.join(f"{s['tenant_orders']:>12,}" for s in steps)
+    print(f"  {'endpoint':<20} {'window':>6}{header} {'slope':>7}  verdict")
+    curves = []
+    for (endpoint, name), points in series.items():
+        exponent = loglog_slope(points)
+        curves.append({'endpoint': endpoint, 'window': name, 'points': [{'tenant_orders': n, 'cold_p50_ms': ms}
+                                                                       for n, ms in points],
+                       'slope': round(exponent, 3) if exponent is not None else None,
+                       'verdict': scaling_verdict(exponent)})
+        cells = ''.join(f'{ms:>10.0f}ms' if ms else f"{'—':>12}" for _, ms in points)
+        slope_txt = f'{exponent:>7.2f}' if exponent is not None else f"{'—':>7}"
+        print(f'  {endpoint:<20} {name:>6}{cells} {slope_txt}  {scaling_verdict(exponent)}')
+
+    # Fixed windows cover the same orders at every step, so growth there is history leaking into the query
+    history_bound = [f"{c['endpoint']} {c['window']}" for c in curves
+                     if c['window'] != 'all' and c['slope'] is not None and c['slope'] >= 0.3]
+    rollups = [c['endpoint'] for c in curves if c['window'] == 'all' and c['slope'] is not None and c['slope'] >= 0.8]
+    recent_over = [f"{r['endpoint']} {r['window']}" for r in steps[-1]['results']
+                   if r['window'] != 'all' and (r['cold_p50_ms'] or float('inf')) > args.budget_ms]
+    if rss_start and rss_end:
+        print(f'\n  Backend RSS {rss_start / 2**20:.0f} MB -> {rss_end / 2**20:.0f} MB '
+              '(every cache-busted response stays in the analytics cache Map)')
+    passed = print_checks([
+        ('Every cold request succeeded', all(r['cold_p50_ms'] for s in steps for r in s['results'])),
+        ('7d/90d latency independent of history size (slope < 0.3)', not history_bound),
+        (f'7d/90d cold p50 within {args.budget_ms:g} ms at the largest tenant', not recent_over),
+        ('No all-history aggregation scales linearly', not rollups),
+    ])
+    for label, items in (('History-bound fixed windows', history_bound), ('Needs a rollup', rollups)):
+        if items:
+            print(f"  {label}: {', '.join(items)}")
+
+    save_results('analytics-cold', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'tenant_id': tenant_id,
+        'sizes': sizes,
+        'recent_orders': recent,
+        'years': args.years,
+        'steps': steps,
+        'curves': curves,
+        'history_bound': history_bound,
+        'needs_rollup': rollups,
+        'backend_rss_mb': {'start': rss_start and round(rss_start / 2**20, 1),
+                           'end': rss_end and round(rss_end / 2**20, 1)},
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Assignment engine fairness-and-latency benchmark.
+
+Incoming orders get a sales rep and a delivery agent from the workflow
+assign_user action: every new order fires the tenant's order_created
+workflows through the Bull workflow queue, and executeAssignUserAction in
+queues/workflowQueue.ts picks a user from the workflow's configured
+assignments list. AssignmentService (selectSalesRepWeighted,
+selectDeliveryAgentForArea) is not called from any request path today; what
+it would add per order is the candidate query in getUsersByRole, so that query
+is timed on its own against each roster size.
+
+For each roster size (--rosters) the harness:
+
+  1. activates that many seeded reps and agents (perf-<role>-<n>@perf-assign.local)
+     in the admin's tenant, with --unavailable-pct of them marked unavailable
+     the way reps go off shift after a workflow is configured; agents get an
+     agent_balances row, since getUsersByRole's balance filter only matches
+     agents that have one
+  2. creates an order_created workflow whose assign_user actions cover the whole
+     roster: sales reps weighted by a mix of configured weights, delivery
+     agents in even mode; its conditions match only this phase's orders
+  3. pushes orders through POST /api/orders at --rate, across --areas areas
+  4. waits for the queue to assign them and reads, per order, the time from
+     creation until the workflow execution completed
+  5. times the getUsersByRole query for both roles, and EXPLAINs it
+
+Skew is measured against the configured weights: chi-square (with a
+Wilson-Hilferty z score), the largest per-user relative deviation, the share
+of the busiest user, and how many users got nothing. Orders are sized to give
+every user --orders-per-user expected assignments so the statistics mean
+something at 2,000 users. Assignments to users marked unavailable are
+counted separately. Even mode in forward-only workflows (the default) picks
+assignments[i % len] with i the order's position in a one-order batch, so the
+agent split is expected to show everything landing on the first agent.
+
+Needs Redis: with NODE_ENV=test the workflow queue is a no-op and nothing is
+ever assigned.
+
+Usage:
+    python scripts/perf/bench_assignment.py --rosters 10,100,500,2000 --rate 50
+    python scripts/perf/bench_assignment.py --rosters 2000 --orders-per-user 10 --rate 0
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+from perf_common import (
+    ADMIN_EMAIL, API_URL, LatencyStats, connect_db, copy_rows, ensure_perf_product, format_ghana_phone,
+    ghana_local_number, login, new_session, percentile, print_checks, print_header, print_latency_table,
+    query_all, query_one, random_area, run_concurrent, save_results, tenant_id_for, timed_request,
+)
+
+SEED_DOMAIN = 'perf-assign.local'
+ORDER_NOTE = 'perf: assignment'
+ROLES = ('sales_rep', 'delivery_agent')
+WEIGHT_TIERS = [1, 2, 3, 5]
+
+# The query getUsersByRole issues through Prisma; the agent_balances relation
+# filter is an inner match, so agents without a balance row never qualify.
+ROLE_LOOKUP_SQL = {
+    'sales_rep': """
+        SELECT * FROM users
+        WHERE role = 'sales_rep' AND is_active AND is_available AND tenant_id = %s
+        ORDER BY first_name ASC
+    """,
+    'delivery_agent': """
+        SELECT u.* FROM users u
+        WHERE u.role = 'delivery_agent' AND u.is_active AND u.is_available AND u.tenant_id = %s
+          AND u.id IN (SELECT b.agent_id FROM agent_balances b
+                       WHERE b.is_blocked = false OR b.is_blocked IS NULL)
+        ORDER BY u.first_name ASC
+    """,
+}
+
+
+def seed_roster(conn, tenant_id, role, count):
+    """Create perf users for `role` up to `count` and return their ids in order"""
+    prefix = f'perf-{role.replace("_", "-")}-'
+    password_hash = query_one(conn, 'SELECT password FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+    existing = query_one(conn, 'SELECT COUNT(*) FROM users WHERE email LIKE %s', (f'{prefix}%@{SEED_DOMAIN}',))[0]
+    now = datetime.now()
+    label = 'Rep' if role == 'sales_rep' else 'Agent'
+    rows = ((f'{prefix}{i}@{SEED_DOMAIN}', password_hash, role, 'Perf', f'{label}{i:05d}', tenant_id, now, now)
+            for i in range(existing, count))
+    copy_rows(conn, 'users', ['email', 'password', 'role', 'first_name', 'last_name',
+                              'tenant_id', 'created_at', 'updated_at'], rows)
+    ids = [r[0] for r in query_all(conn, 'SELECT id FROM users WHERE email LIKE %s ORDER BY id',
+                                   (f'{prefix}%@{SEED_DOMAIN}',))]
+    if role == 'delivery_agent':
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO agent_balances (agent_id, tenant_id, updated_at)
+                SELECT id, tenant_id, NOW() FROM users WHERE id = ANY(%s)
+                ON CONFLICT (agent_id) DO NOTHING
+            """, (ids,))
+    return ids
+
+
+def activate_roster(conn, ids, size, unavailable_pct, rng):
+    """First `size` users active, a share of them unavailable; everyone else inactive"""
+    active = ids[:size]
+    unavailable = set(rng.sample(active, int(size * unavailable_pct / 100)))
+    with conn.cursor() as cur:
+        cur.execute('UPDATE users SET is_active = false, is_available = false WHERE id = ANY(%s)', (ids[size:],))
+        cur.execute('UPDATE users SET is_active = true, is_available = true WHERE id = ANY(%s)', (active,))
+        if unavailable:
+            cur.execute('UPDATE users SET is_available = false WHERE id = ANY(%s)', (list(unavailable),))
+        cur.execute('ANALYZE users')
+    return active, unavailable
+
+
+def create_workflow(session, note, reps, rep_weights, agents):
+    conditions = {'logic': 'AND', 'rules': [{'field': 'notes', 'operator': 'equals', 'value': note}]}
+    payload = {
+        'name': f'Perf assignment ({note})',
+        'description': 'Created by scripts/perf/bench_assignment.py',
+        'triggerType': 'order_created',
+        'triggerData': {},
+        'conditions': conditions,
+        'actions': [
+            {'type': 'assign_user', 'config': {
+                'userType': 'sales_rep', 'distributionMode': 'weighted',
+                'assignments': [{'userId': uid, 'weight': w} for uid, w in zip(reps, rep_weights)]}},
+            {'type': 'assign_user', 'config': {
+                'userType': 'delivery_agent', 'distributionMode': 'even',
+                'assignments': [{'userId': uid, 'weight': 1} for uid in agents]}},
+        ],
+    }
+    resp, _, err = timed_request(session, 'POST', '/api/workflows', json=payload)
+    if err or resp.status_code != 201:
+        raise SystemExit(f'Could not create workflow: {err or resp.status_code} {resp.text[:200] if resp else ""}')
+    return resp.json()['workflow']['id']
+
+
+def push_orders(session, count, rate, workers, note, product_id, customer_id, areas, stats):
+    """POST orders at `rate`/s (0 = as fast as the workers go); returns created ids"""
+    ids = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def create(i):
+        if rate:
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        state, area = areas[i % len(areas)]
+        payload = {
+            'customerId': customer_id,
+            'orderItems': [{'productId': product_id, 'quantity': 1, 'unitPrice': 150}],
+            'subtotal': 150, 'totalAmount': 150,
+            'deliveryAddress': f'{area} junction', 'deliveryState': state, 'deliveryArea': area,
+            'notes': note,
+        }
+        resp, ms, err = timed_request(session, 'POST', '/api/orders', json=payload)
+        stats.record_response(resp, ms, err, ok_statuses=(201,))
+        if resp is not None and resp.status_code == 201:
+            with lock:
+                ids.append(resp.json()['order']['id'])
+
+    run_concurrent(create, range(count), workers)
+    return ids, time.perf_counter() - start
+
+
+def wait_for_assignment(conn, order_ids, timeout_s):
+    deadline = time.perf_counter() + timeout_s
+    while True:
+        pending = query_one(conn, """
+            SELECT COUNT(*) FROM orders
+            WHERE id = ANY(%s) AND (customer_rep_id IS NULL OR delivery_agent_id IS NULL)
+        """, (order_ids,))[0]
+        if pending == 0 or time.perf_counter() > deadline:
+            return pending
+        time.sleep(1)
+
+
+def assignment_latencies(conn, workflow_id):
+    """Per execution: ms from order creation (execution row) until the workflow completed"""
+    rows = query_all(conn, """
+        SELECT EXTRACT(EPOCH FROM (completed_at - started_at)) * 1000
+        FROM workflow_executions WHERE workflow_id = %s AND completed_at IS NOT NULL
+    """, (workflow_id,))
+    return sorted(float(r[0]) for r in rows)
+
+
+def time_role_lookup(conn, tenant_id, role, iterations):
+    samples = []
+    rows = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        rows = len(query_all(conn, ROLE_LOOKUP_SQL[role], (tenant_id,)))
+        samples.append((time.perf_counter() - start) * 1000)
+    plan = query_one(conn, f'EXPLAIN (ANALYZE, FORMAT JSON) {ROLE_LOOKUP_SQL[role]}', (tenant_id,))[0]
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    samples.sort()
+    return {
+        'role': role,
+        'rows': rows,
+        'p50_ms': round(percentile(samples, 50), 2),
+        'p95_ms': round(percentile(samples, 95), 2),
+        'plan_execution_ms': plan[0]['Execution Time'],
+        'plan_root': plan[0]['Plan']['Node Type'],
+    }
+
+
+def skew(counts, shares, total):
+    """How far observed assignment counts are from the configured shares"""
+    expected = {uid: share * total for uid, share in shares.items()}
+    chi2 = sum((counts.get(uid, 0) - e) ** 2 / e for uid, e in expected.items() if e > 0)
+    k = len(expected)
+    df = max(k - 1, 1)
+    # Wilson-Hilferty: chi2/df is roughly normal after a cube root
+    z = ((chi2 / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    deviations = [abs(counts.get(uid, 0) - e) / e for uid, e in expected.items() if e > 0]
+    top_uid = max(counts, key=counts.get) if counts else None
+    return {
+        'users': k,
+        'assigned': total,
+        'min_expected': round(min(expected.values()), 2) if expected else 0,
+        'chi2': round(chi2, 1),
+        'df': df,
+        'z': round(z, 2),
+        'max_relative_deviation': round(max(deviations), 3) if deviations else 0,
+        'top_user': top_uid,
+        'top_share': round(counts[top_uid] / total, 4) if top_uid else 0,
+        'top_expected_share': round(shares.get(top_uid, 0), 4) if top_uid else 0,
+        'users_with_none': sum(1 for uid in expected if not counts.get(uid)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rosters', default='10,100,500,2000', help='comma-separated reps/agents per phase')
+    parser.add_argument('--orders-per-user', type=int, default=5, help='expected assignments per user')
+    parser.add_argument('--min-orders', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=50, help='orders/s to push (0 = unpaced)')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--areas', type=int, default=20, help='distinct delivery areas to spread orders over')
+    parser.add_argument('--unavailable-pct', type=float, default=5)
+    parser.add_argument('--lookup-iterations', type=int, default=200)
+    parser.add_argument('--lookup-budget-ms', type=float, default=10,
+                        help='p95 budget for one getUsersByRole lookup at the largest roster')
+    parser.add_argument('--max-z', type=float, default=3.0, help='chi-square z above which a split counts as skewed')
+    parser.add_argument('--assign-timeout', type=float, default=600)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rosters = sorted(int(r) for r in args.rosters.split(','))
+    rng = random.Random(args.seed)
+    print_header('⚖️  Assignment Engine Benchmark', target=API_URL, rosters=rosters, rate=args.rate or 'unpaced',
+                 orders_per_user=args.orders_per_user, unavailable_pct=args.unavailable_pct)
+
+    token = login()
+    session = new_session(token, pool_size=args.workers * 2)
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    product_id = ensure_perf_product(conn, tenant_id)
+
+    others = query_all(conn, """
+        SELECT id, name FROM workflows
+        WHERE trigger_type = 'order_created' AND is_active AND tenant_id = %s AND name NOT LIKE 'Perf assignment%%'
+    """, (tenant_id,))
+    if others:
+        print(f'ℹ️  {len(others)} other active order_created workflow(s) will also run on every order: '
+              + ', '.join(name for _, name in others))
+
+    print('\n[Phase 1] Seeding rosters')
+    pools = {role: seed_roster(conn, tenant_id, role, rosters[-1]) for role in ROLES}
+    for role, ids in pools.items():
+        print(f'  {role}: {len(ids):,} users')
+    resp, _, err = timed_request(session, 'POST', '/api/orders', json={
+        'customerPhone': format_ghana_phone(ghana_local_number(rng), 'local'), 'customerName': 'Perf Assignment',
+        'orderItems': [{'productId': product_id, 'quantity': 1, 'unitPrice': 150}],
+        'subtotal': 150, 'totalAmount': 150, 'deliveryAddress': 'Osu junction',
+        'deliveryState': 'Greater Accra', 'deliveryArea': 'Osu', 'notes': f'{ORDER_NOTE} (setup)'})
+    if err or resp.status_code != 201:
+        raise SystemExit(f'Could not create setup order: {err or resp.status_code}')
+    customer_id = resp.json()['order']['customerId']
+    areas = [random_area(rng) for _ in range(args.areas)]
+
+    phases = []
+    for phase, size in enumerate(rosters, start=2):
+        print(f'\n[Phase {phase}] Roster of {size:,} reps and {size:,} agents')
+        active, unavailable = {}, set()
+        for role in ROLES:
+            active[role], off = activate_roster(conn, pools[role], size, args.unavailable_pct, rng)
+            unavailable |= off
+        tiers = [rng.choice(WEIGHT_TIERS) for _ in active['sales_rep']]
+        rep_weights = [t / sum(tiers) for t in tiers]
+        note = f'{ORDER_NOTE} {size}'
+        workflow_id = create_workflow(session, note, active['sales_rep'], rep_weights, active['delivery_agent'])
+
+        lookups = [time_role_lookup(conn, tenant_id, role, args.lookup_iterations) for role in ROLES]
+        for lk in lookups:
+            print(f"  getUsersByRole('{lk['role']}'): {lk['rows']:,} rows, p50 {lk['p50_ms']:.2f} ms, "
+                  f"p95 {lk['p95_ms']:.2f} ms ({lk['plan_root']})")
+
+        order_count = max(args.min_orders, size * args.orders_per_user)
+        create_stats = LatencyStats(f'POST /api/orders ({size})')
+        order_ids, push_s = push_orders(session, order_count, args.rate, args.workers, note, product_id,
+                                        customer_id, areas, create_stats)
+        print(f'  Pushed {len(order_ids):,} orders in {push_s:.1f}s ({len(order_ids) / push_s:.1f}/s)')
+        pending = wait_for_assignment(conn, order_ids, args.assign_timeout)
+        latencies = assignment_latencies(conn, workflow_id)
+
+        rows = query_all(conn, 'SELECT customer_rep_id, delivery_agent_id FROM orders WHERE id = ANY(%s)',
+                         (order_ids,))
+        result = {'roster': size, 'orders': len(order_ids), 'unassigned': pending, 'workflow_id': workflow_id,
+                  'push_rate': round(len(order_ids) / push_s, 1), 'lookups': lookups, 'roles': {}}
+        for idx, (role, mode, ids) in enumerate((('sales_rep', 'weighted', active['sales_rep']),
+                                                 ('delivery_agent', 'even', active['delivery_agent']))):
+            counts = {}
+            for row in rows:
+                if row[idx] is not None:
+                    counts[row[idx]] = counts.get(row[idx], 0) + 1
+            shares = dict(zip(ids, rep_weights)) if role == 'sales_rep' else {uid: 1 / len(ids) for uid in ids}
+            stats = skew(counts, shares, sum(counts.values()))
+            stats.update(mode=mode, to_unavailable=sum(c for uid, c in counts.items() if uid in unavailable))
+            result['roles'][role] = stats
+            print(f"  {role:<15} {mode:<8} chi2 z {stats['z']:>7.1f}, max dev {stats['max_relative_deviation']:.0%}, "
+                  f"top share {stats['top_share']:.1%} (expected {stats['top_expected_share']:.1%}), "
+                  f"{stats['users_with_none']} idle, {stats['to_unavailable']} to unavailable users")
+        result['assignment_ms'] = {
+            'count': len(latencies),
+            'p50': round(percentile(latencies, 50), 1) if latencies else None,
+            'p95': round(percentile(latencies, 95), 1) if latencies else None,
+            'p99': round(percentile(latencies, 99), 1) if latencies else None,
+        }
+        result['create'] = create_stats.summary()
+        if latencies:
+            print(f"  Order -> assigned: p50 {result['assignment_ms']['p50']:.0f} ms, "
+                  f"p95 {result['assignment_ms']['p95']:.0f} ms, p99 {result['assignment_ms']['p99']:.0f} ms")
+        if pending:
+            print(f'  ⚠️  {pending:,} orders still unassigned after {args.assign_timeout:.0f}s')
+        phases.append(result)
+        timed_request(session, 'DELETE', f'/api/workflows/{workflow_id}')
+
+    print_latency_table([p['create'] for p in phases])
+    print(f"\n  {'Roster':>7} {'rep lookup p95':>15} {'agent lookup p95':>17} {'assign p95':>11} {'rep z':>7} "
+          f"{'agent top':>10}")
+    for p in phases:
+        lk = {x['role']: x for x in p['lookups']}
+        print(f"  {p['roster']:>7,} {lk['sales_rep']['p95_ms']:>13.2f}ms {lk['delivery_agent']['p95_ms']:>15.2f}ms "
+              f"{p['assignment_ms']['p95'] or 0:>9.0f}ms {p['roles']['sales_rep']['z']:>7.1f} "
+              f"{p['roles']['delivery_agent']['top_share']:>10.1%}")
+
+    largest = phases[-1]
+    lookup_p95 = max(x['p95_ms'] for x in largest['lookups'])
+    skewed = [f"{p['roster']}/{role}" for p in phases for role, s in p['roles'].items()
+              if s['min_expected'] >= 5 and s['z'] > args.max_z]
+    passed = print_checks([
+        ('Every order got a rep and an agent', all(p['unassigned'] == 0 for p in phases)),
+        ('Rep split matches configured weights (chi-square z <= max)', not any('sales_rep' in s for s in skewed)),
+        ('Even agent split is even (chi-square z <= max)', not any('delivery_agent' in s for s in skewed)),
+        ('No order assigned to an unavailable user',
+         not any(s['to_unavailable'] for p in phases for s in p['roles'].values())),
+        (f'getUsersByRole p95 within {args.lookup_budget_ms:g} ms at {largest["roster"]:,} users',
+         lookup_p95 <= args.lookup_budget_ms),
+    ])
+
+    save_results('assignment', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'tenant_id': tenant_id,
+        'rosters': rosters,
+        'rate': args.rate,
+        'unavailable_pct': args.unavailable_pct,
+        'other_order_created_workflows': [name for _, name in others],
+        'phases': phases,
+        'skewed': skewed,
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Login and token-issuance throughput benchmark, including rate-limiter behaviour.
+
+Shift changes bring hundreds of reps and agents to POST /api/auth/login within
+minutes. This harness:
+
+  1. Seeds N sales_rep / delivery_agent users that share the admin's password
+     hash (so no bcrypt dependency is needed and every seeded user has the same
+     cost factor as production).
+  2. Splits one login into its parts by timing three request shapes serially:
+     unknown email (DB lookup only), wrong password (lookup + bcrypt compare)
+     and valid login (lookup + bcrypt + refresh-token write + permissions +
+     two JWT signatures). The differences give bcrypt time and post-auth DB time;
+     /api/auth/refresh and /api/auth/me isolate utils/jwt.ts verify/sign cost.
+  3. Ramps concurrency and records successful-login throughput and latency.
+     bcrypt runs on libuv's thread pool (4 threads by default), so the harness
+     also prints the theoretical ceiling for the measured hash time.
+  4. Maps where authLimiter (middleware/rateLimiter.ts, keyed on req.ip, which
+     honours X-Forwarded-For because of `trust proxy`) locks legitimate users
+     out: offices of growing size behind one NAT IP logging in with a typo
+     rate, and an attacker IP spraying bad passwords next to real users.
+
+Seeding writes directly to DATABASE_URL - point it at a disposable database.
+
+Usage:
+    python scripts/perf/bench_auth_throughput.py --users 500
+    python scripts/perf/bench_auth_throughput.py --skip-seed --levels 1,10,50,100,200
+"""
+import argparse
+import itertools
+import random
+import threading
+import time
+from datetime import datetime
+
+from perf_common import (
+    ADMIN_EMAIL, ADMIN_PASSWORD, API_URL, LatencyStats, connect_db, copy_rows, new_session,
+    print_checks, print_header, print_latency_table, query_one, run_concurrent,
+    save_results, tenant_id_for, timed_request,
+)
+
+USER_DOMAIN = 'perf-auth.local'
+LIBUV_POOL_SIZE = 4
+
+# Every request gets its own synthetic source address unless a scenario pins one
+_ip_counter = itertools.count(1)
+_ip_lock = threading.Lock()
+
+
+def next_ip(block=10):
+    with _ip_lock:
+        n = next(_ip_counter)
+    return f'{block}.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}'
+
+
+def seeded_email(i):
+    return f'perf-auth-{i}@{USER_DOMAIN}'
+
+
+def seed_users(conn, tenant_id, count):
+    """Reps and agents sharing the admin's bcrypt hash, so they log in with ADMIN_PASSWORD"""
+    password_hash = query_one(conn, 'SELECT password FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+    existing = query_one(conn, 'SELECT COUNT(*) FROM users WHERE email LIKE %s', (f'%@{USER_DOMAIN}',))[0]
+    now = datetime.now()
+    rows = ((seeded_email(i), password_hash, 'sales_rep' if i % 3 else 'delivery_agent',
+             'Perf', f'User{i}', tenant_id, now, now)
+            for i in range(existing, count))
+    inserted = copy_rows(conn, 'users', ['email', 'password', 'role', 'first_name', 'last_name',
+                                         'tenant_id', 'created_at', 'updated_at'], rows)
+    print(f'  {existing:,} seeded users already present, inserted {inserted:,}')
+    return password_hash
+
+
+def bcrypt_cost(password_hash):
+    """Cost factor from a $2b$10$... hash"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def login_request(session, email, password, ip):
+    return timed_request(session, 'POST', '/api/auth/login',
+                         json={'email': email, 'password': password},
+                         headers={'X-Forwarded-For': ip})
+
+
+def breakdown(session, users, samples):
+    """Serial timings of the three login shapes plus the token endpoints"""
+    stats = {
+        'unknown': LatencyStats('login: unknown email'),
+        'wrong_password': LatencyStats('login: wrong password'),
+        'valid': LatencyStats('login: valid'),
+        'refresh': LatencyStats('refresh token'),
+        'me': LatencyStats('GET /auth/me (jwt verify)'),
+    }
+    for i in range(samples):
+        email = seeded_email(i % users)
+        resp, ms, err = login_request(session, f'nobody-{i}@{USER_DOMAIN}', ADMIN_PASSWORD, next_ip())
+        stats['unknown'].record_response(resp, ms, err, ok_statuses=(401,))
+        resp, ms, err = login_request(session, email, ADMIN_PASSWORD + 'x', next_ip())
+        stats['wrong_password'].record_response(resp, ms, err, ok_statuses=(401,))
+        resp, ms, err = login_request(session, email, ADMIN_PASSWORD, next_ip())
+        stats['valid'].record_response(resp, ms, err)
+        if resp is None or resp.status_code != 200:
+            continue
+        tokens = resp.json()['tokens']
+        resp, ms, err = timed_request(session, 'POST', '/api/auth/refresh',
+                                      json={'refreshToken': tokens['refreshToken']},
+                                      headers={'X-Forwarded-For': next_ip()})
+        stats['refresh'].record_response(resp, ms, err)
+        resp, ms, err = timed_request(session, 'GET', '/api/auth/me', headers={
+            'Authorization': f"Bearer {tokens['accessToken']}", 'X-Forwarded-For': next_ip()})
+        stats['me'].record_response(resp, ms, err)
+
+    p50 = {k: s.summary()['p50_ms'] for k, s in stats.items()}
+    return stats, {
+        'db_lookup_ms': p50['unknown'],
+        'bcrypt_compare_ms': max(p50['wrong_password'] - p50['unknown'], 0.0),
+        'post_auth_write_and_sign_ms': max(p50['valid'] - p50['wrong_password'], 0.0),
+        'refresh_ms': p50['refresh'],
+        'jwt_verify_request_ms': p50['me'],
+    }
+
+
+def ramp(session, users, levels, per_level):
+    """Successful-login throughput and latency at each concurrency level"""
+    results = []
+    cursor = itertools.count()
+    for level in levels:
+        stats = LatencyStats(f'login @ {level} concurrent')
+
+        def attempt(_):
+            email = seeded_email(next(cursor) % users)
+            resp, ms, err = login_request(session, email, ADMIN_PASSWORD, next_ip())
+            stats.record_response(resp, ms, err)
+
+        start = time.perf_counter()
+        run_concurrent(attempt, range(max(per_level, level)), level)
+        elapsed = time.perf_counter() - start
+        summary = stats.summary()
+        summary['concurrency'] = level
+        summary['logins_per_sec'] = (summary['count'] - summary['errors']) / elapsed
+        results.append(summary)
+        print(f"  {level:>4} concurrent: {summary['logins_per_sec']:7.1f} logins/s, "
+              f"p50 {summary['p50_ms']:.0f}ms, p99 {summary['p99_ms']:.0f}ms, "
+              f"{summary['errors']} errors")
+    return results
+
+
+def office_scenario(session, users, office_size, typo_rate, rng, user_offset):
+    """
+    `office_size` people behind one NAT address each log in once; a share of
+    them mistype first. Returns how many legitimate users ended up with a 429.
+    """
+    ip = next_ip(block=172)
+    attempts = []
+    for k in range(office_size):
+        email = seeded_email((user_offset + k) % users)
+        if rng.random() < typo_rate:
+            attempts.append((email, ADMIN_PASSWORD + 'typo', k))
+        attempts.append((email, ADMIN_PASSWORD, k))
+
+    locked_out = set()
+    limit_header = None
+    for email, password, person in attempts:
+        resp, _, _ = login_request(session, email, password, ip)
+        if resp is None:
+            continue
+        limit_header = resp.headers.get('RateLimit-Limit', limit_header)
+        if resp.status_code == 429 and password == ADMIN_PASSWORD:
+            locked_out.add(person)
+    return {
+        'office_size': office_size,
+        'typo_rate': typo_rate,
+        'requests': len(attempts),
+        'legitimate_users_locked_out': len(locked_out),
+        'rate_limit': limit_header,
+    }
+
+
+def attacker_scenario(session, users, bad_attempts, bystanders, user_offset):
+    """
+    One IP sprays bad passwords, then real users log in from the same IP and
+    from other IPs. Only the shared-IP users should be blocked.
+    """
+    attacker_ip = next_ip(block=203)
+    blocked_at = None
+    for n in range(bad_attempts):
+        resp, _, _ = login_request(session, seeded_email((user_offset + n) % users),
+                                   'wrong-password', attacker_ip)
+        if resp is not None and resp.status_code == 429 and blocked_at is None:
+            blocked_at = n + 1
+    shared, elsewhere = 0, 0
+    for k in range(bystanders):
+        email = seeded_email((user_offset + bad_attempts + k) % users)
+        resp, _, _ = login_request(session, email, ADMIN_PASSWORD, attacker_ip)
+        shared += resp is not None and resp.status_code == 429
+        resp, _, _ = login_request(session, email, ADMIN_PASSWORD, next_ip())
+        elsewhere += resp is not None and resp.status_code == 429
+    return {
+        'bad_attempts': bad_attempts,
+        'attacker_blocked_after': blocked_at,
+        'shared_ip_users_locked_out': shared,
+        'other_ip_users_locked_out': elsewhere,
+        'bystanders': bystanders,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=500, help='rep/agent users to seed')
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--samples', type=int, default=50, help='serial samples per login shape')
+    parser.add_argument('--levels', default='1,5,10,25,50,100,200', help='concurrency ramp')
+    parser.add_argument('--per-level', type=int, default=400, help='logins per ramp level')
+    parser.add_argument('--office-sizes', default='5,10,20,40,60,100')
+    parser.add_argument('--typo-rate', type=float, default=0.15)
+    parser.add_argument('--attacker-attempts', type=int, default=120)
+    parser.add_argument('--seed', type=int, default=27)
+    args = parser.parse_args()
+
+    levels = [int(x) for x in args.levels.split(',')]
+    rng = random.Random(args.seed)
+    print_header('🔐 Login & Token Issuance Throughput', target=API_URL, users=args.users,
+                 ramp=args.levels, offices=args.office_sizes)
+
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    print('\n[Phase 1] Seeding users...')
+    if args.skip_seed:
+        password_hash = query_one(conn, 'SELECT password FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+    else:
+        password_hash = seed_users(conn, tenant_id, args.users)
+    cost = bcrypt_cost(password_hash)
+    print(f'  bcrypt cost factor: {cost}')
+
+    session = new_session(pool_size=max(levels) + 4)
+
+    print(f'\n[Phase 2] Cost breakdown ({args.samples} serial samples per shape)...')
+    breakdown_stats, parts = breakdown(session, args.users, args.samples)
+    for name, ms in parts.items():
+        print(f'  {name:<30}{ms:8.1f}ms')
+    ceiling = LIBUV_POOL_SIZE * 1000 / parts['bcrypt_compare_ms'] if parts['bcrypt_compare_ms'] else None
+    if ceiling:
+        print(f'  bcrypt ceiling at UV_THREADPOOL_SIZE={LIBUV_POOL_SIZE}: ~{ceiling:.0f} logins/s per node')
+
+    print('\n[Phase 3] Concurrency ramp...')
+    ramp_results = ramp(session, args.users, levels, args.per_level)
+    peak = max(ramp_results, key=lambda r: r['logins_per_sec'])
+
+    print('\n[Phase 4] Rate limiter: offices behind one NAT address...')
+    offices = []
+    offset = 0
+    for size in [int(x) for x in args.office_sizes.split(',')]:
+        result = office_scenario(session, args.users, size, args.typo_rate, rng, offset)
+        offset += size
+        offices.append(result)
+        print(f"  office of {size:>4}: {result['requests']:>4} requests, "
+              f"{result['legitimate_users_locked_out']:>3} legitimate users got 429 "
+              f"(limit {result['rate_limit']})")
+
+    print('\n[Phase 5] Rate limiter: attacker next to legitimate users...')
+    attacker = attacker_scenario(session, args.users, args.attacker_attempts, 10, offset)
+    print(f"  attacker blocked after {attacker['attacker_blocked_after']} attempts; "
+          f"{attacker['shared_ip_users_locked_out']}/{attacker['bystanders']} same-IP users and "
+          f"{attacker['other_ip_users_locked_out']}/{attacker['bystanders']} other-IP users locked out")
+
+    print_latency_table([s.summary() for s in breakdown_stats.values()] + ramp_results)
+    first_lockout = next((o['office_size'] for o in offices if o['legitimate_users_locked_out']), None)
+    print(f"\nPeak throughput: {peak['logins_per_sec']:.1f} logins/s at {peak['concurrency']} concurrent")
+    print(f'Smallest office with lockouts: {first_lockout or "none"}')
+
+    passed = print_checks([
+        ('Peak login throughput > 20/s', peak['logins_per_sec'] > 20),
+        ('p95 login latency < 2000ms at peak', peak['p95_ms'] < 2000),
+        ('Attacker IP gets rate limited', attacker['attacker_blocked_after'] is not None),
+        ('Users on other IPs unaffected by attacker', attacker['other_ip_users_locked_out'] == 0),
+        ('Office of 40 can log in without lockouts',
+         all(o['legitimate_users_locked_out'] == 0 for o in offices if o['office_size'] <= 40)),
+    ])
+
+    save_results('auth-throughput', {
+        'timestamp': datetime.now().isoformat(),
+        'settings': vars(args),
+        'bcrypt_cost': cost,
+        'breakdown_ms': parts,
+        'bcrypt_ceiling_logins_per_sec': ceiling,
+        'latency': [s.summary() for s in breakdown_stats.values()],
+        'ramp': ramp_results,
+        'offices': offices,
+        'attacker': attacker,
+        'passed': passed,
+    })
+
+
+if __name__ == '__main__':
+    main()
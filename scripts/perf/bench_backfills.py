@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Backfill job runtime profiler for the financial maintenance jobs run after
+migrations.
+
+For each dataset size it seeds a batch of delivered COD orders straight into
+Postgres in the state a bulk import leaves them (no delivery_date, no agent
+collection, revenue not recognised) and runs the maintenance jobs over them in
+the order they are run after a migration:
+
+    delivery-dates   POST /api/financial/backfill-delivery-dates
+    collections      POST /api/financial/backfill-collections
+    batch-sync       FinancialSyncService.batchSyncOrders, via `npm run sync-financial`
+    commissions      POST /api/financial/backfill-commissions
+
+batchSyncOrders has no HTTP route; the sync-financial script is how it is run,
+so it is spawned as a child process of this harness from backend/. It syncs
+every delivered COD order in the database, not just the tenant's.
+
+While a job runs, progress is sampled from row counts over the seeded batch
+(orders given a delivery_date, agent_collections created, orders with
+revenue_recognized, journal entries given commission lines), along with open
+Postgres connections and memory: the backend's RSS and heap from GET /metrics
+for the HTTP jobs, and the RSS of the sync-financial process tree from /proc
+for batch-sync. The requestTimeout middleware answers 408 after 30s but the
+handler keeps running, so a job counts as finished when its progress reaches
+the batch size, not when the HTTP call returns. backfill-collections writes
+everything in one transaction, so its progress jumps from 0 at commit. A job
+whose progress does not move for --stall-polls polls is ended and recorded as
+stalled, with no runtime, rather than waited on until --job-timeout.
+
+Runtimes per size are fitted to a power law (runtime = a * rows^b) and
+projected to --project-rows, a production-size tenant, with the request
+timeout flagged for the HTTP jobs.
+
+Seeded orders are left in place: they are delivered orders with ledger
+entries, and every earlier batch stays in the tenant as rows the next batch's
+jobs have to scan past, as on a real tenant.
+
+Usage:
+    python scripts/perf/bench_backfills.py --sizes 1000,5000,20000 --project-rows 500000
+    python scripts/perf/bench_backfills.py --sizes 2000 --jobs delivery-dates,collections
+"""
+import argparse
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from perf_common import (
+    ADMIN_EMAIL, API_URL, connect_db, ensure_perf_product, format_ghana_phone, ghana_local_number, login,
+    loglog_slope, new_session, print_checks, print_header, query_one, random_area, save_results, tenant_id_for,
+    timed_request,
+)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+SEED_DOMAIN = 'perf-backfill.local'
+ORDER_NOTE = 'perf: backfill batch'
+SERVER_TIMEOUT_S = 30  # requestTimeout(30000) in server.ts
+JOBS = ['delivery-dates', 'collections', 'batch-sync', 'commissions']
+HTTP_JOBS = {
+    'delivery-dates': '/api/financial/backfill-delivery-dates',
+    'collections': '/api/financial/backfill-collections',
+    'commissions': '/api/financial/backfill-commissions',
+}
+AGENT_COMMISSION_CODE = '5040'  # GL_ACCOUNTS.DELIVERY_AGENT_COMMISSION
+
+# Rows of the seeded batch each job has finished, keyed by job
+PROGRESS_SQL = {
+    'delivery-dates': """
+        SELECT COUNT(*) FROM orders
+        WHERE id BETWEEN %(lo)s AND %(hi)s AND notes = %(note)s AND delivery_date IS NOT NULL
+    """,
+    'collections': """
+        SELECT COUNT(*) FROM agent_collections ac
+        JOIN orders o ON o.id = ac.order_id
+        WHERE o.id BETWEEN %(lo)s AND %(hi)s AND o.notes = %(note)s
+    """,
+    'batch-sync': """
+        SELECT COUNT(*) FROM orders
+        WHERE id BETWEEN %(lo)s AND %(hi)s AND notes = %(note)s AND revenue_recognized
+    """,
+    'commissions': """
+        SELECT COUNT(DISTINCT je.id) FROM journal_entries je
+        JOIN account_transactions t ON t.journal_entry_id = je.id
+        JOIN accounts a ON a.id = t.account_id
+        WHERE je.source_type = 'order_delivery' AND je.source_id BETWEEN %(lo)s AND %(hi)s
+          AND a.code = %(commission_code)s
+    """,
+}
+
+# Rows each job will pick up, batch included, before it starts
+ELIGIBLE_SQL = {
+    'delivery-dates': """
+        SELECT COUNT(*) FROM orders
+        WHERE tenant_id = %(tenant)s AND status = 'delivered' AND delivery_date IS NULL AND deleted_at IS NULL
+    """,
+    'collections': """
+        SELECT COUNT(*) FROM orders o
+        WHERE o.tenant_id = %(tenant)s AND o.status = 'delivered' AND o.deleted_at IS NULL
+          AND o.delivery_agent_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM agent_collections ac WHERE ac.order_id = o.id)
+    """,
+    'batch-sync': """
+        SELECT COUNT(*) FROM orders
+        WHERE status = 'delivered' AND cod_amount IS NOT NULL AND deleted_at IS NULL
+    """,
+    'commissions': """
+        SELECT COUNT(*) FROM journal_entries je
+        WHERE je.tenant_id = %(tenant)s AND je.source_type = 'order_delivery' AND NOT je.is_voided
+          AND NOT EXISTS (
+              SELECT 1 FROM account_transactions t JOIN accounts a ON a.id = t.account_id
+              WHERE t.journal_entry_id = je.id AND a.code IN ('5040', '5050'))
+    """,
+}
+
+
+def ensure_seed_users(conn, tenant_id):
+    """Delivery agent and sales rep the seeded orders are attributed to"""
+    password_hash = query_one(conn, 'SELECT password FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+    ids = {}
+    for role in ('delivery_agent', 'sales_rep'):
+        email = f'perf-{role.replace("_", "-")}@{SEED_DOMAIN}'
+        row = query_one(conn, 'SELECT id FROM users WHERE email = %s', (email,))
+        if not row:
+            row = query_one(conn, """
+                INSERT INTO users (email, password, role, first_name, last_name, tenant_id, created_at, updated_at)
+                VALUES (%s, %s, %s, 'Perf', 'Backfill', %s, NOW(), NOW())
+                RETURNING id
+            """, (email, password_hash, role, tenant_id))
+        ids[role] = row[0]
+    return ids['delivery_agent'], ids['sales_rep']
+
+
+def ensure_seed_customer(conn, tenant_id):
+    row = query_one(conn, 'SELECT id FROM customers WHERE tenant_id = %s AND notes = %s', (tenant_id, ORDER_NOTE))
+    if row:
+        return row[0]
+    state, area = random_area()
+    row = query_one(conn, """
+        INSERT INTO customers (first_name, last_name, phone_number, address, state, area, notes,
+                               tenant_id, created_at, updated_at)
+        VALUES ('Perf', 'Backfill', %s, %s, %s, %s, %s, %s, NOW(), NOW())
+        RETURNING id
+    """, (format_ghana_phone(ghana_local_number(), 'local'), f'{area} junction', state, area, ORDER_NOTE,
+          tenant_id))
+    return row[0]
+
+
+def set_commissions(conn, user_ids, amount):
+    with conn.cursor() as cur:
+        cur.execute('UPDATE users SET commission_amount = %s WHERE id = ANY(%s)', (amount, list(user_ids)))
+
+
+def seed_batch(conn, tenant_id, size, customer_id, agent_id, rep_id, product_id, admin_id):
+    """Delivered COD orders as a bulk import leaves them; returns the batch's id range"""
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO orders (customer_id, customer_rep_id, delivery_agent_id, status, subtotal, total_amount,
+                                cod_amount, notes, tenant_id, created_at, updated_at)
+            SELECT %s, %s, %s, 'delivered', 150, 150, 150, %s, %s,
+                   NOW() - (g * INTERVAL '1 minute'), NOW()
+            FROM generate_series(1, %s) g
+            RETURNING id
+        """, (customer_id, rep_id, agent_id, ORDER_NOTE, tenant_id, size))
+        ids = [r[0] for r in cur.fetchall()]
+        lo, hi = min(ids), max(ids)
+        cur.execute("""
+            INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price, created_at)
+            SELECT id, %s, 1, 150, 150, created_at FROM orders
+            WHERE id BETWEEN %s AND %s AND notes = %s
+        """, (product_id, lo, hi, ORDER_NOTE))
+        cur.execute("""
+            INSERT INTO order_history (order_id, status, notes, changed_by, created_at)
+            SELECT id, 'delivered', %s, %s, created_at + INTERVAL '2 hours' FROM orders
+            WHERE id BETWEEN %s AND %s AND notes = %s
+        """, (ORDER_NOTE, admin_id, lo, hi, ORDER_NOTE))
+        cur.execute('ANALYZE orders')
+    print(f'  Seeded {size:,} delivered orders in {time.perf_counter() - start:.1f}s (ids {lo}..{hi})')
+    return lo, hi
+
+
+def proc_tree_rss(root_pid):
+    """Resident memory of a process and all its descendants, from /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+def server_memory(session):
+    """Backend RSS and heap in bytes from the Prometheus /metrics endpoint"""
+    try:
+        resp = session.get(f'{API_URL}/metrics', timeout=5)
+    except requests.RequestException:
+        return None, None
+    values = {}
+    for line in resp.text.splitlines():
+        if line.startswith(('process_resident_memory_bytes ', 'process_heap_bytes_used ')):
+            name, value = line.split()
+            values[name] = float(value)
+    return values.get('process_resident_memory_bytes'), values.get('process_heap_bytes_used')
+
+
+class JobSampler(threading.Thread):
+    """Samples batch progress, Postgres connections and memory until stopped"""
+
+    def __init__(self, job, params, interval_s, child=None):
+        super().__init__(daemon=True)
+        self.job = job
+        self.params = params
+        self.interval_s = interval_s
+        self.child = child
+        self.samples = []
+        self.progress = 0
+        self.stop_event = threading.Event()
+        self.conn = connect_db()
+        self.metrics_session = requests.Session()
+
+    def sample(self, t0):
+        progress = query_one(self.conn, PROGRESS_SQL[self.job], self.params)[0]
+        total, active = query_one(self.conn, """
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE state = 'active')
+            FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()
+        """)
+        if self.child is not None:
+            rss, heap = proc_tree_rss(self.child.pid), None
+        else:
+            rss, heap = server_memory(self.metrics_session)
+        self.progress = progress
+        self.samples.append({'t_s': round(time.perf_counter() - t0, 2), 'progress': progress,
+                             'connections': total, 'active_connections': active, 'rss': rss, 'heap': heap})
+
+    def run(self):
+        t0 = time.perf_counter()
+        while not self.stop_event.is_set():
+            self.sample(t0)
+            self.stop_event.wait(self.interval_s)
+        self.sample(t0)
+        self.conn.close()
+
+    def finish(self):
+        self.stop_event.set()
+        self.join()
+
+
+def run_job(job, session, params, target, args):
+    """Run one job over the batch; returns its measurements"""
+    outcome = {}
+    child = None
+    if job == 'batch-sync':
+        child = subprocess.Popen(['npm', 'run', '--silent', 'sync-financial'], cwd=BACKEND_DIR,
+                                 stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+    sampler = JobSampler(job, params, args.sample_interval, child)
+    start = time.perf_counter()
+    sampler.start()
+
+    if child is not None:
+        def drive():
+            output, _ = child.communicate()
+            outcome.update(returncode=child.returncode, output_tail=output.strip().splitlines()[-15:],
+                           returned_s=time.perf_counter() - start)
+    else:
+        def drive():
+            resp, ms, err = timed_request(session, 'POST', HTTP_JOBS[job], timeout=args.job_timeout)
+            outcome.update(status=resp.status_code if resp is not None else None, error=err,
+                           returned_s=ms / 1000)
+            if resp is not None and resp.status_code != 408:
+                try:
+                    outcome['body'] = resp.json()
+                except ValueError:
+                    outcome['body'] = resp.text[:300]
+
+    driver = threading.Thread(target=drive, daemon=True)
+    driver.start()
+
+    finished_at = None
+    stalled = False
+    last_progress, idle_polls = sampler.progress, 0
+    while time.perf_counter() - start < args.job_timeout:
+        if sampler.progress >= target and finished_at is None:
+            finished_at = time.perf_counter() - start
+        # A 408 only means the middleware gave up; the handler is still working
+        if not driver.is_alive() and (outcome.get('status') != 408 or finished_at is not None):
+            break
+        if finished_at is None:
+            idle_polls = idle_polls + 1 if sampler.progress == last_progress else 0
+            last_progress = sampler.progress
+            if idle_polls >= args.stall_polls:
+                stalled = True
+                if child is not None:
+                    child.kill()
+                break
+        time.sleep(args.sample_interval / 2)
+    driver.join(timeout=args.sample_interval if stalled else args.job_timeout)
+    sampler.finish()
+
+    done = sampler.samples[-1]['progress'] if sampler.samples else 0
+    if stalled:
+        runtime = None
+    elif child is not None or outcome.get('status') not in (408, None):
+        runtime = outcome.get('returned_s')
+    else:
+        runtime = finished_at
+    rss = [s['rss'] for s in sampler.samples if s['rss']]
+    heap = [s['heap'] for s in sampler.samples if s['heap']]
+    return {
+        'job': job,
+        'rows': target,
+        'rows_done': done,
+        'completed': done >= target and not stalled,
+        'stalled': stalled,
+        'runtime_s': round(runtime, 2) if runtime is not None else None,
+        'rows_per_s': round(done / runtime, 1) if runtime else None,
+        'http_status': outcome.get('status'),
+        'http_returned_s': round(outcome['returned_s'], 2) if 'returned_s' in outcome else None,
+        'timed_out_408': outcome.get('status') == 408,
+        'returncode': outcome.get('returncode'),
+        'response': outcome.get('body') or outcome.get('output_tail') or outcome.get('error'),
+        'peak_connections': max((s['connections'] for s in sampler.samples), default=0),
+        'peak_active_connections': max((s['active_connections'] for s in sampler.samples), default=0),
+        'memory_source': 'sync-financial process tree' if child is not None else 'backend /metrics',
+        'baseline_rss_mb': round(rss[0] / 2**20, 1) if rss else None,
+        'peak_rss_mb': round(max(rss) / 2**20, 1) if rss else None,
+        'peak_heap_mb': round(max(heap) / 2**20, 1) if heap else None,
+        'samples': sampler.samples,
+    }
+
+
+def fit_scaling(points):
+    """
+    runtime = a * rows^b, with b the shared log-log slope and a the matching
+    intercept (geometric mean of runtime / rows^b).
+
+    With a single size the exponent is taken as 1 (linear).
+    """
+    points = [(n, t) for n, t in points if n > 0 and t and t > 0]
+    if not points:
+        return None
+    b = loglog_slope(points)
+    if b is None:
+        b = 1.0
+    log_a = sum(math.log(t) - b * math.log(n) for n, t in points) / len(points)
+    return {'a': math.exp(log_a), 'b': b}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='1000,5000,20000', help='comma-separated batch sizes')
+    parser.add_argument('--jobs', default=','.join(JOBS), help=f'subset of {",".join(JOBS)}')
+    parser.add_argument('--project-rows', type=int, default=500_000,
+                        help='row count of the production-size tenant to project to')
+    parser.add_argument('--commission', type=float, default=5.0,
+                        help='agent and rep commission_amount set before backfill-commissions')
+    parser.add_argument('--sample-interval', type=float, default=1.0)
+    parser.add_argument('--job-timeout', type=float, default=3600, help='give up on a job after this long (s)')
+    parser.add_argument('--stall-polls', type=int, default=240,
+                        help='end a job whose progress has not moved for this many polls (every --sample-interval / 2);'
+                             ' keep it above the longest single transaction, backfill-collections commits once')
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    jobs = [j for j in JOBS if j in args.jobs.split(',')]
+    if not jobs:
+        raise SystemExit(f'--jobs must name at least one of {", ".join(JOBS)}')
+
+    print_header('🧹 Backfill Job Runtime Profiler', target=API_URL, sizes=sizes, jobs=jobs,
+                 project_rows=f'{args.project_rows:,}')
+
+    token = login()
+    session = new_session(token)
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    admin_id = query_one(conn, 'SELECT id FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+    agent_id, rep_id = ensure_seed_users(conn, tenant_id)
+    customer_id = ensure_seed_customer(conn, tenant_id)
+    product_id = ensure_perf_product(conn, tenant_id)
+
+    runs = []
+    for phase, size in enumerate(sizes, start=1):
+        print(f'\n[Phase {phase}] {size:,} orders')
+        # Revenue entries are posted without commission lines so backfill-commissions has work to do
+        set_commissions(conn, (agent_id, rep_id), 0)
+        lo, hi = seed_batch(conn, tenant_id, size, customer_id, agent_id, rep_id, product_id, admin_id)
+        params = {'lo': lo, 'hi': hi, 'note': ORDER_NOTE, 'tenant': tenant_id,
+                  'commission_code': AGENT_COMMISSION_CODE}
+        for job in jobs:
+            if job == 'commissions':
+                set_commissions(conn, (agent_id, rep_id), args.commission)
+            eligible = query_one(conn, ELIGIBLE_SQL[job], params)[0]
+            result = run_job(job, session, params, size, args)
+            result.update(size=size, eligible_rows=eligible)
+            runs.append(result)
+            status = result['http_status'] if job in HTTP_JOBS else f"exit {result['returncode']}"
+            runtime = f"{result['runtime_s']:.1f}s" if result['runtime_s'] is not None else \
+                ('stalled' if result['stalled'] else 'n/a')
+            print(f"  {job:<15} {runtime:>9}  {result['rows_done']:,}/{size:,} rows "
+                  f"({eligible:,} eligible), {status}, peak {result['peak_connections']} connections, "
+                  f"peak RSS {result['peak_rss_mb']} MB{'  ⏱ 408' if result['timed_out_408'] else ''}")
+        set_commissions(conn, (agent_id, rep_id), 0)
+
+    print(f'\n[Phase {len(sizes) + 1}] Scaling and projection to {args.project_rows:,} rows')
+    projections = {}
+    print(f"  {'Job':<15} {'exponent':>9} {'projected':>12} {'rows/s':>9}")
+    for job in jobs:
+        job_runs = [r for r in runs if r['job'] == job]
+        fit = fit_scaling([(r['eligible_rows'], r['runtime_s']) for r in job_runs if r['completed']])
+        if fit is None:
+            projections[job] = None
+            print(f'  {job:<15} {"—":>9} {"no data":>12}')
+            continue
+        projected = fit['a'] * args.project_rows ** fit['b']
+        projections[job] = {
+            'exponent': round(fit['b'], 3),
+            'coefficient': fit['a'],
+            'projected_runtime_s': round(projected, 1),
+            'projected_rows_per_s': round(args.project_rows / projected, 1),
+            'exceeds_request_timeout': job in HTTP_JOBS and projected > SERVER_TIMEOUT_S,
+        }
+        print(f"  {job:<15} {fit['b']:>9.2f} {projected / 60:>10.1f}m {args.project_rows / projected:>9.0f}")
+
+    over_timeout = [j for j, p in projections.items() if p and p['exceeds_request_timeout']]
+    superlinear = [j for j, p in projections.items() if p and p['exponent'] > 1.2]
+    sync_ok = all(r['returncode'] == 0 for r in runs if r['job'] == 'batch-sync')
+    passed = print_checks([
+        ('Every job processed every seeded row', all(r['completed'] for r in runs)),
+        (f'No job stalled (progress still for {args.stall_polls} polls)', not any(r['stalled'] for r in runs)),
+        ('batch-sync exited cleanly', sync_ok),
+        ('No HTTP backfill answered 408 during the run', not any(r['timed_out_408'] for r in runs)),
+        (f'No HTTP backfill projected past the {SERVER_TIMEOUT_S}s request timeout', not over_timeout),
+        ('No job scales worse than ~linearly (exponent <= 1.2)', not superlinear),
+    ])
+
+    stuck = query_one(conn, """
+        SELECT COUNT(*) FROM orders o
+        WHERE o.notes = %s AND (o.delivery_date IS NULL OR NOT o.revenue_recognized)
+    """, (ORDER_NOTE,))[0]
+    conn.close()
+
+    save_results('backfills', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'tenant_id': tenant_id,
+        'sizes': sizes,
+        'jobs': jobs,
+        'project_rows': args.project_rows,
+        'runs': runs,
+        'projections': projections,
+        'over_request_timeout': over_timeout,
+        'superlinear': superlinear,
+        'seeded_orders_left_unprocessed': stuck,
+        'passed': passed,
+    })
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Call logging and communications history at volume.
+
+Every rep logs dozens of calls an hour and every order sends several WhatsApp /
+SMS / email messages, so `calls` and `message_logs` outgrow every other table.
+The history endpoints return a customer's or order's whole call log with no
+paging, and /api/calls/stats runs seven queries per active rep, one of which
+loads every call with a duration the rep ever made.
+
+Phases:
+
+    1. seed     --reps sales reps (perf-calls-rep-<n>@perf-calls.local), a
+                customer base with --orders-per-customer orders, then --years
+                of working-hours calls at --calls-per-hour per rep and
+                --messages-per-call message logs, skewed (--skew) so a few
+                customers and orders carry thousands of entries
+    2. history  GET /api/calls/customer/:id, /api/calls/order/:id and
+                /api/communications/messages?customerId= / ?orderId= for the
+                hottest, median and coldest customers and orders, with rows and
+                bytes returned; plus the unfiltered message inbox (first and a
+                deep page) and /api/communications/stats
+    3. stats    GET /api/calls/stats for the whole team (all time and last 7
+                days) as the admin, and for one rep as that rep
+    4. peak     --writers reps POST /api/calls every --think-ms for --duration
+                seconds while --readers open customer histories and a manager
+                refreshes /api/calls/stats; reports sustained calls/s against
+                the nominal rep demand (writers / think), write latency and
+                checks every 201 was persisted
+
+Run the backend with NODE_ENV=development (apiLimiter allows 500 requests per
+15 min in production). Seeding writes straight to DATABASE_URL and runs once;
+--reseed adds another batch on top, --cleanup removes all of it.
+
+Usage:
+    python scripts/perf/bench_call_history.py
+    python scripts/perf/bench_call_history.py --reps 80 --years 3 --calls-per-hour 20 --writers 80
+    python scripts/perf/bench_call_history.py --skip-seed --duration 120 --think-ms 2000
+    python scripts/perf/bench_call_history.py --cleanup
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from perf_common import (
+    ADMIN_EMAIL, ADMIN_PASSWORD, API_URL, LatencyStats, connect_db, copy_rows, format_ghana_phone,
+    ghana_local_number, login, new_session, print_checks, print_header, print_latency_table, query_all,
+    query_one, random_area, run_concurrent, run_for_duration, save_results, tenant_id_for, timed_request,
+)
+
+SEED_DOMAIN = 'perf-calls.local'
+SEED_MARKER = 'perf-seed:call-history'
+WORKING_DAYS_PER_YEAR = 250
+WORKING_HOURS = 8
+OUTCOMES = ['confirmed', 'rescheduled', 'no_answer', 'cancelled', 'other']
+OUTCOME_WEIGHTS = [40, 20, 30, 7, 3]
+STATUS_MIX = {'delivered': 60, 'confirmed': 12, 'cancelled': 10, 'returned': 8, 'pending_confirmation': 10}
+
+# Targets are the seeded orders in random order; index 1 is the hottest. Calls
+# and messages pick a target with power(random(), skew), so low indexes get
+# most of the history the way repeat callers and problem orders do.
+TARGETS_SQL = """
+    CREATE TEMP TABLE perf_call_targets AS
+    SELECT row_number() OVER (ORDER BY random()) AS idx, customer_id, id AS order_id
+    FROM orders WHERE tenant_id = %(tenant)s AND notes = %(marker)s;
+    CREATE UNIQUE INDEX ON perf_call_targets (idx);
+    CREATE TEMP TABLE perf_call_reps AS
+    SELECT row_number() OVER (ORDER BY id) - 1 AS idx, id FROM users WHERE email LIKE %(rep_pattern)s;
+"""
+
+SEED_CALLS_SQL = """
+    INSERT INTO calls (order_id, customer_id, sales_rep_id, outcome, duration, notes, created_at)
+    SELECT CASE WHEN g.with_order THEN t.order_id END, t.customer_id, r.id, g.outcome::"CallOutcome",
+           CASE WHEN g.outcome <> 'no_answer' THEN 20 + floor(random() * 400)::int END, %(marker)s,
+           LEAST(g.ts, now())
+    FROM (
+        SELECT 1 + floor(%(targets)s * power(random(), %(skew)s))::int AS idx,
+               floor(random() * %(reps)s)::int AS rep_idx,
+               random() < 0.7 AS with_order,
+               (ARRAY['confirmed', 'confirmed', 'confirmed', 'confirmed', 'no_answer', 'no_answer', 'no_answer',
+                      'rescheduled', 'rescheduled', 'cancelled', 'other'])[1 + floor(random() * 11)::int] AS outcome,
+               date_trunc('day', now()) - floor(random() * %(days)s) * interval '1 day'
+                   + interval '8 hours' + random() * interval '10 hours' AS ts
+        FROM generate_series(1, %(count)s)
+    ) g
+    JOIN perf_call_targets t ON t.idx = g.idx
+    JOIN perf_call_reps r ON r.idx = g.rep_idx
+"""
+
+SEED_MESSAGES_SQL = """
+    INSERT INTO message_logs (order_id, customer_id, channel, direction, template_name, message_body, status,
+                              sent_at, tenant_id, created_at, updated_at)
+    SELECT CASE WHEN random() < 0.8 THEN t.order_id END, t.customer_id, g.channel::"MessageChannel",
+           (CASE WHEN random() < 0.15 THEN 'inbound' ELSE 'outbound' END)::"MessageDirection", %(marker)s,
+           'Hello, your order is on its way. Reply 1 to confirm delivery today.', g.status::"MessageStatus",
+           g.ts, %(tenant)s, g.ts, g.ts
+    FROM (
+        SELECT 1 + floor(%(targets)s * power(random(), %(skew)s))::int AS idx,
+               (ARRAY['whatsapp', 'whatsapp', 'sms', 'email'])[1 + floor(random() * 4)::int] AS channel,
+               (ARRAY['delivered', 'delivered', 'read', 'sent', 'failed'])[1 + floor(random() * 5)::int] AS status,
+               LEAST(now(), date_trunc('day', now()) - floor(random() * %(days)s) * interval '1 day'
+                   + interval '7 hours' + random() * interval '14 hours') AS ts
+        FROM generate_series(1, %(count)s)
+    ) g
+    JOIN perf_call_targets t ON t.idx = g.idx
+"""
+
+
+def seed_reps(conn, tenant_id, count):
+    pattern = f'perf-calls-rep-%@{SEED_DOMAIN}'
+    password_hash = query_one(conn, 'SELECT password FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+    existing = query_one(conn, 'SELECT COUNT(*) FROM users WHERE email LIKE %s', (pattern,))[0]
+    now = datetime.now()
+    copy_rows(conn, 'users', ['email', 'password', 'role', 'first_name', 'last_name', 'tenant_id', 'created_at',
+                              'updated_at'],
+              ((f'perf-calls-rep-{i}@{SEED_DOMAIN}', password_hash, 'sales_rep', 'Perf', f'CallRep{i}', tenant_id,
+                now, now) for i in range(existing, count)))
+    return query_all(conn, 'SELECT id, email FROM users WHERE email LIKE %s ORDER BY id LIMIT %s', (pattern, count))
+
+
+def seed_customers_and_orders(conn, tenant_id, reps, args, rng):
+    """Customers with --orders-per-customer orders each, spread over the history window"""
+    existing = query_one(conn, 'SELECT COUNT(*) FROM customers WHERE tenant_id = %s AND notes = %s',
+                         (tenant_id, SEED_MARKER))[0]
+    now = datetime.now()
+
+    def customers():
+        for i in range(existing, args.customers):
+            state, area = random_area(rng)
+            yield ('Perf', f'Caller{i}', format_ghana_phone(ghana_local_number(rng), 'local'), f'{area} street {i}',
+                   state, area, SEED_MARKER, tenant_id, now, now)
+
+    copy_rows(conn, 'customers', ['first_name', 'last_name', 'phone_number', 'address', 'state', 'area', 'notes',
+                                  'tenant_id', 'created_at', 'updated_at'], customers())
+    new_customers = [r[0] for r in query_all(conn, """
+        SELECT c.id FROM customers c
+        WHERE c.tenant_id = %s AND c.notes = %s
+          AND NOT EXISTS (SELECT 1 FROM orders o WHERE o.customer_id = c.id AND o.notes = %s)
+    """, (tenant_id, SEED_MARKER, SEED_MARKER))]
+    statuses, weights = list(STATUS_MIX), list(STATUS_MIX.values())
+    days = args.years * 365
+
+    def orders():
+        for customer in new_customers:
+            for _ in range(args.orders_per_customer):
+                created = now - timedelta(days=rng.random() * days)
+                total = rng.choice([120, 150, 180, 250])
+                yield (customer, rng.choice(reps), rng.choices(statuses, weights)[0], total, total, total,
+                       SEED_MARKER, tenant_id, created, created + timedelta(days=1))
+
+    copy_rows(conn, 'orders', ['customer_id', 'customer_rep_id', 'status', 'subtotal', 'total_amount', 'cod_amount',
+                               'notes', 'tenant_id', 'created_at', 'updated_at'], orders())
+    return len(new_customers)
+
+
+def seed_history(conn, tenant_id, rep_count, args):
+    """Calls and message logs in --batch chunks; returns (calls, messages) inserted"""
+    total_calls = int(rep_count * args.years * WORKING_DAYS_PER_YEAR * WORKING_HOURS * args.calls_per_hour)
+    total_messages = int(total_calls * args.messages_per_call)
+    params = {'tenant': tenant_id, 'marker': SEED_MARKER, 'rep_pattern': f'perf-calls-rep-%@{SEED_DOMAIN}',
+              'skew': args.skew, 'days': args.years * 365}
+    inserted = {'calls': 0, 'message_logs': 0}
+    with conn.cursor() as cur:
+        cur.execute(TARGETS_SQL, params)
+        params['targets'] = query_one(conn, 'SELECT COUNT(*) FROM perf_call_targets')[0]
+        params['reps'] = query_one(conn, 'SELECT COUNT(*) FROM perf_call_reps')[0]
+        for table, sql, total in (('calls', SEED_CALLS_SQL, total_calls),
+                                  ('message_logs', SEED_MESSAGES_SQL, total_messages)):
+            start = time.perf_counter()
+            while inserted[table] < total:
+                cur.execute(sql, {**params, 'count': min(args.batch, total - inserted[table])})
+                inserted[table] += cur.rowcount
+                rate = inserted[table] / (time.perf_counter() - start)
+                print(f'\r  {table}: {inserted[table]:,} / {total:,} ({rate:,.0f} rows/s)', end='', flush=True)
+            print()
+            cur.execute(f'ANALYZE {table}')
+        cur.execute('DROP TABLE perf_call_targets, perf_call_reps')
+    return inserted['calls'], inserted['message_logs']
+
+
+def history_tiers(conn, column, table, marker_column, samples):
+    """Hottest, median and coldest ids by seeded row count, with their counts"""
+    rows = query_all(conn, f"""
+        SELECT {column}, COUNT(*) FROM {table}
+        WHERE {marker_column} = %s AND {column} IS NOT NULL
+        GROUP BY {column} ORDER BY COUNT(*) DESC
+    """, (SEED_MARKER,))
+    mid = len(rows) // 2
+    return {'hot': rows[:samples], 'median': rows[max(0, mid - samples // 2):mid + (samples + 1) // 2],
+            'cold': rows[-samples:]}
+
+
+def read_history(session, label, paths, workers):
+    """GET each path concurrently; returns the summary plus rows/bytes returned"""
+    stats = LatencyStats(label)
+    sizes = []
+
+    def fetch(path):
+        resp, ms, err = timed_request(session, 'GET', path)
+        stats.record_response(resp, ms, err)
+        if resp is not None and resp.status_code == 200:
+            body = resp.json()
+            rows = len(body.get('calls') or body.get('data') or [])
+            sizes.append((rows, len(resp.content)))
+
+    run_concurrent(fetch, paths, workers)
+    summary = stats.summary()
+    summary['rows_max'] = max((r for r, _ in sizes), default=0)
+    summary['kb_max'] = round(max((b for _, b in sizes), default=0) / 1024, 1)
+    return summary
+
+
+def time_repeated(session, label, path, repeats):
+    stats = LatencyStats(label)
+    body = None
+    for _ in range(repeats):
+        resp, ms, err = timed_request(session, 'GET', path)
+        stats.record_response(resp, ms, err)
+        if resp is not None and resp.status_code == 200:
+            body = resp.json()
+    return stats.summary(), body
+
+
+def peak_hour(admin, rep_sessions, targets, warm_customers, args, run_note):
+    """Reps log calls while readers open histories and a manager refreshes /stats"""
+    writes = LatencyStats('POST /api/calls')
+    reads = LatencyStats('customer history under load')
+    stats_load = LatencyStats('/api/calls/stats under load')
+    created = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    rngs = [random.Random(f'{run_note}-{i}') for i in range(len(rep_sessions))]
+    reader_rngs = [random.Random(f'{args.seed}-reader-{i}') for i in range(args.readers)]
+
+    def writer(i):
+        rng = rngs[i]
+        customer_id, order_id = rng.choice(targets)
+        outcome = rng.choices(OUTCOMES, OUTCOME_WEIGHTS)[0]
+        payload = {'customerId': customer_id, 'outcome': outcome, 'notes': run_note}
+        if rng.random() < 0.7:
+            payload['orderId'] = order_id
+        if outcome != 'no_answer':
+            payload['duration'] = rng.randint(20, 420)
+        resp, ms, err = timed_request(rep_sessions[i], 'POST', '/api/calls', json=payload)
+        writes.record_response(resp, ms, err, ok_statuses=(201,))
+        if resp is not None and resp.status_code == 201:
+            with lock:
+                created.append(resp.json()['call']['id'])
+        stop.wait(args.think_ms / 1000 * rng.uniform(0.5, 1.5))
+
+    def reader(i):
+        customer_id = reader_rngs[i].choice(warm_customers)
+        resp, ms, err = timed_request(admin, 'GET', f'/api/calls/customer/{customer_id}')
+        reads.record_response(resp, ms, err)
+        stop.wait(args.think_ms / 1000)
+
+    def manager():
+        while not stop.is_set():
+            resp, ms, err = timed_request(admin, 'GET', '/api/calls/stats')
+            stats_load.record_response(resp, ms, err)
+            stop.wait(args.stats_every_s)
+
+    threads = [threading.Thread(target=run_for_duration, args=(reader, args.readers, args.duration, stop),
+                                daemon=True),
+               threading.Thread(target=manager, daemon=True)]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    run_for_duration(writer, len(rep_sessions), args.duration, stop)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return writes.summary(), reads.summary(), stats_load.summary(), created, elapsed
+
+
+def cleanup(conn):
+    with conn.cursor() as cur:
+        cur.execute('DELETE FROM calls WHERE notes LIKE %s', (SEED_MARKER + '%',))
+        calls = cur.rowcount
+        cur.execute('DELETE FROM message_logs WHERE template_name = %s', (SEED_MARKER,))
+        messages = cur.rowcount
+        cur.execute("""
+            DELETE FROM calls WHERE order_id IN (SELECT id FROM orders WHERE notes = %(m)s)
+                OR customer_id IN (SELECT id FROM customers WHERE notes = %(m)s)
+        """, {'m': SEED_MARKER})
+        calls += cur.rowcount
+        cur.execute('DELETE FROM orders WHERE notes = %s', (SEED_MARKER,))
+        cur.execute('DELETE FROM customers WHERE notes = %s', (SEED_MARKER,))
+        cur.execute('DELETE FROM users WHERE email LIKE %s', (f'perf-calls-rep-%@{SEED_DOMAIN}',))
+    print(f'  Deleted {calls:,} calls and {messages:,} message logs with their customers, orders and reps')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--reps', type=int, default=40)
+    parser.add_argument('--customers', type=int, default=20_000)
+    parser.add_argument('--orders-per-customer', type=int, default=2)
+    parser.add_argument('--years', type=float, default=2)
+    parser.add_argument('--calls-per-hour', type=float, default=12, help='calls per rep per working hour')
+    parser.add_argument('--messages-per-call', type=float, default=1.5)
+    parser.add_argument('--skew', type=float, default=2.0, help='1 = uniform; higher piles history on few targets')
+    parser.add_argument('--batch', type=int, default=250_000, help='rows per seeding INSERT')
+    parser.add_argument('--samples', type=int, default=20, help='customers / orders per tier')
+    parser.add_argument('--workers', type=int, default=10, help='concurrent history reads')
+    parser.add_argument('--stats-repeats', type=int, default=3)
+    parser.add_argument('--writers', type=int, default=40, help='reps logging calls in the peak phase')
+    parser.add_argument('--readers', type=int, default=10, help='concurrent history readers in the peak phase')
+    parser.add_argument('--think-ms', type=float, default=1000, help='mean pause between a rep\'s calls')
+    parser.add_argument('--stats-every-s', type=float, default=10, help='manager /stats refresh interval')
+    parser.add_argument('--duration', type=float, default=60, help='peak phase seconds')
+    parser.add_argument('--history-budget-ms', type=float, default=1000, help='p95 budget for hot histories')
+    parser.add_argument('--stats-budget-ms', type=float, default=3000, help='p95 budget for team /stats')
+    parser.add_argument('--write-budget-ms', type=float, default=300, help='p95 budget for POST /api/calls')
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--reseed', action='store_true', help='add another history batch even if one exists')
+    parser.add_argument('--cleanup', action='store_true', help='delete the seeded history and exit')
+    parser.add_argument('--seed', type=int, default=50)
+    args = parser.parse_args()
+
+    conn = connect_db()
+    if args.cleanup:
+        cleanup(conn)
+        conn.close()
+        return
+
+    rng = random.Random(args.seed)
+    print_header('📞 Call & Message History at Volume', target=API_URL,
+                 history=f'{args.reps} reps x {args.years:g} years x {args.calls_per_hour:g} calls/h',
+                 customers=f'{args.customers:,} x {args.orders_per_customer} orders', skew=args.skew,
+                 peak=f'{args.writers} writers + {args.readers} readers for {args.duration:g}s')
+    tenant_id = tenant_id_for(conn)
+    token = login()
+    admin = new_session(token)
+
+    print('\n[Phase 1] Seeding history')
+    reps = seed_reps(conn, tenant_id, max(args.reps, args.writers))
+    seeded_calls = query_one(conn, 'SELECT COUNT(*) FROM calls WHERE notes = %s', (SEED_MARKER,))[0]
+    if not args.skip_seed and (args.reseed or seeded_calls == 0):
+        added = seed_customers_and_orders(conn, tenant_id, [r[0] for r in reps[:args.reps]], args, rng)
+        start = time.perf_counter()
+        calls, messages = seed_history(conn, tenant_id, min(args.reps, len(reps)), args)
+        print(f'  +{added:,} customers, {calls:,} calls and {messages:,} message logs in '
+              f'{time.perf_counter() - start:.0f}s')
+    totals = {table: query_one(conn, f'SELECT COUNT(*) FROM {table}')[0] for table in ('calls', 'message_logs')}
+    print(f"  tables now hold {totals['calls']:,} calls and {totals['message_logs']:,} message logs")
+
+    print('\n[Phase 2] History reads')
+    customer_tiers = history_tiers(conn, 'customer_id', 'calls', 'notes', args.samples)
+    order_tiers = history_tiers(conn, 'order_id', 'calls', 'notes', args.samples)
+    message_customer_tiers = history_tiers(conn, 'customer_id', 'message_logs', 'template_name', args.samples)
+    message_order_tiers = history_tiers(conn, 'order_id', 'message_logs', 'template_name', args.samples)
+    if not customer_tiers['hot'] or not message_customer_tiers['hot']:
+        raise SystemExit('No seeded call/message history in this database; run once without --skip-seed')
+    history = []
+    for tier in ('hot', 'median', 'cold'):
+        history += [
+            read_history(admin, f'calls/customer ({tier})',
+                         [f'/api/calls/customer/{cid}' for cid, _ in customer_tiers[tier]], args.workers),
+            read_history(admin, f'calls/order ({tier})',
+                         [f'/api/calls/order/{oid}' for oid, _ in order_tiers[tier]], args.workers),
+            read_history(admin, f'messages?customerId ({tier})',
+                         [f'/api/communications/messages?customerId={cid}&limit=20'
+                          for cid, _ in message_customer_tiers[tier]], args.workers),
+            read_history(admin, f'messages?orderId ({tier})',
+                         [f'/api/communications/messages?orderId={oid}&limit=20'
+                          for oid, _ in message_order_tiers[tier]], args.workers),
+        ]
+    inbox, _ = time_repeated(admin, 'messages inbox page 1', '/api/communications/messages?page=1&limit=20',
+                             args.stats_repeats)
+    deep_page = max(1, totals['message_logs'] // 20 // 2)
+    inbox_deep, _ = time_repeated(admin, f'messages inbox page {deep_page:,}',
+                                  f'/api/communications/messages?page={deep_page}&limit=20', args.stats_repeats)
+    message_stats, _ = time_repeated(admin, 'communications/stats', '/api/communications/stats', args.stats_repeats)
+    print_latency_table(history + [inbox, inbox_deep, message_stats])
+    print(f"\n  {'endpoint':<32}{'rows max':>10}{'KB max':>10}")
+    for s in history:
+        print(f"  {s['name']:<32}{s['rows_max']:>10,}{s['kb_max']:>10,.1f}")
+
+    hot_customer, hot_count = message_customer_tiers['hot'][0]
+    resp, _, _ = timed_request(admin, 'GET', f'/api/communications/messages?customerId={hot_customer}&limit=1')
+    filtered_total = resp.json()['pagination']['total'] if resp is not None and resp.status_code == 200 else None
+    expected_total = query_one(conn, 'SELECT COUNT(*) FROM message_logs WHERE customer_id = %s', (hot_customer,))[0]
+
+    print('\n[Phase 3] /api/calls/stats')
+    week_ago = (datetime.now() - timedelta(days=7)).date().isoformat()
+    team_all, team_body = time_repeated(admin, 'stats, team, all time', '/api/calls/stats', args.stats_repeats)
+    team_week, _ = time_repeated(admin, 'stats, team, 7 days', f'/api/calls/stats?startDate={week_ago}',
+                                 args.stats_repeats)
+    rep_session = new_session(login(reps[0][1], ADMIN_PASSWORD), pool_size=4)
+    rep_own, _ = time_repeated(rep_session, 'stats, one rep', '/api/calls/stats', args.stats_repeats)
+    stats_reps = len((team_body or {}).get('stats') or [])
+    print_latency_table([team_all, team_week, rep_own])
+    print(f"  {stats_reps} rep(s) in the team view = {7 * stats_reps + 1} queries per request, "
+          f"{team_all['p50_ms'] / max(stats_reps, 1):.1f} ms per rep")
+
+    print(f'\n[Phase 4] Peak hour: {args.writers} reps logging calls')
+    run_note = f'{SEED_MARKER} run {uuid.uuid4().hex[:8]}'
+    targets = [tuple(r) for r in query_all(conn, """
+        SELECT customer_id, id FROM orders WHERE tenant_id = %s AND notes = %s ORDER BY random() LIMIT 5000
+    """, (tenant_id, SEED_MARKER))]
+    writer_sessions = run_concurrent(lambda rep: new_session(login(rep[1], ADMIN_PASSWORD), pool_size=2),
+                                     reps[:args.writers], 16)
+    warm = [cid for cid, _ in customer_tiers['median']] or [t[0] for t in targets]
+    writes, peak_reads, peak_stats, created, elapsed = peak_hour(admin, writer_sessions, targets, warm, args, run_note)
+    # Nominal demand: one call per rep per --think-ms. Slow writes stretch each rep's cycle and show up as a
+    # shortfall here; dividing by measured latency instead would make the check pass however slow the backend is.
+    offered = args.writers * 1000 / args.think_ms
+    achieved = len(created) / elapsed if elapsed else 0.0
+    persisted = query_one(conn, 'SELECT COUNT(*) FROM calls WHERE notes = %s', (run_note,))[0]
+    print_latency_table([writes, peak_reads, peak_stats])
+    print(f'  {len(created):,} calls logged in {elapsed:.0f}s: {achieved:.1f}/s of {offered:.1f}/s offered '
+          f'({achieved * 3600:,.0f} calls/hour); {persisted:,} persisted')
+
+    hot_history = next(s for s in history if s['name'] == 'calls/customer (hot)')
+    checks = [
+        (f"Hot customer call history p95 {hot_history['p95_ms']:.0f} ms <= {args.history_budget_ms:.0f} ms "
+         f"({hot_history['rows_max']:,} rows, {hot_history['kb_max']:,.0f} KB)",
+         hot_history['p95_ms'] <= args.history_budget_ms),
+        (f"Team /stats p95 {team_all['p95_ms']:.0f} ms <= {args.stats_budget_ms:.0f} ms",
+         team_all['p95_ms'] <= args.stats_budget_ms),
+        (f"Team /stats under load p95 {peak_stats['p95_ms']:.0f} ms <= {args.stats_budget_ms:.0f} ms",
+         peak_stats['count'] == 0 or peak_stats['p95_ms'] <= args.stats_budget_ms),
+        (f"POST /api/calls p95 {writes['p95_ms']:.0f} ms <= {args.write_budget_ms:.0f} ms",
+         writes['p95_ms'] <= args.write_budget_ms),
+        (f'Peak throughput kept up with the reps ({achieved:.1f}/s of {offered:.1f}/s)', achieved >= offered * 0.9),
+        (f'Every logged call persisted ({persisted:,} of {len(created):,})', persisted == len(created)),
+        ('No history read errors', all(s['errors'] == 0 for s in history + [peak_reads])),
+        (f'messages?customerId returns only that customer ({filtered_total} vs {expected_total:,})',
+         filtered_total == expected_total),
+    ]
+    passed = print_checks(checks)
+
+    save_results('call-history', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'settings': vars(args),
+        'tables': totals,
+        'hot_counts': {'customer_calls': customer_tiers['hot'][0][1] if customer_tiers['hot'] else 0,
+                       'order_calls': order_tiers['hot'][0][1] if order_tiers['hot'] else 0,
+                       'customer_messages': hot_count},
+        'history': history,
+        'inbox': [inbox, inbox_deep, message_stats],
+        'call_stats': {'team_all_time': team_all, 'team_7_days': team_week, 'one_rep': rep_own,
+                       'reps_in_team_view': stats_reps},
+        'peak': {'writes': writes, 'history_reads': peak_reads, 'stats': peak_stats,
+                 'calls_logged': len(created), 'persisted': persisted, 'elapsed_s': round(elapsed, 1),
+                 'offered_per_s': round(offered, 1), 'achieved_per_s': round(achieved, 1)},
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
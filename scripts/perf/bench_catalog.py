@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Product catalog scaling benchmark: list, low-stock and stock writes from 100 to 100k SKUs.
+
+productRoutes.ts serves the catalog (GET /api/products, paginated with
+skip/take plus a COUNT), GET /api/products/low-stock (unpaginated, filters
+stock_quantity <= low_stock_threshold, a column-to-column comparison no index
+can answer), PATCH /api/products/:id/stock (absolute set) and the shipment
+flow, whose PATCH /shipments/:id/arrive increments stock, re-weights COGS and
+posts a GL entry in one Serializable transaction. Checkout forms embed the
+product with its packages and upsells; GET /api/checkout-forms returns every
+form with both, unpaginated.
+
+Phases:
+
+    1. grow    the admin's tenant to each --levels SKU count (default 100,
+               1000, 10000, 100000). Every SKU gets a checkout form with 3
+               packages and 2 upsells pointing at other SKUs; --low-pct of
+               SKUs sit at or under their threshold and 5% are inactive
+    2. read    at each level: catalog first page, last page, name search,
+               category filter, low-stock, the form list and single public
+               forms, --requests each on --workers threads. Response bytes are
+               recorded and the low-stock query is EXPLAINed to see how many
+               rows it examines to return the low ones
+    3. write   at the largest level, concurrently and shuffled:
+                   arrive    --hot-products SKUs with --shipments pending
+                             shipments each, every shipment arrived twice
+                             (a double click) with different unit costs
+                   patch     --patch-products SKUs, --patches absolute
+                             PATCH /:id/stock calls each
+                   mixed     --mixed-products SKUs taking both at once
+               Shipments still pending after a 5xx are re-arrived for up to
+               --retries rounds, as a user would click again
+    4. verify  arrive SKUs: stock = before + every arrived quantity, COGS =
+               the weighted average (order independent), one GL entry per
+               arrived shipment; patch SKUs end on a value that was sent;
+               mixed SKUs report arrivals overwritten by an absolute PATCH
+
+Per endpoint the log-log slope of p50 against SKU count is reported: flat
+(< 0.3), sublinear (< 0.8) or linear. Serializable arrivals that conflict
+answer 500 with no retry; the harness reports how often.
+
+Run the backend with NODE_ENV=development (apiLimiter allows 500 requests per
+15 min in production). Seeded SKUs are `PERF-CAT-*` and are left in place.
+
+Usage:
+    python scripts/perf/bench_catalog.py
+    python scripts/perf/bench_catalog.py --levels 1000,10000 --requests 100 --workers 16
+    python scripts/perf/bench_catalog.py --levels 100000 --hot-products 20 --shipments 12 --write-workers 64
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+from perf_common import (
+    ADMIN_EMAIL, API_URL, LatencyStats, connect_db, login, new_session, print_checks, print_header, print_latency_table,
+    loglog_slope, query_all, query_one, run_concurrent, save_results, scaling_verdict, tenant_id_for, timed_request,
+)
+
+SKU_PREFIX = 'PERF-CAT-'
+SLUG_PREFIX = 'perf-cat-'
+CATEGORIES = ['Beauty', 'Electronics', 'Fashion', 'Health', 'Home', 'Kitchen', 'Kids', 'Sports']
+CHUNK = 20_000
+PATCH_STEP = 1_000_000
+
+FORM_FIELDS = json.dumps([{'id': 'name', 'type': 'text', 'label': 'Full name', 'required': True},
+                          {'id': 'phone', 'type': 'phone', 'label': 'Phone number', 'required': True},
+                          {'id': 'address', 'type': 'text', 'label': 'Delivery address', 'required': True}])
+FORM_STYLING = json.dumps({'primaryColor': '#16a34a', 'buttonText': 'Order now'})
+FORM_REGIONS = json.dumps({'Greater Accra': ['Accra Central', 'Osu', 'Tema'], 'Ashanti': ['Adum', 'Bantama']})
+
+LOW_STOCK_SQL = """
+    SELECT * FROM products
+    WHERE is_active = true AND stock_quantity <= low_stock_threshold AND tenant_id = %s
+    ORDER BY stock_quantity ASC
+"""
+
+
+def perf_sku_count(conn, tenant_id):
+    return query_one(conn, 'SELECT COUNT(*) FROM products WHERE tenant_id = %s AND sku LIKE %s',
+                     (tenant_id, SKU_PREFIX + '%'))[0]
+
+
+def grow_catalog(conn, tenant_id, target, low_pct):
+    """Add PERF-CAT SKUs, each with a checkout form, 3 packages and 2 upsells, until `target` exist"""
+    have = perf_sku_count(conn, tenant_id)
+    for lo in range(have, target, CHUNK):
+        hi = min(lo + CHUNK, target) - 1
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO products (sku, name, description, category, price, stock_quantity, low_stock_threshold,
+                                      is_active, cogs, tenant_id, created_at, updated_at)
+                SELECT %(prefix)s || lpad(g::text, 7, '0'), 'Perf Item ' || g, 'Catalog benchmark item ' || g,
+                       (%(cats)s::text[])[1 + g %% cardinality(%(cats)s::text[])], 50 + (g %% 40) * 5,
+                       CASE WHEN g %% 100 < %(low)s THEN g %% 10 ELSE 40 + g %% 500 END, 10, g %% 20 <> 0,
+                       20 + g %% 30, %(tenant)s, NOW() - g * INTERVAL '1 minute', NOW()
+                FROM generate_series(%(lo)s, %(hi)s) g
+                ON CONFLICT (sku) DO NOTHING
+                RETURNING id
+            """, {'prefix': SKU_PREFIX, 'cats': CATEGORIES, 'low': low_pct, 'tenant': tenant_id, 'lo': lo, 'hi': hi})
+            product_ids = [r[0] for r in cur.fetchall()]
+            if not product_ids:
+                continue
+            cur.execute("""
+                INSERT INTO checkout_forms (name, slug, product_id, fields, styling, regions, tenant_id,
+                                            created_at, updated_at)
+                SELECT 'Perf form ' || p, %s || p, p, %s::jsonb, %s::jsonb, %s::jsonb, %s, NOW(), NOW()
+                FROM unnest(%s::int[]) p
+                ON CONFLICT (slug) DO NOTHING
+                RETURNING id
+            """, (SLUG_PREFIX, FORM_FIELDS, FORM_STYLING, FORM_REGIONS, tenant_id, product_ids))
+            form_ids = [r[0] for r in cur.fetchall()]
+            cur.execute("""
+                INSERT INTO form_packages (form_id, name, description, price, quantity, discount_type, discount_value,
+                                           original_price, is_popular, is_default, sort_order)
+                SELECT f, (ARRAY['Single', 'Buy 2', 'Family pack'])[n], 'Perf package ' || n, 150 * n - 20 * (n - 1),
+                       n, CASE WHEN n > 1 THEN 'fixed' ELSE 'none' END, 20 * (n - 1), 150 * n, n = 2, n = 1, n
+                FROM unnest(%s::int[]) f, generate_series(1, 3) n
+            """, (form_ids,))
+            cur.execute("""
+                INSERT INTO form_upsells (form_id, name, description, price, product_id, sort_order)
+                SELECT f.id, 'Add-on ' || k, 'Perf upsell ' || k, 35 * k,
+                       (%(products)s::int[])[1 + (f.i::int + k * 7) %% cardinality(%(products)s::int[])], k
+                FROM unnest(%(forms)s::int[]) WITH ORDINALITY AS f(id, i), generate_series(1, 2) k
+            """, {'forms': form_ids, 'products': product_ids})
+        print(f'  SKUs: {hi + 1:,}/{target:,}', end='\r', flush=True)
+    print()
+    with conn.cursor() as cur:
+        for table in ('products', 'checkout_forms', 'form_packages', 'form_upsells'):
+            cur.execute(f'ANALYZE {table}')
+    return perf_sku_count(conn, tenant_id)
+
+
+def walk(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from walk(child)
+
+
+def explain_low_stock(conn, tenant_id, catalog):
+    """How many product rows the low-stock query touches to return the low ones"""
+    row = query_one(conn, f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {LOW_STOCK_SQL}', (tenant_id,))[0]
+    plan = (row if isinstance(row, list) else json.loads(row))[0]
+    scans = [n for n in walk(plan['Plan']) if n.get('Relation Name') == 'products']
+    returned = sum(n.get('Actual Rows', 0) * n.get('Actual Loops', 1) for n in scans)
+    removed = sum(n.get('Rows Removed by Filter', 0) * n.get('Actual Loops', 1) for n in scans)
+    examined = returned + removed
+    return {
+        'execution_ms': round(plan['Execution Time'], 1),
+        'scan_nodes': sorted({n['Node Type'] + (f" ({n['Index Name']})" if n.get('Index Name') else '')
+                              for n in scans}),
+        'rows_returned': returned,
+        'rows_examined': examined,
+        'tenant_products': catalog,
+        'examined_pct': round(examined / catalog * 100, 1) if catalog else 0.0,
+        'shared_hit': plan['Plan'].get('Shared Hit Blocks', 0),
+        'shared_read': plan['Plan'].get('Shared Read Blocks', 0),
+    }
+
+
+def read_endpoints(level, pages, slugs, rng):
+    """(label, path factory, requests multiplier) for every read measured at one level"""
+    return [
+        ('list first page', lambda: '/api/products?page=1&limit=20', 1),
+        ('list last page', lambda: f'/api/products?page={pages}&limit=20', 1),
+        ('list search', lambda: f'/api/products?page=1&limit=20&search=Item%20{rng.randrange(level)}', 1),
+        ('list category', lambda: f'/api/products?page=1&limit=20&category={rng.choice(CATEGORIES)}', 1),
+        ('low-stock', lambda: '/api/products/low-stock', 1),
+        ('forms list', lambda: '/api/checkout-forms', 0.2),
+        ('public form', lambda: f'/api/public/forms/{rng.choice(slugs)}', 1),
+    ]
+
+
+def measure_reads(session, level, pages, slugs, args, rng):
+    results = {}
+    for label, path, share in read_endpoints(level, pages, slugs, rng):
+        stats = LatencyStats(f'{label} @{level:,}')
+        sizes = []
+        lock = threading.Lock()
+
+        def call(_, path=path, stats=stats, sizes=sizes, lock=lock):
+            resp, ms, err = timed_request(session, 'GET', path())
+            stats.record_response(resp, ms, err, ok_statuses=(200,))
+            if resp is not None and resp.status_code == 200:
+                with lock:
+                    sizes.append(len(resp.content))
+
+        run_concurrent(call, range(max(int(args.requests * share), 3)), args.workers)
+        summary = stats.summary()
+        summary['avg_bytes'] = round(sum(sizes) / len(sizes)) if sizes else 0
+        results[label] = summary
+    return results
+
+
+def pick_products(conn, tenant_id, count, offset):
+    """Active PERF-CAT SKUs well above their threshold, disjoint per group via offset"""
+    return [r[0] for r in query_all(conn, """
+        SELECT id FROM products
+        WHERE tenant_id = %s AND sku LIKE %s AND is_active AND stock_quantity > low_stock_threshold
+        ORDER BY id LIMIT %s OFFSET %s
+    """, (tenant_id, SKU_PREFIX + '%', count, offset))]
+
+
+def create_shipments(conn, tenant_id, user_id, product_ids, per_product, rng):
+    """Pending shipments with varied quantity and landed cost; returns {shipment_id: (product_id, qty, total)}"""
+    rows = [(pid, rng.randint(5, 50), rng.randint(10, 40), rng.randint(0, 200)) for pid in product_ids
+            for _ in range(per_product)]
+    shipments = {}
+    with conn.cursor() as cur:
+        for pid, qty, unit, extra in rows:
+            cur.execute("""
+                INSERT INTO inventory_shipments (product_id, supplier, quantity, unit_cost, shipping_cost,
+                                                 customs_duties, other_costs, total_cost, status, notes,
+                                                 created_by_id, tenant_id, created_at, updated_at)
+                VALUES (%s, 'Perf Supplier', %s, %s, %s, 0, 0, %s, 'pending', 'perf: catalog', %s, %s, NOW(), NOW())
+                RETURNING id
+            """, (pid, qty, unit, extra, qty * unit + extra, user_id, tenant_id))
+            shipments[cur.fetchone()[0]] = (pid, qty, qty * unit + extra)
+    return shipments
+
+
+def snapshot(conn, product_ids):
+    return {pid: (stock, float(cogs or 0)) for pid, stock, cogs in query_all(
+        conn, 'SELECT id, stock_quantity, cogs FROM products WHERE id = ANY(%s)', (product_ids,))}
+
+
+class Writer:
+    """Fires stock PATCHes and shipment arrivals, keeping latency and error samples per operation"""
+
+    def __init__(self, session):
+        self.session = session
+        self.stats = {name: LatencyStats(name) for name in ('PATCH stock', 'arrive', 'arrive retry')}
+        self.patched = {}
+        self.arrived = {}
+        self.server_errors = []
+        self._lock = threading.Lock()
+
+    def run(self, item):
+        kind, target, value = item
+        if kind == 'patch':
+            resp, ms, err = timed_request(self.session, 'PATCH', f'/api/products/{target}/stock',
+                                          json={'stockQuantity': value})
+            self.stats['PATCH stock'].record_response(resp, ms, err, ok_statuses=(200,))
+            if resp is not None and resp.status_code == 200:
+                with self._lock:
+                    self.patched.setdefault(target, []).append(value)
+        else:
+            resp, ms, err = timed_request(self.session, 'PATCH', f'/api/products/shipments/{target}/arrive')
+            # The losing click of a double click is refused with 400 (pre-check) or 409 (status flip)
+            self.stats['arrive retry' if kind == 'retry' else 'arrive'].record_response(
+                resp, ms, err, ok_statuses=(200, 400, 409))
+            if resp is not None and resp.status_code == 200:
+                with self._lock:
+                    self.arrived[target] = self.arrived.get(target, 0) + 1
+        if resp is not None and resp.status_code >= 500:
+            with self._lock:
+                if len(self.server_errors) < 5:
+                    self.server_errors.append(f'{kind} {target}: {resp.text[:160]}')
+
+
+def pending_shipments(conn, shipment_ids):
+    return [r[0] for r in query_all(
+        conn, "SELECT id FROM inventory_shipments WHERE id = ANY(%s) AND status = 'pending'", (shipment_ids,))]
+
+
+def expected_cogs(before_stock, before_cogs, arrivals):
+    """Weighted-average COGS after applying every arrival; the same in any order"""
+    qty = before_stock + sum(q for q, _ in arrivals)
+    if qty <= 0:
+        return before_cogs
+    return (before_stock * before_cogs + sum(total for _, total in arrivals)) / qty
+
+
+def verify_writes(conn, groups, shipments, before, writer):
+    arrived = {r[0]: r[1] for r in query_all(conn, """
+        SELECT s.id, (SELECT COUNT(*) FROM journal_entries j
+                      WHERE j.source_type = 'inventory_purchase' AND j.source_id = s.id AND NOT j.is_voided)
+        FROM inventory_shipments s WHERE s.id = ANY(%s) AND s.status = 'arrived'
+    """, (list(shipments),))}
+    after = snapshot(conn, groups['arrive'] + groups['patch'] + groups['mixed'])
+    stock_drift, cogs_drift, lost = [], [], {}
+    for pid in groups['arrive']:
+        done = [(qty, total) for sid, (p, qty, total) in shipments.items() if p == pid and sid in arrived]
+        stock0, cogs0 = before[pid]
+        want = stock0 + sum(q for q, _ in done)
+        if after[pid][0] != want:
+            stock_drift.append((pid, after[pid][0], want))
+        cogs = expected_cogs(stock0, cogs0, done)
+        # cogs is Decimal(10, 2), rounded at every arrival
+        if abs(after[pid][1] - cogs) > 0.01 * max(len(done), 1):
+            cogs_drift.append((pid, after[pid][1], round(cogs, 2)))
+    bad_patch = [pid for pid in groups['patch'] if after[pid][0] not in writer.patched.get(pid, [before[pid][0]])]
+    for pid in groups['mixed']:
+        arrived_qty = sum(qty for sid, (p, qty, _) in shipments.items() if p == pid and sid in arrived)
+        final = after[pid][0]
+        # PATCH values are multiples of PATCH_STEP and arrivals sum to less, so the remainder is
+        # what arrived after the last PATCH landed; the rest was overwritten by it
+        lost[pid] = arrived_qty - (final % PATCH_STEP) if final >= PATCH_STEP else 0
+    return {
+        'shipments': len(shipments),
+        'arrived': len(arrived),
+        'still_pending': len(shipments) - len(arrived),
+        'gl_entry_counts_not_one': [sid for sid, n in arrived.items() if n != 1],
+        'arrived_more_than_once': [sid for sid, n in writer.arrived.items() if n > 1],
+        'stock_drift': stock_drift,
+        'cogs_drift': cogs_drift,
+        'patch_final_not_sent': bad_patch,
+        'mixed_arrivals_overwritten': lost,
+    }
+
+
+def run_writes(conn, session, tenant_id, user_id, args, rng):
+    groups, offset = {}, 0
+    for name, count in (('arrive', args.hot_products), ('patch', args.patch_products),
+                        ('mixed', args.mixed_products)):
+        groups[name] = pick_products(conn, tenant_id, count, offset)
+        offset += count
+    shipments = create_shipments(conn, tenant_id, user_id, groups['arrive'] + groups['mixed'], args.shipments, rng)
+    before = snapshot(conn, groups['arrive'] + groups['patch'] + groups['mixed'])
+
+    items = [('arrive', sid, copy) for sid, (pid, _, _) in shipments.items()
+             for copy in range(2 if pid in groups['arrive'] else 1)]
+    items += [('patch', pid, rng.randint(100, 5000)) for pid in groups['patch'] for _ in range(args.patches)]
+    items += [('patch', pid, PATCH_STEP * (i + 1)) for pid in groups['mixed'] for i in range(args.patches)]
+    rng.shuffle(items)
+
+    writer = Writer(session)
+    start = time.perf_counter()
+    run_concurrent(writer.run, items, args.write_workers)
+    elapsed = time.perf_counter() - start
+    retries = 0
+    for _ in range(args.retries):
+        left = pending_shipments(conn, list(shipments))
+        if not left:
+            break
+        retries += 1
+        run_concurrent(writer.run, [('retry', sid, 1) for sid in left], args.write_workers)
+    check = verify_writes(conn, groups, shipments, before, writer)
+    check.update({'calls': len(items), 'runtime_s': round(elapsed, 2), 'retry_rounds': retries,
+                  'server_error_samples': writer.server_errors, 'groups': groups})
+    return check, [s.summary() for s in writer.stats.values()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--levels', default='100,1000,10000,100000', help='SKU counts to grow the tenant through')
+    parser.add_argument('--low-pct', type=int, default=5, help='share of SKUs at or under their threshold')
+    parser.add_argument('--requests', type=int, default=50, help='requests per read endpoint and level')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--hot-products', type=int, default=10, help='SKUs taking concurrent shipment arrivals')
+    parser.add_argument('--shipments', type=int, default=8, help='pending shipments per arriving SKU')
+    parser.add_argument('--patch-products', type=int, default=10)
+    parser.add_argument('--mixed-products', type=int, default=5)
+    parser.add_argument('--patches', type=int, default=8, help='PATCH /:id/stock calls per SKU')
+    parser.add_argument('--write-workers', type=int, default=32)
+    parser.add_argument('--retries', type=int, default=3, help='re-arrive rounds for shipments left pending')
+    parser.add_argument('--max-p95-ms', type=float, default=500, help='catalog list and low-stock at the top level')
+    parser.add_argument('--max-arrive-error-pct', type=float, default=1.0, help='first-attempt arrive 5xx share')
+    parser.add_argument('--skip-writes', action='store_true')
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    levels = sorted(int(x) for x in args.levels.split(',') if x)
+    rng = random.Random(args.seed)
+    print_header('📦 Product Catalog Scaling Benchmark', target=API_URL, levels=', '.join(f'{n:,}' for n in levels),
+                 low_stock=f'{args.low_pct}%', requests=args.requests, workers=args.workers,
+                 writes='skipped' if args.skip_writes else
+                 f'{args.hot_products} arrive / {args.patch_products} patch / {args.mixed_products} mixed SKUs')
+
+    token = login()
+    session = new_session(token, pool_size=max(args.workers, args.write_workers))
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    user_id = query_one(conn, 'SELECT id FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+
+    per_level = []
+    for level in levels:
+        print(f'\n[Phase 1] Growing the catalog to {level:,} SKUs')
+        start = time.perf_counter()
+        have = grow_catalog(conn, tenant_id, level, args.low_pct)
+        catalog = query_one(conn, 'SELECT COUNT(*) FROM products WHERE tenant_id = %s', (tenant_id,))[0]
+        print(f'  {have:,} perf SKUs ({catalog:,} in tenant) after {time.perf_counter() - start:.0f}s')
+
+        print(f'\n[Phase 2] Reads at {level:,} SKUs')
+        slugs = [r[0] for r in query_all(conn, 'SELECT slug FROM checkout_forms WHERE tenant_id = %s AND slug LIKE %s '
+                                               'ORDER BY random() LIMIT 200', (tenant_id, SLUG_PREFIX + '%'))]
+        reads = measure_reads(session, level, max(math.ceil(catalog / 20), 1), slugs, args, rng)
+        plan = explain_low_stock(conn, tenant_id, catalog)
+        print_latency_table(list(reads.values()))
+        print(f"  low-stock: {reads['low-stock']['avg_bytes'] / 1024:,.0f} KiB per response, "
+              f"forms list: {reads['forms list']['avg_bytes'] / 2 ** 20:,.1f} MiB")
+        print(f"  low-stock plan: {', '.join(plan['scan_nodes'])}; examined {plan['rows_examined']:,} rows "
+              f"({plan['examined_pct']}% of the tenant catalog) to return {plan['rows_returned']:,}")
+        per_level.append({'level': level, 'tenant_products': catalog, 'reads': reads, 'low_stock_plan': plan})
+
+    curves = []
+    print(f"\n  {'endpoint':<18}" + ''.join(f'{r["level"]:>10,}' for r in per_level) + f"{'slope':>8}  verdict")
+    for label in per_level[0]['reads']:
+        points = [(r['level'], r['reads'][label]['p50_ms']) for r in per_level]
+        exponent = loglog_slope(points)
+        curves.append({'endpoint': label, 'points': points, 'slope': round(exponent, 3) if exponent is not None
+                       else None, 'verdict': scaling_verdict(exponent)})
+        cells = ''.join(f'{ms:>8.0f}ms' for _, ms in points)
+        slope_txt = f'{exponent:>8.2f}' if exponent is not None else f"{'—':>8}"
+        print(f'  {label:<18}{cells}{slope_txt}  {scaling_verdict(exponent)}')
+
+    writes, write_summaries = None, []
+    if not args.skip_writes:
+        print(f'\n[Phase 3] Concurrent stock writes at {levels[-1]:,} SKUs')
+        writes, write_summaries = run_writes(conn, session, tenant_id, user_id, args, rng)
+        print(f"  {writes['calls']:,} calls in {writes['runtime_s']:.1f}s, {writes['retry_rounds']} retry round(s)")
+        print_latency_table(write_summaries)
+        if writes['server_error_samples']:
+            print('  5xx responses, e.g.:\n    ' + '\n    '.join(writes['server_error_samples']))
+
+        print('\n[Phase 4] Verifying stock totals')
+        print(f"  shipments arrived {writes['arrived']}/{writes['shipments']}, "
+              f"GL entries not exactly one: {len(writes['gl_entry_counts_not_one'])}")
+        print(f"  stock drift: {len(writes['stock_drift'])}, COGS drift: {len(writes['cogs_drift'])}, "
+              f"PATCH finals not sent: {len(writes['patch_final_not_sent'])}")
+        overwritten = writes['mixed_arrivals_overwritten']
+        print(f'  mixed SKUs: {sum(overwritten.values()):,} arrived units overwritten by a later absolute PATCH '
+              f'across {sum(1 for v in overwritten.values() if v)} of {len(overwritten)} SKUs')
+
+    top = per_level[-1]
+    checks = [
+        (f"List first page p95 under {args.max_p95_ms:g} ms at {top['level']:,} SKUs "
+         f"({top['reads']['list first page']['p95_ms']:.0f} ms)",
+         top['reads']['list first page']['p95_ms'] < args.max_p95_ms),
+        (f"Low-stock p95 under {args.max_p95_ms:g} ms at {top['level']:,} SKUs "
+         f"({top['reads']['low-stock']['p95_ms']:.0f} ms)", top['reads']['low-stock']['p95_ms'] < args.max_p95_ms),
+        (f"Low-stock examines under half the catalog ({top['low_stock_plan']['examined_pct']}%)",
+         top['low_stock_plan']['examined_pct'] < 50),
+        ('Public form latency independent of catalog size',
+         next(c for c in curves if c['endpoint'] == 'public form')['verdict'] in ('flat', 'n/a')),
+        ('No read errors', all(s['errors'] == 0 for r in per_level for s in r['reads'].values())),
+    ]
+    if writes:
+        first = next(s for s in write_summaries if s['name'] == 'arrive')
+        arrive_5xx = sum(n for code, n in first['statuses'].items() if code.isdigit() and int(code) >= 500)
+        arrive_5xx_pct = arrive_5xx / first['count'] * 100 if first['count'] else 0.0
+        writes['first_attempt_arrive_5xx_pct'] = round(arrive_5xx_pct, 2)
+        checks += [
+            ('Every shipment arrived (within retries)', writes['still_pending'] == 0),
+            (f'First-attempt arrive 5xx at most {args.max_arrive_error_pct:g}% ({arrive_5xx_pct:.1f}%)',
+             arrive_5xx_pct <= args.max_arrive_error_pct),
+            ('Double clicks never arrive a shipment twice', not writes['arrived_more_than_once']
+             and not writes['gl_entry_counts_not_one'] and not writes['stock_drift']),
+            ('COGS equals the weighted average of all arrivals', not writes['cogs_drift']),
+            ('PATCH /:id/stock ends on a value that was sent', not writes['patch_final_not_sent']),
+        ]
+    passed = print_checks(checks)
+
+    save_results('catalog', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'settings': vars(args),
+        'levels': per_level,
+        'curves': curves,
+        'writes': writes,
+        'write_latency': write_summaries,
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Housekeeping queue benchmark: message-log and pending-checkout cleanup at scale.
+
+Two Bull jobs keep the high-churn tables trimmed:
+
+    cleanup-old-messages    queues/messageCleanupQueue.ts, daily. Deletes
+                            message_logs older than MESSAGE_LOG_RETENTION_DAYS
+                            (90) in batches of 1000: a findMany of ids, then a
+                            deleteMany by id, until a batch comes back short
+    cleanup-stale-pending   queues/pendingCheckoutCleanupQueue.ts, hourly.
+                            Deletes pending_checkouts older than
+                            PENDING_CHECKOUT_RETENTION_HOURS (24) in a single
+                            DELETE statement
+
+Phases:
+
+    1. seed    --messages message_logs and --checkouts pending_checkouts
+               straight into Postgres, --expired-pct of each past retention,
+               then VACUUM ANALYZE so both tables start without dead tuples
+    2. base    order writes (POST /api/orders) at --write-rate for
+               --baseline-s with no cleanup running
+    3. jobs    each job is added to its real Bull queue by a short ts-node
+               process in backend/, which waits for job.finished(). The
+               backend and that process both register the processor, so
+               either may run it; retention comes from the environment of
+               whichever does, and the harness passes --retention-days and
+               --retention-hours through to its own child. Order writes
+               continue at the same rate throughout. Every --sample-interval
+               the sampler reads n_tup_del from pg_stat_user_tables (deletion
+               rate), ungranted locks and the longest lock wait from pg_locks
+               and pg_stat_activity, and the longest running cleanup statement
+    4. bloat   pg_stat_user_tables and relation sizes before and after each
+               job: dead tuples left for autovacuum, table and index bytes
+               (DELETE never shrinks them), WAL written. --vacuum then times a
+               plain VACUUM and reports what it gives back
+
+Order-write p95 during each job is compared with the baseline p95.
+
+The jobs delete every expired row in the database, not only seeded ones; run
+against a disposable database. Seeded rows are tagged template_name /
+reference `perf-cleanup` and retained seeded rows are left in place.
+
+Usage:
+    python scripts/perf/bench_cleanup_jobs.py --messages 5000000 --checkouts 200000
+    python scripts/perf/bench_cleanup_jobs.py --messages 1000000 --expired-pct 40 --write-rate 20 --vacuum
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+from perf_common import (
+    API_URL, LatencyStats, connect_db, ensure_perf_product, format_ghana_phone, ghana_local_number, login,
+    new_session, print_checks, print_header, print_latency_table, query_one, random_area,
+    run_for_duration, save_results, tenant_id_for, timed_request,
+)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+SEED_TAG = 'perf-cleanup'
+ORDER_NOTE = 'perf: cleanup writes'
+
+JOBS = {
+    'messages': {'queue': 'messageCleanupQueue', 'name': 'cleanup-old-messages', 'table': 'message_logs'},
+    'checkouts': {'queue': 'pendingCheckoutCleanupQueue', 'name': 'cleanup-stale-pending',
+                  'table': 'pending_checkouts'},
+}
+
+# Adds one job to the real queue and waits for whichever worker takes it
+TRIGGER_SCRIPT = """
+const queue = require('./src/queues/%(queue)s').default;
+(async () => {
+  const job = await queue.add('%(name)s', {});
+  await job.finished();
+  await queue.close();
+  process.exit(0);
+})().catch((err) => { console.error(err); process.exit(1); });
+"""
+
+TABLE_STATS_SQL = """
+    SELECT n_live_tup, n_dead_tup, n_tup_del, autovacuum_count, vacuum_count,
+           pg_relation_size(relid), pg_indexes_size(relid), pg_total_relation_size(relid)
+    FROM pg_stat_user_tables WHERE relname = %s
+"""
+TABLE_STATS_FIELDS = ('live_tuples', 'dead_tuples', 'tuples_deleted', 'autovacuum_count', 'vacuum_count',
+                      'table_bytes', 'index_bytes', 'total_bytes')
+
+
+def seed_messages(conn, tenant_id, total, expired_pct, retention_days, chunk):
+    expired = total * expired_pct // 100
+    with conn.cursor() as cur:
+        for lo in range(0, total, chunk):
+            cur.execute("""
+                INSERT INTO message_logs (channel, direction, template_name, message_body, status, metadata,
+                                          sent_at, tenant_id, created_at, updated_at)
+                SELECT (ARRAY['whatsapp', 'sms', 'email'])[1 + g %% 3]::"MessageChannel", 'outbound', %(tag)s,
+                       rpad('Hello, your order #' || g || ' is on its way. ', 240, 'Thank you for shopping. '),
+                       (ARRAY['sent', 'delivered', 'read', 'failed'])[1 + g %% 4]::"MessageStatus",
+                       jsonb_build_object('seq', g, 'source', %(tag)s), x.ts, %(tenant)s, x.ts, x.ts
+                FROM generate_series(%(lo)s, %(hi)s) g,
+                     LATERAL (SELECT NOW() - CASE WHEN g < %(expired)s
+                                  THEN (%(days)s + 1 + (g %% 365)) * INTERVAL '1 day'
+                                  ELSE ((g %% (%(days)s - 1)) + random()) * INTERVAL '1 day' END AS ts) x
+            """, {'tag': SEED_TAG, 'tenant': tenant_id, 'lo': lo, 'hi': min(lo + chunk, total) - 1,
+                  'expired': expired, 'days': retention_days})
+            print(f'  message_logs: {min(lo + chunk, total):,}/{total:,}', end='\r', flush=True)
+    print()
+    return expired
+
+
+def seed_checkouts(conn, tenant_id, total, expired_pct, retention_hours, customer_id, form_id):
+    expired = total * expired_pct // 100
+    run = int(time.time())
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO pending_checkouts (reference, tenant_id, customer_id, form_id, payment_method, order_type,
+                                           currency, subtotal, total_amount, paystack_charge_minor, order_items,
+                                           form_data, selected_package, created_at)
+            SELECT %(tag)s || '-' || %(run)s || '-' || g, %(tenant)s, %(customer)s, %(form)s, 'paystack',
+                   'physical', 'GHS', 150, 150, 15000,
+                   '[{"productId": 1, "quantity": 1, "unitPrice": 150}]'::jsonb,
+                   jsonb_build_object('name', 'Perf Checkout ' || g, 'phone', '0241234567'),
+                   '{"name": "Single pack", "price": 150}'::jsonb,
+                   NOW() - CASE WHEN g < %(expired)s THEN (%(hours)s + 1 + g %% 720) * INTERVAL '1 hour'
+                                ELSE (g %% greatest(%(hours)s - 1, 1)) * INTERVAL '1 hour' END
+            FROM generate_series(0, %(total)s - 1) g
+        """, {'tag': SEED_TAG, 'run': run, 'tenant': tenant_id, 'customer': customer_id, 'form': form_id,
+              'expired': expired, 'hours': retention_hours, 'total': total})
+    return expired
+
+
+def table_stats(conn, table):
+    return dict(zip(TABLE_STATS_FIELDS, query_one(conn, TABLE_STATS_SQL, (table,))))
+
+
+def wal_lsn(conn):
+    return query_one(conn, 'SELECT pg_current_wal_lsn()')[0]
+
+
+class OrderWriter:
+    """Creates orders at a fixed rate until stopped, recording latency into the current phase's stats"""
+
+    def __init__(self, session, base, rate, workers):
+        self.session = session
+        self.base = base
+        self.interval_s = workers / rate
+        self.workers = workers
+        self.stats = None
+        self.stop_event = None
+        self.thread = None
+
+    def start(self, name):
+        self.stats = LatencyStats(name)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=run_for_duration, args=(self.write, self.workers, 10 ** 9,
+                                                                      self.stop_event), daemon=True)
+        self.thread.start()
+
+    def write(self, _):
+        stats = self.stats
+        resp, ms, err = timed_request(self.session, 'POST', '/api/orders', json=self.base)
+        stats.record_response(resp, ms, err, ok_statuses=(201,))
+        self.stop_event.wait(max(self.interval_s - ms / 1000, 0))
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        return self.stats.summary()
+
+
+class CleanupSampler(threading.Thread):
+    """Samples deletions, lock waits and the longest cleanup statement until stopped"""
+
+    def __init__(self, table, interval_s):
+        super().__init__(daemon=True)
+        self.table = table
+        self.interval_s = interval_s
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.conn = connect_db()
+
+    def sample(self, t0):
+        deleted = query_one(self.conn, 'SELECT n_tup_del FROM pg_stat_user_tables WHERE relname = %s',
+                            (self.table,))[0]
+        waiting, max_wait_ms, cleanup_ms = query_one(self.conn, """
+            SELECT (SELECT COUNT(*) FROM pg_locks WHERE NOT granted),
+                   COALESCE(MAX(EXTRACT(EPOCH FROM NOW() - query_start) * 1000)
+                            FILTER (WHERE wait_event_type = 'Lock'), 0),
+                   COALESCE(MAX(EXTRACT(EPOCH FROM NOW() - query_start) * 1000)
+                            FILTER (WHERE query ILIKE '%%' || %s || '%%' AND query ILIKE '%%DELETE%%'), 0)
+            FROM pg_stat_activity
+            WHERE datname = current_database() AND state = 'active' AND pid <> pg_backend_pid()
+        """, (self.table,))
+        self.samples.append({'t_s': round(time.perf_counter() - t0, 2), 'tuples_deleted': deleted,
+                             'lock_waiters': waiting, 'max_lock_wait_ms': round(float(max_wait_ms), 1),
+                             'cleanup_statement_ms': round(float(cleanup_ms), 1)})
+
+    def run(self):
+        t0 = time.perf_counter()
+        while not self.stop_event.is_set():
+            self.sample(t0)
+            self.stop_event.wait(self.interval_s)
+        self.sample(t0)
+        self.conn.close()
+
+    def finish(self):
+        self.stop_event.set()
+        self.join()
+
+
+def run_job(key, conn, writer, args):
+    """Trigger one cleanup job under order-write load; returns its measurements"""
+    job = JOBS[key]
+    table = job['table']
+    before = table_stats(conn, table)
+    lsn_before = wal_lsn(conn)
+    env = {**os.environ, 'MESSAGE_LOG_RETENTION_DAYS': str(args.retention_days),
+           'PENDING_CHECKOUT_RETENTION_HOURS': str(args.retention_hours)}
+
+    sampler = CleanupSampler(table, args.sample_interval)
+    writer.start(f'orders during {key}')
+    sampler.start()
+    start = time.perf_counter()
+    child = subprocess.run(['npx', 'ts-node', '--transpile-only', '-e', TRIGGER_SCRIPT % job], cwd=BACKEND_DIR,
+                           env=env, capture_output=True, text=True, timeout=args.job_timeout)
+    runtime_s = time.perf_counter() - start
+    sampler.finish()
+    writes = writer.stop()
+
+    time.sleep(2)  # let the cleanup backend flush its table statistics
+    after = table_stats(conn, table)
+    wal_bytes = query_one(conn, 'SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)', (lsn_before,))[0]
+    deleted = after['tuples_deleted'] - before['tuples_deleted']
+    samples = sampler.samples
+    return {
+        'job': job['name'],
+        'table': table,
+        'returncode': child.returncode,
+        'output_tail': (child.stdout + child.stderr).strip().splitlines()[-10:],
+        'runtime_s': round(runtime_s, 2),
+        'rows_deleted': deleted,
+        'rows_per_s': round(deleted / runtime_s, 1) if runtime_s else None,
+        'max_lock_waiters': max((s['lock_waiters'] for s in samples), default=0),
+        'max_lock_wait_ms': max((s['max_lock_wait_ms'] for s in samples), default=0),
+        'longest_cleanup_statement_ms': max((s['cleanup_statement_ms'] for s in samples), default=0),
+        'wal_bytes': int(wal_bytes),
+        'before': before,
+        'after': after,
+        'order_writes': writes,
+        'samples': samples,
+    }
+
+
+def vacuum(conn, table):
+    before = table_stats(conn, table)
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute(f'VACUUM (ANALYZE) {table}')
+    elapsed = time.perf_counter() - start
+    time.sleep(1)
+    after = table_stats(conn, table)
+    return {'table': table, 'runtime_s': round(elapsed, 2), 'before': before, 'after': after}
+
+
+def mb(n):
+    return f'{n / 2 ** 20:,.1f} MB'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--messages', type=int, default=5_000_000, help='message_logs rows to seed')
+    parser.add_argument('--checkouts', type=int, default=200_000, help='pending_checkouts rows to seed')
+    parser.add_argument('--expired-pct', type=int, default=30, help='share of seeded rows past retention')
+    parser.add_argument('--retention-days', type=int, default=90, help='must match MESSAGE_LOG_RETENTION_DAYS')
+    parser.add_argument('--retention-hours', type=int, default=24,
+                        help='must match PENDING_CHECKOUT_RETENTION_HOURS')
+    parser.add_argument('--chunk', type=int, default=500_000, help='message_logs rows per seeding statement')
+    parser.add_argument('--jobs', default='messages,checkouts', help=f"subset of {','.join(JOBS)}")
+    parser.add_argument('--write-rate', type=float, default=10, help='order creations per second')
+    parser.add_argument('--write-workers', type=int, default=8)
+    parser.add_argument('--baseline-s', type=int, default=60)
+    parser.add_argument('--sample-interval', type=float, default=0.5)
+    parser.add_argument('--job-timeout', type=int, default=3600)
+    parser.add_argument('--max-slowdown', type=float, default=2.0, help='allowed order p95 vs baseline')
+    parser.add_argument('--max-lock-wait-ms', type=float, default=1000)
+    parser.add_argument('--vacuum', action='store_true', help='time a plain VACUUM after each job')
+    args = parser.parse_args()
+
+    jobs = [j for j in args.jobs.split(',') if j]
+    print_header('🧹 Cleanup Job Benchmark', target=API_URL, messages=f'{args.messages:,}',
+                 checkouts=f'{args.checkouts:,}', expired=f'{args.expired_pct}%', jobs=jobs,
+                 write_rate=f'{args.write_rate:g}/s')
+
+    token = login()
+    session = new_session(token, pool_size=args.write_workers)
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    product_id = ensure_perf_product(conn, tenant_id)
+
+    state, area = random_area()
+    base = {'orderItems': [{'productId': product_id, 'quantity': 1, 'unitPrice': 150}],
+            'subtotal': 150, 'totalAmount': 150, 'deliveryAddress': f'{area} junction',
+            'deliveryState': state, 'deliveryArea': area, 'notes': ORDER_NOTE}
+    first, _, err = timed_request(session, 'POST', '/api/orders', json={
+        **base, 'customerName': 'Perf Cleanup', 'customerPhone': format_ghana_phone(ghana_local_number(), 'local')})
+    if err or first.status_code != 201:
+        raise SystemExit(f'Order creation failed: {err or first.text[:200]}')
+    customer_id = first.json()['order']['customerId']
+    base['customerId'] = customer_id
+
+    print('\n[Phase 1] Seeding')
+    start = time.perf_counter()
+    expected = {}
+    if 'messages' in jobs:
+        expected['messages'] = seed_messages(conn, tenant_id, args.messages, args.expired_pct,
+                                             args.retention_days, args.chunk)
+    if 'checkouts' in jobs:
+        form = query_one(conn, 'SELECT id FROM checkout_forms WHERE tenant_id = %s ORDER BY id LIMIT 1',
+                         (tenant_id,))
+        expected['checkouts'] = seed_checkouts(conn, tenant_id, args.checkouts, args.expired_pct,
+                                               args.retention_hours, customer_id, form[0] if form else 0)
+    with conn.cursor() as cur:
+        for key in jobs:
+            cur.execute(f"VACUUM (ANALYZE) {JOBS[key]['table']}")
+    backlog = {key: query_one(conn, f"""
+        SELECT COUNT(*) FROM {JOBS[key]['table']} WHERE created_at < NOW() - %s * INTERVAL '1 hour'
+    """, ((args.retention_days * 24 if key == 'messages' else args.retention_hours),))[0] for key in jobs}
+    print(f'  Seeded in {time.perf_counter() - start:.0f}s; expired rows now: '
+          + ', '.join(f"{JOBS[k]['table']} {n:,}" for k, n in backlog.items()))
+
+    print(f'\n[Phase 2] Baseline order writes ({args.baseline_s}s)')
+    writer = OrderWriter(session, base, args.write_rate, args.write_workers)
+    writer.start('orders baseline')
+    time.sleep(args.baseline_s)
+    baseline = writer.stop()
+    print_latency_table([baseline])
+
+    results = {}
+    for phase, key in enumerate(jobs, start=3):
+        job = JOBS[key]
+        print(f"\n[Phase {phase}] {job['name']} ({job['table']}, {backlog[key]:,} expired rows)")
+        result = run_job(key, conn, writer, args)
+        result['remaining_expired'] = query_one(conn, f"""
+            SELECT COUNT(*) FROM {job['table']} WHERE created_at < NOW() - %s * INTERVAL '1 hour'
+        """, ((args.retention_days * 24 if key == 'messages' else args.retention_hours),))[0]
+        result['retained_seeded'] = query_one(conn, (
+            'SELECT COUNT(*) FROM message_logs WHERE template_name = %s' if key == 'messages' else
+            'SELECT COUNT(*) FROM pending_checkouts WHERE reference LIKE %s || \'-%%\''), (SEED_TAG,))[0]
+        if args.vacuum:
+            result['vacuum'] = vacuum(conn, job['table'])
+        results[key] = result
+
+        b, a = result['before'], result['after']
+        status = '✅' if result['returncode'] == 0 else f"❌ exit {result['returncode']}"
+        print(f"  {status} in {result['runtime_s']:.1f}s: {result['rows_deleted']:,} rows deleted "
+              f"({result['rows_per_s'] or 0:,.0f}/s), {result['remaining_expired']:,} expired left")
+        print(f"  Locks: up to {result['max_lock_waiters']} waiter(s), longest wait "
+              f"{result['max_lock_wait_ms']:.0f} ms; longest cleanup statement "
+              f"{result['longest_cleanup_statement_ms']:.0f} ms; WAL {mb(result['wal_bytes'])}")
+        print(f"  Bloat: dead tuples {b['dead_tuples']:,} -> {a['dead_tuples']:,}, live {b['live_tuples']:,} -> "
+              f"{a['live_tuples']:,}; table {mb(b['table_bytes'])} -> {mb(a['table_bytes'])}, "
+              f"indexes {mb(b['index_bytes'])} -> {mb(a['index_bytes'])}; "
+              f"autovacuum runs +{a['autovacuum_count'] - b['autovacuum_count']}")
+        if args.vacuum:
+            v = result['vacuum']
+            print(f"  VACUUM took {v['runtime_s']:.1f}s: dead tuples {v['before']['dead_tuples']:,} -> "
+                  f"{v['after']['dead_tuples']:,}, table {mb(v['before']['table_bytes'])} -> "
+                  f"{mb(v['after']['table_bytes'])}")
+        if result['returncode'] != 0:
+            print('  ' + '\n  '.join(result['output_tail']))
+        print_latency_table([baseline, result['order_writes']])
+
+    checks = []
+    for key, r in results.items():
+        table = r['table']
+        slowdown = r['order_writes']['p95_ms'] / baseline['p95_ms'] if baseline['p95_ms'] else float('inf')
+        r['order_p95_slowdown'] = round(slowdown, 2)
+        checks += [
+            (f"{r['job']} completed", r['returncode'] == 0),
+            (f'{table}: every expired row deleted', r['remaining_expired'] == 0),
+            (f'{table}: order write p95 within {args.max_slowdown:g}x baseline ({slowdown:.2f}x)',
+             slowdown <= args.max_slowdown),
+            (f'{table}: no order write errors during cleanup', r['order_writes']['errors'] == 0),
+            (f'{table}: lock waits under {args.max_lock_wait_ms:g} ms', r['max_lock_wait_ms'] < args.max_lock_wait_ms),
+        ]
+    passed = print_checks(checks)
+
+    save_results('cleanup-jobs', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'settings': vars(args),
+        'expired_seeded': expected,
+        'expired_before': backlog,
+        'baseline_order_writes': baseline,
+        'jobs': results,
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
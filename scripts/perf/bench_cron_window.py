@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Morning cron window simulator: aging, overdue and reconciliation jobs across many tenants under rep traffic.
+
+Three Bull crons run once for the whole platform, with no tenant context, at
+fixed wall-clock times:
+
+    agent-aging-refresh/refresh-buckets              06:00  agingService.refreshAll:
+                                                            every outstanding collection
+                                                            of every tenant, one upsert
+                                                            per agent in one transaction
+    agent-aging-refresh/notify-overdue-collections   10:00  overdue agents from the
+                                                            buckets, one notification per
+                                                            admin
+    financial-reconciliation/
+        reconcile-delivered-orders                   */15   the 50 oldest delivered COD
+                                                            orders with no revenue
+                                                            recognized, synced one by one
+
+Phases:
+
+    1. seed    --tenants perf-cron-* tenants, each with an admin, --agents
+               delivery agents holding --collections outstanding collections
+               aged 0-14 days, --reps sales reps and --unsynced delivered COD
+               orders the reconciliation cron has to pick up
+    2. clock   a simulated morning from --from to --to, --minute-s real seconds
+               per minute. Reps log in over --ramp-min from --shift-start and
+               then read orders, customers and notifications with --think-ms
+               pauses. Each cron fires at its simulated time by adding the job
+               straight to its Bull queue in Redis (a small node process using
+               backend/node_modules/bull); the live repeat schedule is not
+               touched and the running backend's workers process the job.
+               --aligned fires all three at --shift-start instead. Every
+               --sample-interval the sampler reads wait / active / delayed
+               counts for both queues from Redis and active statements and lock
+               waiters from pg_stat_activity
+    3. report  per job: queue wait, run time, attempts; rep latency while any
+               job runs vs while none does; the aging buckets match the
+               outstanding collections; the reconciliation backlog left and
+               how many 15-minute runs draining it takes; every overdue
+               notification went to an admin of the agents' own tenant and is
+               stored under that tenant
+
+Needs `pip install redis`, Node and backend dependencies installed (npm ci in
+backend/), the backend running with NODE_ENV=development against the same
+Redis (apiLimiter allows 500 requests per 15 min in production). The
+reconciliation and aging jobs see every tenant in the database, not only the
+seeded ones. Seeded tenants are left in place; --cleanup deletes them.
+
+Usage:
+    python scripts/perf/bench_cron_window.py
+    python scripts/perf/bench_cron_window.py --tenants 1000 --agents 10 --reps 200 --minute-s 0.5
+    python scripts/perf/bench_cron_window.py --aligned --tenants 300 --unsynced 20
+    python scripts/perf/bench_cron_window.py --cleanup
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import redis
+
+from perf_common import (
+    ADMIN_EMAIL, ADMIN_PASSWORD, API_URL, LatencyStats, connect_db, copy_rows, login, new_session, percentile,
+    print_checks, print_header, print_latency_table, query_all, query_one, random_area, run_concurrent,
+    save_results, timed_request,
+)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+SLUG_PREFIX = 'perf-cron-'
+EMAIL_DOMAIN = 'perf-cron.local'
+SEED_MARKER = 'perf-seed:cron-window'
+UNSYNCED_MARKER = 'perf-seed:cron-window unsynced'
+RECONCILE_BATCH = 50
+RECONCILE_EVERY_MIN = 15
+OUTSTANDING = ('draft', 'verified', 'approved', 'deposited')
+
+JOBS = {
+    'refresh': {'queue': 'agent-aging-refresh', 'name': 'refresh-buckets', 'at': '06:00', 'opts': {}},
+    'notify': {'queue': 'agent-aging-refresh', 'name': 'notify-overdue-collections', 'at': '10:00', 'opts': {}},
+    'reconcile': {'queue': 'financial-reconciliation', 'name': 'reconcile-delivered-orders', 'at': None,
+                  'opts': {'timeout': 120_000}},
+}
+QUEUES = sorted({job['queue'] for job in JOBS.values()})
+
+# Adds jobs to the real queues on request, one JSON line per job. No processor is
+# registered here, so only the backend's workers run them.
+ENQUEUE_SCRIPT = """
+const Bull = require('bull');
+const readline = require('readline');
+const queues = {};
+const defaults = { attempts: 3, backoff: { type: 'exponential', delay: 5000 } };
+readline.createInterface({ input: process.stdin }).on('line', async (line) => {
+  const { queue, name, opts } = JSON.parse(line);
+  try {
+    queues[queue] = queues[queue] || new Bull(queue, process.env.PERF_REDIS_URL);
+    const job = await queues[queue].add(name, {}, { ...defaults, ...opts });
+    console.log(JSON.stringify({ queue, name, id: String(job.id) }));
+  } catch (err) {
+    console.log(JSON.stringify({ queue, name, error: err.message }));
+  }
+});
+"""
+
+SEED_ORDERS_SQL = """
+    WITH agents AS (
+        SELECT u.id AS agent_id, u.tenant_id, c.id AS customer_id
+        FROM users u JOIN customers c ON c.tenant_id = u.tenant_id AND c.notes = %(marker)s
+        WHERE u.role = 'delivery_agent' AND u.tenant_id = ANY(%(tenants)s)
+    ), placed AS (
+        INSERT INTO orders (customer_id, delivery_agent_id, status, payment_status, subtotal, total_amount, cod_amount,
+                            revenue_recognized, notes, tenant_id, delivery_date, created_at, updated_at)
+        SELECT a.customer_id, a.agent_id, 'delivered', 'paid', 150, 150, 150, true, %(marker)s, a.tenant_id,
+               x.ts, x.ts, x.ts
+        FROM agents a CROSS JOIN generate_series(1, %(per_agent)s) g,
+             LATERAL (SELECT now() - random() * interval '14 days' + g * interval '0 s' AS ts) x
+        RETURNING id, delivery_agent_id, delivery_date
+    )
+    INSERT INTO agent_collections (order_id, agent_id, amount, status, collection_date, created_at, updated_at)
+    SELECT id, delivery_agent_id, 150,
+           (ARRAY['draft', 'verified', 'approved', 'deposited', 'reconciled'])[1 + floor(random() * 5)::int]
+               ::"CollectionStatus",
+           delivery_date, delivery_date, delivery_date
+    FROM placed
+"""
+
+SEED_UNSYNCED_SQL = """
+    INSERT INTO orders (customer_id, delivery_agent_id, status, payment_status, subtotal, total_amount, cod_amount,
+                        revenue_recognized, notes, tenant_id, delivery_date, created_at, updated_at)
+    SELECT c.id, a.id, 'delivered', 'pending', 150, 150, 150, false, %(unsynced)s, c.tenant_id,
+           now() - g * interval '1 minute', now() - interval '1 day', now() - g * interval '1 minute'
+    FROM customers c CROSS JOIN generate_series(1, %(per_tenant)s) g,
+         LATERAL (SELECT id FROM users WHERE tenant_id = c.tenant_id AND role = 'delivery_agent'
+                  ORDER BY id LIMIT 1) a
+    WHERE c.notes = %(marker)s AND c.tenant_id = ANY(%(tenants)s)
+"""
+
+
+def parse_hhmm(text):
+    hours, minutes = text.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def hhmm(minute):
+    return f'{int(minute) // 60:02d}:{int(minute) % 60:02d}'
+
+
+def rep_email(rank, j):
+    return f'rep-{rank}-{j}@{EMAIL_DOMAIN}'
+
+
+def seed_tenants(conn, args, password_hash, rng):
+    """Top the perf-cron tenants up to --tenants; returns the new tenant count"""
+    existing = query_one(conn, 'SELECT COUNT(*) FROM tenants WHERE slug LIKE %s', (SLUG_PREFIX + '%',))[0]
+    if existing >= args.tenants:
+        return 0
+    now = datetime.now()
+    tenants = {rank: str(uuid.uuid4()) for rank in range(existing + 1, args.tenants + 1)}
+    copy_rows(conn, 'tenants', ['id', 'name', 'slug', 'subscription_status', 'createdAt', 'updatedAt'],
+              ((tid, f'Perf Cron {rank}', f'{SLUG_PREFIX}{rank:05d}', 'active', now, now)
+               for rank, tid in tenants.items()))
+
+    def users():
+        for rank, tid in tenants.items():
+            yield f'admin-{rank}@{EMAIL_DOMAIN}', password_hash, 'admin', 'Perf', f'Admin{rank}', tid, now, now
+            for j in range(args.agents):
+                yield f'agent-{rank}-{j}@{EMAIL_DOMAIN}', password_hash, 'delivery_agent', 'Perf', f'Agent{rank}x{j}', \
+                    tid, now, now
+            for j in range(args.reps_per_tenant):
+                yield rep_email(rank, j), password_hash, 'sales_rep', 'Perf', f'Rep{rank}x{j}', tid, now, now
+
+    copy_rows(conn, 'users', ['email', 'password', 'role', 'first_name', 'last_name', 'tenant_id', 'created_at',
+                              'updated_at'], users())
+    copy_rows(conn, 'customers', ['first_name', 'last_name', 'phone_number', 'address', 'state', 'area', 'notes',
+                                  'tenant_id', 'created_at', 'updated_at'],
+              (('Perf', f'Customer{rank}', '0240000000', 'Perf street', *random_area(rng), SEED_MARKER, tid, now, now)
+               for rank, tid in tenants.items()))
+    params = {'marker': SEED_MARKER, 'unsynced': UNSYNCED_MARKER, 'tenants': list(tenants.values()),
+              'per_agent': args.collections, 'per_tenant': args.unsynced}
+    with conn.cursor() as cur:
+        cur.execute(SEED_ORDERS_SQL, params)
+        if args.unsynced:
+            cur.execute(SEED_UNSYNCED_SQL, params)
+        for table in ('tenants', 'users', 'customers', 'orders', 'agent_collections'):
+            cur.execute(f'ANALYZE {table}')
+    return len(tenants)
+
+
+def unsynced_backlog(conn):
+    """Orders the reconciliation cron would still pick up, across every tenant"""
+    return query_one(conn, """
+        SELECT COUNT(*) FROM orders
+        WHERE status = 'delivered' AND revenue_recognized = false AND cod_amount > 0 AND deleted_at IS NULL
+    """)[0]
+
+
+def aging_expected(conn):
+    return query_one(conn, """
+        SELECT COUNT(DISTINCT ac.agent_id) FROM agent_collections ac JOIN orders o ON o.id = ac.order_id
+        WHERE ac.status::text = ANY(%s) AND o.deleted_at IS NULL
+    """, (list(OUTSTANDING),))[0]
+
+
+class Enqueuer:
+    """Long-lived node process adding jobs to the Bull queues; one line in, one JSON line out"""
+
+    def __init__(self, redis_url):
+        self.proc = subprocess.Popen(['node', '-e', ENQUEUE_SCRIPT], cwd=BACKEND_DIR, text=True, bufsize=1,
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     env={**os.environ, 'PERF_REDIS_URL': redis_url})
+        self.lock = threading.Lock()
+
+    def add(self, key):
+        job = JOBS[key]
+        with self.lock:
+            self.proc.stdin.write(json.dumps({'queue': job['queue'], 'name': job['name'], 'opts': job['opts']}) + '\n')
+            reply = json.loads(self.proc.stdout.readline() or '{"error": "enqueue process exited"}')
+        if 'error' in reply:
+            raise SystemExit(f"Could not add {job['queue']}/{job['name']}: {reply['error']}")
+        return reply['id']
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.terminate()
+        self.proc.wait(timeout=10)
+
+
+class JobTracker(threading.Thread):
+    """Follows fired jobs through Bull's job hashes until each finishes or fails for good"""
+
+    def __init__(self, rdb, t0):
+        super().__init__(daemon=True)
+        self.rdb = rdb
+        self.t0 = t0
+        self.jobs = []
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+    def fired(self, key, job_id, sim_minute):
+        with self.lock:
+            self.jobs.append({'key': key, 'queue': JOBS[key]['queue'], 'id': job_id, 'sim_time': hhmm(sim_minute),
+                              'enqueued_s': time.monotonic() - self.t0, 'finished_s': None, 'state': 'waiting'})
+
+    def poll(self):
+        with self.lock:
+            pending = [j for j in self.jobs if j['finished_s'] is None]
+        for job in pending:
+            fields = self.rdb.hmget(f"bull:{job['queue']}:{job['id']}", 'timestamp', 'processedOn', 'finishedOn',
+                                    'failedReason', 'attemptsMade')
+            created, processed, finished, reason, attempts = (f.decode() if f else None for f in fields)
+            if processed and job['state'] == 'waiting':
+                job['state'] = 'active'
+                job['wait_ms'] = int(processed) - int(created)
+            in_failed = self.rdb.zscore(f"bull:{job['queue']}:failed", job['id']) is not None
+            if finished and (not in_failed or int(attempts or 0) >= 3):
+                job.update(state='failed' if in_failed else 'completed', finished_s=time.monotonic() - self.t0,
+                           run_ms=int(finished) - int(processed or finished), attempts=int(attempts or 0),
+                           failed_reason=reason)
+
+    def run(self):
+        while not self.stop.is_set():
+            self.poll()
+            self.stop.wait(0.2)
+
+    def wait_all(self, timeout_s):
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            with self.lock:
+                if all(j['finished_s'] is not None for j in self.jobs):
+                    return True
+            time.sleep(0.5)
+        return False
+
+    def windows(self):
+        with self.lock:
+            return [(j['enqueued_s'], j['finished_s'] if j['finished_s'] is not None else float('inf'))
+                    for j in self.jobs]
+
+
+class Sampler(threading.Thread):
+    """Queue depth from Redis and database pressure from pg_stat_activity, every interval"""
+
+    def __init__(self, rdb, t0, interval):
+        super().__init__(daemon=True)
+        self.rdb = rdb
+        self.t0 = t0
+        self.interval = interval
+        self.samples = []
+        self.stop = threading.Event()
+        self.conn = connect_db()
+
+    def sample(self, sim_minute):
+        row = {'t_s': round(time.monotonic() - self.t0, 1), 'sim_time': hhmm(sim_minute())}
+        for queue in QUEUES:
+            pipe = self.rdb.pipeline()
+            pipe.llen(f'bull:{queue}:wait')
+            pipe.llen(f'bull:{queue}:active')
+            pipe.zcard(f'bull:{queue}:delayed')
+            waiting, active, delayed = pipe.execute()
+            row[queue] = {'wait': waiting, 'active': active, 'delayed': delayed}
+        active_sql, longest_ms, lock_waiters = query_one(self.conn, """
+            SELECT COUNT(*), COALESCE(MAX(EXTRACT(EPOCH FROM NOW() - query_start) * 1000), 0),
+                   COUNT(*) FILTER (WHERE wait_event_type = 'Lock')
+            FROM pg_stat_activity
+            WHERE datname = current_database() AND state = 'active' AND pid <> pg_backend_pid()
+        """)
+        row.update(active_statements=active_sql, longest_statement_ms=round(float(longest_ms), 1),
+                   lock_waiters=lock_waiters)
+        self.samples.append(row)
+
+    def run_with(self, sim_minute):
+        while not self.stop.is_set():
+            self.sample(sim_minute)
+            self.stop.wait(self.interval)
+        self.conn.close()
+
+
+class Reps:
+    """Sales reps logging in over the ramp and reading until the window closes"""
+
+    def __init__(self, sessions, args, t0):
+        self.sessions = sessions
+        self.args = args
+        self.t0 = t0
+        self.records = []
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.paths = ['/api/orders?page=1&limit=20', '/api/customers?page=1&limit=20',
+                      '/api/notifications?page=1&limit=20']
+
+    def work(self, index, start_s):
+        rng = random.Random(index)
+        session = self.sessions[index]
+        if self.stop.wait(start_s):
+            return
+        while not self.stop.is_set():
+            resp, ms, err = timed_request(session, 'GET', rng.choice(self.paths))
+            status = resp.status_code if resp is not None else 'error'
+            with self.lock:
+                self.records.append((time.monotonic() - self.t0, ms, err is None and status == 200, status))
+            self.stop.wait(self.args.think_ms / 1000 * rng.uniform(0.5, 1.5))
+
+    def start(self, first_start_s, ramp_s):
+        rng = random.Random(0)
+        self.threads = [threading.Thread(target=self.work, args=(i, first_start_s + rng.uniform(0, ramp_s)),
+                                         daemon=True) for i in range(len(self.sessions))]
+        for thread in self.threads:
+            thread.start()
+
+    def finish(self):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+
+
+def split_latency(records, windows):
+    """Rep requests sent while at least one job was queued or running vs while none was"""
+    during, idle = LatencyStats('rep reads, jobs running'), LatencyStats('rep reads, no job running')
+    for t, ms, ok, status in records:
+        stats = during if any(lo <= t <= hi for lo, hi in windows) else idle
+        stats.record(ms, ok=ok, status=status)
+    return idle.summary(), during.summary()
+
+
+def schedule(args):
+    """(simulated minute, job key) firings inside the window, in order"""
+    start, end = parse_hhmm(args.from_time), parse_hhmm(args.to_time)
+    if args.aligned:
+        at = parse_hhmm(args.shift_start)
+        return [(at, key) for key in JOBS]
+    firings = [(parse_hhmm(job['at']), key) for key, job in JOBS.items() if job['at']]
+    first = start + (-start) % RECONCILE_EVERY_MIN
+    firings += [(m, 'reconcile') for m in range(first, end + 1, RECONCILE_EVERY_MIN)]
+    return sorted((m, key) for m, key in firings if start <= m <= end)
+
+
+def check_notifications(conn, since):
+    rows = query_all(conn, """
+        SELECT n.tenant_id, u.tenant_id, length(n.message),
+               (SELECT COUNT(*) FROM jsonb_array_elements(n.data -> 'agents') a
+                JOIN users ag ON ag.id = (a ->> 'agentId')::int
+                WHERE ag.tenant_id IS DISTINCT FROM u.tenant_id)
+        FROM notifications n JOIN users u ON u.id = n.user_id
+        WHERE n.type = 'overdue_collections' AND n.created_at >= %s
+    """, (since,))
+    return {
+        'notifications': len(rows),
+        'tenants_notified': len({r[1] for r in rows}),
+        'untagged': sum(1 for r in rows if r[0] is None and r[1] is not None),
+        'foreign_agent_mentions': sum(r[3] for r in rows),
+        'notifications_with_foreign_agents': sum(1 for r in rows if r[3]),
+        'max_message_chars': max((r[2] for r in rows), default=0),
+    }
+
+
+def cleanup(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            DELETE FROM agent_collections WHERE order_id IN (
+                SELECT o.id FROM orders o JOIN tenants t ON t.id = o.tenant_id WHERE t.slug LIKE %s)
+        """, (SLUG_PREFIX + '%',))
+        cur.execute('DELETE FROM tenants WHERE slug LIKE %s', (SLUG_PREFIX + '%',))
+        print(f'  Deleted {cur.rowcount:,} perf-cron tenants with their users, orders and notifications')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tenants', type=int, default=300)
+    parser.add_argument('--agents', type=int, default=5, help='delivery agents per tenant')
+    parser.add_argument('--collections', type=int, default=20, help='collections per agent, aged 0-14 days')
+    parser.add_argument('--reps-per-tenant', type=int, default=3, help='sales rep accounts seeded per tenant')
+    parser.add_argument('--unsynced', type=int, default=5, help='delivered orders per tenant missing revenue')
+    parser.add_argument('--reps', type=int, default=100, help='reps generating traffic (across the first tenants)')
+    parser.add_argument('--think-ms', type=float, default=1000, help='mean pause between a rep\'s requests')
+    parser.add_argument('--from', dest='from_time', default='05:45', help='simulated window start')
+    parser.add_argument('--to', dest='to_time', default='10:30', help='simulated window end')
+    parser.add_argument('--shift-start', default='05:55', help='first rep login (and --aligned firing time)')
+    parser.add_argument('--ramp-min', type=float, default=30, help='simulated minutes over which reps log in')
+    parser.add_argument('--minute-s', type=float, default=0.25, help='real seconds per simulated minute')
+    parser.add_argument('--aligned', action='store_true', help='fire every job at --shift-start at once')
+    parser.add_argument('--job-timeout', type=float, default=600, help='seconds to wait for jobs after the window')
+    parser.add_argument('--sample-interval', type=float, default=1.0)
+    parser.add_argument('--max-slowdown', type=float, default=1.5, help='allowed rep p95 with jobs vs without')
+    parser.add_argument('--redis-url', default=os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+    parser.add_argument('--cleanup', action='store_true', help='delete the seeded tenants and exit')
+    parser.add_argument('--seed', type=int, default=19)
+    args = parser.parse_args()
+
+    conn = connect_db()
+    if args.cleanup:
+        cleanup(conn)
+        conn.close()
+        return
+
+    rng = random.Random(args.seed)
+    firings = schedule(args)
+    window_min = parse_hhmm(args.to_time) - parse_hhmm(args.from_time)
+    print_header('⏰ Morning Cron Window Simulator', target=API_URL, redis=args.redis_url,
+                 tenants=f'{args.tenants:,} x {args.agents} agents x {args.collections} collections',
+                 unsynced=f'{args.unsynced} per tenant', reps=f'{args.reps} from {args.shift_start}',
+                 window=f'{args.from_time}-{args.to_time} in {window_min * args.minute_s:.0f}s',
+                 firings=f"{len(firings)} ({'aligned' if args.aligned else 'cron schedule'})")
+
+    print('\n[Phase 1] Seeding tenants')
+    start = time.perf_counter()
+    password_hash = query_one(conn, 'SELECT password FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+    added = seed_tenants(conn, args, password_hash, rng)
+    backlog_before = unsynced_backlog(conn)
+    outstanding_agents = aging_expected(conn)
+    print(f'  +{added:,} tenants in {time.perf_counter() - start:.0f}s; {outstanding_agents:,} agents with '
+          f'outstanding collections, {backlog_before:,} delivered orders awaiting reconciliation')
+
+    rdb = redis.Redis.from_url(args.redis_url)
+    rdb.ping()
+    reps_per = max(args.reps_per_tenant, 1)
+    emails = [rep_email(1 + i // reps_per, i % reps_per) for i in range(args.reps)]
+    sessions = run_concurrent(lambda email: new_session(login(email, ADMIN_PASSWORD), pool_size=2), emails, 16)
+    print(f'  {len(sessions)} reps logged in')
+    enqueuer = Enqueuer(args.redis_url)
+
+    print(f'\n[Phase 2] Simulated morning {args.from_time}-{args.to_time}')
+    t0 = time.monotonic()
+    start_min = parse_hhmm(args.from_time)
+
+    def sim_minute():
+        return start_min + (time.monotonic() - t0) / args.minute_s
+
+    tracker = JobTracker(rdb, t0)
+    sampler = Sampler(rdb, t0, args.sample_interval)
+    threading.Thread(target=sampler.run_with, args=(sim_minute,), daemon=True).start()
+    tracker.start()
+    reps = Reps(sessions, args, t0)
+    reps.start((parse_hhmm(args.shift_start) - start_min) * args.minute_s, args.ramp_min * args.minute_s)
+    fired_at = datetime.now()
+
+    for minute, key in firings:
+        delay = t0 + (minute - start_min) * args.minute_s - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        tracker.fired(key, enqueuer.add(key), minute)
+        print(f'  {hhmm(minute)} fired {JOBS[key]["queue"]}/{JOBS[key]["name"]}')
+    remaining = t0 + window_min * args.minute_s - time.monotonic()
+    if remaining > 0:
+        time.sleep(remaining)
+    drained = tracker.wait_all(args.job_timeout)
+    reps.finish()
+    tracker.stop.set()
+    sampler.stop.set()
+    enqueuer.close()
+
+    print('\n[Phase 3] Results')
+    jobs = tracker.jobs
+    print(f"\n  {'fired':<7}{'job':<30}{'state':<11}{'wait':>9}{'run':>10}{'tries':>7}")
+    for j in jobs:
+        print(f"  {j['sim_time']:<7}{JOBS[j['key']]['name']:<30}{j['state']:<11}"
+              f"{j.get('wait_ms', 0) / 1000:>8.1f}s{j.get('run_ms', 0) / 1000:>9.1f}s{j.get('attempts', 0):>7}")
+    idle, during = split_latency(reps.records, tracker.windows())
+    print_latency_table([idle, during])
+    slowdown = during['p95_ms'] / idle['p95_ms'] if idle['p95_ms'] and during['count'] else 0.0
+    peak_wait = {q: max((s[q]['wait'] + s[q]['active'] for s in sampler.samples), default=0) for q in QUEUES}
+    peak_lock_waiters = max((s['lock_waiters'] for s in sampler.samples), default=0)
+    longest_statement = max((s['longest_statement_ms'] for s in sampler.samples), default=0)
+    print(f'  rep p95 {idle["p95_ms"]:.0f} ms without jobs, {during["p95_ms"]:.0f} ms with ({slowdown:.2f}x)')
+    print('  peak queue depth (wait + active): ' + ', '.join(f'{q} {n}' for q, n in peak_wait.items()))
+    print(f'  peak lock waiters {peak_lock_waiters}, longest statement {longest_statement / 1000:.1f}s')
+
+    buckets = query_one(conn, 'SELECT COUNT(*) FROM agent_aging_buckets')[0]
+    backlog_after = unsynced_backlog(conn)
+    reconcile_runs = sum(1 for j in jobs if j['key'] == 'reconcile' and j['state'] == 'completed')
+    drain_runs = math.ceil(backlog_after / RECONCILE_BATCH)
+    notes = check_notifications(conn, fired_at)
+    print(f'  aging buckets {buckets:,} for {outstanding_agents:,} agents with outstanding collections')
+    print(f'  reconciliation backlog {backlog_before:,} -> {backlog_after:,} after {reconcile_runs} run(s); '
+          f'{drain_runs:,} more runs ({drain_runs * RECONCILE_EVERY_MIN / 60:,.1f} h at */15) to drain')
+    print(f"  overdue notifications: {notes['notifications']:,} to {notes['tenants_notified']:,} tenant(s), "
+          f"{notes['notifications_with_foreign_agents']:,} naming other tenants' agents, "
+          f"{notes['untagged']:,} stored without a tenant, longest {notes['max_message_chars']:,} chars")
+
+    fired_keys = {key for _, key in firings}
+    completed = [j for j in jobs if j['state'] == 'completed']
+    waits = sorted(j.get('wait_ms', 0) for j in jobs)
+    checks = [
+        (f'Every fired job completed ({len(completed)} of {len(jobs)})', drained and len(completed) == len(jobs)),
+        (f'Rep p95 while jobs run at most {args.max_slowdown:g}x idle ({slowdown:.2f}x)',
+         during['count'] == 0 or slowdown <= args.max_slowdown),
+        ('No rep request errors', idle['errors'] == 0 and during['errors'] == 0),
+        (f'Jobs started within one reconcile interval of firing (max wait {percentile(waits, 100) / 1000:.1f}s)',
+         not waits or waits[-1] <= RECONCILE_EVERY_MIN * 60_000),
+    ]
+    if 'refresh' in fired_keys:
+        checks.append((f'Aging buckets cover every agent with outstanding collections ({buckets:,} vs '
+                       f'{outstanding_agents:,})', buckets == outstanding_agents))
+    if 'reconcile' in fired_keys:
+        checks.append((f'Reconciliation kept up with the backlog ({backlog_after:,} left)',
+                       backlog_after <= backlog_before - min(backlog_before, RECONCILE_BATCH * reconcile_runs)))
+    if 'notify' in fired_keys:
+        checks.append((f"Overdue notifications stay inside their tenant "
+                       f"({notes['notifications_with_foreign_agents']:,} leak, {notes['untagged']:,} untagged)",
+                       notes['notifications_with_foreign_agents'] == 0 and notes['untagged'] == 0))
+    passed = print_checks(checks)
+
+    save_results('cron-window', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'settings': vars(args),
+        'firings': [{'sim_time': hhmm(m), 'job': key} for m, key in firings],
+        'jobs': jobs,
+        'rep_latency': {'idle': idle, 'during_jobs': during, 'p95_slowdown': round(slowdown, 2)},
+        'job_wait_ms_p95': percentile(waits, 95),
+        'peak_queue_depth': peak_wait,
+        'peak_lock_waiters': peak_lock_waiters,
+        'longest_statement_ms': longest_statement,
+        'aging': {'buckets': buckets, 'agents_outstanding': outstanding_agents},
+        'reconciliation': {'backlog_before': backlog_before, 'backlog_after': backlog_after,
+                           'runs_completed': reconcile_runs, 'runs_to_drain': drain_runs},
+        'notifications': notes,
+        'samples': sampler.samples,
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Customer lookup by phone - stress benchmark for the duplicate-detection paths.
+
+utils/customerLookup.ts (findCustomerByPhoneIncludingArchived /
+findAndReactivateCustomerByPhone) runs on every manual, public, webhook and
+bulk-import order. This harness:
+
+  1. Seeds millions of customers for the admin's tenant straight into Postgres,
+     with realistic Ghanaian phone formats, a share of archived (is_active =
+     false) records and a share of format-variant duplicates of the same number.
+  2. Checks the lookup query plan (phone_number + tenant_id) uses the
+     customers_phone_number_tenant_key index and counts format-variant
+     duplicates, since the lookup compares raw strings and does not normalize.
+  3. Times the raw lookup SQL at concurrency (hit active / hit archived / miss).
+  4. Pushes orders through POST /api/orders for new, existing and archived
+     phones plus a customerId baseline, and through POST /api/orders/bulk, and
+     reports the per-order lookup overhead over the baseline.
+  5. Races concurrent orders for the same fresh phone (identical and in
+     different formats) and reports duplicate customers and failed requests.
+
+Seeding writes directly to DATABASE_URL - point it at a disposable database.
+
+Usage:
+    python scripts/perf/bench_customer_lookup.py --customers 2000000
+    python scripts/perf/bench_customer_lookup.py --skip-seed --orders 5000 --workers 100
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from perf_common import (
+    API_URL, LatencyStats, connect_db, copy_rows, ensure_perf_product, format_ghana_phone,
+    login, new_session, normalize_ghana_phone, print_checks, print_header,
+    print_latency_table, query_all, query_one, random_area, run_concurrent, save_results,
+    tenant_id_for, timed_request, GHANA_PREFIXES,
+)
+
+SEED_MARKER = 'perf-seed:customer-lookup'
+ORDER_NOTE = 'perf:customer-lookup'
+PHONE_STYLES = ['local', 'local', 'local', 'international', 'country_code', 'spaced']
+FIRST_NAMES = ['Kwame', 'Ama', 'Kofi', 'Akosua', 'Yaw', 'Abena', 'Kwesi', 'Efua', 'Kojo', 'Adwoa']
+LAST_NAMES = ['Mensah', 'Owusu', 'Boateng', 'Asante', 'Appiah', 'Osei', 'Addo', 'Agyeman']
+
+
+def local_number_for(index):
+    """Map a dense index onto a unique nine-digit Ghanaian subscriber number"""
+    prefix = GHANA_PREFIXES[index // 10_000_000]
+    return f'{prefix}{index % 10_000_000:07d}'
+
+
+def seed_customers(conn, tenant_id, count, archived_pct, variant_pct, rng):
+    """
+    COPY `count` customers into the tenant. Returns the phones used, split into
+    active / archived lists, so the order phases can aim at known records.
+    """
+    space = len(GHANA_PREFIXES) * 10_000_000
+    indexes = rng.sample(range(space), count)
+    now = datetime.now()
+    active, archived = [], []
+
+    def rows():
+        for i, idx in enumerate(indexes):
+            local = local_number_for(idx)
+            phone = format_ghana_phone(local, rng.choice(PHONE_STYLES))
+            is_active = rng.random() * 100 >= archived_pct
+            (active if is_active else archived).append(phone)
+            state, area = random_area(rng)
+            created = now - timedelta(days=rng.randrange(1500))
+            yield (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), phone, f'{area} street {i}',
+                   state, area, SEED_MARKER, is_active, tenant_id, created, created)
+            # Same subscriber keyed in again in another format, as bulk imports do
+            if rng.random() * 100 < variant_pct:
+                variant = format_ghana_phone(local, 'international' if phone.startswith('0') else 'local')
+                yield (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), variant, f'{area} street {i}',
+                       state, area, SEED_MARKER, True, tenant_id, created, created)
+
+    columns = ['first_name', 'last_name', 'phone_number', 'address', 'state', 'area', 'notes',
+               'is_active', 'tenant_id', 'created_at', 'updated_at']
+    start = time.perf_counter()
+    inserted = copy_rows(conn, 'customers', columns, rows())
+    with conn.cursor() as cur:
+        cur.execute('ANALYZE customers')
+    elapsed = time.perf_counter() - start
+    print(f'  Seeded {inserted:,} customers in {elapsed:.1f}s ({inserted / elapsed:,.0f} rows/s)')
+    return active, archived
+
+
+def load_seeded_phones(conn, tenant_id, sample_size):
+    """Reuse an earlier seed: sample active and archived phones already in the table"""
+    rows = query_all(conn, """
+        SELECT phone_number, is_active FROM customers
+        WHERE tenant_id = %s AND notes = %s
+        ORDER BY id DESC LIMIT %s
+    """, (tenant_id, SEED_MARKER, sample_size))
+    active = [phone for phone, is_active in rows if is_active]
+    archived = [phone for phone, is_active in rows if not is_active]
+    return active, archived
+
+
+def check_lookup_plan(conn, tenant_id, phone):
+    """EXPLAIN the query the Prisma lookup issues and report whether it is index-backed"""
+    row = query_one(conn, """
+        EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+        SELECT * FROM customers WHERE phone_number = %s AND tenant_id = %s LIMIT 1
+    """, (phone, tenant_id))
+    plan = row[0][0]
+    nodes = []
+
+    def walk(node):
+        nodes.append({'type': node.get('Node Type'), 'index': node.get('Index Name')})
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan['Plan'])
+    index_backed = any(n['type'] in ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan') for n in nodes)
+    return {
+        'index_backed': index_backed,
+        'nodes': nodes,
+        'execution_ms': plan.get('Execution Time'),
+        'planning_ms': plan.get('Planning Time'),
+    }
+
+
+def count_variant_duplicates(conn, tenant_id):
+    """Subscriber numbers stored more than once under different formats"""
+    row = query_one(conn, """
+        SELECT COUNT(*), COALESCE(SUM(n - 1), 0) FROM (
+            SELECT RIGHT(REGEXP_REPLACE(phone_number, '[^0-9]', '', 'g'), 9) AS k, COUNT(*) AS n
+            FROM customers WHERE tenant_id = %s
+            GROUP BY k HAVING COUNT(*) > 1
+        ) d
+    """, (tenant_id,))
+    return {'numbers_with_variants': row[0], 'extra_customer_rows': int(row[1])}
+
+
+def bench_sql_lookups(tenant_id, active, archived, lookups, workers, rng):
+    """Time the raw lookup statement per outcome with one connection per worker"""
+    stats = {
+        'hit_active': LatencyStats('sql lookup: hit active'),
+        'hit_archived': LatencyStats('sql lookup: hit archived'),
+        'miss': LatencyStats('sql lookup: miss'),
+    }
+    local = threading.local()
+
+    def lookup(_):
+        if not hasattr(local, 'conn'):
+            local.conn = connect_db()
+        kind = rng.choice(['hit_active', 'hit_archived', 'miss'] if archived else ['hit_active', 'miss'])
+        if kind == 'hit_active':
+            phone = rng.choice(active)
+        elif kind == 'hit_archived':
+            phone = rng.choice(archived)
+        else:
+            phone = f'0{rng.choice(GHANA_PREFIXES)}9{rng.randrange(1_000_000):06d}x'
+        start = time.perf_counter()
+        with local.conn.cursor() as cur:
+            cur.execute('SELECT id, is_active FROM customers WHERE phone_number = %s AND tenant_id = %s LIMIT 1',
+                        (phone, tenant_id))
+            cur.fetchone()
+        stats[kind].record((time.perf_counter() - start) * 1000)
+
+    run_concurrent(lookup, range(lookups), workers)
+    return [s.summary() for s in stats.values()]
+
+
+def fresh_local_numbers(conn, tenant_id, count, rng):
+    """Subscriber numbers not stored for the tenant in any of the known formats"""
+    fresh = []
+    while len(fresh) < count:
+        candidates = {f'{rng.choice(GHANA_PREFIXES)}{rng.randrange(10_000_000):07d}'
+                      for _ in range(count - len(fresh))}
+        variants = [format_ghana_phone(c, style) for c in candidates
+                    for style in ('local', 'international', 'country_code', 'spaced')]
+        taken = {normalize_ghana_phone(row[0]) for row in query_all(conn, """
+            SELECT phone_number FROM customers WHERE tenant_id = %s AND phone_number = ANY(%s)
+        """, (tenant_id, variants))}
+        fresh.extend(c for c in candidates if c not in taken and c not in fresh)
+    return fresh[:count]
+
+
+def order_payload(product_id, phone=None, customer_id=None, rng=random):
+    state, area = random_area(rng)
+    payload = {
+        'customerName': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+        'orderItems': [{'productId': product_id, 'quantity': 1, 'unitPrice': 150}],
+        'subtotal': 150,
+        'totalAmount': 150,
+        'deliveryAddress': f'{area} junction',
+        'deliveryState': state,
+        'deliveryArea': area,
+        'notes': ORDER_NOTE,
+    }
+    if customer_id:
+        payload['customerId'] = customer_id
+    else:
+        payload['customerPhone'] = phone
+    return payload
+
+
+def bench_order_push(session, product_id, baseline_customer_id, active, archived, fresh,
+                     orders, workers, rng):
+    """
+    Push orders through POST /api/orders. The customerId baseline skips the
+    phone lookup entirely, so the difference in medians is the lookup overhead.
+    """
+    stats = {
+        'baseline': LatencyStats('order: customerId (no lookup)'),
+        'new': LatencyStats('order: new phone'),
+        'existing': LatencyStats('order: existing phone'),
+        'archived': LatencyStats('order: archived phone'),
+    }
+    kinds = ['baseline', 'new', 'existing'] + (['archived'] if archived else [])
+    archived_pool = list(archived)
+    rng.shuffle(archived_pool)
+    fresh_pool = list(fresh)
+    pool_lock = threading.Lock()
+    reactivated = []
+
+    def push(i):
+        kind = kinds[i % len(kinds)]
+        if kind == 'baseline':
+            payload = order_payload(product_id, customer_id=baseline_customer_id, rng=rng)
+        elif kind == 'new':
+            with pool_lock:
+                local = fresh_pool.pop()
+            payload = order_payload(product_id, phone=format_ghana_phone(local, 'local'), rng=rng)
+        elif kind == 'existing':
+            payload = order_payload(product_id, phone=rng.choice(active), rng=rng)
+        else:
+            with pool_lock:
+                phone = archived_pool.pop() if archived_pool else rng.choice(archived)
+            reactivated.append(phone)
+            payload = order_payload(product_id, phone=phone, rng=rng)
+        resp, ms, err = timed_request(session, 'POST', '/api/orders', json=payload)
+        stats[kind].record_response(resp, ms, err)
+
+    start = time.perf_counter()
+    run_concurrent(push, range(orders), workers)
+    elapsed = time.perf_counter() - start
+    return stats, reactivated, orders / elapsed
+
+
+def bench_bulk_import(session, product_name, active, archived, fresh, batches, batch_size, rng):
+    """POST /api/orders/bulk batches mixing new, existing and archived phones"""
+    stats = LatencyStats('bulk import batch')
+    per_row = []
+    for b in range(batches):
+        rows = []
+        for r in range(batch_size):
+            pick = r % 3
+            if pick == 0:
+                phone = format_ghana_phone(fresh.pop(), 'local')
+            elif pick == 1:
+                phone = rng.choice(active)
+            else:
+                phone = rng.choice(archived) if archived else rng.choice(active)
+            state, area = random_area(rng)
+            rows.append({
+                'customerPhone': phone,
+                'customerFirstName': rng.choice(FIRST_NAMES),
+                'customerLastName': rng.choice(LAST_NAMES),
+                'subtotal': 100 + b * batch_size + r,
+                'totalAmount': 100 + b * batch_size + r,
+                'deliveryAddress': f'{area} market',
+                'deliveryState': state,
+                'deliveryArea': area,
+                'productName': product_name,
+                'quantity': 1,
+                'unitPrice': 100 + b * batch_size + r,
+                'notes': f'{ORDER_NOTE}:bulk:{b}:{r}',
+            })
+        resp, ms, err = timed_request(session, 'POST', '/api/orders/bulk', json={'orders': rows})
+        stats.record_response(resp, ms, err)
+        per_row.append(ms / batch_size)
+    summary = stats.summary()
+    summary['avg_ms_per_row'] = sum(per_row) / len(per_row) if per_row else 0.0
+    return summary
+
+
+def bench_races(session, conn, tenant_id, product_id, fresh, fanout, rng):
+    """
+    Fire `fanout` simultaneous orders for each fresh phone. Half the races use
+    the identical string, half use a different format per request, which the
+    raw-string lookup cannot match and so turns into separate customers.
+    """
+    failures = {'identical': 0, 'mixed_format': 0}
+    requests_sent = {'identical': 0, 'mixed_format': 0}
+    race_phones = {'identical': [], 'mixed_format': []}
+
+    for n, local in enumerate(fresh):
+        mode = 'identical' if n % 2 == 0 else 'mixed_format'
+        styles = ['local'] * fanout if mode == 'identical' else \
+            [['local', 'international', 'country_code', 'spaced'][k % 4] for k in range(fanout)]
+        race_phones[mode].append(local)
+        barrier = threading.Barrier(fanout)
+
+        def fire(k):
+            barrier.wait()
+            payload = order_payload(product_id, phone=format_ghana_phone(local, styles[k]), rng=rng)
+            resp, _, err = timed_request(session, 'POST', '/api/orders', json=payload)
+            return err is None and resp is not None and resp.status_code == 201
+
+        results = run_concurrent(fire, range(fanout), fanout)
+        requests_sent[mode] += fanout
+        failures[mode] += results.count(False)
+
+    report = {}
+    for mode, locals_ in race_phones.items():
+        rows = query_all(conn, """
+            SELECT RIGHT(REGEXP_REPLACE(phone_number, '[^0-9]', '', 'g'), 9) AS k, COUNT(*)
+            FROM customers
+            WHERE tenant_id = %s AND RIGHT(REGEXP_REPLACE(phone_number, '[^0-9]', '', 'g'), 9) = ANY(%s)
+            GROUP BY k
+        """, (tenant_id, locals_))
+        duplicated = sum(1 for _, c in rows if c > 1)
+        report[mode] = {
+            'races': len(locals_),
+            'requests': requests_sent[mode],
+            'failed_requests': failures[mode],
+            'phones_with_duplicate_customers': duplicated,
+            'extra_customers_created': sum(c - 1 for _, c in rows if c > 1),
+        }
+    return report
+
+
+def count_still_archived(conn, tenant_id, phones):
+    if not phones:
+        return 0
+    row = query_one(conn, """
+        SELECT COUNT(*) FROM customers
+        WHERE tenant_id = %s AND phone_number = ANY(%s) AND is_active = false
+    """, (tenant_id, list(set(phones))))
+    return row[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--customers', type=int, default=2_000_000, help='customers to seed')
+    parser.add_argument('--archived-pct', type=float, default=10.0, help='share seeded as archived')
+    parser.add_argument('--variant-pct', type=float, default=1.0,
+                        help='share of numbers also stored in a second format')
+    parser.add_argument('--skip-seed', action='store_true', help='reuse customers from an earlier seed')
+    parser.add_argument('--sql-lookups', type=int, default=20_000)
+    parser.add_argument('--orders', type=int, default=2_000)
+    parser.add_argument('--workers', type=int, default=50)
+    parser.add_argument('--bulk-batches', type=int, default=10)
+    parser.add_argument('--bulk-size', type=int, default=100)
+    parser.add_argument('--race-phones', type=int, default=40)
+    parser.add_argument('--race-fanout', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=26)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print_header('👤 Customer Lookup by Phone - Stress Benchmark',
+                 target=API_URL, customers=f'{args.customers:,}', orders=args.orders,
+                 workers=args.workers, race=f'{args.race_phones} phones x {args.race_fanout}')
+
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    product_id = ensure_perf_product(conn, tenant_id)
+    product_name = query_one(conn, 'SELECT name FROM products WHERE id = %s', (product_id,))[0]
+
+    print('\n[Phase 1] Seeding customers...')
+    if args.skip_seed:
+        active, archived = load_seeded_phones(conn, tenant_id, 200_000)
+        print(f'  Reusing seed: {len(active):,} active / {len(archived):,} archived phones sampled')
+    else:
+        active, archived = seed_customers(conn, tenant_id, args.customers, args.archived_pct,
+                                          args.variant_pct, rng)
+    if not active:
+        raise SystemExit('No seeded customers found; run without --skip-seed first')
+    tenant_customers = query_one(conn, 'SELECT COUNT(*) FROM customers WHERE tenant_id = %s', (tenant_id,))[0]
+    print(f'  Tenant now holds {tenant_customers:,} customers')
+
+    print('\n[Phase 2] Checking lookup plan and phone normalization...')
+    plan = check_lookup_plan(conn, tenant_id, rng.choice(active))
+    print(f"  Index-backed: {plan['index_backed']} "
+          f"({', '.join(n['index'] or n['type'] for n in plan['nodes'])}), "
+          f"execution {plan['execution_ms']:.3f}ms")
+    variants = count_variant_duplicates(conn, tenant_id)
+    print(f"  Numbers stored under >1 format: {variants['numbers_with_variants']:,} "
+          f"({variants['extra_customer_rows']:,} extra customer rows)")
+
+    print(f'\n[Phase 3] Timing {args.sql_lookups:,} raw lookups at {args.workers} workers...')
+    sql_stats = bench_sql_lookups(tenant_id, active, archived, args.sql_lookups, args.workers, rng)
+
+    print(f'\n[Phase 4] Pushing {args.orders:,} orders through POST /api/orders...')
+    token = login()
+    session = new_session(token, pool_size=max(args.workers, args.race_fanout) + 4)
+    baseline_customer_id = query_one(conn, """
+        SELECT id FROM customers WHERE tenant_id = %s AND is_active = true ORDER BY id LIMIT 1
+    """, (tenant_id,))[0]
+    fresh = fresh_local_numbers(conn, tenant_id, args.orders + args.bulk_batches * args.bulk_size
+                                + args.race_phones, rng)
+    order_stats, reactivated, throughput = bench_order_push(
+        session, product_id, baseline_customer_id, active, archived, fresh[:args.orders],
+        args.orders, args.workers, rng)
+    still_archived = count_still_archived(conn, tenant_id, reactivated)
+    baseline_p50 = order_stats['baseline'].summary()['p50_ms']
+    overhead = {kind: s.summary()['p50_ms'] - baseline_p50
+                for kind, s in order_stats.items() if kind != 'baseline'}
+
+    print(f'\n[Phase 5] Bulk import: {args.bulk_batches} batches x {args.bulk_size} rows...')
+    bulk_fresh = fresh[args.orders:args.orders + args.bulk_batches * args.bulk_size]
+    bulk = bench_bulk_import(session, product_name, active, archived, bulk_fresh,
+                             args.bulk_batches, args.bulk_size, rng)
+
+    print(f'\n[Phase 6] Racing {args.race_phones} fresh phones x {args.race_fanout} concurrent orders...')
+    race_fresh = fresh[len(fresh) - args.race_phones:]
+    races = bench_races(session, conn, tenant_id, product_id, race_fresh, args.race_fanout, rng)
+
+    latency = sql_stats + [s.summary() for s in order_stats.values()] + [bulk]
+    print_latency_table(latency)
+    print(f'\nOrder throughput: {throughput:.1f} orders/sec')
+    print('\nPer-order lookup overhead vs customerId baseline (p50):')
+    for kind, ms in overhead.items():
+        print(f'  {kind:<10}{ms:+8.1f}ms')
+    print(f"Bulk import: {bulk['avg_ms_per_row']:.1f}ms per row")
+    print('\nDuplicate-customer races:')
+    for mode, r in races.items():
+        print(f"  {mode:<13} {r['races']} races, {r['failed_requests']}/{r['requests']} requests failed, "
+              f"{r['phones_with_duplicate_customers']} phones duplicated "
+              f"(+{r['extra_customers_created']} customers)")
+
+    passed = print_checks([
+        ('Lookup query is index-backed', plan['index_backed']),
+        ('Archived customers reactivated by new orders', still_archived == 0),
+        ('Identical-phone races create no duplicate customers',
+         races['identical']['phones_with_duplicate_customers'] == 0),
+        ('Identical-phone races fail no requests', races['identical']['failed_requests'] == 0),
+        ('Format-variant races resolve to one customer',
+         races['mixed_format']['phones_with_duplicate_customers'] == 0),
+        ('Existing-phone lookup overhead < 20ms p50', overhead.get('existing', 0) < 20),
+    ])
+
+    save_results('customer-lookup', {
+        'timestamp': datetime.now().isoformat(),
+        'settings': vars(args),
+        'tenant_customers': tenant_customers,
+        'lookup_plan': plan,
+        'format_variants': variants,
+        'latency': latency,
+        'order_throughput_per_sec': throughput,
+        'lookup_overhead_p50_ms': overhead,
+        'archived_not_reactivated': still_archived,
+        'races': races,
+        'passed': passed,
+    })
+
+
+if __name__ == '__main__':
+    main()
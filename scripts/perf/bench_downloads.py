@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Digital download burst benchmark: token redemption latency and counter correctness.
+
+Digital orders get a download_tokens row (digitalDeliveryService) and the buyer
+follows GET /api/public/download/:token, which redeems the token with a single
+atomic UPDATE ... download_count + 1 ... WHERE download_count < max_downloads
+and answers 302 to products.digital_file_url, or 404 once the token is
+invalid, expired, revoked or used up. After an influencer post thousands of
+buyers click within minutes, many of them more than once.
+
+Phases:
+
+    1. seed    a digital product (https digital_file_url), one customer and
+               one digital order + order item per token, then download_tokens
+               minted straight into Postgres:
+                   valid      expires in 3 days, download_count 0
+                   expired    expired 7 days ago
+                   exhausted  download_count = max_downloads
+                   revoked    is_revoked = true
+               plus --unknown random tokens that were never minted
+    2. burst   every valid token is clicked --clicks times (default one more
+               than max_downloads, so the last click must 404) and every other
+               token once, shuffled and fired on --workers threads without
+               following redirects. Latency per token class, requests/s and
+               response bytes/s; --follow also fetches each 302 Location and
+               reports file bytes/s from the file host
+    3. hot     --hot-tokens tokens with --hot-max downloads each take
+               --hot-clicks concurrent clicks apiece, released together
+    4. verify  download_count of every seeded token against the 302s the
+               harness saw: never above max_downloads, equal to the redirects
+               for that token, untouched for expired and revoked tokens
+
+Any 500 means the redemption query itself failed, not a rejected token. The
+route sits under webhookLimiter (/api/public, 100 requests per 15 min per IP
+outside development), so run the backend with NODE_ENV=development or every
+click past the first hundred is a 429.
+
+Seeded orders carry notes `perf: downloads` and are left in place.
+
+Usage:
+    python scripts/perf/bench_downloads.py --tokens 5000 --workers 128
+    python scripts/perf/bench_downloads.py --tokens 1000 --hot-clicks 500 --hot-max 50 --follow
+"""
+import argparse
+import random
+import secrets
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from perf_common import (
+    API_URL, LatencyStats, connect_db, copy_rows, format_ghana_phone, ghana_local_number, new_session,
+    print_checks, print_header, print_latency_table, query_all, query_one, random_area, run_concurrent,
+    save_results, tenant_id_for, timed_request,
+)
+
+ORDER_NOTE = 'perf: downloads'
+PRODUCT_SKU = 'PERF-DIGITAL-001'
+CLASSES = ('valid', 'expired', 'exhausted', 'revoked', 'unknown', 'hot')
+# Redeemable classes may 404 once used up; the rest must always 404
+OK_STATUSES = {'valid': (302, 404), 'hot': (302, 404)}
+
+
+def ensure_digital_product(conn, tenant_id, file_url, price):
+    row = query_one(conn, 'SELECT id FROM products WHERE sku = %s', (PRODUCT_SKU,))
+    if row:
+        with conn.cursor() as cur:
+            cur.execute('UPDATE products SET digital_file_url = %s WHERE id = %s', (file_url, row[0]))
+        return row[0]
+    row = query_one(conn, """
+        INSERT INTO products (sku, name, category, price, stock_quantity, cogs, product_type, digital_file_url,
+                              digital_file_type, download_link_expiry_hours, tenant_id, updated_at)
+        VALUES (%s, 'Perf Digital Guide', 'Perf', %s, 0, 0, 'digital', %s, 'pdf', 72, %s, NOW())
+        RETURNING id
+    """, (PRODUCT_SKU, price, file_url, tenant_id))
+    return row[0]
+
+
+def seed_orders(conn, tenant_id, product_id, count, price):
+    """One paid digital order per token, as the checkout flow creates them"""
+    state, area = random_area()
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO customers (first_name, last_name, phone_number, address, state, area, notes,
+                                   tenant_id, created_at, updated_at)
+            VALUES ('Perf', 'Downloads', %s, %s, %s, %s, %s, %s, NOW(), NOW())
+            RETURNING id
+        """, (format_ghana_phone(ghana_local_number(), 'local'), f'{area} junction', state, area, ORDER_NOTE,
+              tenant_id))
+        customer_id = cur.fetchone()[0]
+        cur.execute("""
+            INSERT INTO orders (customer_id, status, payment_status, order_type, payment_method, subtotal,
+                                total_amount, cod_amount, notes, source, tenant_id, created_at, updated_at)
+            SELECT %(customer)s, 'digital_delivered'::"OrderStatus", 'paid'::"PaymentStatus", 'digital', 'paystack',
+                   %(price)s, %(price)s, 0, %(note)s, 'webform', %(tenant)s, NOW(), NOW()
+            FROM generate_series(1, %(count)s)
+            RETURNING id
+        """, {'customer': customer_id, 'price': price, 'note': ORDER_NOTE, 'tenant': tenant_id, 'count': count})
+        order_ids = [r[0] for r in cur.fetchall()]
+        cur.execute("""
+            INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price, created_at)
+            SELECT id, %s, 1, %s, %s, NOW() FROM unnest(%s::int[]) id
+        """, (product_id, price, price, order_ids))
+    return order_ids
+
+
+def mint_tokens(conn, order_ids, plan):
+    """
+    Insert download_tokens for `plan` ({class: (count, max_downloads)}) and
+    return {token: class}. expires_at is naive UTC like Prisma writes it, with
+    days of margin either side so the server's NOW() cannot flip a class.
+    """
+    now = datetime.utcnow()
+    ids = iter(order_ids)
+    tokens, rows = {}, []
+    for cls, (count, limit) in plan.items():
+        for _ in range(count):
+            token = secrets.token_hex(32)
+            tokens[token] = cls
+            rows.append((next(ids), token,
+                         now - timedelta(days=7) if cls == 'expired' else now + timedelta(days=3),
+                         limit if cls == 'exhausted' else 0, limit, cls == 'revoked', now))
+    copy_rows(conn, 'download_tokens', ['order_id', 'token', 'expires_at', 'download_count', 'max_downloads',
+                                        'is_revoked', 'created_at'], rows)
+    with conn.cursor() as cur:
+        cur.execute('ANALYZE download_tokens')
+    return tokens
+
+
+class Clicker:
+    """Redeems tokens, recording latency per class and the 302s each token earned"""
+
+    def __init__(self, workers, follow):
+        self.session = new_session(pool_size=workers)
+        self.file_session = new_session(pool_size=workers) if follow else None
+        self.stats = {cls: LatencyStats(f'download {cls}') for cls in CLASSES}
+        self.file_stats = LatencyStats('file fetch (302 target)')
+        self.redirects = {}
+        self.response_bytes = 0
+        self.file_bytes = 0
+        self.server_errors = []
+        self._lock = threading.Lock()
+
+    def click(self, item):
+        token, cls = item
+        resp, ms, err = timed_request(self.session, 'GET', f'/api/public/download/{token}', allow_redirects=False)
+        self.stats[cls].record_response(resp, ms, err, ok_statuses=OK_STATUSES.get(cls, (404,)))
+        if resp is None:
+            return
+        size = len(resp.content) + sum(len(k) + len(v) + 4 for k, v in resp.headers.items())
+        with self._lock:
+            self.response_bytes += size
+            if resp.status_code == 302:
+                self.redirects[token] = self.redirects.get(token, 0) + 1
+            elif resp.status_code >= 500 and len(self.server_errors) < 5:
+                self.server_errors.append(resp.text[:200])
+        if self.file_session is not None and resp.status_code == 302:
+            file_resp, file_ms, file_err = timed_request(self.file_session, 'GET', resp.headers['Location'])
+            self.file_stats.record_response(file_resp, file_ms, file_err, ok_statuses=(200,))
+            if file_resp is not None:
+                with self._lock:
+                    self.file_bytes += len(file_resp.content)
+
+
+def burst(clicker, items, workers):
+    start = time.perf_counter()
+    run_concurrent(clicker.click, items, workers)
+    return time.perf_counter() - start
+
+
+def hot_burst(clicker, tokens, clicks):
+    """All clicks on all hot tokens wait on one barrier so redemptions genuinely overlap"""
+    items = [(token, 'hot') for token in tokens for _ in range(clicks)]
+    barrier = threading.Barrier(len(items))
+
+    def click(item):
+        barrier.wait()
+        clicker.click(item)
+
+    start = time.perf_counter()
+    run_concurrent(click, items, len(items))
+    return time.perf_counter() - start
+
+
+def verify(conn, tokens, redirects, max_downloads, hot_max):
+    """Compare stored counters with the redirects observed; returns per-class mismatch lists"""
+    rows = query_all(conn, 'SELECT token, download_count, max_downloads FROM download_tokens WHERE token = ANY(%s)',
+                     (list(tokens),))
+    over_limit, mismatched, touched = [], [], []
+    for token, count, limit in rows:
+        cls = tokens[token]
+        served = redirects.get(token, 0)
+        if count > limit:
+            over_limit.append((cls, token[:8], count, limit))
+        if cls in ('valid', 'hot') and count != served:
+            mismatched.append((cls, token[:8], count, served))
+        if cls in ('expired', 'revoked') and count != 0:
+            touched.append((cls, token[:8], count))
+        if cls == 'exhausted' and (count != max_downloads or served):
+            touched.append((cls, token[:8], count))
+    hot_counts = sorted(count for token, count, _ in rows if tokens[token] == 'hot')
+    return {'tokens_checked': len(rows), 'over_limit': over_limit, 'count_mismatch': mismatched,
+            'invalid_tokens_changed': touched, 'hot_counts': hot_counts,
+            'hot_all_exhausted': all(c == hot_max for c in hot_counts)}
+
+
+def rate(n, seconds):
+    return n / seconds if seconds else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tokens', type=int, default=2000, help='valid tokens')
+    parser.add_argument('--expired', type=int, default=500)
+    parser.add_argument('--exhausted', type=int, default=500)
+    parser.add_argument('--revoked', type=int, default=200)
+    parser.add_argument('--unknown', type=int, default=200, help='never-minted tokens')
+    parser.add_argument('--max-downloads', type=int, default=5, help='max_downloads on seeded tokens')
+    parser.add_argument('--clicks', type=int, help='clicks per valid token (default max-downloads + 1)')
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--hot-tokens', type=int, default=3)
+    parser.add_argument('--hot-clicks', type=int, default=200, help='concurrent clicks per hot token')
+    parser.add_argument('--hot-max', type=int, default=25, help='max_downloads on hot tokens')
+    parser.add_argument('--file-url', default='https://downloads.example.com/perf/guide.pdf',
+                        help='digital_file_url of the seeded product; must be https')
+    parser.add_argument('--price', type=float, default=99.0)
+    parser.add_argument('--follow', action='store_true', help='also fetch every 302 Location')
+    parser.add_argument('--max-p95-ms', type=float, default=300)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    clicks = args.clicks or args.max_downloads + 1
+    rng = random.Random(args.seed)
+    print_header('⬇️  Digital Download Burst Benchmark', target=API_URL, valid_tokens=f'{args.tokens:,}',
+                 clicks_per_token=clicks, max_downloads=args.max_downloads, workers=args.workers,
+                 hot=f'{args.hot_tokens} x {args.hot_clicks} clicks (max {args.hot_max})', follow=args.follow)
+
+    print('\n[Phase 1] Seeding digital orders and tokens')
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    product_id = ensure_digital_product(conn, tenant_id, args.file_url, args.price)
+    plan = {'valid': (args.tokens, args.max_downloads), 'expired': (args.expired, args.max_downloads),
+            'exhausted': (args.exhausted, args.max_downloads), 'revoked': (args.revoked, args.max_downloads),
+            'hot': (args.hot_tokens, args.hot_max)}
+    start = time.perf_counter()
+    order_ids = seed_orders(conn, tenant_id, product_id, sum(n for n, _ in plan.values()), args.price)
+    tokens = mint_tokens(conn, order_ids, plan)
+    print(f'  {len(order_ids):,} orders and tokens in {time.perf_counter() - start:.1f}s '
+          f'(product {product_id}, {args.file_url})')
+
+    items = [(t, cls) for t, cls in tokens.items() if cls != 'hot'
+             for _ in range(clicks if cls == 'valid' else 1)]
+    items += [(secrets.token_hex(32), 'unknown') for _ in range(args.unknown)]
+    rng.shuffle(items)
+
+    print(f'\n[Phase 2] Burst: {len(items):,} clicks on {args.workers} workers')
+    clicker = Clicker(max(args.workers, args.hot_tokens * args.hot_clicks), args.follow)
+    burst_s = burst(clicker, items, args.workers)
+    burst_bytes, burst_file_bytes = clicker.response_bytes, clicker.file_bytes
+    print(f'  {rate(len(items), burst_s):,.0f} req/s, {rate(burst_bytes, burst_s) / 1024:,.1f} KiB/s of responses'
+          + (f', {rate(burst_file_bytes, burst_s) / 2 ** 20:,.1f} MiB/s of files' if args.follow else ''))
+
+    hot_tokens = [t for t, cls in tokens.items() if cls == 'hot']
+    print(f'\n[Phase 3] Hot tokens: {args.hot_clicks} simultaneous clicks on each of {len(hot_tokens)}')
+    hot_s = hot_burst(clicker, hot_tokens, args.hot_clicks)
+    print(f'  {len(hot_tokens) * args.hot_clicks:,} clicks in {hot_s:.2f}s')
+
+    summaries = [clicker.stats[cls].summary() for cls in CLASSES]
+    if args.follow:
+        summaries.append(clicker.file_stats.summary())
+    print_latency_table(summaries)
+    if clicker.server_errors:
+        print('\n  5xx responses, e.g.: ' + '\n  '.join(clicker.server_errors))
+
+    print('\n[Phase 4] Verifying download counters')
+    check = verify(conn, tokens, clicker.redirects, args.max_downloads, args.hot_max)
+    for key in ('over_limit', 'count_mismatch', 'invalid_tokens_changed'):
+        print(f'  {key.replace("_", " ")}: {len(check[key])}' + (f'  e.g. {check[key][:3]}' if check[key] else ''))
+    print(f'  hot token counters: {check["hot_counts"]} (max {args.hot_max})')
+
+    by_class = {s['name'].split()[-1]: s for s in summaries[:len(CLASSES)]}
+    statuses = {}
+    for s in by_class.values():
+        for code, n in s['statuses'].items():
+            statuses[code] = statuses.get(code, 0) + n
+    server_errors = sum(n for code, n in statuses.items() if code.isdigit() and int(code) >= 500)
+    expected_valid = args.tokens * min(clicks, args.max_downloads)
+    served_valid = sum(n for t, n in clicker.redirects.items() if tokens.get(t) == 'valid')
+    rejected_ok = all(by_class[cls]['errors'] == 0 for cls in ('expired', 'exhausted', 'revoked', 'unknown'))
+    checks = [
+        ('No 5xx from the download route', server_errors == 0),
+        ('No 429s (webhookLimiter; run with NODE_ENV=development)', statuses.get('429', 0) == 0),
+        (f'Valid tokens served {expected_valid:,} downloads ({served_valid:,})', served_valid == expected_valid),
+        ('Expired, exhausted, revoked and unknown tokens all 404', rejected_ok),
+        ('No counter above max_downloads', not check['over_limit']),
+        ('Every counter equals the 302s served for it', not check['count_mismatch']),
+        ('Rejected tokens left unchanged', not check['invalid_tokens_changed']),
+        (f'Hot tokens stop at exactly {args.hot_max} downloads', check['hot_all_exhausted']),
+        (f"Valid-click p95 under {args.max_p95_ms:g} ms ({by_class['valid']['p95_ms']:.0f} ms)",
+         by_class['valid']['p95_ms'] < args.max_p95_ms),
+    ]
+    passed = print_checks(checks)
+
+    save_results('downloads', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'settings': vars(args),
+        'burst': {'clicks': len(items), 'runtime_s': round(burst_s, 2),
+                  'req_per_s': round(rate(len(items), burst_s), 1),
+                  'response_bytes_per_s': round(rate(burst_bytes, burst_s)),
+                  'file_bytes_per_s': round(rate(burst_file_bytes, burst_s)) if args.follow else None},
+        'hot': {'clicks': len(hot_tokens) * args.hot_clicks, 'runtime_s': round(hot_s, 2)},
+        'latency': summaries,
+        'statuses': statuses,
+        'server_error_samples': clicker.server_errors,
+        'counters': check,
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
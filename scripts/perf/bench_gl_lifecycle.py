@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Concurrent order-lifecycle simulator for GL automation and account-balance
+contention.
+
+Every delivered or returned order posts a journal entry through
+GLAutomationService, and each entry read-modify-writes accounts.current_balance
+on the same handful of hot accounts (cash in transit, revenue, COGS,
+inventory) via updateAccountBalance. This pushes thousands of orders through
+the lifecycle concurrently with PATCH /api/orders/:id/status:
+
+    confirmed -> preparing -> ready_for_pickup -> out_for_delivery ->
+        delivered                       (revenue recognition, async after commit)
+        delivered -> returned           (return reversal, inside the status tx)
+        failed_delivery
+
+With --agent-email the orders are assigned to that delivery agent and the
+resulting agent collections are verified concurrently through
+POST /api/agent-reconciliation/:id/verify (collection verification entry).
+
+Reports journal entries/sec, createJournalEntryWithRetry retries (counted from
+the backend's logs/combined.log), and status-update tail latency, then checks
+the ledger:
+
+  - every journal entry written during the run balances
+  - for every touched account, the change in current_balance (read through
+    GET /api/gl/accounts/:id/balance) equals the change in the sum of its
+    account_transactions; a mismatch is a lost balance update
+  - no delivered order is missing, or has more than one, revenue entry
+  - GET /api/financial/balance-sheet reports isBalanced
+  - optionally (--ui-check) FinancialModuleTester's balance-sheet check
+
+The failed-delivery GL entry is only posted by deliveryService.markDeliveryFailed,
+which no route exposes; failed_delivery via the status endpoint posts nothing.
+
+Usage:
+    python scripts/perf/bench_gl_lifecycle.py --orders 2000 --workers 40
+    python scripts/perf/bench_gl_lifecycle.py --agent-email agent@example.com --ui-check
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from perf_common import (
+    API_URL, BACKEND_LOG, LatencyStats, connect_db, count_log_markers, ensure_perf_product,
+    format_ghana_phone, ghana_local_number, log_offset, login, new_session, print_checks, print_header,
+    print_latency_table, query_all, query_one, random_area, run_concurrent, save_results, tenant_id_for,
+    timed_request,
+)
+
+ORDER_NOTE = 'perf: gl lifecycle'
+PRE_DELIVERY = ['confirmed', 'preparing', 'ready_for_pickup', 'out_for_delivery']
+RETRY_MARKER = 'Unique constraint violation on journal entry_number, retrying'
+SYNC_FAILURE_MARKER = 'Failed to auto-sync financial data'
+
+_local = threading.local()
+
+
+def thread_conn():
+    if getattr(_local, 'conn', None) is None:
+        _local.conn = connect_db()
+    return _local.conn
+
+
+def ledger_snapshot(conn, tenant_id):
+    """Per account: cached current_balance and the balance implied by its transactions"""
+    rows = query_all(conn, """
+        SELECT a.id, a.code, a.normal_balance, a.current_balance,
+               COALESCE(SUM(t.debit_amount), 0), COALESCE(SUM(t.credit_amount), 0)
+        FROM accounts a
+        LEFT JOIN account_transactions t ON t.account_id = a.id
+        WHERE a.tenant_id = %s OR a.tenant_id IS NULL
+        GROUP BY a.id
+    """, (tenant_id,))
+    snapshot = {}
+    for account_id, code, normal, current, debits, credits in rows:
+        implied = debits - credits if normal == 'debit' else credits - debits
+        snapshot[account_id] = {'code': code, 'current': Decimal(current), 'implied': Decimal(implied)}
+    return snapshot
+
+
+def create_orders(session, product_id, count, workers, agent_id, rng):
+    """Create orders for one perf customer and optionally assign the agent"""
+    state, area = random_area(rng)
+    base = {
+        'customerName': 'Perf Ledger',
+        'orderItems': [{'productId': product_id, 'quantity': 1, 'unitPrice': 150}],
+        'subtotal': 150,
+        'totalAmount': 150,
+        'deliveryAddress': f'{area} junction',
+        'deliveryState': state,
+        'deliveryArea': area,
+        'notes': ORDER_NOTE,
+    }
+    first, _, err = timed_request(session, 'POST', '/api/orders', json={
+        **base, 'customerPhone': format_ghana_phone(ghana_local_number(rng), 'local')})
+    if err or first.status_code != 201:
+        raise SystemExit(f'Order creation failed: {err or first.text[:200]}')
+    customer_id = first.json()['order']['customerId']
+    ids = [first.json()['order']['id']]
+    lock = threading.Lock()
+
+    def create(_):
+        resp, _, err = timed_request(session, 'POST', '/api/orders', json={**base, 'customerId': customer_id})
+        if not err and resp.status_code == 201:
+            with lock:
+                ids.append(resp.json()['order']['id'])
+
+    run_concurrent(create, range(count - 1), workers)
+    if agent_id:
+        run_concurrent(lambda oid: timed_request(session, 'PATCH', f'/api/orders/{oid}/assign-agent',
+                                                 json={'deliveryAgentId': agent_id}), ids, workers)
+    return sorted(ids)
+
+
+def wait_for_revenue(order_ids, timeout_s):
+    """Poll until revenue is recognized for all orders; returns those still missing"""
+    pending = list(order_ids)
+    deadline = time.time() + timeout_s
+    conn = thread_conn()
+    while pending and time.time() < deadline:
+        rows = query_all(conn, 'SELECT id FROM orders WHERE id = ANY(%s) AND revenue_recognized', (pending,))
+        done = {r[0] for r in rows}
+        pending = [oid for oid in pending if oid not in done]
+        if pending:
+            time.sleep(0.25)
+    return pending
+
+
+def run_lifecycles(session, order_ids, workers, return_pct, failed_pct, think_ms, settle_s, rng):
+    """Walk every order through its lifecycle concurrently; returns stats and outcomes"""
+    stats = {s: LatencyStats(f'-> {s}') for s in PRE_DELIVERY + ['delivered', 'returned', 'failed_delivery']}
+    outcomes = {}
+    plans = {}
+    for oid in order_ids:
+        roll = rng.random() * 100
+        plans[oid] = 'failed' if roll < failed_pct else 'returned' if roll < failed_pct + return_pct else 'delivered'
+
+    def step(oid, status):
+        if think_ms:
+            time.sleep(random.uniform(0, think_ms) / 1000)
+        resp, ms, err = timed_request(session, 'PATCH', f'/api/orders/{oid}/status',
+                                      json={'status': status, 'notes': ORDER_NOTE})
+        stats[status].record_response(resp, ms, err, ok_statuses=(200,))
+        return not err and resp.status_code == 200
+
+    def walk(oid):
+        for status in PRE_DELIVERY:
+            if not step(oid, status):
+                outcomes[oid] = f'stuck before {status}'
+                return
+        plan = plans[oid]
+        if plan == 'failed':
+            outcomes[oid] = 'failed_delivery' if step(oid, 'failed_delivery') else 'stuck before failed_delivery'
+            return
+        if not step(oid, 'delivered'):
+            outcomes[oid] = 'stuck before delivered'
+            return
+        if plan == 'returned':
+            if wait_for_revenue([oid], settle_s):
+                outcomes[oid] = 'revenue never recognized'
+                return
+            outcomes[oid] = 'returned' if step(oid, 'returned') else 'stuck before returned'
+            return
+        outcomes[oid] = 'delivered'
+
+    start = time.perf_counter()
+    run_concurrent(walk, order_ids, workers)
+    return stats, outcomes, time.perf_counter() - start
+
+
+def verify_collections(session, order_ids, workers):
+    """Verify every draft agent collection from the run concurrently"""
+    rows = query_all(thread_conn(), """
+        SELECT id FROM agent_collections WHERE order_id = ANY(%s) AND status = 'draft'
+    """, (order_ids,))
+    stats = LatencyStats('verify collection')
+
+    def verify(collection_id):
+        resp, ms, err = timed_request(session, 'POST', f'/api/agent-reconciliation/{collection_id}/verify')
+        stats.record_response(resp, ms, err, ok_statuses=(200,))
+
+    run_concurrent(verify, [r[0] for r in rows], workers)
+    return stats
+
+
+def journal_throughput(conn, tenant_id, since):
+    """Entries per source type written since `since`, with overall and peak-second rate"""
+    by_type = dict(query_all(conn, """
+        SELECT source_type::text, COUNT(*) FROM journal_entries
+        WHERE tenant_id = %s AND created_at >= %s GROUP BY 1
+    """, (tenant_id, since)))
+    span = query_one(conn, """
+        SELECT MIN(created_at), MAX(created_at) FROM journal_entries WHERE tenant_id = %s AND created_at >= %s
+    """, (tenant_id, since))
+    peak = query_one(conn, """
+        SELECT COALESCE(MAX(n), 0) FROM (
+            SELECT COUNT(*) AS n FROM journal_entries
+            WHERE tenant_id = %s AND created_at >= %s GROUP BY date_trunc('second', created_at)
+        ) s
+    """, (tenant_id, since))[0]
+    total = sum(by_type.values())
+    seconds = (span[1] - span[0]).total_seconds() if span[0] and span[1] and span[1] > span[0] else 0
+    return {
+        'by_source_type': by_type,
+        'total': total,
+        'entries_per_sec': round(total / seconds, 1) if seconds else None,
+        'peak_entries_per_sec': peak,
+    }
+
+
+def ledger_checks(session, conn, tenant_id, before, since, order_ids):
+    unbalanced = query_all(conn, """
+        SELECT e.entry_number, SUM(t.debit_amount), SUM(t.credit_amount)
+        FROM journal_entries e JOIN account_transactions t ON t.journal_entry_id = e.id
+        WHERE e.tenant_id = %s AND e.created_at >= %s
+        GROUP BY e.id HAVING ABS(SUM(t.debit_amount) - SUM(t.credit_amount)) > 0.0001
+    """, (tenant_id, since))
+
+    after = ledger_snapshot(conn, tenant_id)
+    drift = []
+    for account_id, now in after.items():
+        prev = before.get(account_id, {'current': Decimal(0), 'implied': Decimal(0)})
+        implied_delta = now['implied'] - prev['implied']
+        if implied_delta == 0 and now['current'] == prev['current']:
+            continue
+        resp, _, err = timed_request(session, 'GET', f'/api/gl/accounts/{account_id}/balance')
+        api_current = Decimal(str(resp.json()['currentBalance'])) if not err and resp.status_code == 200 else now['current']
+        current_delta = api_current - prev['current']
+        if abs(current_delta - implied_delta) > Decimal('0.0001'):
+            drift.append({'account': now['code'], 'current_delta': str(current_delta),
+                          'transactions_delta': str(implied_delta),
+                          'lost': str(implied_delta - current_delta)})
+
+    revenue_counts = dict(query_all(conn, """
+        SELECT o.id, COUNT(e.id) FROM orders o
+        LEFT JOIN journal_entries e ON e.source_type = 'order_delivery' AND e.source_id = o.id
+        WHERE o.id = ANY(%s) AND o.status IN ('delivered', 'returned')
+        GROUP BY o.id
+    """, (order_ids,)))
+    missing = sorted(oid for oid, n in revenue_counts.items() if n == 0)
+    duplicated = sorted(oid for oid, n in revenue_counts.items() if n > 1)
+
+    resp, _, err = timed_request(session, 'GET', '/api/financial/balance-sheet')
+    sheet = resp.json() if not err and resp.status_code == 200 else {}
+    return {
+        'unbalanced_entries': [{'entry': e, 'debits': str(d), 'credits': str(c)} for e, d, c in unbalanced],
+        'balance_drift': drift,
+        'missing_revenue_entries': missing,
+        'duplicate_revenue_entries': duplicated,
+        'balance_sheet_balanced': sheet.get('isBalanced'),
+        'balance_sheet_total_assets': sheet.get('assets', {}).get('total'),
+        'balance_sheet_total_liabilities_and_equity': sheet.get('totalLiabilitiesAndEquity'),
+    }
+
+
+def ui_balance_sheet_check():
+    """Run FinancialModuleTester's Financial Statements tab and return its issues"""
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from playwright.sync_api import sync_playwright
+    from test_financial_module import FinancialModuleTester
+
+    tester = FinancialModuleTester()
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        try:
+            tester.login(page)
+            tester.navigate_to_financial(page)
+            tester.test_financial_statements(page)
+        finally:
+            browser.close()
+    tab = tester.test_results['tabs_tested'][-1] if tester.test_results['tabs_tested'] else {}
+    return tab.get('issues_found', ['Financial Statements tab not tested'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=40)
+    parser.add_argument('--return-pct', type=float, default=15.0, help='share delivered then returned')
+    parser.add_argument('--failed-pct', type=float, default=10.0, help='share ending in failed_delivery')
+    parser.add_argument('--think-ms', type=float, default=0, help='random pause before each transition')
+    parser.add_argument('--settle-s', type=float, default=120, help='wait for async revenue recognition')
+    parser.add_argument('--agent-email', help='assign orders to this delivery agent and verify collections')
+    parser.add_argument('--backend-log', default=BACKEND_LOG, help='winston combined.log for retry counts')
+    parser.add_argument('--ui-check', action='store_true', help='also run the FinancialModuleTester balance sheet check')
+    parser.add_argument('--seed', type=int, default=31)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print_header('📒 GL Automation - Concurrent Order Lifecycle Simulator', target=API_URL,
+                 orders=f'{args.orders:,}', workers=args.workers,
+                 mix=f'{args.return_pct}% returned, {args.failed_pct}% failed',
+                 agent=args.agent_email or 'none')
+
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    product_id = ensure_perf_product(conn, tenant_id)
+    agent_id = None
+    if args.agent_email:
+        row = query_one(conn, "SELECT id FROM users WHERE email = %s AND role = 'delivery_agent'", (args.agent_email,))
+        if not row:
+            raise SystemExit(f'No delivery agent with email {args.agent_email}')
+        agent_id = row[0]
+    session = new_session(login(), pool_size=args.workers + 8)
+
+    print(f'\n[Phase 1] Creating {args.orders:,} orders...')
+    order_ids = create_orders(session, product_id, args.orders, args.workers, agent_id, rng)
+    print(f'  Created {len(order_ids):,} orders')
+
+    before = ledger_snapshot(conn, tenant_id)
+    since = query_one(conn, 'SELECT NOW()')[0]
+    offset = log_offset(args.backend_log)
+    if offset is None:
+        print(f'  ℹ️  {args.backend_log} not found; retry counts unavailable')
+
+    print(f'\n[Phase 2] Running lifecycles with {args.workers} workers...')
+    stats, outcomes, elapsed = run_lifecycles(session, order_ids, args.workers, args.return_pct,
+                                              args.failed_pct, args.think_ms, args.settle_s, rng)
+    delivered = [oid for oid, o in outcomes.items() if o in ('delivered', 'returned')]
+    print(f'  {len(outcomes):,} lifecycles in {elapsed:.1f}s; waiting for async revenue recognition...')
+    unrecognized = wait_for_revenue(delivered, args.settle_s)
+    summaries = [s.summary() for s in stats.values() if s.samples]
+
+    if agent_id:
+        print('\n[Phase 3] Verifying agent collections concurrently...')
+        verify_stats = verify_collections(session, order_ids, args.workers)
+        if verify_stats.samples:
+            summaries.append(verify_stats.summary())
+    print_latency_table(summaries)
+
+    print('\n[Phase 4] Journal throughput and retries...')
+    throughput = journal_throughput(conn, tenant_id, since)
+    markers = count_log_markers(offset, [RETRY_MARKER, SYNC_FAILURE_MARKER], args.backend_log)
+    print(f"  Journal entries: {throughput['total']:,} {throughput['by_source_type']}")
+    print(f"  Rate: {throughput['entries_per_sec']} /s average, {throughput['peak_entries_per_sec']} /s peak second")
+    if markers is not None:
+        print(f'  entry_number retries: {markers[RETRY_MARKER]:,}, '
+              f'async sync failures: {markers[SYNC_FAILURE_MARKER]:,}')
+
+    print('\n[Phase 5] Checking the ledger...')
+    ledger = ledger_checks(session, conn, tenant_id, before, since, order_ids)
+    for d in ledger['balance_drift']:
+        print(f"  ❌ {d['account']}: current_balance moved {d['current_delta']}, "
+              f"transactions moved {d['transactions_delta']}")
+    ui_issues = ui_balance_sheet_check() if args.ui_check else None
+
+    outcome_counts = {}
+    for o in outcomes.values():
+        outcome_counts[o] = outcome_counts.get(o, 0) + 1
+    print(f'  Outcomes: {outcome_counts}')
+
+    checks = [
+        ('Every lifecycle completed', all(o in ('delivered', 'returned', 'failed_delivery') for o in outcomes.values())),
+        ('Revenue recognized for every delivered order', not unrecognized),
+        ('Every journal entry balances', not ledger['unbalanced_entries']),
+        ('current_balance matches account transactions (no lost updates)', not ledger['balance_drift']),
+        ('Exactly one revenue entry per delivered order',
+         not ledger['missing_revenue_entries'] and not ledger['duplicate_revenue_entries']),
+        ('Balance sheet isBalanced', ledger['balance_sheet_balanced'] is True),
+    ]
+    if ui_issues is not None:
+        checks.append(('FinancialModuleTester balance sheet check', not any('CRITICAL' in i for i in ui_issues)))
+    passed = print_checks(checks)
+
+    save_results('gl-lifecycle', {
+        'timestamp': datetime.now().isoformat(),
+        'settings': vars(args),
+        'orders': len(order_ids),
+        'elapsed_s': round(elapsed, 1),
+        'outcomes': outcome_counts,
+        'latency': summaries,
+        'journal': throughput,
+        'log_markers': markers,
+        'unrecognized_orders': unrecognized,
+        'ledger': ledger,
+        'ui_issues': ui_issues,
+        'passed': passed,
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Order list, search and export performance matrix.
+
+OrdersList.tsx pages through GET /api/orders with any mix of status, date
+range, area, rep and free-text search, and exports the same filter through
+GET /api/orders/export. Both end in orderService.getAllOrders, which always
+sorts by created_at DESC, pages with OFFSET and runs a COUNT(*) over the same
+filter. This harness:
+
+  1. seeds a large tenant straight into Postgres (customers, reps, agents and
+     orders spread over --days of history and every delivery area)
+  2. runs every combination of the filter dimensions below, plus page depth,
+     through GET /api/orders and records latency, rows returned and total
+  3. exports the --export-shapes slowest shapes through GET /api/orders/export;
+     that endpoint allows 5 requests per 5 minutes per IP, so it stops at 429
+  4. captures EXPLAIN (ANALYZE, BUFFERS) of the slowest --explain-top shapes
+     through the SQL getAllOrders issues: the page query and the count query,
+     with search expanded to the customer subqueries Prisma generates
+  5. ranks the shapes whose plans miss the indexes listed in
+     backend/INDEXES_QUICK_REFERENCE.md: a sequential scan of orders or
+     customers, a top-N or external sort over the whole filtered set instead
+     of an index in created_at order, or none of the documented indexes for
+     the shape's leading filter used at all
+
+Documented indexes that do not exist in the database are listed too.
+
+Dimensions:
+    status   none | one status | the four in-flight statuses
+    date     none | last 7 days | last 90 days
+    area     none | one delivery area
+    rep      none | one sales rep
+    search   none | phone digits | first name | order id
+    page     1 | --deep-page
+
+Seeding writes directly to DATABASE_URL - point it at a disposable database.
+
+Usage:
+    python scripts/perf/bench_order_queries.py --orders 500000 --customers 100000
+    python scripts/perf/bench_order_queries.py --skip-seed --explain-top 20 --report /tmp/order-matrix.md
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+from perf_common import (
+    ADMIN_EMAIL, API_URL, GHANA_AREAS, GHANA_PREFIXES, connect_db, login, new_session, percentile, print_checks,
+    print_header, query_all, query_one, save_results, tenant_id_for, timed_request,
+)
+
+INDEX_REFERENCE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend',
+                                               'INDEXES_QUICK_REFERENCE.md'))
+SEED_DOMAIN = 'perf-orders.local'
+ORDER_NOTE = 'perf: order matrix'
+FIRST_NAMES = ['Kwame', 'Ama', 'Kofi', 'Akosua', 'Yaw', 'Abena', 'Kwesi', 'Efua', 'Kojo', 'Adwoa']
+LAST_NAMES = ['Mensah', 'Owusu', 'Boateng', 'Asante', 'Appiah', 'Osei', 'Addo', 'Agyeman']
+IN_FLIGHT = ['confirmed', 'preparing', 'ready_for_pickup', 'out_for_delivery']
+# Leading column each filter dimension hands the planner
+FILTER_COLUMNS = {'status': 'status', 'date': 'created_at', 'area': 'delivery_area', 'rep': 'customer_rep_id'}
+
+
+# ---------------------------------------------------------------------------
+# Seeding
+# ---------------------------------------------------------------------------
+
+def seed_users(conn, tenant_id, role, count):
+    slug = 'rep' if role == 'sales_rep' else 'agent'
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO users (email, password, role, first_name, last_name, tenant_id, created_at, updated_at)
+            SELECT 'perf-matrix-' || %s || '-' || g || '@' || %s,
+                   (SELECT password FROM users WHERE email = %s), %s, 'Perf', 'Matrix' || g, %s, NOW(), NOW()
+            FROM generate_series(1, %s) g
+            ON CONFLICT (email) DO NOTHING
+        """, (slug, SEED_DOMAIN, ADMIN_EMAIL, role, tenant_id, count))
+    return [r[0] for r in query_all(conn, 'SELECT id FROM users WHERE email LIKE %s ORDER BY id',
+                                    (f'perf-matrix-{slug}-%@{SEED_DOMAIN}',))]
+
+
+def seed_tenant(conn, tenant_id, args):
+    """Customers and orders via generate_series; idempotent per marker"""
+    start = time.perf_counter()
+    reps = seed_users(conn, tenant_id, 'sales_rep', args.reps)
+    agents = seed_users(conn, tenant_id, 'delivery_agent', args.agents)
+    pairs = [(state, area) for state, areas in GHANA_AREAS.items() for area in areas]
+    with conn.cursor() as cur:
+        cur.execute('SELECT setseed(0.42)')
+        cur.execute("""
+            INSERT INTO customers (first_name, last_name, phone_number, address, state, area, notes,
+                                   tenant_id, created_at, updated_at)
+            SELECT (%(first)s::text[])[1 + g %% cardinality(%(first)s::text[])],
+                   (%(last)s::text[])[1 + (g / 7) %% cardinality(%(last)s::text[])],
+                   '0' || (%(prefixes)s::text[])[1 + g %% cardinality(%(prefixes)s::text[])]
+                       || lpad(((g::bigint * 7919) %% 10000000)::text, 7, '0'),
+                   'Street ' || g, %(state)s, %(area)s, %(note)s, %(tenant)s, NOW(), NOW()
+            FROM generate_series(1, %(count)s) g
+            ON CONFLICT DO NOTHING
+        """, {'first': FIRST_NAMES, 'last': LAST_NAMES, 'prefixes': GHANA_PREFIXES, 'state': pairs[0][0],
+              'area': pairs[0][1], 'note': ORDER_NOTE, 'tenant': tenant_id, 'count': args.customers})
+        existing = query_one(conn, 'SELECT COUNT(*) FROM orders WHERE tenant_id = %s AND notes = %s',
+                             (tenant_id, ORDER_NOTE))[0]
+        missing = max(args.orders - existing, 0)
+        cur.execute("""
+            WITH c AS (SELECT array_agg(id) AS ids FROM customers WHERE tenant_id = %(tenant)s AND notes = %(note)s)
+            INSERT INTO orders (customer_id, customer_rep_id, delivery_agent_id, status, subtotal, total_amount,
+                                cod_amount, delivery_state, delivery_area, delivery_address, notes, tenant_id,
+                                created_at, updated_at)
+            SELECT c.ids[1 + floor(random() * cardinality(c.ids))::int],
+                   (%(reps)s::int[])[1 + floor(random() * cardinality(%(reps)s::int[]))::int],
+                   (%(agents)s::int[])[1 + floor(random() * cardinality(%(agents)s::int[]))::int],
+                   (CASE WHEN x.r < 0.62 THEN 'delivered' WHEN x.r < 0.70 THEN 'cancelled'
+                         WHEN x.r < 0.76 THEN 'returned' WHEN x.r < 0.81 THEN 'pending_confirmation'
+                         WHEN x.r < 0.86 THEN 'confirmed'
+                         WHEN x.r < 0.90 THEN 'preparing' WHEN x.r < 0.93 THEN 'ready_for_pickup'
+                         WHEN x.r < 0.97 THEN 'out_for_delivery' ELSE 'failed_delivery' END)::"OrderStatus",
+                   150, 150, 150, (%(states)s::text[])[1 + x.pi], (%(areas)s::text[])[1 + x.pi],
+                   (%(areas)s::text[])[1 + x.pi] || ' junction', %(note)s, %(tenant)s, x.ts, x.ts
+            FROM c, (
+                -- recent-heavy history: squaring the uniform draw piles orders towards NOW()
+                SELECT random() AS r, NOW() - (random() ^ 2) * %(days)s * INTERVAL '1 day' AS ts,
+                       floor(random() * %(npairs)s)::int AS pi
+                FROM generate_series(1, %(count)s)
+            ) x
+        """, {'tenant': tenant_id, 'note': ORDER_NOTE, 'reps': reps, 'agents': agents, 'count': missing,
+              'days': args.days, 'npairs': len(pairs), 'states': [s for s, _ in pairs],
+              'areas': [a for _, a in pairs]})
+        cur.execute('ANALYZE customers')
+        cur.execute('ANALYZE orders')
+    print(f'  {args.customers:,} customers, {missing:,} new orders ({existing:,} already seeded) '
+          f'in {time.perf_counter() - start:.1f}s')
+    return reps
+
+
+# ---------------------------------------------------------------------------
+# Filter shapes
+# ---------------------------------------------------------------------------
+
+def dimensions(conn, tenant_id, reps, deep_page):
+    now = datetime.now()
+    area = query_one(conn, """
+        SELECT delivery_area FROM orders WHERE tenant_id = %s AND notes = %s
+        GROUP BY delivery_area ORDER BY COUNT(*) DESC LIMIT 1
+    """, (tenant_id, ORDER_NOTE))[0]
+    phone, order_id = query_one(conn, """
+        SELECT c.phone_number, o.id FROM orders o JOIN customers c ON c.id = o.customer_id
+        WHERE o.tenant_id = %s AND o.notes = %s ORDER BY o.id DESC LIMIT 1
+    """, (tenant_id, ORDER_NOTE))
+    return {
+        'status': [('any', None), ('one', ['confirmed']), ('in-flight', IN_FLIGHT)],
+        'date': [('any', None), ('7d', (now - timedelta(days=7), now)), ('90d', (now - timedelta(days=90), now))],
+        'area': [('any', None), ('one', area)],
+        'rep': [('any', None), ('one', reps[len(reps) // 2])],
+        'search': [('none', None), ('phone', phone[-6:-2]), ('name', FIRST_NAMES[0].lower()),
+                   ('order-id', str(order_id))],
+        'page': [('1', 1), (str(deep_page), deep_page)],
+    }
+
+
+def shape_label(choice):
+    return ' '.join(f'{dim}={label}' for dim, (label, _) in choice.items()
+                    if label not in ('any', 'none') and not (dim == 'page' and label == '1'))
+
+
+def api_params(choice, limit):
+    params = {'page': choice['page'][1], 'limit': limit}
+    if choice['status'][1]:
+        params['status'] = choice['status'][1]
+    if choice['date'][1]:
+        params['startDate'] = choice['date'][1][0].isoformat()
+        params['endDate'] = choice['date'][1][1].isoformat()
+    if choice['area'][1]:
+        params['area'] = choice['area'][1]
+    if choice['rep'][1]:
+        params['customerRepId'] = choice['rep'][1]
+    if choice['search'][1]:
+        params['search'] = choice['search'][1]
+    return params
+
+
+def shape_sql(choice, tenant_id, limit):
+    """The page and count queries getAllOrders sends for this shape (tenant scope included)"""
+    where = ['o.deleted_at IS NULL', 'o.tenant_id = %(tenant)s']
+    params = {'tenant': tenant_id, 'limit': limit, 'offset': (choice['page'][1] - 1) * limit}
+    if choice['status'][1]:
+        where.append('o.status = ANY(%(status)s::"OrderStatus"[])')
+        params['status'] = choice['status'][1]
+    if choice['date'][1]:
+        where.append('o.created_at >= %(start)s AND o.created_at <= %(end)s')
+        params['start'], params['end'] = choice['date'][1]
+    if choice['area'][1]:
+        where.append('o.delivery_area = %(area)s')
+        params['area'] = choice['area'][1]
+    if choice['rep'][1]:
+        where.append('o.customer_rep_id = %(rep)s')
+        params['rep'] = choice['rep'][1]
+    if choice['search'][1]:
+        term = choice['search'][1]
+        # Nested relation filters get no tenant scope from the Prisma extension
+        ors = [f'o.customer_id IN (SELECT c.id FROM customers c WHERE c.{col} ILIKE %(pattern)s)'
+               for col in ('phone_number', 'first_name', 'last_name')]
+        if term.isdigit():
+            ors.insert(0, 'o.id = %(search_id)s')
+            params['search_id'] = int(term)
+        params['pattern'] = f'%{term}%'
+        where.append('(' + ' OR '.join(ors) + ')')
+    clause = ' AND '.join(where)
+    page = f'SELECT o.* FROM orders o WHERE {clause} ORDER BY o.created_at DESC LIMIT %(limit)s OFFSET %(offset)s'
+    count = f'SELECT COUNT(*) FROM orders o WHERE {clause}'
+    return page, count, params
+
+
+# ---------------------------------------------------------------------------
+# Index reference and plan analysis
+# ---------------------------------------------------------------------------
+
+def snake(name):
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+
+
+def documented_indexes(path=INDEX_REFERENCE):
+    """{table: [[col, ...], ...]} from the '### <Table> Table' blocks of the quick reference"""
+    indexes = {}
+    table = None
+    with open(path) as f:
+        for line in f:
+            heading = re.match(r'###\s+(\w+)\s+Table', line)
+            if heading:
+                table = heading.group(1).lower()
+                continue
+            if line.startswith('## '):
+                table = None
+            if table:
+                for cols in re.findall(r'\[([A-Za-z_, ]+)\]', line):
+                    indexes.setdefault(table, []).append([snake(c.strip()) for c in cols.split(',')])
+    return indexes
+
+
+def live_indexes(conn, tables):
+    """{table: {index_name: [col, ...]}} from pg_indexes"""
+    result = {}
+    for table, name, definition in query_all(conn, """
+        SELECT tablename, indexname, indexdef FROM pg_indexes WHERE schemaname = 'public' AND tablename = ANY(%s)
+    """, (list(tables),)):
+        match = re.search(r'USING \w+ \((.+)\)', definition)
+        if match:
+            cols = [c.strip().strip('"').split(' ')[0].strip('"') for c in match.group(1).split(',')]
+            result.setdefault(table, {})[name] = cols
+    return result
+
+
+def walk(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from walk(child)
+
+
+def explain(conn, sql, params):
+    row = query_one(conn, f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}', params)[0]
+    return (row if isinstance(row, list) else json.loads(row))[0]
+
+
+def analyze_plan(plan, limit):
+    """Scans, indexes and sorts of one plan"""
+    nodes = list(walk(plan['Plan']))
+    seq_scans = sorted({n['Relation Name'] for n in nodes if n['Node Type'] == 'Seq Scan'})
+    indexes = sorted({n['Index Name'] for n in nodes if n.get('Index Name')})
+    sorts = [n for n in nodes if n['Node Type'] == 'Sort']
+    full_sort = any(n.get('Actual Rows', 0) * n.get('Actual Loops', 1) > limit or
+                    n.get('Sort Space Type') == 'Disk' for n in sorts)
+    top = plan['Plan']
+    return {
+        'execution_ms': round(plan['Execution Time'], 1),
+        'seq_scans': seq_scans,
+        'indexes': indexes,
+        'sort_methods': sorted({n.get('Sort Method', '?') for n in sorts}),
+        'full_sort': full_sort,
+        'disk_sort': any(n.get('Sort Space Type') == 'Disk' for n in sorts),
+        'rows_removed_by_filter': sum(n.get('Rows Removed by Filter', 0) * n.get('Actual Loops', 1) for n in nodes),
+        'shared_hit': top.get('Shared Hit Blocks', 0),
+        'shared_read': top.get('Shared Read Blocks', 0),
+    }
+
+
+def index_misses(choice, page_plan, count_plan, live):
+    """Why this shape misses the documented indexes (empty when it does not)"""
+    reasons = []
+    for name, plan in (('page', page_plan), ('count', count_plan)):
+        for table in plan['seq_scans']:
+            if table in ('orders', 'customers'):
+                reasons.append(f'{name}: seq scan on {table}')
+    if page_plan['full_sort']:
+        reasons.append(f"page: sorts the filtered set ({', '.join(page_plan['sort_methods'])})")
+    leading = {FILTER_COLUMNS[d] for d in FILTER_COLUMNS if choice[d][1]}
+    if leading:
+        candidates = {name for name, cols in live.get('orders', {}).items() if cols[0] in leading}
+        used = set(page_plan['indexes']) | set(count_plan['indexes'])
+        if candidates and not candidates & used:
+            reasons.append(f"no index led by {'/'.join(sorted(leading))} used")
+    return reasons
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--orders', type=int, default=500_000)
+    parser.add_argument('--customers', type=int, default=100_000)
+    parser.add_argument('--reps', type=int, default=40)
+    parser.add_argument('--agents', type=int, default=60)
+    parser.add_argument('--days', type=int, default=730, help='history span of the seeded orders')
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--limit', type=int, default=50, help='page size OrdersList requests')
+    parser.add_argument('--deep-page', type=int, default=100)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--explain-top', type=int, default=15)
+    parser.add_argument('--export-shapes', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=500, help='p50 budget per list request')
+    parser.add_argument('--report', help='also write the ranked miss report as markdown here')
+    args = parser.parse_args()
+
+    print_header('🔎 Order List / Search / Export Matrix', target=API_URL, orders=f'{args.orders:,}',
+                 page_size=args.limit, deep_page=args.deep_page, explain_top=args.explain_top)
+
+    token = login()
+    session = new_session(token)
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+
+    print('\n[Phase 1] Seeding tenant')
+    if args.skip_seed:
+        reps = [r[0] for r in query_all(conn, 'SELECT id FROM users WHERE email LIKE %s ORDER BY id',
+                                        (f'perf-matrix-rep-%@{SEED_DOMAIN}',))]
+        if not reps:
+            raise SystemExit('Nothing seeded yet; run without --skip-seed first')
+        print('  skipped')
+    else:
+        reps = seed_tenant(conn, tenant_id, args)
+    tenant_orders = query_one(conn, 'SELECT COUNT(*) FROM orders WHERE tenant_id = %s AND deleted_at IS NULL',
+                              (tenant_id,))[0]
+    print(f'  Tenant has {tenant_orders:,} orders')
+
+    dims = dimensions(conn, tenant_id, reps, args.deep_page)
+    keys = list(dims)
+    shapes = [dict(zip(keys, combo)) for combo in itertools.product(*(dims[k] for k in keys))]
+    print(f'\n[Phase 2] {len(shapes)} filter shapes x {args.repeats} through GET /api/orders')
+    results = []
+    for i, choice in enumerate(shapes, start=1):
+        samples, rows, total, errors = [], 0, 0, 0
+        for _ in range(args.repeats):
+            resp, ms, err = timed_request(session, 'GET', '/api/orders', params=api_params(choice, args.limit),
+                                          timeout=120)
+            samples.append(ms)
+            if err or resp.status_code != 200:
+                errors += 1
+                continue
+            body = resp.json()
+            rows, total = len(body['orders']), body['pagination']['total']
+        samples.sort()
+        results.append({'shape': shape_label(choice) or 'no filter', 'choice': choice,
+                        'p50_ms': round(percentile(samples, 50), 1), 'max_ms': round(samples[-1], 1),
+                        'rows': rows, 'total': total, 'errors': errors})
+        if i % 50 == 0:
+            print(f'  {i}/{len(shapes)} shapes')
+    results.sort(key=lambda r: r['p50_ms'], reverse=True)
+    print(f"\n  {'p50':>8} {'rows':>5} {'total':>9}  shape (slowest 15)")
+    for r in results[:15]:
+        print(f"  {r['p50_ms']:>6.0f}ms {r['rows']:>5} {r['total']:>9,}  {r['shape']}")
+
+    print(f'\n[Phase 3] Export of the {args.export_shapes} slowest page-1 shapes')
+    exports = []
+    for r in [r for r in results if r['choice']['page'][1] == 1][:args.export_shapes]:
+        params = api_params(r['choice'], args.limit)
+        for key in ('page', 'limit'):
+            params.pop(key)
+        if 'startDate' in params:
+            params['startDate'] = r['choice']['date'][1][0].strftime('%Y-%m-%d')
+            params['endDate'] = r['choice']['date'][1][1].strftime('%Y-%m-%d')
+        resp, ms, err = timed_request(session, 'GET', '/api/orders/export', params=params, timeout=120)
+        status = resp.status_code if resp is not None else err
+        exports.append({'shape': r['shape'], 'status': status, 'ms': round(ms, 1),
+                        'bytes': len(resp.content) if resp is not None else 0})
+        print(f"  {ms:>6.0f}ms  {status}  {r['shape']}")
+        if status == 429:
+            print('  Export rate limit reached; remaining exports skipped')
+            break
+
+    print(f'\n[Phase 4] EXPLAIN (ANALYZE, BUFFERS) for the {args.explain_top} slowest shapes')
+    documented = documented_indexes()
+    live = live_indexes(conn, documented)
+    missing_docs = [f"{table}[{', '.join(cols)}]" for table, idx in documented.items() for cols in idx
+                    if table in live and cols not in live[table].values()]
+    misses = []
+    for r in results[:args.explain_top]:
+        page_sql, count_sql, params = shape_sql(r['choice'], tenant_id, args.limit)
+        page_plan = analyze_plan(explain(conn, page_sql, params), args.limit)
+        count_plan = analyze_plan(explain(conn, count_sql, params), args.limit)
+        reasons = index_misses(r['choice'], page_plan, count_plan, live)
+        r.update(page_plan=page_plan, count_plan=count_plan, misses=reasons)
+        if reasons:
+            misses.append(r)
+
+    misses.sort(key=lambda r: r['p50_ms'], reverse=True)
+    print(f"\n  {'rank':>4} {'p50':>8} {'page/count SQL':>15}  shape -> why")
+    report = ['# Order list filter shapes that miss the documented indexes', '',
+              f'Tenant orders: {tenant_orders:,}. Page size {args.limit}.', '',
+              '| Rank | API p50 (ms) | Page SQL (ms) | Count SQL (ms) | Shape | Indexes used | Misses |',
+              '|---:|---:|---:|---:|---|---|---|']
+    for rank, r in enumerate(misses, start=1):
+        pp, cp = r['page_plan'], r['count_plan']
+        print(f"  {rank:>4} {r['p50_ms']:>6.0f}ms {pp['execution_ms']:>7.0f}/{cp['execution_ms']:<7.0f} "
+              f"{r['shape']} -> {'; '.join(r['misses'])}")
+        used = ', '.join(sorted(set(pp['indexes']) | set(cp['indexes']))) or '—'
+        report.append(f"| {rank} | {r['p50_ms']:.0f} | {pp['execution_ms']:.0f} | {cp['execution_ms']:.0f} | "
+                      f"{r['shape']} | {used} | {'; '.join(r['misses'])} |")
+    if missing_docs:
+        print(f"\n  Documented but not in the database: {', '.join(missing_docs)}")
+        report += ['', 'Documented in INDEXES_QUICK_REFERENCE.md but missing from the database: '
+                   + ', '.join(missing_docs)]
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write('\n'.join(report) + '\n')
+        print(f'  Report written to {args.report}')
+
+    over_budget = [r['shape'] for r in results if r['p50_ms'] > args.budget_ms]
+    passed = print_checks([
+        ('Every list request succeeded', not any(r['errors'] for r in results)),
+        (f'Every shape within {args.budget_ms:g} ms p50', not over_budget),
+        ('No explained shape misses the documented indexes', not misses),
+        ('Export served the slowest shapes', all(e['status'] == 200 for e in exports)),
+    ])
+
+    for r in results:
+        r['choice'] = {dim: label for dim, (label, _) in r['choice'].items()}
+    save_results('order-queries', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'tenant_id': tenant_id,
+        'tenant_orders': tenant_orders,
+        'page_size': args.limit,
+        'shapes': results,
+        'exports': exports,
+        'index_misses': [{'shape': r['shape'], 'p50_ms': r['p50_ms'], 'misses': r['misses']} for r in misses],
+        'documented_missing': missing_docs,
+        'over_budget': over_budget,
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
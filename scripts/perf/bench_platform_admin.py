@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Platform admin dashboard benchmark: cross-tenant endpoints from 10 to 10,000 tenants, alone and under tenant traffic.
+
+platformRoutes.ts serves PlatformDashboard.tsx and PlatformTenants.tsx. After
+requirePlatformAdmin the tenant context is null, so every query spans the whole
+platform: /metrics counts tenants and users and groups tenants by plan,
+/metrics/trends loads every tenant created in the period, /tenants pages with
+skip/take and a _count of users and orders per row, /tenants/:id counts and
+sums the tenant's orders for the month, and /billing-events joins the latest
+platform webhook events to tenants and plans.
+
+Phases:
+
+    1. grow    the platform to each --levels tenant count (default 10, 100,
+               1000, 10000). Tenant sizes follow a Zipf curve: the rank-r
+               tenant gets --max-orders * r^-skew orders and --max-users *
+               r^-skew users, so a few tenants hold most of the rows. Tenants
+               are spread over the last 400 days with a mix of plans and
+               statuses, and each gets --billing-events platform webhook events
+    2. alone   every platform endpoint, --requests each on --workers threads,
+               recording latency and response bytes
+    3. shared  --tenant-traffic tenants (the largest active ones) read their
+               orders and customers for --duration seconds, first alone and
+               then while --platform-workers loop over the platform endpoints;
+               the tenant p95 ratio between the two is the slowdown platform
+               aggregates cause
+
+Per endpoint the log-log slope of p50 against tenant count is reported. The
+tenant list page and billing events are bounded by their page size, so their
+payload should not grow with the platform.
+
+Seeded tenants are `perf-plat-*` with users @perf-plat.local sharing the
+admin's password, and the harness logs in as its own platform admin
+(perf-platform-admin@perf-plat.local, tenant_id NULL). They are left in place
+between runs; --cleanup deletes them (cascading to their orders). Run the
+backend with NODE_ENV=development (apiLimiter allows 500 requests per 15 min
+in production).
+
+Usage:
+    python scripts/perf/bench_platform_admin.py
+    python scripts/perf/bench_platform_admin.py --levels 100,1000 --requests 100 --duration 60
+    python scripts/perf/bench_platform_admin.py --levels 10000 --max-orders 500000 --platform-workers 8
+    python scripts/perf/bench_platform_admin.py --cleanup
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from perf_common import (
+    ADMIN_EMAIL, ADMIN_PASSWORD, API_URL, LatencyStats, connect_db, copy_rows, login, loglog_slope, new_session,
+    print_checks, print_header, print_latency_table, query_all, query_one, random_area, run_concurrent,
+    run_for_duration, save_results, scaling_verdict, timed_request,
+)
+
+SLUG_PREFIX = 'perf-plat-'
+EMAIL_DOMAIN = 'perf-plat.local'
+PLATFORM_ADMIN_EMAIL = f'perf-platform-admin@{EMAIL_DOMAIN}'
+CUSTOMER_NOTE = 'perf-plat seed'
+BILLING_EVENT_TYPES = ['charge.success', 'subscription.create', 'invoice.payment_failed', 'subscription.disable']
+REGIONS = ['Greater Accra', 'Ashanti', 'Western', 'Central', 'Lagos']
+TENANT_PAGE = 20
+
+SEED_ORDERS_SQL = """
+    INSERT INTO orders (customer_id, status, subtotal, total_amount, tenant_id, created_at, updated_at)
+    SELECT s.customer_id,
+           (ARRAY['pending_confirmation', 'confirmed', 'out_for_delivery', 'delivered', 'delivered', 'delivered',
+                  'cancelled', 'returned'])[1 + g % 8]::"OrderStatus",
+           150, 150, s.tenant_id, now() - (g % 60) * interval '1 day', now()
+    FROM perf_plat_sizes s CROSS JOIN LATERAL generate_series(1, s.orders) g
+"""
+
+
+def tenant_size(rank, maximum, skew):
+    return max(1, round(maximum * rank ** -skew))
+
+
+def tenant_admin_email(rank):
+    return f'admin-{rank}@{EMAIL_DOMAIN}'
+
+
+def ensure_platform_admin(conn, password_hash):
+    now = datetime.now()
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO users (email, password, role, is_platform_admin, first_name, last_name, tenant_id,
+                               created_at, updated_at)
+            VALUES (%s, %s, 'super_admin', true, 'Perf', 'Platform', NULL, %s, %s)
+            ON CONFLICT (email) DO UPDATE SET is_platform_admin = true, tenant_id = NULL, password = EXCLUDED.password
+        """, (PLATFORM_ADMIN_EMAIL, password_hash, now, now))
+
+
+def grow_platform(conn, target, args, plan_ids, password_hash, rng):
+    """Seed tenants ranked existing+1..target; rank decides each tenant's Zipf share"""
+    existing = query_one(conn, 'SELECT COUNT(*) FROM tenants WHERE slug LIKE %s', (SLUG_PREFIX + '%',))[0]
+    if existing >= target:
+        return existing
+    now = datetime.now()
+    ranks = range(existing + 1, target + 1)
+    tenants = {}
+    for rank in ranks:
+        roll = rng.random()
+        status = 'active' if rank <= args.tenant_traffic or roll >= 0.1 else 'suspended' if roll < 0.05 else 'trialing'
+        tenants[rank] = (str(uuid.uuid4()), status, now - timedelta(days=rng.uniform(0, 400)))
+
+    copy_rows(conn, 'tenants', ['id', 'name', 'slug', 'region', 'currency', 'current_plan_id', 'subscription_status',
+                                'createdAt', 'updatedAt'],
+              ((tid, f'Perf Platform {rank}', f'{SLUG_PREFIX}{rank:05d}', rng.choice(REGIONS), 'GHS',
+                rng.choice(plan_ids) if plan_ids else None, status, created, created)
+               for rank, (tid, status, created) in tenants.items()))
+
+    def users():
+        for rank, (tid, _, created) in tenants.items():
+            yield tenant_admin_email(rank), password_hash, 'super_admin', 'Perf', f'Admin{rank}', tid, now, created, now
+            for j in range(1, tenant_size(rank, args.max_users, args.skew)):
+                last_login = now - timedelta(days=rng.uniform(0, 60)) if rng.random() < 0.5 else None
+                yield (f'user-{rank}-{j}@{EMAIL_DOMAIN}', password_hash, 'sales_rep' if j % 3 else 'delivery_agent',
+                       'Perf', f'User{rank}x{j}', tid, last_login, created, now)
+
+    user_count = copy_rows(conn, 'users', ['email', 'password', 'role', 'first_name', 'last_name', 'tenant_id',
+                                           'last_login', 'created_at', 'updated_at'], users())
+    copy_rows(conn, 'customers', ['first_name', 'last_name', 'phone_number', 'address', 'state', 'area', 'notes',
+                                  'tenant_id', 'created_at', 'updated_at'],
+              (('Perf', f'Customer{rank}', '0240000000', 'Perf street', *random_area(rng), CUSTOMER_NOTE, tid, now, now)
+               for rank, (tid, _, _) in tenants.items()))
+    customer_ids = dict(query_all(conn, 'SELECT tenant_id, id FROM customers WHERE notes = %s AND tenant_id = ANY(%s)',
+                                  (CUSTOMER_NOTE, [tid for tid, _, _ in tenants.values()])))
+
+    with conn.cursor() as cur:
+        cur.execute('CREATE TEMP TABLE IF NOT EXISTS perf_plat_sizes (tenant_id text, customer_id int, orders int)')
+        cur.execute('TRUNCATE perf_plat_sizes')
+    copy_rows(conn, 'perf_plat_sizes', ['tenant_id', 'customer_id', 'orders'],
+              ((tid, customer_ids[tid], tenant_size(rank, args.max_orders, args.skew))
+               for rank, (tid, _, _) in tenants.items()))
+    with conn.cursor() as cur:
+        cur.execute(SEED_ORDERS_SQL)
+        order_count = cur.rowcount
+
+    copy_rows(conn, 'webhook_events', ['provider', 'event_type', 'reference', 'payload_hash', 'tenant_id',
+                                       'received_at'],
+              (('paystack-platform', rng.choice(BILLING_EVENT_TYPES), f'{SLUG_PREFIX}{rank}-{j}', 'perf', tid,
+                now - timedelta(days=rng.uniform(0, 90)))
+               for rank, (tid, _, _) in tenants.items() for j in range(args.billing_events)))
+    with conn.cursor() as cur:
+        for table in ('tenants', 'users', 'customers', 'orders', 'webhook_events'):
+            cur.execute(f'ANALYZE {table}')
+    print(f'  +{len(tenants):,} tenants, +{user_count:,} users, +{order_count:,} orders')
+    return target
+
+
+def platform_endpoints(ids, total, rng):
+    """(label, path factory) for every endpoint the platform pages call"""
+    last_page = max(-(-total // TENANT_PAGE), 1)
+    return [
+        ('metrics', lambda: '/api/platform/metrics'),
+        ('trends 30d', lambda: '/api/platform/metrics/trends?period=30d'),
+        ('trends 1y', lambda: '/api/platform/metrics/trends?period=1y'),
+        ('tenants page 1', lambda: f'/api/platform/tenants?page=1&limit={TENANT_PAGE}'),
+        ('tenants last page', lambda: f'/api/platform/tenants?page={last_page}&limit={TENANT_PAGE}'),
+        ('tenants search', lambda: f'/api/platform/tenants?search=Platform%20{rng.randint(1, len(ids))}'
+                                   f'&limit={TENANT_PAGE}'),
+        ('tenants suspended', lambda: f'/api/platform/tenants?status=suspended&limit={TENANT_PAGE}'),
+        ('tenant largest', lambda: f'/api/platform/tenants/{ids[0]}'),
+        ('tenant random', lambda: f'/api/platform/tenants/{rng.choice(ids)}'),
+        ('billing events', lambda: '/api/platform/billing-events?limit=100'),
+    ]
+
+
+def measure_platform(session, level, endpoints, args):
+    results = {}
+    for label, path in endpoints:
+        stats = LatencyStats(f'{label} @{level:,}')
+        sizes = []
+        lock = threading.Lock()
+
+        def call(_, path=path, stats=stats, sizes=sizes, lock=lock):
+            resp, ms, err = timed_request(session, 'GET', path())
+            stats.record_response(resp, ms, err, ok_statuses=(200,))
+            if resp is not None and resp.status_code == 200:
+                with lock:
+                    sizes.append(len(resp.content))
+
+        run_concurrent(call, range(args.requests), args.workers)
+        summary = stats.summary()
+        summary['avg_bytes'] = round(sum(sizes) / len(sizes)) if sizes else 0
+        results[label] = summary
+    return results
+
+
+def tenant_sessions(conn, count, pool_size):
+    """Sessions for the largest active seeded tenants, logged in as their super_admin"""
+    rows = query_all(conn, """
+        SELECT slug FROM tenants WHERE slug LIKE %s AND subscription_status = 'active' ORDER BY slug LIMIT %s
+    """, (SLUG_PREFIX + '%', count))
+    return [new_session(login(tenant_admin_email(int(slug[len(SLUG_PREFIX):])), ADMIN_PASSWORD), pool_size=pool_size)
+            for (slug,) in rows]
+
+
+def tenant_reader(sessions, stats, rng):
+    paths = ['/api/orders?page=1&limit=20', '/api/orders?page=1&limit=20&status=delivered',
+             '/api/customers?page=1&limit=20']
+
+    def read(_):
+        resp, ms, err = timed_request(rng.choice(sessions), 'GET', rng.choice(paths))
+        stats.record_response(resp, ms, err, ok_statuses=(200,))
+    return read
+
+
+def platform_looper(session, endpoints, stats, rng):
+    def loop(_):
+        _, path = rng.choice(endpoints)
+        resp, ms, err = timed_request(session, 'GET', path())
+        stats.record_response(resp, ms, err, ok_statuses=(200,))
+    return loop
+
+
+def measure_shared(platform, sessions, level, endpoints, args, rng):
+    alone = LatencyStats(f'tenant reads alone @{level:,}')
+    run_for_duration(tenant_reader(sessions, alone, rng), args.tenant_workers, args.duration)
+
+    shared = LatencyStats(f'tenant reads shared @{level:,}')
+    looped = LatencyStats(f'platform loop @{level:,}')
+    stop = threading.Event()
+    background = threading.Thread(target=run_for_duration, daemon=True,
+                                  args=(platform_looper(platform, endpoints, looped, rng), args.platform_workers,
+                                        args.duration + 30, stop))
+    background.start()
+    time.sleep(1)  # let the platform loop reach steady state before sampling tenant reads
+    run_for_duration(tenant_reader(sessions, shared, rng), args.tenant_workers, args.duration)
+    stop.set()
+    background.join()
+
+    alone_s, shared_s, looped_s = alone.summary(), shared.summary(), looped.summary()
+    slowdown = shared_s['p95_ms'] / alone_s['p95_ms'] if alone_s['p95_ms'] else 0.0
+    return {'alone': alone_s, 'shared': shared_s, 'platform_loop': looped_s, 'p95_slowdown': round(slowdown, 2)}
+
+
+def cleanup(conn):
+    with conn.cursor() as cur:
+        cur.execute('DELETE FROM tenants WHERE slug LIKE %s', (SLUG_PREFIX + '%',))
+        tenants = cur.rowcount
+        cur.execute('DELETE FROM users WHERE email = %s', (PLATFORM_ADMIN_EMAIL,))
+    print(f'  Deleted {tenants:,} perf tenants and their users, customers, orders and billing events')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--levels', default='10,100,1000,10000', help='tenant counts to grow the platform through')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for tenant sizes')
+    parser.add_argument('--max-orders', type=int, default=100_000, help='orders of the largest tenant')
+    parser.add_argument('--max-users', type=int, default=200, help='users of the largest tenant')
+    parser.add_argument('--billing-events', type=int, default=3, help='platform webhook events per tenant')
+    parser.add_argument('--requests', type=int, default=50, help='requests per platform endpoint and level')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--tenant-traffic', type=int, default=10, help='tenants generating traffic in phase 3')
+    parser.add_argument('--tenant-workers', type=int, default=16)
+    parser.add_argument('--platform-workers', type=int, default=4, help='concurrent platform admins in phase 3')
+    parser.add_argument('--duration', type=float, default=20, help='seconds per phase 3 run')
+    parser.add_argument('--max-p95-ms', type=float, default=1000, help='per platform endpoint at the top level')
+    parser.add_argument('--max-slowdown', type=float, default=1.5,
+                        help='allowed tenant p95 ratio with platform traffic vs without')
+    parser.add_argument('--cleanup', action='store_true', help='delete the seeded tenants and exit')
+    parser.add_argument('--seed', type=int, default=13)
+    args = parser.parse_args()
+
+    conn = connect_db()
+    if args.cleanup:
+        cleanup(conn)
+        conn.close()
+        return
+
+    levels = sorted(int(x) for x in args.levels.split(',') if x)
+    rng = random.Random(args.seed)
+    print_header('🛰️  Platform Admin Dashboard Benchmark', target=API_URL,
+                 levels=', '.join(f'{n:,}' for n in levels),
+                 sizes=f'zipf s={args.skew}, top tenant {args.max_orders:,} orders / {args.max_users:,} users',
+                 requests=args.requests, workers=args.workers,
+                 shared=f'{args.tenant_traffic} tenants x {args.tenant_workers} workers, '
+                        f'{args.platform_workers} platform workers, {args.duration:g}s')
+
+    password_hash = query_one(conn, 'SELECT password FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+    ensure_platform_admin(conn, password_hash)
+    plan_ids = [r[0] for r in query_all(conn, 'SELECT id FROM plans WHERE is_active = true ORDER BY price_ghs')]
+    platform = new_session(login(PLATFORM_ADMIN_EMAIL, ADMIN_PASSWORD), pool_size=args.workers + args.platform_workers)
+
+    per_level = []
+    for level in levels:
+        print(f'\n[Phase 1] Growing the platform to {level:,} perf tenants')
+        start = time.perf_counter()
+        grow_platform(conn, level, args, plan_ids, password_hash, rng)
+        total, orders = query_one(conn, 'SELECT (SELECT COUNT(*) FROM tenants), (SELECT COUNT(*) FROM orders)')
+        ids = [r[0] for r in query_all(conn, 'SELECT id FROM tenants WHERE slug LIKE %s ORDER BY slug LIMIT %s',
+                                       (SLUG_PREFIX + '%', level))]
+        print(f'  {total:,} tenants and {orders:,} orders on the platform after {time.perf_counter() - start:.0f}s')
+        endpoints = platform_endpoints(ids, total, rng)
+
+        print(f'\n[Phase 2] Platform endpoints at {level:,} tenants')
+        reads = measure_platform(platform, level, endpoints, args)
+        print_latency_table(list(reads.values()))
+        print('  bytes: ' + ', '.join(f"{label} {s['avg_bytes'] / 1024:,.1f} KiB" for label, s in reads.items()))
+
+        print(f'\n[Phase 3] Tenant traffic with and without platform load at {level:,} tenants')
+        sessions = tenant_sessions(conn, args.tenant_traffic, args.tenant_workers)
+        shared = measure_shared(platform, sessions, level, endpoints, args, rng)
+        print_latency_table([shared['alone'], shared['shared'], shared['platform_loop']])
+        print(f"  tenant p95 {shared['alone']['p95_ms']:.0f} ms alone, {shared['shared']['p95_ms']:.0f} ms "
+              f"with platform load ({shared['p95_slowdown']:.2f}x)")
+        per_level.append({'level': level, 'platform_tenants': total, 'platform_orders': orders, 'reads': reads,
+                          'shared': shared})
+
+    curves = []
+    print(f"\n  {'endpoint':<20}" + ''.join(f'{r["level"]:>10,}' for r in per_level) + f"{'slope':>8}  verdict")
+    for label in per_level[0]['reads']:
+        points = [(r['level'], r['reads'][label]['p50_ms']) for r in per_level]
+        exponent = loglog_slope(points)
+        curves.append({'endpoint': label, 'points': points, 'slope': round(exponent, 3) if exponent is not None
+                       else None, 'verdict': scaling_verdict(exponent)})
+        cells = ''.join(f'{ms:>8.0f}ms' for _, ms in points)
+        slope_txt = f'{exponent:>8.2f}' if exponent is not None else f"{'—':>8}"
+        print(f'  {label:<20}{cells}{slope_txt}  {scaling_verdict(exponent)}')
+
+    top, bottom = per_level[-1], per_level[0]
+    slowest = max(top['reads'].values(), key=lambda s: s['p95_ms'])
+    worst_slowdown = max(per_level, key=lambda r: r['shared']['p95_slowdown'])
+
+    def grew(label):
+        return top['reads'][label]['avg_bytes'] / max(bottom['reads'][label]['avg_bytes'], 1)
+
+    checks = [
+        (f"Every platform endpoint p95 under {args.max_p95_ms:g} ms at {top['level']:,} tenants "
+         f"(slowest: {slowest['name']} {slowest['p95_ms']:.0f} ms)", slowest['p95_ms'] < args.max_p95_ms),
+        (f"Tenant p95 slowdown under platform load at most {args.max_slowdown:g}x "
+         f"(worst {worst_slowdown['shared']['p95_slowdown']:.2f}x at {worst_slowdown['level']:,} tenants)",
+         worst_slowdown['shared']['p95_slowdown'] <= args.max_slowdown),
+        (f"Tenant list page payload bounded ({grew('tenants page 1'):.2f}x from {bottom['level']:,} to "
+         f"{top['level']:,} tenants)", grew('tenants page 1') <= 1.5),
+        (f"Billing events payload bounded ({grew('billing events'):.2f}x)", grew('billing events') <= 1.5),
+        ('Largest tenant detail independent of tenant count',
+         next(c for c in curves if c['endpoint'] == 'tenant largest')['verdict'] in ('flat', 'n/a')),
+        ('No errors', all(s['errors'] == 0 for r in per_level for s in
+                          [*r['reads'].values(), r['shared']['alone'], r['shared']['shared'],
+                           r['shared']['platform_loop']])),
+    ]
+    passed = print_checks(checks)
+
+    save_results('platform-admin', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'settings': vars(args),
+        'levels': per_level,
+        'curves': curves,
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
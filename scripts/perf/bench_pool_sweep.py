@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Prisma connection-pool sizing sweep.
+
+utils/prisma.ts takes its pool from DATABASE_URL (connection_limit, default
+num_cpus * 2 + 1, and pool_timeout, default 10s). Every heavy path competes for
+that pool: $transaction in order creation and agent inventory, GL posting when
+an order is delivered, and the analytics aggregates. The health routes and the
+MCP server open small PrismaClients of their own on top of it.
+
+For every point of the grid --pool-sizes x --max-connections this harness:
+
+    1. sets Postgres max_connections (ALTER SYSTEM, then --pg-restart-cmd);
+       with no restart command only the current value is swept
+    2. restarts the backend (--command, from backend/) with
+       connection_limit and pool_timeout rewritten in its DATABASE_URL
+    3. runs the same mixed workload from --workers threads for --duration:
+
+           create     POST /api/orders
+           advance    PATCH /api/orders/:id/status, one lifecycle step of an
+                      order created earlier; the final step to delivered
+                      posts to the GL
+           allocate   POST /api/agent-inventory/allocate to a seeded agent
+           list       GET /api/orders
+           analytics  GET /api/analytics/dashboard, cache-busted
+
+    4. samples pg_stat_activity for the database: active, idle and
+       idle-in-transaction connections (the pool holding connections while
+       Node does other work), and total connections against max_connections
+    5. counts pool wait timeouts (P2024) and refused connections ("too many
+       clients") in the backend log
+
+Throughput, p99 and error rate are tabulated per configuration. The
+recommendation is the smallest pool with no pool timeouts or refusals whose
+throughput is within --tolerance-pct of the best and whose p99 is within
+--tolerance-pct of the best p99. It is reported per node for --cores (default:
+this host) alongside the Prisma default, and with the number of nodes of that
+size each swept max_connections can hold once reserved slots, the other
+PrismaClients and --ops-connections operator slots are counted.
+
+Usage:
+    python scripts/perf/bench_pool_sweep.py --pool-sizes 5,10,20,40,80 --duration 90
+    python scripts/perf/bench_pool_sweep.py --pool-sizes 10,30,60 --max-connections 100,300 \\
+        --pg-restart-cmd 'docker restart ecommerce-cod-postgres'
+"""
+import argparse
+import os
+import random
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from perf_common import (
+    ADMIN_EMAIL, ADMIN_PASSWORD, DATABASE_URL, LatencyStats, connect_db, ensure_perf_product,
+    format_ghana_phone, ghana_local_number, new_session, percentile, print_checks, print_header, query_all,
+    query_one, random_area, run_for_duration, save_results, tenant_id_for, timed_request,
+)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+AGENT_DOMAIN = 'perf-pool.local'
+ORDER_NOTE = 'perf: pool sweep'
+LIFECYCLE = ['confirmed', 'preparing', 'ready_for_pickup', 'out_for_delivery', 'delivered']
+MIX = {'create': 20, 'advance': 25, 'allocate': 15, 'list': 25, 'analytics': 15}
+OK_STATUSES = {'create': (201,), 'advance': (200,), 'allocate': (201, 400), 'list': (200,), 'analytics': (200,)}
+POOL_TIMEOUT_MARKERS = ('P2024', 'Timed out fetching a new connection from the connection pool')
+REFUSED_MARKERS = ('too many clients already', 'remaining connection slots are reserved')
+# Connections per node outside the main pool: the health routes' PrismaClient (one or two probes at a
+# time) and the MCP server's (connection_limit=2, mcp/config.ts)
+OTHER_CONNECTIONS = 4
+# Slots kept free on the database outside any node for operators: migrations (prisma migrate deploy),
+# psql/admin sessions and a backup or monitoring connection; override with --ops-connections
+OPS_CONNECTIONS = 5
+
+
+def with_pool(url, size, timeout_s):
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.update(connection_limit=str(size), pool_timeout=str(timeout_s))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def seed_agents(conn, tenant_id, count):
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO users (email, password, role, first_name, last_name, tenant_id, created_at, updated_at)
+            SELECT 'perf-pool-agent-' || g || '@' || %s, (SELECT password FROM users WHERE email = %s),
+                   'delivery_agent', 'Perf', 'Pool' || g, %s, NOW(), NOW()
+            FROM generate_series(1, %s) g
+            ON CONFLICT (email) DO NOTHING
+        """, (AGENT_DOMAIN, ADMIN_EMAIL, tenant_id, count))
+    return [r[0] for r in query_all(conn, 'SELECT id FROM users WHERE email LIKE %s ORDER BY id',
+                                    (f'%@{AGENT_DOMAIN}',))][:count]
+
+
+class Backend:
+    """One backend process restarted per configuration"""
+
+    def __init__(self, args, log_path):
+        self.args = args
+        self.log_path = log_path
+        self.proc = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.args.port}'
+
+    def start(self, pool_size):
+        env = {**os.environ, 'PORT': str(self.args.port), 'NODE_ENV': self.args.node_env,
+               'DATABASE_URL': with_pool(DATABASE_URL, pool_size, self.args.pool_timeout)}
+        self.proc = subprocess.Popen(shlex.split(self.args.command), cwd=BACKEND_DIR, env=env,
+                                     stdout=open(self.log_path, 'a'), stderr=subprocess.STDOUT,
+                                     start_new_session=True)
+        session = new_session(pool_size=1)
+        deadline = time.monotonic() + 120
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise SystemExit(f'Backend exited; see {self.log_path}')
+            resp, _, err = timed_request(session, 'GET', f'{self.url}/health', timeout=2)
+            if not err and resp.status_code == 200:
+                return
+            time.sleep(0.5)
+        raise SystemExit('Backend not healthy after 120s')
+
+    def stop(self):
+        if self.proc is None:
+            return
+        os.killpg(self.proc.pid, signal.SIGTERM)
+        try:
+            self.proc.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+            self.proc.wait()
+        self.proc = None
+
+
+def set_max_connections(value, restart_cmd):
+    conn = connect_db()
+    with conn.cursor() as cur:
+        cur.execute(f'ALTER SYSTEM SET max_connections = {int(value)}')
+    conn.close()
+    subprocess.run(restart_cmd, shell=True, check=True)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            conn = connect_db()
+            current = int(query_one(conn, 'SHOW max_connections')[0])
+            conn.close()
+            if current == value:
+                return
+        except Exception:
+            pass
+        time.sleep(1)
+    raise SystemExit(f'Postgres did not come back with max_connections={value}')
+
+
+class ActivitySampler(threading.Thread):
+    """Connection states for the database, sampled until stopped"""
+
+    def __init__(self, interval_s):
+        super().__init__(daemon=True)
+        self.interval_s = interval_s
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.conn = connect_db()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            row = query_one(self.conn, """
+                SELECT COUNT(*), COUNT(*) FILTER (WHERE state = 'active'), COUNT(*) FILTER (WHERE state = 'idle'),
+                       COUNT(*) FILTER (WHERE state LIKE 'idle in transaction%%'),
+                       COUNT(*) FILTER (WHERE wait_event_type = 'Lock')
+                FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()
+            """)
+            self.samples.append(dict(zip(('total', 'active', 'idle', 'idle_in_tx', 'lock_waits'), row)))
+            self.stop_event.wait(self.interval_s)
+        self.conn.close()
+
+    def finish(self):
+        """Peak of each state over the run, plus average active and idle-in-transaction"""
+        self.stop_event.set()
+        self.join()
+        n = len(self.samples) or 1
+        peaks = {k: max((s[k] for s in self.samples), default=0)
+                 for k in ('total', 'active', 'idle', 'idle_in_tx', 'lock_waits')}
+        peaks['avg_active'] = round(sum(s['active'] for s in self.samples) / n, 1)
+        peaks['avg_idle_in_tx'] = round(sum(s['idle_in_tx'] for s in self.samples) / n, 1)
+        return peaks
+
+
+def count_markers(path, offset, markers):
+    with open(path, errors='replace') as f:
+        f.seek(offset)
+        return sum(1 for line in f if any(m in line for m in markers))
+
+
+def run_workload(base_url, session, order, product_id, agent_ids, args):
+    stats = {op: LatencyStats(op) for op in MIX}
+    ops = [op for op, weight in MIX.items() for _ in range(weight)]
+    in_flight = deque()  # (order_id, next lifecycle index)
+
+    def work(_):
+        op = random.choice(ops)
+        if op == 'advance' and not in_flight:
+            op = 'create'
+        if op == 'create':
+            resp, ms, err = timed_request(session, 'POST', f'{base_url}/api/orders', json=order)
+            if not err and resp.status_code == 201:
+                in_flight.append((resp.json()['order']['id'], 0))
+        elif op == 'advance':
+            try:
+                order_id, step = in_flight.popleft()
+            except IndexError:
+                return
+            resp, ms, err = timed_request(session, 'PATCH', f'{base_url}/api/orders/{order_id}/status',
+                                          json={'status': LIFECYCLE[step], 'notes': ORDER_NOTE})
+            if not err and resp.status_code == 200 and step + 1 < len(LIFECYCLE):
+                in_flight.append((order_id, step + 1))
+        elif op == 'allocate':
+            resp, ms, err = timed_request(session, 'POST', f'{base_url}/api/agent-inventory/allocate', json={
+                'productId': product_id, 'agentId': random.choice(agent_ids), 'quantity': 1, 'notes': ORDER_NOTE})
+        elif op == 'list':
+            resp, ms, err = timed_request(session, 'GET', f'{base_url}/api/orders', params={'page': 1, 'limit': 20})
+        else:
+            resp, ms, err = timed_request(session, 'GET', f'{base_url}/api/analytics/dashboard',
+                                          params={'_cb': uuid.uuid4().hex})
+        stats[op].record_response(resp, ms, err, ok_statuses=OK_STATUSES[op])
+
+    calls = run_for_duration(work, args.workers, args.duration)
+    return calls, stats
+
+
+def recommend(results, tolerance_pct):
+    clean = [r for r in results if not r['pool_timeouts'] and not r['refused'] and r['error_pct'] < 1]
+    if not clean:
+        return None
+    best_rps = max(r['rps'] for r in clean)
+    best_p99 = min(r['p99_ms'] for r in clean)
+    ok = [r for r in clean if r['rps'] >= best_rps * (1 - tolerance_pct / 100)
+          and r['p99_ms'] <= best_p99 * (1 + tolerance_pct / 100)]
+    return min(ok or clean, key=lambda r: (r['pool_size'], -r['rps']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pool-sizes', default='5,10,20,40,80', help='connection_limit values to sweep')
+    parser.add_argument('--max-connections', default='', help='Postgres max_connections values (needs restart cmd)')
+    parser.add_argument('--pg-restart-cmd', help='shell command that restarts Postgres')
+    parser.add_argument('--pool-timeout', type=int, default=10, help='pool_timeout seconds for every run')
+    parser.add_argument('--command', default='node dist/server.js', help='backend start command, run in backend/')
+    parser.add_argument('--node-env', default='development')
+    parser.add_argument('--port', type=int, default=3201)
+    parser.add_argument('--workers', type=int, default=128)
+    parser.add_argument('--duration', type=int, default=90, help='seconds of load per configuration')
+    parser.add_argument('--agents', type=int, default=20)
+    parser.add_argument('--cores', type=int, default=os.cpu_count(), help='cores per backend node')
+    parser.add_argument('--ops-connections', type=int, default=OPS_CONNECTIONS,
+                        help='connections left free for migrations, psql and monitoring when sizing node counts')
+    parser.add_argument('--tolerance-pct', type=float, default=5)
+    parser.add_argument('--sample-interval', type=float, default=0.5)
+    args = parser.parse_args()
+
+    pool_sizes = [int(p) for p in args.pool_sizes.split(',')]
+    max_conns = [int(m) for m in args.max_connections.split(',') if m]
+    if max_conns and not args.pg_restart_cmd:
+        raise SystemExit('--max-connections needs --pg-restart-cmd to apply the setting')
+    prisma_default = args.cores * 2 + 1
+    print_header('🏊 Prisma Pool Sizing Sweep', pool_sizes=pool_sizes, max_connections=max_conns or 'current',
+                 workers=args.workers, duration=f'{args.duration}s', cores=args.cores,
+                 prisma_default=prisma_default)
+
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    product_id = ensure_perf_product(conn, tenant_id)
+    agent_ids = seed_agents(conn, tenant_id, args.agents)
+    reserved = int(query_one(conn, 'SHOW superuser_reserved_connections')[0])
+    conn.close()
+
+    log_path = os.path.join(os.environ.get('PERF_RESULTS_DIR', '/tmp/perf-results'), 'pool-sweep-backend.log')
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    backend = Backend(args, log_path)
+    state, area = random_area()
+    order = {'orderItems': [{'productId': product_id, 'quantity': 1, 'unitPrice': 150}],
+             'subtotal': 150, 'totalAmount': 150, 'deliveryAddress': f'{area} junction',
+             'deliveryState': state, 'deliveryArea': area, 'notes': ORDER_NOTE}
+
+    results = []
+    grid = [(m, p) for m in (max_conns or [None]) for p in pool_sizes]
+    try:
+        for phase, (max_conn, pool_size) in enumerate(grid, start=1):
+            if max_conn is not None and (phase == 1 or grid[phase - 2][0] != max_conn):
+                backend.stop()
+                set_max_connections(max_conn, args.pg_restart_cmd)
+            conn = connect_db()
+            current_max = int(query_one(conn, 'SHOW max_connections')[0])
+            conn.close()
+            print(f'\n[Phase {phase}] connection_limit={pool_size}, max_connections={current_max}')
+            backend.stop()
+            offset = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+            backend.start(pool_size)
+
+            session = new_session(pool_size=args.workers)
+            resp, _, err = timed_request(session, 'POST', f'{backend.url}/api/auth/login',
+                                         json={'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+            if err or resp.status_code != 200:
+                raise SystemExit(f'Login failed: {err or resp.text[:200]}')
+            session.headers['Authorization'] = f"Bearer {resp.json()['tokens']['accessToken']}"
+            if 'customerId' not in order:
+                resp, _, err = timed_request(session, 'POST', f'{backend.url}/api/orders', json={
+                    **order, 'customerName': 'Perf Pool',
+                    'customerPhone': format_ghana_phone(ghana_local_number(), 'local')})
+                if err or resp.status_code != 201:
+                    raise SystemExit(f'Order creation failed: {err or resp.text[:200]}')
+                order['customerId'] = resp.json()['order']['customerId']
+
+            sampler = ActivitySampler(args.sample_interval)
+            sampler.start()
+            calls, stats = run_workload(backend.url, session, order, product_id, agent_ids, args)
+            activity = sampler.finish()
+            backend.stop()
+
+            summaries = [s.summary() for s in stats.values()]
+            samples = sorted(ms for s in stats.values() for ms in s.samples)
+            errors = sum(s['errors'] for s in summaries)
+            result = {
+                'pool_size': pool_size,
+                'max_connections': current_max,
+                'requests': calls,
+                'rps': round(calls / args.duration, 1),
+                'p50_ms': round(percentile(samples, 50), 1),
+                'p99_ms': round(percentile(samples, 99), 1),
+                'error_pct': round(errors / calls * 100, 2) if calls else 100.0,
+                'pool_timeouts': count_markers(log_path, offset, POOL_TIMEOUT_MARKERS),
+                'refused': count_markers(log_path, offset, REFUSED_MARKERS),
+                'pg': activity,
+                'ops': summaries,
+            }
+            results.append(result)
+            print(f"  {result['rps']:,.0f} req/s, p99 {result['p99_ms']:.0f} ms, errors {result['error_pct']:.2f}%, "
+                  f"pool timeouts {result['pool_timeouts']}, refused {result['refused']}")
+            print(f"  Postgres: up to {activity['total']} connections ({activity['active']} active, "
+                  f"{activity['idle_in_tx']} idle in transaction, {activity['lock_waits']} waiting on locks)")
+    finally:
+        backend.stop()
+
+    print(f'\n[Phase {len(grid) + 1}] Sweep')
+    print(f"  {'max_conn':>8} {'pool':>5} {'req/s':>8} {'p50':>8} {'p99':>8} {'err%':>6} {'P2024':>6} "
+          f"{'refused':>7} {'pg peak':>8} {'active':>7} {'idle-tx':>8}")
+    for r in results:
+        print(f"  {r['max_connections']:>8} {r['pool_size']:>5} {r['rps']:>8,.0f} {r['p50_ms']:>6.0f}ms "
+              f"{r['p99_ms']:>6.0f}ms {r['error_pct']:>6.2f} {r['pool_timeouts']:>6} {r['refused']:>7} "
+              f"{r['pg']['total']:>8} {r['pg']['active']:>7} {r['pg']['idle_in_tx']:>8}")
+
+    pick = recommend(results, args.tolerance_pct)
+    capacity = {}
+    if pick:
+        per_node = pick['pool_size'] + OTHER_CONNECTIONS
+        for m in sorted({r['max_connections'] for r in results}):
+            capacity[m] = max((m - reserved - args.ops_connections) // per_node, 0)
+        print(f"\n  Recommended connection_limit per node ({args.cores} cores): {pick['pool_size']} "
+              f"(Prisma default {prisma_default}); {pick['rps']:,.0f} req/s, p99 {pick['p99_ms']:.0f} ms")
+        print('  Nodes per database at that size: '
+              + ', '.join(f'max_connections={m}: {n}' for m, n in capacity.items()))
+    else:
+        print('\n  No configuration ran without pool timeouts, refused connections or errors')
+
+    passed = print_checks([
+        ('At least one configuration ran clean (no P2024, no refused connections, < 1% errors)', pick is not None),
+        ('Recommended pool keeps idle-in-transaction below half the pool',
+         pick is not None and pick['pg']['idle_in_tx'] < pick['pool_size'] / 2),
+    ])
+    save_results('pool-sweep', {
+        'timestamp': datetime.now().isoformat(),
+        'settings': vars(args),
+        'superuser_reserved_connections': reserved,
+        'prisma_default_pool': prisma_default,
+        'results': results,
+        'recommendation': {'pool_size': pick['pool_size'], 'cores': args.cores, 'nodes_per_max_connections': capacity}
+        if pick else None,
+        'passed': passed,
+    })
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
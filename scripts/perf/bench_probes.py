@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Readiness and liveness probe behaviour under saturation.
+
+The orchestrator restarts or unroutes a backend pod when its probes fail
+(k8s/backend-deployment.yaml: liveness and readiness both on GET /health;
+liveness every 10s with a 5s timeout, readiness every 5s with a 3s timeout,
+three consecutive failures each). This harness polls the probe endpoints from
+routes/health.routes.ts at that cadence while it saturates the API with an
+order and analytics mix, then asks: did a node that was still serving traffic
+fail its probes?
+
+Probes (--probe PATH:PERIOD_S:TIMEOUT_S:FAILURES[:liveness], repeatable;
+defaults below):
+
+    /health            10s / 5s / 3   liveness as deployed; static JSON, so its
+                                      latency is pure event-loop and queueing
+    /health             5s / 3s / 3   readiness as deployed
+    /ready              5s / 3s / 3   SELECT 1 plus a Redis PING. Uses its own
+                                      PrismaClient, so it queues on a separate
+                                      pool, but behind healthLimiter (30/min
+                                      per IP outside development)
+    /live              10s / 5s / 3   process.memoryUsage() only
+    /health/detailed   30s / 5s / 3   database and Redis round trips, also
+                                      behind healthLimiter
+
+Load ramps through --levels concurrent workers for --step-s each, starting
+with an idle step. Each worker picks from the mix:
+
+    create      POST /api/orders
+    list        GET /api/orders (first page, newest first)
+    analytics   GET /api/analytics/dashboard, --cold-pct of them with a
+                cache-busting query parameter so they miss the response cache
+
+A probe failure is a timeout, a transport error or a non-2xx status. It
+counts as a false failure when the API was still healthy: at least
+--healthy-pct of load requests in the preceding --health-window-s succeeded
+(or there was no load). For each probe the harness replays the orchestrator
+logic: FAILURES consecutive failures is one restart (liveness) or one
+removal from the service (readiness). A restarted pod hands its traffic to
+its peers, so every false restart under load is a step towards a cascade.
+
+Usage:
+    python scripts/perf/bench_probes.py --levels 16,64,128,256 --step-s 120
+    python scripts/perf/bench_probes.py --levels 32,128 --probe /ready:5:1:3 --probe /health:10:5:3:liveness
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from datetime import datetime
+
+from perf_common import (
+    API_URL, LatencyStats, connect_db, ensure_perf_product, format_ghana_phone, ghana_local_number, login,
+    new_session, print_checks, print_header, print_latency_table, random_area, run_for_duration, save_results,
+    tenant_id_for, timed_request,
+)
+
+ORDER_NOTE = 'perf: probe saturation'
+DEFAULT_PROBES = [
+    ('/health', 10, 5, 3, 'liveness'),
+    ('/health', 5, 3, 3, 'readiness'),
+    ('/ready', 5, 3, 3, 'readiness'),
+    ('/live', 10, 5, 3, 'liveness'),
+    ('/health/detailed', 30, 5, 3, 'readiness'),
+]
+MIX = {'create': 30, 'list': 30, 'analytics': 40}
+
+
+def parse_probe(spec):
+    path, period, timeout, failures, *kind = spec.split(':')
+    return path, float(period), float(timeout), int(failures), kind[0] if kind else 'readiness'
+
+
+class LoadTracker:
+    """Per-operation latency plus a time-ordered success log for health windows"""
+
+    def __init__(self):
+        self.stats = {}
+        self.times = []
+        self.oks = []
+        self._lock = threading.Lock()
+
+    def record(self, level, op, resp, ms, err, ok_statuses):
+        key = f'{op} @{level}'
+        self.stats.setdefault(key, LatencyStats(key)).record_response(resp, ms, err, ok_statuses=ok_statuses)
+        ok = err is None and resp is not None and resp.status_code in ok_statuses
+        with self._lock:
+            self.times.append(time.monotonic())
+            self.oks.append(ok)
+
+    def success_ratio(self, start, end):
+        with self._lock:
+            lo, hi = bisect_left(self.times, start), bisect_left(self.times, end)
+            window = self.oks[lo:hi]
+        return (sum(window) / len(window)) if window else None
+
+
+class ProbePoller(threading.Thread):
+    """Polls one probe at a fixed period with the orchestrator's timeout"""
+
+    def __init__(self, path, period_s, timeout_s, failures, kind, state, stop_event):
+        super().__init__(daemon=True)
+        self.path, self.period_s, self.timeout_s, self.failures, self.kind = path, period_s, timeout_s, failures, kind
+        self.label = f'{kind} {path} ({period_s:g}s/{timeout_s:g}s/{failures})'
+        self.state = state
+        self.stop_event = stop_event
+        self.session = new_session(pool_size=2)
+        self.samples = []
+
+    def run(self):
+        # Offset start so probes with equal periods do not fire in lockstep
+        self.stop_event.wait(random.uniform(0, self.period_s))
+        next_at = time.monotonic()
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            resp, ms, err = timed_request(self.session, 'GET', f'{API_URL}{self.path}', timeout=self.timeout_s)
+            status = resp.status_code if resp is not None else ('timeout' if err and 'timed out' in err else 'error')
+            self.samples.append({'t': started, 'level': self.state['level'], 'ms': ms, 'status': status,
+                                 'ok': err is None and 200 <= resp.status_code < 300})
+            next_at += self.period_s
+            self.stop_event.wait(max(next_at - time.monotonic(), 0))
+
+
+def evaluate(poller, tracker, window_s, healthy_pct):
+    """Classify failures and replay the failure-threshold logic per load level"""
+    by_level = {}
+    streak = 0
+    for s in poller.samples:
+        if s['level'] not in by_level:
+            by_level[s['level']] = {'probes': 0, 'failures': 0, 'false_failures': 0, 'trips': 0, 'false_trips': 0,
+                                    'statuses': {}, 'stats': LatencyStats(f"{poller.path} @{s['level']}")}
+        level = by_level[s['level']]
+        level['probes'] += 1
+        level['stats'].record(s['ms'], ok=s['ok'], status=s['status'])
+        if s['ok']:
+            streak = 0
+            continue
+        ratio = tracker.success_ratio(s['t'] - window_s, s['t'])
+        healthy = ratio is None or ratio * 100 >= healthy_pct
+        level['failures'] += 1
+        level['false_failures'] += healthy
+        level['statuses'][str(s['status'])] = level['statuses'].get(str(s['status']), 0) + 1
+        streak += 1
+        if streak == poller.failures:
+            level['trips'] += 1
+            level['false_trips'] += healthy
+            streak = 0  # the orchestrator acts, then counting starts over
+    return by_level
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--levels', default='16,64,128,256', help='concurrent load workers per step (after idle)')
+    parser.add_argument('--step-s', type=int, default=120, help='seconds per load level')
+    parser.add_argument('--probe', action='append', metavar='PATH:PERIOD:TIMEOUT:FAILURES[:KIND]',
+                        help='probe to poll (repeatable); default: the deployed probes plus /ready, /live, '
+                             '/health/detailed')
+    parser.add_argument('--cold-pct', type=float, default=50, help='share of analytics requests that bust the cache')
+    parser.add_argument('--health-window-s', type=float, default=10)
+    parser.add_argument('--healthy-pct', type=float, default=90, help='load success rate that counts as healthy')
+    parser.add_argument('--max-false-failure-pct', type=float, default=1.0, help='per readiness probe')
+    args = parser.parse_args()
+
+    levels = [0] + [int(n) for n in args.levels.split(',')]
+    probes = [parse_probe(p) for p in args.probe] if args.probe else DEFAULT_PROBES
+    print_header('🩺 Probe Behaviour Under Saturation', target=API_URL, levels=levels, step=f'{args.step_s}s',
+                 probes=len(probes), mix=MIX)
+
+    token = login()
+    session = new_session(token, pool_size=max(levels))
+    conn = connect_db()
+    product_id = ensure_perf_product(conn, tenant_id_for(conn))
+    conn.close()
+    state_name, area = random_area()
+    order = {'orderItems': [{'productId': product_id, 'quantity': 1, 'unitPrice': 150}],
+             'subtotal': 150, 'totalAmount': 150, 'deliveryAddress': f'{area} junction',
+             'deliveryState': state_name, 'deliveryArea': area, 'notes': ORDER_NOTE}
+    first, _, err = timed_request(session, 'POST', '/api/orders', json={
+        **order, 'customerName': 'Perf Probe', 'customerPhone': format_ghana_phone(ghana_local_number(), 'local')})
+    if err or first.status_code != 201:
+        raise SystemExit(f'Order creation failed: {err or first.text[:200]}')
+    order['customerId'] = first.json()['order']['customerId']
+
+    tracker = LoadTracker()
+    state = {'level': 0}
+    ops = [op for op, weight in MIX.items() for _ in range(weight)]
+
+    def work(i):
+        level = state['level']
+        op = random.choice(ops)
+        if op == 'create':
+            resp, ms, err = timed_request(session, 'POST', '/api/orders', json=order)
+            tracker.record(level, op, resp, ms, err, (201,))
+        elif op == 'list':
+            resp, ms, err = timed_request(session, 'GET', '/api/orders', params={'page': 1, 'limit': 20})
+            tracker.record(level, op, resp, ms, err, (200,))
+        else:
+            params = {'_cb': uuid.uuid4().hex} if random.uniform(0, 100) < args.cold_pct else {}
+            resp, ms, err = timed_request(session, 'GET', '/api/analytics/dashboard', params=params)
+            tracker.record(level, op, resp, ms, err, (200,))
+
+    stop = threading.Event()
+    pollers = [ProbePoller(*p, state=state, stop_event=stop) for p in probes]
+    for p in pollers:
+        p.start()
+
+    for phase, level in enumerate(levels, start=1):
+        state['level'] = level
+        print(f'\n[Phase {phase}] {level} load worker(s) for {args.step_s}s')
+        if level:
+            calls = run_for_duration(work, level, args.step_s)
+            print(f'  {calls:,} requests ({calls / args.step_s:.0f}/s)')
+        else:
+            time.sleep(args.step_s)
+        recent = [s for p in pollers for s in p.samples if s['level'] == level]
+        print(f"  {sum(1 for s in recent if not s['ok'])} of {len(recent)} probe(s) failed")
+    stop.set()
+    for p in pollers:
+        p.join()
+
+    print(f'\n[Phase {len(levels) + 1}] Load and probe latency')
+    load_summaries = [s.summary() for s in tracker.stats.values()]
+    print_latency_table(sorted(load_summaries, key=lambda s: (int(s['name'].split('@')[1]), s['name'])))
+
+    results = []
+    for poller in pollers:
+        by_level = evaluate(poller, tracker, args.health_window_s, args.healthy_pct)
+        print(f'\n  {poller.label}')
+        print_latency_table([by_level[lv]['stats'].summary() for lv in levels if lv in by_level])
+        rows = []
+        for lv in levels:
+            if lv not in by_level:
+                continue
+            r = by_level[lv]
+            action = 'restarts' if poller.kind == 'liveness' else 'unroutes'
+            print(f"    @{lv:<5} {r['failures']:>3}/{r['probes']:<4} failed ({r['false_failures']} while healthy), "
+                  f"{r['trips']} {action} ({r['false_trips']} false) {r['statuses'] or ''}")
+            rows.append({'level': lv, **{k: v for k, v in r.items() if k != 'stats'},
+                         'latency': r['stats'].summary()})
+        probes_total = sum(r['probes'] for r in rows)
+        false_total = sum(r['false_failures'] for r in rows)
+        results.append({'probe': poller.label, 'path': poller.path, 'kind': poller.kind,
+                        'period_s': poller.period_s, 'timeout_s': poller.timeout_s,
+                        'failure_threshold': poller.failures, 'levels': rows,
+                        'false_failure_pct': round(false_total / probes_total * 100, 2) if probes_total else 0.0,
+                        'false_trips': sum(r['false_trips'] for r in rows),
+                        'rate_limited': sum(r['statuses'].get('429', 0) for r in rows)})
+
+    checks = []
+    for r in results:
+        if r['kind'] == 'liveness':
+            checks.append((f"{r['probe']}: no restarts of a healthy node", r['false_trips'] == 0))
+        else:
+            checks.append((f"{r['probe']}: false failures {r['false_failure_pct']:.2f}% "
+                           f"< {args.max_false_failure_pct:g}%", r['false_failure_pct'] < args.max_false_failure_pct))
+        if r['rate_limited']:
+            checks.append((f"{r['probe']}: never rate limited ({r['rate_limited']} 429s)", False))
+    passed = print_checks(checks)
+
+    save_results('probes', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'settings': {k: v for k, v in vars(args).items() if k != 'probe'},
+        'levels': levels,
+        'load': load_summaries,
+        'probes': results,
+        'passed': passed,
+    })
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Payday scale test for the rep payout and workload endpoints.
+
+Finance opens the rep dashboards and then pays every rep in one sitting. This
+seeds a multi-year order history for hundreds of reps (perf-payout-rep-<n>@
+perf-payout.local) and delivery agents, with each rep on their own fixed
+commission_amount, then replays payday:
+
+  1. the dashboards: GET /api/users/reps/workload, /reps/performance and
+     /agents/performance, which load every rep's or agent's orders with no
+     paging (agents/performance over all history unless given dates)
+  2. for every rep, concurrently: GET /reps/:id/pending-payments, then
+     POST /reps/:id/process-payout for all of them with the amount the payout
+     modal would send (the sum of the listed commissionAmount)
+
+Delivered orders older than --unpaid-days are seeded as already paid, except
+a --backlog-pct share that was never paid out; the rest are what the payouts
+settle. Re-running resets that unpaid window, so history (and old payouts)
+accumulate across runs the way they do in production.
+
+processPayout trusts the client's amount and marks the given orders paid
+without checking they were unpaid, so --double-submit-pct resubmits some
+payouts concurrently, the way a double click would, to show whether the same
+orders can be paid for twice.
+
+The ledger checks: every payout has exactly one balanced journal entry, the sum
+of payouts equals the debits those entries post to Commissions Payable (2020),
+the movement of 2020 over the run matches, and the payouts add up to each
+rep's commission times the orders that were marked paid.
+
+Usage:
+    python scripts/perf/bench_rep_payouts.py --reps 300 --years 3 --workers 20
+    python scripts/perf/bench_rep_payouts.py --reps 500 --double-submit-pct 5
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from perf_common import (
+    ADMIN_EMAIL, API_URL, LatencyStats, connect_db, copy_rows, format_ghana_phone, ghana_local_number, login,
+    new_session, percentile, print_checks, print_header, print_latency_table, query_all, query_one, random_area,
+    run_concurrent, save_results, tenant_id_for, timed_request,
+)
+
+SEED_DOMAIN = 'perf-payout.local'
+ORDER_NOTE = 'perf: rep payouts'
+COMMISSIONS_PAYABLE = '2020'  # GL_ACCOUNTS.COMMISSIONS_PAYABLE
+COMMISSION_TIERS = [5, 10, 15, 20]
+# Status mix of the seeded history (weights)
+STATUS_MIX = {'delivered': 75, 'returned': 8, 'cancelled': 7, 'confirmed': 4, 'out_for_delivery': 3,
+              'pending_confirmation': 3}
+
+
+def seed_users(conn, tenant_id, role, count, rng):
+    slug = 'rep' if role == 'sales_rep' else 'agent'
+    pattern = f'perf-payout-{slug}-%@{SEED_DOMAIN}'
+    password_hash = query_one(conn, 'SELECT password FROM users WHERE email = %s', (ADMIN_EMAIL,))[0]
+    existing = query_one(conn, 'SELECT COUNT(*) FROM users WHERE email LIKE %s', (pattern,))[0]
+    now = datetime.now()
+    rows = ((f'perf-payout-{slug}-{i}@{SEED_DOMAIN}', password_hash, role, 'Perf', f'Payout{slug.title()}{i}',
+             rng.choice(COMMISSION_TIERS), tenant_id, now, now) for i in range(existing, count))
+    copy_rows(conn, 'users', ['email', 'password', 'role', 'first_name', 'last_name', 'commission_amount',
+                              'tenant_id', 'created_at', 'updated_at'], rows)
+    return [r[0] for r in query_all(conn, 'SELECT id FROM users WHERE email LIKE %s ORDER BY id LIMIT %s',
+                                    (pattern, count))]
+
+
+def seed_history(conn, tenant_id, reps, agents, customers, args, rng):
+    """Orders per rep per month over --years, plus deliveries for the delivered ones"""
+    now = datetime.now()
+    months = args.years * 12
+    statuses, weights = list(STATUS_MIX), list(STATUS_MIX.values())
+    paid_before = now - timedelta(days=args.unpaid_days)
+
+    def rows():
+        for rep in reps:
+            for month in range(months):
+                for _ in range(args.orders_per_month):
+                    created = now - timedelta(days=month * 30 + rng.random() * 30)
+                    status = rng.choices(statuses, weights)[0]
+                    paid = status == 'delivered' and created < paid_before and rng.random() * 100 >= args.backlog_pct
+                    total = rng.choice([120, 150, 180, 250])
+                    yield (rng.choice(customers), rep, rng.choice(agents), status, total, total, total, ORDER_NOTE,
+                           paid, tenant_id, created, created + timedelta(days=2))
+
+    start = time.perf_counter()
+    inserted = copy_rows(conn, 'orders', ['customer_id', 'customer_rep_id', 'delivery_agent_id', 'status',
+                                          'subtotal', 'total_amount', 'cod_amount', 'notes', 'commission_paid',
+                                          'tenant_id', 'created_at', 'updated_at'], rows())
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO deliveries (order_id, agent_id, actual_delivery_time, tenant_id, created_at, updated_at)
+            SELECT id, delivery_agent_id, updated_at, tenant_id, created_at, updated_at FROM orders
+            WHERE notes = %s AND status = 'delivered'
+            ON CONFLICT (order_id) DO NOTHING
+        """, (ORDER_NOTE,))
+        cur.execute('ANALYZE orders')
+        cur.execute('ANALYZE deliveries')
+    elapsed = time.perf_counter() - start
+    print(f'  Seeded {inserted:,} orders in {elapsed:.1f}s ({inserted / elapsed:,.0f} rows/s)')
+    return inserted
+
+
+def seed_customers(conn, tenant_id, count, rng):
+    existing = [r[0] for r in query_all(conn, 'SELECT id FROM customers WHERE tenant_id = %s AND notes = %s',
+                                        (tenant_id, ORDER_NOTE))]
+    if len(existing) >= count:
+        return existing[:count]
+    now = datetime.now()
+
+    def rows():
+        for i in range(len(existing), count):
+            state, area = random_area(rng)
+            yield ('Perf', f'Payday{i}', format_ghana_phone(ghana_local_number(rng), 'local'), f'{area} street {i}',
+                   state, area, ORDER_NOTE, tenant_id, now, now)
+
+    copy_rows(conn, 'customers', ['first_name', 'last_name', 'phone_number', 'address', 'state', 'area', 'notes',
+                                  'tenant_id', 'created_at', 'updated_at'], rows())
+    return [r[0] for r in query_all(conn, 'SELECT id FROM customers WHERE tenant_id = %s AND notes = %s',
+                                    (tenant_id, ORDER_NOTE))]
+
+
+def reset_unpaid_window(conn, unpaid_days):
+    """Undo the previous run's payouts inside the unpaid window so there is something to pay"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE orders SET commission_paid = false, payout_id = NULL
+            WHERE notes = %s AND status = 'delivered' AND created_at >= NOW() - %s * INTERVAL '1 day'
+        """, (ORDER_NOTE, unpaid_days))
+        return cur.rowcount
+
+
+def payables_debits(conn):
+    """Total debits and credits ever posted to Commissions Payable"""
+    return query_one(conn, """
+        SELECT COALESCE(SUM(t.debit_amount), 0), COALESCE(SUM(t.credit_amount), 0)
+        FROM account_transactions t JOIN accounts a ON a.id = t.account_id
+        WHERE a.code = %s
+    """, (COMMISSIONS_PAYABLE,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--reps', type=int, default=300)
+    parser.add_argument('--agents', type=int, default=60)
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--orders-per-month', type=int, default=15, help='orders per rep per month of history')
+    parser.add_argument('--unpaid-days', type=int, default=30, help='delivered orders this recent are unpaid')
+    parser.add_argument('--backlog-pct', type=float, default=2, help='older delivered orders never paid out')
+    parser.add_argument('--workers', type=int, default=20)
+    parser.add_argument('--dashboard-repeats', type=int, default=3)
+    parser.add_argument('--double-submit-pct', type=float, default=0,
+                        help='share of reps whose payout is submitted twice at once')
+    parser.add_argument('--pending-budget-ms', type=float, default=500, help='p95 budget for pending-payments')
+    parser.add_argument('--reseed', action='store_true', help='add another history batch even if one exists')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print_header('💸 Rep Payout Scale Test', target=API_URL, reps=args.reps, agents=args.agents,
+                 history=f'{args.years}y x {args.orders_per_month}/rep/month', workers=args.workers,
+                 double_submit_pct=args.double_submit_pct)
+
+    token = login()
+    session = new_session(token, pool_size=args.workers * 2)
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+
+    print('\n[Phase 1] Seeding order history')
+    reps = seed_users(conn, tenant_id, 'sales_rep', args.reps, rng)
+    agents = seed_users(conn, tenant_id, 'delivery_agent', args.agents, rng)
+    customers = seed_customers(conn, tenant_id, args.customers, rng)
+    history = query_one(conn, 'SELECT COUNT(*) FROM orders WHERE notes = %s', (ORDER_NOTE,))[0]
+    if history == 0 or args.reseed:
+        seed_history(conn, tenant_id, reps, agents, customers, args, rng)
+        history = query_one(conn, 'SELECT COUNT(*) FROM orders WHERE notes = %s', (ORDER_NOTE,))[0]
+    else:
+        print(f'  Reusing {history:,} seeded orders; reset {reset_unpaid_window(conn, args.unpaid_days):,} '
+              'orders in the unpaid window')
+    commission = dict(query_all(conn, 'SELECT id, commission_amount FROM users WHERE id = ANY(%s)', (reps,)))
+    expected_pending = dict(query_all(conn, """
+        SELECT customer_rep_id, COUNT(*) FROM orders
+        WHERE customer_rep_id = ANY(%s) AND status = 'delivered' AND NOT commission_paid
+        GROUP BY customer_rep_id
+    """, (reps,)))
+    print(f'  {history:,} orders for {len(reps)} reps; {sum(expected_pending.values()):,} awaiting payout')
+
+    print('\n[Phase 2] Payday dashboards')
+    dashboards = {}
+    for path in ('/api/users/reps/workload', '/api/users/reps/performance', '/api/users/agents/performance'):
+        stats = LatencyStats(f'GET {path.replace("/api/users", "")}')
+        size = 0
+        for _ in range(args.dashboard_repeats):
+            resp, ms, err = timed_request(session, 'GET', path, timeout=120)
+            stats.record_response(resp, ms, err)
+            if resp is not None:
+                size = len(resp.content)
+        dashboards[path] = {'latency': stats.summary(), 'response_kb': round(size / 1024, 1)}
+        print(f"  {path}: p50 {dashboards[path]['latency']['p50_ms']:.0f} ms, "
+              f"{dashboards[path]['response_kb']:,.0f} KB")
+
+    print(f'\n[Phase 3] Paying {len(reps)} reps with {args.workers} workers')
+    pending_stats = LatencyStats('GET /reps/:id/pending-payments')
+    payout_stats = LatencyStats('POST /reps/:id/process-payout')
+    double = set(rng.sample(reps, int(len(reps) * args.double_submit_pct / 100)))
+    per_rep = {}
+    payout_ids = []
+    lock = threading.Lock()
+    debits_before, credits_before = payables_debits(conn)
+
+    def pay(rep_id):
+        resp, ms, err = timed_request(session, 'GET', f'/api/users/reps/{rep_id}/pending-payments', timeout=120)
+        pending_stats.record_response(resp, ms, err)
+        if resp is None or resp.status_code != 200:
+            return
+        pending = resp.json()
+        entry = {'pending_rows': len(pending), 'pending_ms': ms, 'payouts': []}
+        with lock:
+            per_rep[rep_id] = entry
+        if not pending:
+            return
+        payload = {'amount': sum(p['commissionAmount'] for p in pending), 'method': 'mobile_money',
+                   'orderIds': [p['orderId'] for p in pending], 'notes': ORDER_NOTE}
+
+        def submit(_):
+            resp, ms, err = timed_request(session, 'POST', f'/api/users/reps/{rep_id}/process-payout',
+                                          json=payload, timeout=120)
+            payout_stats.record_response(resp, ms, err, ok_statuses=(201,))
+            if resp is not None and resp.status_code == 201:
+                with lock:
+                    payout_ids.append(resp.json()['payout']['id'])
+                    entry['payouts'].append(payload['amount'])
+
+        if rep_id in double:
+            run_concurrent(submit, range(2), 2)
+        else:
+            submit(0)
+
+    start = time.perf_counter()
+    run_concurrent(pay, reps, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f'  {len(payout_ids)} payouts in {elapsed:.1f}s ({len(payout_ids) / elapsed:.1f}/s)')
+    print_latency_table([d['latency'] for d in dashboards.values()] + [pending_stats.summary(),
+                                                                        payout_stats.summary()])
+
+    # Pending-payments cost against list size
+    buckets = {}
+    for entry in per_rep.values():
+        bucket = 0 if entry['pending_rows'] < 10 else 10 ** len(str(entry['pending_rows'])) // 10
+        buckets.setdefault(bucket, []).append(entry['pending_ms'])
+    print(f"\n  {'pending rows':>13} {'reps':>6} {'p50':>9} {'p95':>9}")
+    pending_by_size = []
+    for bucket in sorted(buckets):
+        values = sorted(buckets[bucket])
+        label = '<10' if bucket == 0 else f'{bucket:,}+'
+        pending_by_size.append({'rows': label, 'reps': len(values), 'p50_ms': round(percentile(values, 50), 1),
+                                'p95_ms': round(percentile(values, 95), 1)})
+        print(f'  {label:>13} {len(values):>6} {percentile(values, 50):>7.0f}ms {percentile(values, 95):>7.0f}ms')
+
+    print('\n[Phase 4] Ledger checks')
+    debits_after, credits_after = payables_debits(conn)
+    payout_total = float(query_one(conn, 'SELECT COALESCE(SUM(amount), 0) FROM payouts WHERE id = ANY(%s)',
+                                   (payout_ids,))[0])
+    entries = query_all(conn, """
+        SELECT je.source_id, COUNT(DISTINCT je.id), SUM(t.debit_amount), SUM(t.credit_amount),
+               SUM(t.debit_amount) FILTER (WHERE a.code = %s)
+        FROM journal_entries je
+        JOIN account_transactions t ON t.journal_entry_id = je.id
+        JOIN accounts a ON a.id = t.account_id
+        WHERE je.source_type = 'payout' AND je.source_id = ANY(%s) AND NOT je.is_voided
+        GROUP BY je.source_id
+    """, (COMMISSIONS_PAYABLE, payout_ids))
+    gl_payable = sum(float(e[4] or 0) for e in entries)
+    missing_entries = len(payout_ids) - len(entries)
+    duplicate_entries = sum(1 for e in entries if e[1] > 1)
+    unbalanced = sum(1 for e in entries if abs(float(e[2]) - float(e[3])) > 0.005)
+    movement = float(debits_after - debits_before)
+    paid_orders = dict(query_all(conn, """
+        SELECT customer_rep_id, COUNT(*) FROM orders
+        WHERE payout_id = ANY(%s) GROUP BY customer_rep_id
+    """, (payout_ids,)))
+    earned = sum(count * float(commission[rep] or 0) for rep, count in paid_orders.items())
+    overpaid_reps = [rep for rep, e in per_rep.items() if len(e['payouts']) > 1]
+    still_pending = query_one(conn, """
+        SELECT COUNT(*) FROM orders
+        WHERE customer_rep_id = ANY(%s) AND status = 'delivered' AND NOT commission_paid
+    """, (reps,))[0]
+    print(f'  Payouts {payout_total:,.2f}; GL debits to {COMMISSIONS_PAYABLE} {gl_payable:,.2f}; '
+          f'{COMMISSIONS_PAYABLE} debit movement over the run {movement:,.2f}; '
+          f'commission earned on paid orders {earned:,.2f}')
+    if overpaid_reps:
+        print(f'  ⚠️  {len(overpaid_reps)} reps were paid more than once for the same orders')
+
+    pending_p95 = pending_stats.summary()['p95_ms']
+    passed = print_checks([
+        ('Every payout request succeeded', payout_stats.errors == 0 and pending_stats.errors == 0),
+        ('Every payout has exactly one journal entry', missing_entries == 0 and duplicate_entries == 0),
+        ('Every payout journal entry balances', unbalanced == 0),
+        (f'Sum of payouts equals debits to Commissions Payable ({COMMISSIONS_PAYABLE})',
+         abs(payout_total - gl_payable) < 0.01),
+        (f'{COMMISSIONS_PAYABLE} movement over the run equals the payouts', abs(payout_total - movement) < 0.01),
+        ('Payouts equal commission earned on the orders they settled', abs(payout_total - earned) < 0.01),
+        ('No delivered order of a seeded rep left unpaid', still_pending == 0),
+        (f'pending-payments p95 within {args.pending_budget_ms:g} ms', pending_p95 <= args.pending_budget_ms),
+    ])
+
+    save_results('rep-payouts', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'tenant_id': tenant_id,
+        'reps': len(reps),
+        'history_orders': history,
+        'awaiting_payout': sum(expected_pending.values()),
+        'dashboards': dashboards,
+        'pending_payments': pending_stats.summary(),
+        'pending_by_size': pending_by_size,
+        'process_payout': payout_stats.summary(),
+        'payouts': len(payout_ids),
+        'payout_seconds': round(elapsed, 1),
+        'ledger': {
+            'payout_total': payout_total,
+            'gl_commissions_payable_debits': gl_payable,
+            'commissions_payable_movement': movement,
+            'commission_earned': earned,
+            'credits_movement': float(credits_after - credits_before),
+            'missing_entries': missing_entries,
+            'duplicate_entries': duplicate_entries,
+            'unbalanced_entries': unbalanced,
+            'reps_paid_twice': overpaid_reps,
+            'still_pending': still_pending,
+        },
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Horizontal scale-out test: N backend instances behind a local nginx.
+
+Starts --nodes copies of the backend (--command, from backend/, on
+--base-port, --base-port + 1, ...) against the same Postgres and Redis, puts a
+generated nginx in front of them on --proxy-port (least_conn, no stickiness,
+same as nginx/nginx.conf), then checks the state each process keeps to itself:
+
+    1. cron     Bull repeatable jobs after N concurrent startups (and after
+                --restart-rounds simultaneous restarts). Every setup*Cron
+                removes all repeatables and re-adds its own, so racing nodes
+                can leave duplicates or no schedule at all. Redis is read
+                directly: entries per job in bull:<queue>:repeat and next runs
+                per job in bull:<queue>:delayed. With --cron-watch-min the run
+                also waits across quarter-hour boundaries and counts
+                financial-reconciliation runs (every 15 minutes) in the node
+                logs. node-cron schedules in server.ts (GL verification, upload
+                cleanup) run in every process by construction
+    2. sockets  one Socket.IO client per node (websocket) plus one through the
+                proxy (polling, then upgrade; polling needs sticky sessions).
+                The clients log in as a seeded role=admin user, because
+                emitOrderCreated only reaches the admin, manager and sales_rep
+                rooms and the default PERF_ADMIN_EMAIL is a super_admin.
+                --event-orders orders are created on the first node; its
+                client must hear every order:created event (the control),
+                and every other client should too, but rooms live in one
+                process, so a client only hears its own node
+    3. stale    GET /api/analytics/dashboard is cached on every node, one order
+                is created on the first node, and every node is polled until
+                its totalOrders moves. clearCache('/api/analytics') only clears
+                the Map of the node that took the write; other nodes keep
+                serving the old figure until the TTL (300s) runs out
+    4. scale    the order + analytics mix from --workers threads through the
+                proxy with 1..N nodes enabled, --step-s each: throughput, p95,
+                errors and scaling efficiency against one node
+
+Everything runs on one host, so scaling is bounded by its cores and by the
+shared Postgres; read efficiency as relative, not absolute. Rate limiters use
+in-process stores, so nodes default to NODE_ENV=development (--node-env) to
+keep apiLimiter out of the way.
+
+Needs `pip install redis python-socketio[client] websocket-client` and nginx on
+PATH; build the backend first (`npm run build`) for the default --command.
+
+Usage:
+    python scripts/perf/bench_scale_out.py --nodes 3 --workers 96 --step-s 60
+    python scripts/perf/bench_scale_out.py --nodes 2 --restart-rounds 5 --cron-watch-min 31
+"""
+import argparse
+import os
+import random
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+import redis
+import socketio
+
+from perf_common import (
+    ADMIN_EMAIL, ADMIN_PASSWORD, LatencyStats, connect_db, ensure_perf_product, format_ghana_phone,
+    ghana_local_number, new_session, print_checks, print_header, print_latency_table, random_area,
+    run_for_duration, save_results, tenant_id_for, timed_request,
+)
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+ORDER_NOTE = 'perf: scale-out'
+SOCKET_ADMIN_EMAIL = 'perf-socket-admin@perf-scale.local'
+REPEATABLE_QUEUES = {
+    'agent-aging-refresh': ['refresh-buckets', 'notify-overdue-collections'],
+    'financial-reconciliation': ['reconcile-delivered-orders'],
+    'message-log-cleanup': ['cleanup-old-messages'],
+    'pending-checkout-cleanup': ['cleanup-stale-pending'],
+}
+RECONCILE_MARKER = 'Processing financial reconciliation job...'
+MIX = {'create': 30, 'list': 30, 'analytics': 40}
+
+NGINX_CONF = """
+worker_processes auto;
+pid %(dir)s/nginx.pid;
+error_log %(dir)s/error.log warn;
+events { worker_connections 8192; }
+http {
+    access_log off;
+    client_body_temp_path %(dir)s/body;
+    proxy_temp_path %(dir)s/proxy;
+    fastcgi_temp_path %(dir)s/fastcgi;
+    uwsgi_temp_path %(dir)s/uwsgi;
+    scgi_temp_path %(dir)s/scgi;
+
+    upstream backend {
+        least_conn;
+%(servers)s
+        keepalive 32;
+    }
+
+    server {
+        listen %(port)s;
+        location /socket.io {
+            proxy_pass http://backend;
+            proxy_http_version 1.1;
+            proxy_set_header Upgrade $http_upgrade;
+            proxy_set_header Connection "upgrade";
+            proxy_set_header Host $host;
+            proxy_read_timeout 1h;
+        }
+        location / {
+            proxy_pass http://backend;
+            proxy_http_version 1.1;
+            proxy_set_header Connection "";
+            proxy_set_header Host $host;
+            proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        }
+    }
+}
+"""
+
+
+class Cluster:
+    """Backend processes plus the nginx in front of them"""
+
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.ports = [args.base_port + i for i in range(args.nodes)]
+        self.procs = {}
+        self.nginx = None
+        self.conf = os.path.join(workdir, 'nginx.conf')
+
+    def url(self, port):
+        return f'http://127.0.0.1:{port}'
+
+    @property
+    def proxy_url(self):
+        return self.url(self.args.proxy_port)
+
+    def log_path(self, port):
+        return os.path.join(self.workdir, f'node-{port}.log')
+
+    def start_nodes(self, ports=None):
+        for port in ports or self.ports:
+            env = {**os.environ, 'PORT': str(port), 'NODE_ENV': self.args.node_env}
+            log = open(self.log_path(port), 'a')
+            self.procs[port] = subprocess.Popen(shlex.split(self.args.command), cwd=BACKEND_DIR, env=env,
+                                                stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        self.wait_healthy(ports or self.ports)
+
+    def wait_healthy(self, ports, timeout_s=120):
+        session = new_session(pool_size=len(ports))
+        deadline = time.monotonic() + timeout_s
+        pending = set(ports)
+        while pending and time.monotonic() < deadline:
+            for port in list(pending):
+                if self.procs[port].poll() is not None:
+                    raise SystemExit(f'Node {port} exited; see {self.log_path(port)}')
+                resp, _, err = timed_request(session, 'GET', f'{self.url(port)}/health', timeout=2)
+                if not err and resp.status_code == 200:
+                    pending.discard(port)
+            time.sleep(0.5)
+        if pending:
+            raise SystemExit(f'Nodes not healthy after {timeout_s}s: {sorted(pending)}')
+
+    def stop_nodes(self, ports=None):
+        for port in ports or list(self.procs):
+            proc = self.procs.pop(port)
+            os.killpg(proc.pid, signal.SIGTERM)
+            try:
+                proc.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+
+    def route(self, ports):
+        """Point nginx at `ports`, starting it on first use"""
+        servers = '\n'.join(f'        server 127.0.0.1:{p} max_fails=3 fail_timeout=30s;' for p in ports)
+        with open(self.conf, 'w') as f:
+            f.write(NGINX_CONF % {'dir': self.workdir, 'servers': servers, 'port': self.args.proxy_port})
+        base = ['nginx', '-p', self.workdir, '-c', self.conf]
+        if self.nginx is None:
+            self.nginx = subprocess.Popen(base + ['-g', 'daemon off;'], stderr=subprocess.STDOUT,
+                                          stdout=open(os.path.join(self.workdir, 'nginx.out'), 'a'))
+        else:
+            subprocess.run(base + ['-s', 'reload'], check=True)
+        time.sleep(1)
+
+    def close(self):
+        if self.nginx is not None:
+            self.nginx.terminate()
+            self.nginx.wait()
+        if self.procs:
+            self.stop_nodes()
+
+
+def repeatable_state(client):
+    """Schedule entries and pending next runs per repeatable job, straight from Bull's Redis keys"""
+    state = {}
+    for queue, names in REPEATABLE_QUEUES.items():
+        repeat_keys = [k.decode() for k in client.zrange(f'bull:{queue}:repeat', 0, -1)]
+        next_runs = Counter()
+        for job_id in client.zrange(f'bull:{queue}:delayed', 0, -1):
+            job_id = job_id.decode()
+            if job_id.startswith('repeat:'):
+                name = client.hget(f'bull:{queue}:{job_id}', 'name')
+                next_runs[(name.decode() if name else '?', job_id.rsplit(':', 1)[-1])] += 1
+        for name in names:
+            runs = {ts: n for (job, ts), n in next_runs.items() if job == name}
+            state[f'{queue}/{name}'] = {
+                'schedules': sum(1 for k in repeat_keys if k.split(':', 1)[0] == name),
+                'next_runs': len(runs),
+                'max_copies_per_run': max(runs.values(), default=0),
+            }
+    return state
+
+
+def ensure_socket_admin(conn, tenant_id):
+    """role=admin user in the perf tenant, so its socket joins the role:admin room order:created goes to"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO users (email, password, role, first_name, last_name, tenant_id, created_at, updated_at)
+            SELECT %s, password, 'admin', 'Perf', 'SocketAdmin', %s, NOW(), NOW() FROM users WHERE email = %s
+            ON CONFLICT (email) DO UPDATE SET role = 'admin', is_active = true
+        """, (SOCKET_ADMIN_EMAIL, tenant_id, ADMIN_EMAIL))
+
+
+def check_sockets(cluster, session, token, order, args):
+    """
+    Admin clients on every node and through the proxy; counts order:created
+    events each receives. Orders are written on the first node, so its client
+    is the control: it must hear every event for cross-node loss to mean anything.
+    """
+    clients = []
+    writer = cluster.ports[0]
+    targets = [(f'node {p}', cluster.url(p), ['websocket'], p == writer) for p in cluster.ports]
+    targets.append(('proxy (polling)', cluster.proxy_url, ['polling', 'websocket'], False))
+    for label, url, transports, on_writer in targets:
+        client = {'label': label, 'writer': on_writer, 'seen': set(), 'connect_error': None, 'disconnects': 0}
+        sio = socketio.Client(reconnection=False)
+        sio.on('order:created', lambda data, c=client: c['seen'].add((data or {}).get('id')))
+        sio.on('disconnect', lambda *_, c=client: c.__setitem__('disconnects', c['disconnects'] + 1))
+        try:
+            sio.connect(url, auth={'token': token}, transports=transports, wait_timeout=10)
+        except socketio.exceptions.ConnectionError as e:
+            client['connect_error'] = str(e)
+        client['sio'] = sio
+        clients.append(client)
+
+    created = []
+    for _ in range(args.event_orders):
+        resp, _, err = timed_request(session, 'POST', f'{cluster.url(writer)}/api/orders', json=order)
+        if not err and resp.status_code == 201:
+            created.append(resp.json()['order']['id'])
+    time.sleep(3)
+
+    results = []
+    for c in clients:
+        if c['sio'].connected:
+            c['sio'].disconnect()
+        received = len(c['seen'] & set(created))
+        missed = len(created) - received if not c['connect_error'] else len(created)
+        results.append({'client': c['label'], 'writer': c['writer'], 'connect_error': c['connect_error'],
+                        'disconnects': c['disconnects'],
+                        'received': received, 'missed': missed,
+                        'missed_pct': round(missed / len(created) * 100, 1) if created else 0.0})
+    return len(created), results
+
+
+def dashboard_total(session, url):
+    resp, _, err = timed_request(session, 'GET', f'{url}/api/analytics/dashboard')
+    if err or resp.status_code != 200:
+        return None
+    return resp.json()['metrics']['totalOrders']
+
+
+def check_staleness(cluster, session, order, timeout_s):
+    """Seconds each node keeps serving the pre-write dashboard after a write on the first node"""
+    before = {p: dashboard_total(session, cluster.url(p)) for p in cluster.ports}
+    writer = cluster.ports[0]
+    resp, _, err = timed_request(session, 'POST', f'{cluster.url(writer)}/api/orders', json=order)
+    if err or resp.status_code != 201:
+        raise SystemExit(f'Order creation failed: {err or resp.text[:200]}')
+    written = time.monotonic()
+    stale_s = {}
+    while len(stale_s) < len(cluster.ports) and time.monotonic() - written < timeout_s:
+        for p in cluster.ports:
+            if p in stale_s:
+                continue
+            total = dashboard_total(session, cluster.url(p))
+            if total is not None and before[p] is not None and total > before[p]:
+                stale_s[p] = round(time.monotonic() - written, 1)
+        time.sleep(1)
+    return [{'node': p, 'wrote_here': p == writer, 'before': before[p],
+             'stale_s': stale_s.get(p), 'refreshed': p in stale_s} for p in cluster.ports]
+
+
+def watch_reconciliation(cluster, minutes):
+    """Count reconciliation runs across node logs over quarter-hour ticks"""
+    offsets = {p: os.path.getsize(cluster.log_path(p)) for p in cluster.ports}
+    start = time.time()
+    time.sleep(minutes * 60)
+    ticks = int(time.time() // 900) - int(start // 900)
+    runs = {}
+    for p in cluster.ports:
+        with open(cluster.log_path(p), errors='replace') as f:
+            f.seek(offsets[p])
+            runs[p] = sum(1 for line in f if RECONCILE_MARKER in line)
+    return ticks, runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--nodes', type=int, default=3)
+    parser.add_argument('--command', default='node dist/server.js', help='backend start command, run in backend/')
+    parser.add_argument('--node-env', default='development')
+    parser.add_argument('--base-port', type=int, default=3101)
+    parser.add_argument('--proxy-port', type=int, default=8088)
+    parser.add_argument('--redis-url', default=os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+    parser.add_argument('--restart-rounds', type=int, default=3, help='simultaneous restarts of every node')
+    parser.add_argument('--cron-watch-min', type=float, default=0, help='minutes to watch reconciliation runs')
+    parser.add_argument('--event-orders', type=int, default=30)
+    parser.add_argument('--stale-timeout-s', type=int, default=330)
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--step-s', type=int, default=60)
+    parser.add_argument('--min-efficiency', type=float, default=0.7, help='throughput(N) / (N x throughput(1))')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='perf-scale-out-')
+    cluster = Cluster(args, workdir)
+    print_header('🧩 Horizontal Scale-Out', nodes=args.nodes, ports=cluster.ports, proxy=cluster.proxy_url,
+                 workers=args.workers, step=f'{args.step_s}s', workdir=workdir)
+
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+    product_id = ensure_perf_product(conn, tenant_id)
+    ensure_socket_admin(conn, tenant_id)
+    conn.close()
+    rdb = redis.Redis.from_url(args.redis_url)
+    try:
+        print(f'\n[Phase 1] Starting {args.nodes} node(s) and nginx')
+        cluster.start_nodes()
+        cluster.route(cluster.ports)
+
+        resp, _, err = timed_request(new_session(), 'POST', f'{cluster.proxy_url}/api/auth/login',
+                                     json={'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+        if err or resp.status_code != 200:
+            raise SystemExit(f'Login through the proxy failed: {err or resp.text[:200]}')
+        token = resp.json()['tokens']['accessToken']
+        session = new_session(token, pool_size=args.workers)
+        state, area = random_area()
+        order = {'orderItems': [{'productId': product_id, 'quantity': 1, 'unitPrice': 150}],
+                 'subtotal': 150, 'totalAmount': 150, 'deliveryAddress': f'{area} junction',
+                 'deliveryState': state, 'deliveryArea': area, 'notes': ORDER_NOTE}
+        first, _, err = timed_request(session, 'POST', f'{cluster.proxy_url}/api/orders', json={
+            **order, 'customerName': 'Perf Scale', 'customerPhone': format_ghana_phone(ghana_local_number(), 'local')})
+        if err or first.status_code != 201:
+            raise SystemExit(f'Order creation failed: {err or first.text[:200]}')
+        order['customerId'] = first.json()['order']['customerId']
+
+        print('\n[Phase 2] Bull repeatable jobs')
+        rounds = [{'round': 'startup', 'jobs': repeatable_state(rdb)}]
+        for i in range(args.restart_rounds):
+            cluster.stop_nodes()
+            cluster.start_nodes()
+            rounds.append({'round': f'restart {i + 1}', 'jobs': repeatable_state(rdb)})
+        print(f"  {'job':<52}" + ''.join(f"{r['round']:>12}" for r in rounds))
+        for job in rounds[0]['jobs']:
+            cells = ''.join(f"{r['jobs'][job]['schedules']}/{r['jobs'][job]['next_runs']}"
+                            f"x{r['jobs'][job]['max_copies_per_run']}".rjust(12) for r in rounds)
+            print(f'  {job:<52}{cells}')
+        print('  (schedules / pending next runs x copies of the busiest run; 1/1x1 is correct)')
+        bad_schedules = sorted({job for r in rounds for job, s in r['jobs'].items()
+                                if (s['schedules'], s['next_runs'], s['max_copies_per_run']) != (1, 1, 1)})
+        reconciliation = None
+        if args.cron_watch_min:
+            print(f'  Watching reconciliation runs for {args.cron_watch_min:g} min...')
+            ticks, runs = watch_reconciliation(cluster, args.cron_watch_min)
+            reconciliation = {'ticks': ticks, 'runs_per_node': runs, 'runs': sum(runs.values())}
+            print(f"  {ticks} quarter-hour tick(s), {reconciliation['runs']} run(s) across nodes: {runs}")
+
+        print('\n[Phase 3] Socket.IO events across nodes')
+        resp, _, err = timed_request(new_session(), 'POST', f'{cluster.proxy_url}/api/auth/login',
+                                     json={'email': SOCKET_ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+        if err or resp.status_code != 200:
+            raise SystemExit(f'Socket admin login failed: {err or resp.text[:200]}')
+        orders_sent, sockets = check_sockets(cluster, session, resp.json()['tokens']['accessToken'], order, args)
+        for s in sockets:
+            note = f" connect failed: {s['connect_error']}" if s['connect_error'] else ''
+            role = ' (write, control)' if s['writer'] else ''
+            print(f"  {s['client'] + role:<34} received {s['received']:>4}/{orders_sent} "
+                  f"({s['missed_pct']:.0f}% missed){note}")
+
+        print('\n[Phase 4] Analytics staleness after a write on one node')
+        staleness = check_staleness(cluster, session, order, args.stale_timeout_s)
+        for s in staleness:
+            stale = f"{s['stale_s']:.1f}s" if s['refreshed'] else f'> {args.stale_timeout_s}s'
+            print(f"  node {s['node']}{' (write)' if s['wrote_here'] else '        '}  stale for {stale}")
+
+        print(f'\n[Phase 5] Throughput with 1..{args.nodes} node(s), {args.workers} workers')
+        ops = [op for op, weight in MIX.items() for _ in range(weight)]
+        steps = []
+        for n in range(1, args.nodes + 1):
+            cluster.route(cluster.ports[:n])
+            stats = {op: LatencyStats(f'{op} @{n} node(s)') for op in MIX}
+
+            def work(_):
+                op = random.choice(ops)
+                if op == 'create':
+                    resp, ms, err = timed_request(session, 'POST', f'{cluster.proxy_url}/api/orders', json=order)
+                    stats[op].record_response(resp, ms, err, ok_statuses=(201,))
+                elif op == 'list':
+                    resp, ms, err = timed_request(session, 'GET', f'{cluster.proxy_url}/api/orders',
+                                                  params={'page': 1, 'limit': 20})
+                    stats[op].record_response(resp, ms, err)
+                else:
+                    resp, ms, err = timed_request(session, 'GET', f'{cluster.proxy_url}/api/analytics/dashboard',
+                                                  params={'_cb': uuid.uuid4().hex} if random.random() < 0.5 else {})
+                    stats[op].record_response(resp, ms, err)
+
+            calls = run_for_duration(work, args.workers, args.step_s)
+            summaries = [s.summary() for s in stats.values()]
+            errors = sum(s['errors'] for s in summaries)
+            steps.append({'nodes': n, 'requests': calls, 'rps': round(calls / args.step_s, 1),
+                          'errors': errors, 'ops': summaries})
+            print(f'  {n} node(s): {calls / args.step_s:,.0f} req/s, {errors} error(s)')
+            print_latency_table(summaries)
+        base_rps = steps[0]['rps'] or 1
+        for s in steps:
+            s['efficiency'] = round(s['rps'] / (base_rps * s['nodes']), 2)
+        print('\n  ' + '  '.join(f"{s['nodes']}n: {s['rps']:,.0f}/s ({s['efficiency']:.0%})" for s in steps))
+    finally:
+        cluster.close()
+
+    stale_nodes = [s['node'] for s in staleness if not s['wrote_here'] and (s['stale_s'] or float('inf')) > 5]
+    control_ok = orders_sent > 0 and all(not s['missed'] for s in sockets if s['writer'])
+    missed = [s['client'] for s in sockets if s['missed'] and not s['writer']]
+    checks = [
+        ('Each Bull repeatable has exactly one schedule and one next run', not bad_schedules),
+        (f'Socket client on the writing node receives every order:created event (control, {orders_sent} orders)',
+         control_ok),
+        ('Socket clients on other nodes and the proxy receive every order:created event', control_ok and not missed),
+        ('Dashboard reflects a write on another node within 5s', not stale_nodes),
+        (f"Scaling efficiency at {args.nodes} nodes >= {args.min_efficiency:.0%} ({steps[-1]['efficiency']:.0%})",
+         steps[-1]['efficiency'] >= args.min_efficiency),
+        ('No load errors at any node count', all(s['errors'] == 0 for s in steps)),
+    ]
+    if reconciliation:
+        checks.append((f"One reconciliation run per 15-minute tick ({reconciliation['runs']} runs, "
+                       f"{reconciliation['ticks']} ticks)", reconciliation['runs'] == reconciliation['ticks']))
+    passed = print_checks(checks)
+    for label, items in (('Broken schedules', bad_schedules), ('Clients missing events', missed),
+                         ('Stale nodes', stale_nodes)):
+        if items:
+            print(f"  {label}: {', '.join(map(str, items))}")
+
+    save_results('scale-out', {
+        'timestamp': datetime.now().isoformat(),
+        'settings': vars(args),
+        'workdir': workdir,
+        'repeatable_jobs': rounds,
+        'reconciliation': reconciliation,
+        'socket_orders': orders_sent,
+        'sockets': sockets,
+        'staleness': staleness,
+        'throughput': steps,
+        'passed': passed,
+    })
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Unsubscribe click-storm: public opt-out links right after a bulk campaign, and whether the next batch sees them.
+
+Every marketing email carries /api/public/unsubscribe/:token (unsubscribeRoutes.ts,
+unsubscribeService.ts) plus the RFC 8058 List-Unsubscribe-Post header. GET only
+renders the confirm page; POST looks the customer up by token and sets
+email_opt_out. Both sit behind webhookLimiter and carry no tenant context. The
+tenant side reads opt-outs back through GET /api/communications/opt-outs and
+the pre-send banner GET /api/communications/email-audience, whose emailable
+count is what the next bulk send enqueues.
+
+Phases:
+
+    1. seed     --audience customers with an email address and a fresh random
+                unsubscribe token in the admin's tenant, all under one state
+                so email-audience can be filtered to exactly this audience
+    2. storm    an open-loop replay over --duration seconds, each request fired
+                at its scheduled time whatever the server's latency:
+                    scanner    mail security scanners GET --scanner-pct of the
+                               links in the first seconds after the send
+                    click      --click-pct of recipients open the confirm page
+                               on a fast-rise, long-tail curve (gamma, peak at
+                               --peak-s); --confirm-pct of them POST after a
+                               few seconds of reading, some click twice
+                    one-click  --one-click-pct POST straight from the mail
+                               client's unsubscribe button, no GET
+                    forged     --forged made-up tokens, GET and POST
+                every --batch-interval seconds a "next batch" reads
+                email-audience while the storm runs
+    3. verify   each batch snapshot excluded every opt-out confirmed before it
+                was requested; afterwards the database, the full /opt-outs list
+                and email-audience all hold exactly the confirmed set, and no
+                customer who was only sent GETs was opted out
+
+Run the backend with NODE_ENV=development: webhookLimiter allows 100 requests
+per 15 min per IP in production, and a real storm arrives from thousands of
+IPs while this harness is one. Seeded customers are notes `perf-seed:unsubscribe`
+and are replaced on every run.
+
+Usage:
+    python scripts/perf/bench_unsubscribe.py
+    python scripts/perf/bench_unsubscribe.py --audience 200000 --click-pct 5 --duration 300 --workers 128
+    python scripts/perf/bench_unsubscribe.py --audience 10000 --duration 60 --batch-interval 5
+"""
+import argparse
+import random
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+
+from perf_common import (
+    API_URL, LatencyStats, connect_db, copy_rows, login, new_session, percentile, print_checks, print_header,
+    print_latency_table, query_all, save_results, tenant_id_for, timed_request,
+)
+
+SEED_MARKER = 'perf-seed:unsubscribe'
+AUDIENCE_STATE = 'Perf Unsubscribe'
+EMAIL_DOMAIN = 'perf-unsub.local'
+OPT_OUT_PAGE = 100
+KINDS = ['scanner GET', 'click GET', 'confirm POST', 'repeat POST', 'one-click POST', 'forged GET', 'forged POST']
+
+
+def seed_audience(conn, tenant_id, count):
+    """Replace the seeded audience; returns {customer id: token}"""
+    now = datetime.now()
+    with conn.cursor() as cur:
+        cur.execute('DELETE FROM customers WHERE notes = %s AND tenant_id = %s', (SEED_MARKER, tenant_id))
+    start = time.perf_counter()
+    # 03xxxxxxxx is a landline range no other harness seeds, so phones never collide in the tenant
+    copy_rows(conn, 'customers', ['first_name', 'last_name', 'phone_number', 'email', 'address', 'state', 'area',
+                                  'unsubscribe_token', 'notes', 'tenant_id', 'created_at', 'updated_at'],
+              (('Perf', f'Subscriber{i}', f'03{i:08d}', f'sub-{i}@{EMAIL_DOMAIN}', 'Perf street', AUDIENCE_STATE,
+                'Perf', secrets.token_hex(32), SEED_MARKER, tenant_id, now, now) for i in range(count)))
+    with conn.cursor() as cur:
+        cur.execute('ANALYZE customers')
+    tokens = dict(query_all(conn, 'SELECT id, unsubscribe_token FROM customers WHERE notes = %s AND tenant_id = %s',
+                            (SEED_MARKER, tenant_id)))
+    print(f'  {len(tokens):,} subscribers with tokens in {time.perf_counter() - start:.1f}s')
+    return tokens
+
+
+def build_schedule(tokens, args, rng):
+    """(at_s, kind, customer id or None, token) events, sorted by time"""
+    ids = list(tokens)
+    events = []
+    shape = 2.0
+    scale = args.peak_s / (shape - 1)  # gamma mode = (shape - 1) * scale
+
+    def clicked_at():
+        while True:
+            at = rng.gammavariate(shape, scale)
+            if at < args.duration:
+                return at
+
+    for cid in rng.sample(ids, int(len(ids) * args.scanner_pct / 100)):
+        events.append((rng.uniform(0, min(args.duration * 0.05, 10)), 'scanner GET', cid))
+    clickers = rng.sample(ids, int(len(ids) * args.click_pct / 100))
+    for cid in clickers:
+        at = clicked_at()
+        events.append((at, 'click GET', cid))
+        if rng.random() * 100 < args.confirm_pct:
+            confirm = min(at + rng.uniform(2, 10) * args.think_scale, args.duration)
+            events.append((confirm, 'confirm POST', cid))
+            if rng.random() * 100 < args.repeat_pct:
+                events.append((min(confirm + rng.uniform(0.1, 1.5), args.duration), 'repeat POST', cid))
+    one_clickers = rng.sample(ids, int(len(ids) * args.one_click_pct / 100))
+    for cid in one_clickers:
+        events.append((clicked_at(), 'one-click POST', cid))
+    for _ in range(args.forged):
+        events.append((rng.uniform(0, args.duration), rng.choice(['forged GET', 'forged POST']), None))
+    events.sort(key=lambda e: e[0])
+    return [(at, kind, cid, tokens[cid] if cid is not None else secrets.token_hex(32)) for at, kind, cid in events]
+
+
+class Storm:
+    """Fires scheduled unsubscribe requests open-loop and tracks who was confirmed when"""
+
+    def __init__(self, args):
+        self.session = new_session(pool_size=args.workers)
+        self.stats = {kind: LatencyStats(kind) for kind in KINDS}
+        self.lateness_ms = []
+        self.lock = threading.Lock()
+        self.posted = set()      # POST sent (may not have committed yet)
+        self.confirmed = set()   # POST answered 200
+        self.get_only = set()
+        self.server_errors = []
+
+    def fire(self, event, due):
+        _, kind, cid, token = event
+        lateness = (time.monotonic() - due) * 1000
+        method = 'POST' if kind.endswith('POST') else 'GET'
+        if method == 'POST' and cid is not None:
+            with self.lock:
+                self.posted.add(cid)
+        resp, ms, err = timed_request(self.session, method, f'/api/public/unsubscribe/{quote(token)}')
+        ok_statuses = (404,) if kind.startswith('forged') else (200,)
+        self.stats[kind].record_response(resp, ms, err, ok_statuses=ok_statuses)
+        with self.lock:
+            self.lateness_ms.append(lateness)
+            if method == 'POST' and cid is not None and resp is not None and resp.status_code == 200:
+                self.confirmed.add(cid)
+            elif method == 'GET' and cid is not None:
+                self.get_only.add(cid)
+            if resp is not None and resp.status_code >= 500 and len(self.server_errors) < 5:
+                self.server_errors.append(f'{kind} {resp.status_code}')
+
+    def run(self, schedule, workers):
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for event in schedule:
+                due = start + event[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.fire, event, due)
+        return time.monotonic() - start
+
+    def snapshot(self):
+        with self.lock:
+            return set(self.confirmed), set(self.posted)
+
+
+class NextBatch(threading.Thread):
+    """Reads the email-audience banner every interval, as the next campaign batch would before enqueueing"""
+
+    def __init__(self, session, storm, interval):
+        super().__init__(daemon=True)
+        self.session = session
+        self.storm = storm
+        self.interval = interval
+        self.stop = threading.Event()
+        self.stats = LatencyStats('email-audience (during storm)')
+        self.snapshots = []
+
+    def run(self):
+        started = time.monotonic()
+        while not self.stop.wait(self.interval):
+            confirmed_before, _ = self.storm.snapshot()
+            resp, ms, err = timed_request(self.session, 'GET', audience_path())
+            _, posted_after = self.storm.snapshot()
+            self.stats.record_response(resp, ms, err, ok_statuses=(200,))
+            if resp is None or resp.status_code != 200:
+                continue
+            opted_out = resp.json()['optedOut']
+            self.snapshots.append({
+                't_s': round(time.monotonic() - started, 1),
+                'confirmed_before': len(confirmed_before),
+                'opted_out': opted_out,
+                'posted_after': len(posted_after),
+                'missed': max(len(confirmed_before) - opted_out, 0),
+                'consistent': len(confirmed_before) <= opted_out <= len(posted_after),
+            })
+
+
+def audience_path():
+    return f'/api/communications/email-audience?state={quote(AUDIENCE_STATE)}'
+
+
+def read_opt_outs(session):
+    """Walk every /opt-outs page; returns (seeded customer ids listed, total, stats)"""
+    stats = LatencyStats('opt-outs page')
+    ids, page, pages, total = [], 1, 1, 0
+    while page <= pages:
+        resp, ms, err = timed_request(session, 'GET', f'/api/communications/opt-outs?page={page}&limit={OPT_OUT_PAGE}')
+        stats.record_response(resp, ms, err, ok_statuses=(200,))
+        if resp is None or resp.status_code != 200:
+            break
+        body = resp.json()
+        pages, total = body['pagination']['totalPages'], body['pagination']['total']
+        ids += [c['id'] for c in body['customers']
+                if c.get('emailOptOut') and (c.get('email') or '').endswith('@' + EMAIL_DOMAIN)]
+        page += 1
+    return ids, total, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--audience', type=int, default=50_000, help='campaign recipients to mint tokens for')
+    parser.add_argument('--duration', type=float, default=120, help='seconds the storm is compressed into')
+    parser.add_argument('--peak-s', type=float, default=15, help='seconds after the send when clicks peak')
+    parser.add_argument('--scanner-pct', type=float, default=10, help='links prefetched by mail scanners')
+    parser.add_argument('--click-pct', type=float, default=8, help='recipients opening the confirm page')
+    parser.add_argument('--confirm-pct', type=float, default=60, help='of clickers, those who confirm')
+    parser.add_argument('--repeat-pct', type=float, default=15, help='of confirmers, those who click confirm twice')
+    parser.add_argument('--one-click-pct', type=float, default=2, help='recipients using the one-click header')
+    parser.add_argument('--think-scale', type=float, default=1.0, help='scale the 2-10 s read-before-confirm')
+    parser.add_argument('--forged', type=int, default=200, help='requests with made-up tokens')
+    parser.add_argument('--batch-interval', type=float, default=10, help='seconds between next-batch audience reads')
+    parser.add_argument('--workers', type=int, default=64, help='max requests in flight')
+    parser.add_argument('--max-p95-ms', type=float, default=300, help='GET and POST p95 budget')
+    parser.add_argument('--max-lateness-ms', type=float, default=250,
+                        help='p95 scheduling lateness before the run counts as closed-loop')
+    parser.add_argument('--seed', type=int, default=17)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print_header('📭 Unsubscribe Click-Storm', target=API_URL, audience=f'{args.audience:,}',
+                 storm=f'{args.duration:g}s, peak at {args.peak_s:g}s', workers=args.workers,
+                 mix=f'{args.scanner_pct:g}% scanned, {args.click_pct:g}% click ({args.confirm_pct:g}% confirm), '
+                     f'{args.one_click_pct:g}% one-click, {args.forged} forged',
+                 next_batch=f'every {args.batch_interval:g}s')
+
+    token = login()
+    admin = new_session(token)
+    conn = connect_db()
+    tenant_id = tenant_id_for(conn)
+
+    print('\n[Phase 1] Seeding the campaign audience')
+    tokens = seed_audience(conn, tenant_id, args.audience)
+    schedule = build_schedule(tokens, args, rng)
+    resp, _, err = timed_request(admin, 'GET', audience_path())
+    if err or resp.status_code != 200:
+        raise SystemExit(f'GET {audience_path()} failed: {err or resp.status_code}')
+    before = resp.json()
+    print(f"  {len(schedule):,} requests scheduled; audience {before['audienceTotal']:,}, "
+          f"emailable {before['emailable']:,} before the storm")
+
+    print(f'\n[Phase 2] Storm: {len(schedule):,} requests over {args.duration:g}s')
+    storm = Storm(args)
+    batches = NextBatch(admin, storm, args.batch_interval)
+    batches.start()
+    runtime = storm.run(schedule, args.workers)
+    batches.stop.set()
+    batches.join()
+    lateness = sorted(storm.lateness_ms)
+    late_p95 = percentile(lateness, 95)
+    print(f'  {len(schedule) / runtime:,.0f} req/s average; scheduler lateness p50 '
+          f'{percentile(lateness, 50):.0f} ms, p95 {late_p95:.0f} ms')
+    print_latency_table([s.summary() for s in storm.stats.values()] + [batches.stats.summary()])
+    if storm.server_errors:
+        print('  5xx responses, e.g.: ' + ', '.join(storm.server_errors))
+    for snap in batches.snapshots:
+        print(f"  next batch @{snap['t_s']:>6.1f}s: {snap['confirmed_before']:>6,} confirmed before, "
+              f"{snap['opted_out']:>6,} excluded, {snap['posted_after']:>6,} posted"
+              f"{'' if snap['consistent'] else '  ← inconsistent'}")
+
+    print('\n[Phase 3] Verifying opt-outs')
+    confirmed, posted = storm.snapshot()
+    db_opted = {r[0] for r in query_all(conn, """
+        SELECT id FROM customers WHERE notes = %s AND tenant_id = %s AND email_opt_out = true
+    """, (SEED_MARKER, tenant_id))}
+    listed, listed_total, page_stats = read_opt_outs(admin)
+    audience_stats = LatencyStats('email-audience (after storm)')
+    resp, ms, err = timed_request(admin, 'GET', audience_path())
+    audience_stats.record_response(resp, ms, err, ok_statuses=(200,))
+    after = resp.json() if resp is not None and resp.status_code == 200 else {}
+    get_only_opted = (storm.get_only - posted) & db_opted
+    print(f'  confirmed {len(confirmed):,}, in database {len(db_opted):,}, listed on /opt-outs {len(set(listed)):,} '
+          f'({listed_total:,} opt-outs in the tenant over {page_stats.summary()["count"]} pages)')
+    print(f"  email-audience after: optedOut {after.get('optedOut', 0):,}, emailable {after.get('emailable', 0):,}")
+    print_latency_table([page_stats.summary(), audience_stats.summary()])
+
+    summaries = {kind: s.summary() for kind, s in storm.stats.items()}
+    request_kinds = [k for k in KINDS if not k.startswith('forged')]
+    slowest = max((summaries[k] for k in request_kinds if summaries[k]['count']), key=lambda s: s['p95_ms'],
+                  default=None)
+    stale = [s for s in batches.snapshots if not s['consistent']]
+    checks = [
+        (f'Storm ran open-loop (scheduler lateness p95 {late_p95:.0f} ms <= {args.max_lateness_ms:g} ms)',
+         late_p95 <= args.max_lateness_ms),
+        (f"Unsubscribe GET/POST p95 under {args.max_p95_ms:g} ms "
+         f"(slowest: {slowest['name']} {slowest['p95_ms']:.0f} ms)" if slowest else 'Unsubscribe requests sent',
+         slowest is not None and slowest['p95_ms'] < args.max_p95_ms),
+        ('No 5xx or transport errors on real tokens', all(summaries[k]['errors'] == 0 for k in request_kinds)),
+        ('Forged tokens answered 404', all(summaries[k]['errors'] == 0 for k in ('forged GET', 'forged POST'))),
+        (f'Every next-batch read excluded all earlier confirmations ({len(stale)} of {len(batches.snapshots)} '
+         f'stale)', not stale and bool(batches.snapshots)),
+        (f'Database opt-outs equal confirmed POSTs ({len(db_opted):,} vs {len(confirmed):,})', db_opted == confirmed),
+        (f'/opt-outs lists every confirmed opt-out ({len(set(listed)):,} of {len(confirmed):,})',
+         set(listed) == confirmed and len(listed) == len(set(listed))),
+        (f"email-audience excludes them (optedOut {after.get('optedOut', 0):,}, "
+         f"emailable {after.get('emailable', 0):,})",
+         after.get('optedOut') == len(confirmed) and after.get('emailable') == before['emailable'] - len(confirmed)),
+        (f'GET alone never opted anyone out ({len(get_only_opted)} did)', not get_only_opted),
+    ]
+    passed = print_checks(checks)
+
+    save_results('unsubscribe-storm', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'settings': vars(args),
+        'requests': len(schedule),
+        'runtime_s': round(runtime, 2),
+        'scheduler_lateness_ms': {'p50': percentile(lateness, 50), 'p95': late_p95, 'max': lateness[-1] if lateness
+                                  else 0},
+        'latency': list(summaries.values()) + [batches.stats.summary(), page_stats.summary(),
+                                               audience_stats.summary()],
+        'next_batches': batches.snapshots,
+        'confirmed': len(confirmed),
+        'db_opted_out': len(db_opted),
+        'listed_on_opt_outs': len(set(listed)),
+        'audience_before': before,
+        'audience_after': after,
+        'get_only_opted_out': len(get_only_opted),
+        'passed': passed,
+    })
+    conn.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
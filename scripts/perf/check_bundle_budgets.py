@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Frontend bundle and route-chunk load budget checker.
+
+OPTIMIZATION_SUMMARY.txt promises a ~92 KB main bundle and lazy-loaded routes;
+this keeps those promises honest. For each page in test_pages.PAGES_TO_TEST it
+opens a fresh browser context (cold HTTP cache, logged-in storage state),
+loads the route and records every JS/CSS chunk fetched with its transfer size
+(compressed body bytes on the wire) and decoded size, and whether it is one of
+the shared vendor chunks declared in vite.config.ts manualChunks.
+
+Chunks are keyed by path with the content hash stripped (assets/js/[name]-[hash].js
+-> assets/js/[name].js), so sizes can be compared with a stored baseline across
+builds. The entry chunk is the <script type="module"> that index.html loads. Budgets live in
+scripts/perf/bundle_budgets.json:
+
+  entry            budget for the index-*.js entry chunk
+  default_route    per-route totals (all JS, all CSS, and route-specific JS,
+                   i.e. chunks not already loaded by the /login shell)
+  routes           per-route overrides of default_route
+
+Transfer budgets only apply when the server compresses responses (nginx in
+staging/production); `vite preview` serves uncompressed files, so against it
+only decoded budgets are enforced. The Vite dev server serves unbundled
+modules and is refused.
+
+Usage:
+    cd frontend && npm run build && npx vite preview --port 4173
+    BASE_URL=http://localhost:4173 python scripts/perf/check_bundle_budgets.py
+    BASE_URL=http://localhost:4173 python scripts/perf/check_bundle_budgets.py --update-baseline
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+from playwright.sync_api import sync_playwright
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from test_pages import PAGES_TO_TEST  # noqa: E402
+
+from perf_common import ADMIN_EMAIL, ADMIN_PASSWORD, BASE_URL, print_checks, print_header, save_results  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BUDGETS_PATH = os.path.join(HERE, 'bundle_budgets.json')
+BASELINE_PATH = os.path.join(HERE, 'baselines', 'bundle-baseline.json')
+
+# manualChunks names in frontend/vite.config.ts
+VENDOR_CHUNKS = {'react-vendor', 'ui-vendor', 'chart-vendor', 'dnd-vendor', 'workflow-vendor', 'utils-vendor'}
+# Vite's [hash] is 8 base64url characters; anchoring on it keeps hyphenated names whole
+HASHED_ASSET = re.compile(r'/(assets/(?:js|css)/.+)-[A-Za-z0-9_-]{8}\.(js|css)$')
+MODULE_SCRIPT = re.compile(r'<script\b[^>]*\btype=["\']module["\'][^>]*>', re.IGNORECASE)
+SCRIPT_SRC = re.compile(r'\bsrc=["\']([^"\']+)["\']')
+
+
+def chunk_key(url):
+    """'/assets/js/chart-vendor-AbC123xy.js' -> 'assets/js/chart-vendor.js'"""
+    path = url.split('?', 1)[0]
+    match = HASHED_ASSET.search(path)
+    if match:
+        return f'{match.group(1)}.{match.group(2)}'
+    return path.split('://', 1)[-1].split('/', 1)[-1]
+
+
+def is_vendor(key):
+    return os.path.basename(key).rsplit('.', 1)[0] in VENDOR_CHUNKS
+
+
+def entry_chunk_key(context):
+    """Key of the entry chunk, taken from index.html's <script type="module" src>"""
+    html = context.request.get(f'{BASE_URL}/').text()
+    for tag in MODULE_SCRIPT.findall(html):
+        src = SCRIPT_SRC.search(tag)
+        if src:
+            return chunk_key(src.group(1))
+    return None
+
+
+def collect_chunks(context, url, settle_ms, entry_key=None):
+    """Load `url` in the given context and return the JS/CSS chunks it fetched"""
+    chunks = {}
+    page = context.new_page()
+
+    def on_finished(request):
+        if request.resource_type not in ('script', 'stylesheet'):
+            return
+        response = request.response()
+        if response is None or response.status >= 400:
+            return
+        try:
+            decoded = len(response.body())
+        except Exception:
+            decoded = 0
+        sizes = request.sizes()
+        key = chunk_key(request.url)
+        chunks[key] = {
+            'chunk': key,
+            'url': request.url,
+            'type': 'css' if request.resource_type == 'stylesheet' else 'js',
+            'transfer_bytes': sizes.get('responseBodySize', 0),
+            'decoded_bytes': decoded,
+            'encoding': response.headers.get('content-encoding', ''),
+            'vendor': is_vendor(key),
+            'entry': key == entry_key,
+        }
+
+    page.on('requestfinished', on_finished)
+    page.goto(url, wait_until='networkidle', timeout=30000)
+    page.wait_for_timeout(settle_ms)  # lazy() imports resolve after first paint
+    page.close()
+    return chunks
+
+
+def login_state(browser):
+    """Log in once and return the storage state every cold context starts from"""
+    context = browser.new_context()
+    page = context.new_page()
+    page.goto(f'{BASE_URL}/login', wait_until='networkidle')
+    page.fill('input[type="email"]', ADMIN_EMAIL)
+    page.fill('input[type="password"]', ADMIN_PASSWORD)
+    page.click('button[type="submit"]')
+    page.wait_for_load_state('networkidle')
+    page.wait_for_timeout(2000)
+    state = context.storage_state()
+    context.close()
+    return state
+
+
+def route_budget(budgets, url):
+    budget = dict(budgets['default_route'])
+    budget.update(budgets.get('routes', {}).get(url, {}))
+    return budget
+
+
+def check_route(name, url, chunks, shell, budget, compressed):
+    """Totals for one route and the list of budget violations"""
+    js = [c for c in chunks.values() if c['type'] == 'js']
+    css = [c for c in chunks.values() if c['type'] == 'css']
+    route_js = [c for c in js if c['chunk'] not in shell and not c['vendor']]
+    totals = {
+        'js_decoded_kb': sum(c['decoded_bytes'] for c in js) / 1024,
+        'js_transfer_kb': sum(c['transfer_bytes'] for c in js) / 1024,
+        'css_decoded_kb': sum(c['decoded_bytes'] for c in css) / 1024,
+        'route_js_decoded_kb': sum(c['decoded_bytes'] for c in route_js) / 1024,
+        'vendor_js_decoded_kb': sum(c['decoded_bytes'] for c in js if c['vendor']) / 1024,
+    }
+    violations = []
+    for key, limit in budget.items():
+        if key.endswith('transfer_kb') and not compressed:
+            continue
+        if key in totals and totals[key] > limit:
+            violations.append(f'{name}: {key} {totals[key]:.1f} KB > {limit} KB')
+    return {
+        'name': name,
+        'url': url,
+        'chunks': sorted(chunks.values(), key=lambda c: c['decoded_bytes'], reverse=True),
+        'route_chunks': sorted(c['chunk'] for c in route_js),
+        'totals_kb': {k: round(v, 1) for k, v in totals.items()},
+        'budget_kb': budget,
+        'violations': violations,
+    }
+
+
+def chunk_growth(current, baseline, tolerance_pct, tolerance_kb):
+    """Chunks whose decoded size grew beyond tolerance, plus new and removed chunks"""
+    grown, added = [], []
+    for key, size in sorted(current.items()):
+        before = baseline.get(key)
+        if before is None:
+            added.append({'chunk': key, 'decoded_kb': round(size / 1024, 1)})
+            continue
+        delta = size - before
+        if delta > tolerance_kb * 1024 and delta > before * tolerance_pct / 100:
+            grown.append({'chunk': key, 'before_kb': round(before / 1024, 1),
+                          'after_kb': round(size / 1024, 1), 'growth_pct': round(delta / before * 100, 1)})
+    removed = sorted(set(baseline) - set(current))
+    return sorted(grown, key=lambda g: g['growth_pct'], reverse=True), added, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--budgets', default=BUDGETS_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='store current chunk sizes as baseline')
+    parser.add_argument('--settle-ms', type=int, default=1500)
+    args = parser.parse_args()
+
+    with open(args.budgets) as f:
+        budgets = json.load(f)
+    print_header('📦 Frontend Bundle Budget Check', target=BASE_URL, routes=len(PAGES_TO_TEST),
+                 budgets=os.path.relpath(args.budgets))
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        state = login_state(browser)
+
+        # Shell: what an unauthenticated cold load of /login pulls in
+        shell_context = browser.new_context(service_workers='block')
+        entry_key = entry_chunk_key(shell_context)
+        shell = collect_chunks(shell_context, f'{BASE_URL}/login', args.settle_ms, entry_key)
+        shell_context.close()
+        if any('/@vite/' in c['url'] or '/src/' in c['url'] for c in shell.values()):
+            browser.close()
+            raise SystemExit('BASE_URL is the Vite dev server; build and run `vite preview` instead')
+        compressed = any(c['encoding'] for c in shell.values())
+        entry = shell.get(entry_key)
+
+        routes = []
+        all_chunks = dict((k, c['decoded_bytes']) for k, c in shell.items())
+        for page_info in PAGES_TO_TEST:
+            print(f"\n🔍 {page_info['name']} ({page_info['url']})")
+            context = browser.new_context(storage_state=state, service_workers='block')
+            chunks = collect_chunks(context, f"{BASE_URL}{page_info['url']}", args.settle_ms, entry_key)
+            context.close()
+            result = check_route(page_info['name'], page_info['url'], chunks, shell,
+                                 route_budget(budgets, page_info['url']), compressed)
+            routes.append(result)
+            all_chunks.update((k, c['decoded_bytes']) for k, c in chunks.items())
+            t = result['totals_kb']
+            print(f"  JS {t['js_decoded_kb']:.0f} KB decoded / {t['js_transfer_kb']:.0f} KB transfer, "
+                  f"CSS {t['css_decoded_kb']:.0f} KB, route-specific JS {t['route_js_decoded_kb']:.0f} KB "
+                  f"({', '.join(result['route_chunks']) or 'none'})")
+            for v in result['violations']:
+                print(f'  ❌ {v}')
+        browser.close()
+
+    violations = [v for r in routes for v in r['violations']]
+    if entry:
+        for key in ('js_decoded_kb', 'js_transfer_kb'):
+            size_kb = (entry['decoded_bytes'] if key == 'js_decoded_kb' else entry['transfer_bytes']) / 1024
+            limit = budgets['entry'].get(key)
+            if limit is None or (key == 'js_transfer_kb' and not compressed):
+                continue
+            if size_kb > limit:
+                violations.append(f'entry chunk: {key} {size_kb:.1f} KB > {limit} KB')
+        print(f"\nEntry chunk: {entry['decoded_bytes'] / 1024:.1f} KB decoded, "
+              f"{entry['transfer_bytes'] / 1024:.1f} KB transfer")
+    if not compressed:
+        print('ℹ️  Responses are not compressed; transfer budgets skipped')
+
+    grown, added, removed = [], [], []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['chunks']
+        grown, added, removed = chunk_growth(all_chunks, baseline, budgets['growth_tolerance_pct'],
+                                             budgets['growth_tolerance_kb'])
+        print('\nChunk growth since baseline:')
+        for g in grown:
+            print(f"  📈 {g['chunk']}: {g['before_kb']} KB -> {g['after_kb']} KB (+{g['growth_pct']}%)")
+        for a in added:
+            print(f"  🆕 {a['chunk']}: {a['decoded_kb']} KB")
+        for r in removed:
+            print(f'  ➖ {r}')
+        if not (grown or added or removed):
+            print('  none')
+    else:
+        print(f'\nNo baseline at {args.baseline}; run with --update-baseline to store one')
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({'created': datetime.now().isoformat(), 'base_url': BASE_URL,
+                       'chunks': dict(sorted(all_chunks.items()))}, f, indent=2)
+        print(f'📌 Baseline updated: {args.baseline}')
+
+    passed = print_checks([
+        ('Entry chunk loaded on the login shell', entry is not None),
+        ('All routes within byte budgets', not violations),
+        ('No chunk grew beyond tolerance since baseline', not grown),
+    ])
+    for v in violations:
+        print(f'  - {v}')
+
+    save_results('bundle-budgets', {
+        'timestamp': datetime.now().isoformat(),
+        'base_url': BASE_URL,
+        'compressed': compressed,
+        'shell': sorted(shell.values(), key=lambda c: c['decoded_bytes'], reverse=True),
+        'routes': routes,
+        'violations': violations,
+        'growth': {'grown': grown, 'added': added, 'removed': removed},
+        'passed': passed,
+    })
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Opt-in HAR recorder for the Playwright page scripts.
+
+test_pages.py uses this when started with --record-har. Every /api/ request
+the frontend makes while a page is being visited is written to one HAR 1.2
+file, with one HAR page per visited route and each entry tagged with its
+`pageref`. Requests made outside a page visit (the login form) are not kept.
+
+Entries keep the browser's own timings, so the file preserves the exact
+fan-out the frontend produces: which calls are issued together and which
+wait on an earlier response. scripts/perf/har_replay.py replays it as load.
+
+Authorization and Cookie headers are redacted on record; JSON response
+bodies up to --max-body bytes are kept so the replayer can map the recorded
+IDs onto the IDs returned by the target environment.
+"""
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+DEFAULT_URL_FILTER = '/api/'
+DEFAULT_MAX_BODY = 1_000_000
+REDACTED_HEADERS = {'authorization', 'cookie', 'set-cookie'}
+
+
+def _iso(epoch_ms):
+    return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).isoformat(timespec='milliseconds')
+
+
+def _headers(headers):
+    return [{'name': k, 'value': '<redacted>' if k.lower() in REDACTED_HEADERS else v}
+            for k, v in sorted(headers.items())]
+
+
+def _span(start, end):
+    return round(end - start, 3) if start >= 0 and end >= start else -1
+
+
+class HarRecorder:
+    """Collects /api/ traffic per visited page and writes it as a HAR file"""
+
+    def __init__(self, context, output_path, url_filter=DEFAULT_URL_FILTER, max_body=DEFAULT_MAX_BODY):
+        self.output_path = output_path
+        self.url_filter = url_filter
+        self.max_body = max_body
+        self.pages = []
+        self.entries = []
+        self._pageref = None
+        self._pending = []
+        # Bodies are read after the visit, not inside the event callbacks
+        context.on('requestfinished', lambda request: self._queue(request, failed=False))
+        context.on('requestfailed', lambda request: self._queue(request, failed=True))
+
+    def _queue(self, request, failed):
+        if self._pageref and self.url_filter in request.url:
+            self._pending.append((self._pageref, request, failed))
+
+    @contextmanager
+    def capture(self, name):
+        """Tag every matching request issued inside the block with a new HAR page"""
+        pageref = f'page_{len(self.pages) + 1}'
+        started = datetime.now(timezone.utc)
+        self.pages.append({'startedDateTime': started.isoformat(timespec='milliseconds'),
+                           'id': pageref, 'title': name, 'pageTimings': {}})
+        self._pageref = pageref
+        try:
+            yield
+        finally:
+            self._pageref = None
+            elapsed = (datetime.now(timezone.utc) - started).total_seconds() * 1000
+            self.pages[-1]['pageTimings']['onLoad'] = round(elapsed, 1)
+            pending, self._pending = self._pending, []
+            self.entries += [self._entry(*item) for item in pending]
+            print(f"  📼 {sum(1 for e in self.entries if e['pageref'] == pageref)} API request(s) recorded")
+
+    def _entry(self, pageref, request, failed):
+        timing = request.timing
+        response = None if failed else request.response()
+        send_start = timing.get('requestStart', -1)
+        response_start = timing.get('responseStart', -1)
+        response_end = timing.get('responseEnd', -1)
+        content = {'size': 0, 'mimeType': ''}
+        if response is not None:
+            content['mimeType'] = response.headers.get('content-type', '')
+            try:
+                body = response.body()
+            except Exception:
+                body = b''
+            content['size'] = len(body)
+            if 'json' in content['mimeType'] and len(body) <= self.max_body:
+                content['text'] = body.decode('utf-8', errors='replace')
+        post_data = request.post_data
+        return {
+            'pageref': pageref,
+            'startedDateTime': _iso(timing['startTime']),
+            'time': max(response_end, 0),
+            'request': {
+                'method': request.method,
+                'url': request.url,
+                'httpVersion': 'HTTP/1.1',
+                'headers': _headers(request.headers),
+                'queryString': [],
+                'cookies': [],
+                'headersSize': -1,
+                'bodySize': len(post_data) if post_data else 0,
+                **({'postData': {'mimeType': request.headers.get('content-type', ''), 'text': post_data}}
+                   if post_data else {}),
+            },
+            'response': {
+                'status': response.status if response is not None else 0,
+                'statusText': response.status_text if response is not None else (request.failure or ''),
+                'httpVersion': 'HTTP/1.1',
+                'headers': _headers(response.headers) if response is not None else [],
+                'cookies': [],
+                'content': content,
+                'redirectURL': '',
+                'headersSize': -1,
+                'bodySize': content['size'],
+            },
+            'cache': {},
+            'timings': {
+                'blocked': -1,
+                'dns': _span(timing.get('domainLookupStart', -1), timing.get('domainLookupEnd', -1)),
+                'connect': _span(timing.get('connectStart', -1), timing.get('connectEnd', -1)),
+                'ssl': _span(timing.get('secureConnectionStart', -1), timing.get('connectEnd', -1)),
+                'send': 0,
+                'wait': _span(send_start, response_start),
+                'receive': _span(response_start, response_end),
+            },
+        }
+
+    def close(self):
+        """Write the HAR file; returns its path"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        har = {'log': {
+            'version': '1.2',
+            'creator': {'name': 'har_recorder.py', 'version': '1.0'},
+            'pages': self.pages,
+            'entries': sorted(self.entries, key=lambda e: e['startedDateTime']),
+        }}
+        with open(self.output_path, 'w') as f:
+            json.dump(har, f, indent=1)
+        print(f'\n📼 {len(self.entries)} API request(s) over {len(self.pages)} page(s) saved to: {self.output_path}')
+        return self.output_path
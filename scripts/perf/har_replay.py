@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Replay recorded admin sessions as load, page by page.
+
+Record a session with `python test_pages.py --record-har session.har`
+(see har_recorder.py), then replay one or more HAR files as N concurrent
+virtual users. Load scripts that guess at the call mix miss what a page
+really does on open: the Dashboard alone fires a burst of analytics,
+order and notification calls, some only after others return. The replay
+keeps that shape.
+
+Each recorded page becomes a page-equivalent:
+
+  - requests are split into waves. A request joins the current wave if it
+    was issued before any request in the wave had returned; otherwise it
+    may have waited on one, so it starts the next wave
+  - each wave is fired concurrently, capped at --fanout connections (six,
+    the browser's per-host limit on HTTP/1.1); waves run in order
+  - between pages a virtual user thinks for the recorded gap times
+    --think-scale, or for --think-ms +/-50% if given
+
+Rewrites:
+
+  - the recorded origin is replaced with API_URL and the redacted
+    Authorization header with a fresh login token. Auth endpoints are never
+    replayed, and a 401 triggers one re-login
+  - IDs are remapped per virtual user. Each `id` / `*Id` value in a recorded
+    JSON response is matched to the value at the same JSON path in the
+    replayed response, and later path segments, id-named query parameters
+    and JSON body fields holding a recorded ID are rewritten. A HAR
+    recorded on one environment therefore replays on another when list
+    endpoints return rows in the same order
+  - conditional headers (If-None-Match, If-Modified-Since) are dropped, so
+    every request does the full server-side work
+
+Only GET requests are replayed unless --include-writes is set; the recorded
+page visits are reads, and replaying writes N times over mutates the target.
+
+Latency is reported per page-equivalent (first request sent to last
+response received) and per endpoint, with IDs folded to `:id`. Outside
+development the API allows 500 requests per 15 minutes per IP (apiLimiter),
+so run the backend with NODE_ENV=development or expect 429s.
+
+Usage:
+    python test_pages.py --record-har /tmp/admin-session.har
+    python scripts/perf/har_replay.py /tmp/admin-session.har --users 50 --duration 300
+    python scripts/perf/har_replay.py a.har b.har --users 20 --think-ms 5000 --ramp-up 60
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from perf_common import (
+    API_URL, LatencyStats, login, new_session, print_checks, print_header, print_latency_table, save_results,
+    timed_request,
+)
+
+SKIPPED_PATHS = ('/api/auth/',)
+DROPPED_HEADERS = {'authorization', 'cookie', 'host', 'origin', 'referer', 'content-length', 'connection',
+                   'if-none-match', 'if-modified-since', 'accept-encoding'}
+ID_SEGMENT = re.compile(r'^(\d+|[0-9a-f]{8}-[0-9a-f-]{27}|c[a-z0-9]{24})$')
+
+
+def is_id_key(key):
+    return key == 'id' or key.endswith('Id') or key.endswith('_id')
+
+
+def walk_ids(value, path=()):
+    """Yield (json_path, id) for every id-named scalar in a JSON document"""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if is_id_key(key) and isinstance(child, (int, str)) and not isinstance(child, bool):
+                yield path + (key,), child
+            else:
+                yield from walk_ids(child, path + (key,))
+    elif isinstance(value, list):
+        for i, child in enumerate(value):
+            yield from walk_ids(child, path + (i,))
+
+
+def lookup(value, path):
+    for step in path:
+        try:
+            value = value[step]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return value
+
+
+def endpoint_name(method, path):
+    return f"{method} {'/'.join(':id' if ID_SEGMENT.match(s) else s for s in path.split('/'))}"
+
+
+def epoch_ms(timestamp):
+    return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp() * 1000
+
+
+def parse_json(text):
+    try:
+        return json.loads(text) if text else None
+    except ValueError:
+        return None
+
+
+def load_pages(paths, include_writes):
+    """Page-equivalents from the HAR files, in recorded order, each with its waves and think time"""
+    pages = []
+    for path in paths:
+        with open(path) as f:
+            log = json.load(f)['log']
+        entries = sorted(log['entries'], key=lambda e: e['startedDateTime'])
+        by_page = {p['id']: {'name': p['title'], 'started': p['startedDateTime'], 'requests': []}
+                   for p in log['pages']}
+        for e in entries:
+            req = e['request']
+            split = urlsplit(req['url'])
+            if split.path.startswith(SKIPPED_PATHS) or e.get('pageref') not in by_page:
+                continue
+            if req['method'] != 'GET' and not include_writes:
+                continue
+            start = epoch_ms(e['startedDateTime'])
+            by_page[e['pageref']]['requests'].append({
+                'method': req['method'],
+                'path': split.path,
+                'query': parse_qsl(split.query, keep_blank_values=True),
+                'headers': {h['name']: h['value'] for h in req['headers'] if h['name'].lower() not in DROPPED_HEADERS},
+                'body': req.get('postData', {}).get('text'),
+                'start_ms': start,
+                'end_ms': start + max(e['time'], 0),
+                'status': e['response']['status'],
+                'ids': list(walk_ids(parse_json(e['response']['content'].get('text')))),
+            })
+        recorded = sorted(by_page.values(), key=lambda p: p['started'])
+        for i, page in enumerate(recorded):
+            page['waves'] = split_waves(page['requests'])
+            page['think_ms'] = 0.0
+            if i + 1 < len(recorded):
+                gap = epoch_ms(recorded[i + 1]['started']) - epoch_ms(page['started'])
+                ends = [r['end_ms'] for r in page['requests']]
+                busy = max(ends) - page['requests'][0]['start_ms'] if ends else 0
+                page['think_ms'] = max(gap - busy, 0.0)
+        pages += [p for p in recorded if p['requests']]
+    return pages
+
+
+def split_waves(requests):
+    """Group requests issued before any earlier one in the group returned"""
+    waves = []
+    for req in requests:
+        if waves and req['start_ms'] < min(r['end_ms'] for r in waves[-1]):
+            waves[-1].append(req)
+        else:
+            waves.append([req])
+    return waves
+
+
+class Auth:
+    """Shared access token, refreshed once per expiry across all virtual users"""
+
+    def __init__(self):
+        self.token = login()
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def refresh(self, seen_generation):
+        with self._lock:
+            if self.generation == seen_generation:
+                self.token = login()
+                self.generation += 1
+            return self.token, self.generation
+
+
+class VirtualUser:
+    def __init__(self, index, auth, args, page_stats, endpoint_stats, totals):
+        self.index = index
+        self.auth = auth
+        self.args = args
+        self.page_stats = page_stats
+        self.endpoint_stats = endpoint_stats
+        self.totals = totals
+        self.generation = auth.generation
+        self.session = new_session(auth.token, pool_size=args.fanout)
+        self.pool = ThreadPoolExecutor(max_workers=args.fanout)
+        self.ids = {}
+        self.rng = random.Random(index)
+
+    def remap(self, value):
+        return self.ids.get(str(value), value)
+
+    def rewrite_body(self, value):
+        if isinstance(value, dict):
+            return {k: (self.remap(v) if is_id_key(k) and isinstance(v, (int, str)) else self.rewrite_body(v))
+                    for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.rewrite_body(v) for v in value]
+        return value
+
+    def send(self, req):
+        path = '/'.join(str(self.ids.get(s, s)) if ID_SEGMENT.match(s) else s for s in req['path'].split('/'))
+        params = [(k, self.remap(v) if is_id_key(k) else v) for k, v in req['query']]
+        url = f"{API_URL}{path}{'?' + urlencode(params) if params else ''}"
+        kwargs = {'headers': req['headers']}
+        if req['body'] is not None:
+            body = parse_json(req['body'])
+            kwargs['data'] = json.dumps(self.rewrite_body(body)) if body is not None else req['body']
+        resp, ms, err = timed_request(self.session, req['method'], url, **kwargs)
+        if resp is not None and resp.status_code == 401:
+            token, self.generation = self.auth.refresh(self.generation)
+            self.session.headers['Authorization'] = f'Bearer {token}'
+            resp, ms, err = timed_request(self.session, req['method'], url, **kwargs)
+        ok_statuses = {200, 201, 204, 304, req['status']} - {0}
+        stats = self.endpoint_stats.setdefault(endpoint_name(req['method'], req['path']),
+                                               LatencyStats(endpoint_name(req['method'], req['path'])))
+        stats.record_response(resp, ms, err, ok_statuses=ok_statuses)
+        if req['ids'] and resp is not None and resp.ok:
+            replayed = parse_json(resp.text)
+            for json_path, old in req['ids']:
+                new = lookup(replayed, json_path)
+                if new is not None and str(new) != str(old):
+                    self.ids[str(old)] = new
+        return err is None and resp is not None and resp.status_code in ok_statuses
+
+    def run_page(self, page):
+        start = time.perf_counter()
+        ok = True
+        for wave in page['waves']:
+            ok = all(list(self.pool.map(self.send, wave))) and ok
+        ms = (time.perf_counter() - start) * 1000
+        self.page_stats.setdefault(page['name'], LatencyStats(page['name'])).record(ms, ok=ok)
+        with self.totals['lock']:
+            self.totals['pages'] += 1
+
+    def think(self, page, deadline):
+        if self.args.think_ms is not None:
+            pause = self.args.think_ms * self.rng.uniform(0.5, 1.5)
+        else:
+            pause = page['think_ms'] * self.args.think_scale
+        time.sleep(max(min(pause / 1000, deadline - time.monotonic()), 0))
+
+    def run(self, pages, start_delay, deadline):
+        time.sleep(start_delay)
+        # Stagger the starting page so virtual users do not move through the site in lockstep
+        offset = self.index % len(pages)
+        while time.monotonic() < deadline:
+            for page in pages[offset:] + pages[:offset]:
+                if time.monotonic() >= deadline:
+                    break
+                self.run_page(page)
+                self.think(page, deadline)
+            offset = 0
+        self.pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('har', nargs='+', help='HAR file(s) recorded with test_pages.py --record-har')
+    parser.add_argument('--users', type=int, default=20, help='concurrent virtual users')
+    parser.add_argument('--duration', type=int, default=300, help='seconds of replay after ramp-up starts')
+    parser.add_argument('--ramp-up', type=int, default=30, help='seconds over which users start')
+    parser.add_argument('--fanout', type=int, default=6, help='concurrent requests per user within a wave')
+    parser.add_argument('--think-scale', type=float, default=1.0, help='multiplier on recorded think times')
+    parser.add_argument('--think-ms', type=float, help='fixed think time (+/-50%%) instead of the recorded gaps')
+    parser.add_argument('--include-writes', action='store_true', help='also replay non-GET requests')
+    parser.add_argument('--page-budget-ms', type=float, default=3000, help='p95 budget per page-equivalent')
+    parser.add_argument('--max-error-pct', type=float, default=1.0)
+    args = parser.parse_args()
+
+    pages = load_pages(args.har, args.include_writes)
+    if not pages:
+        raise SystemExit('No replayable /api/ requests in the HAR file(s)')
+    print_header('📼 HAR Session Replay', target=API_URL, hars=len(args.har), pages=len(pages), users=args.users,
+                 duration=f'{args.duration}s', ramp_up=f'{args.ramp_up}s', fanout=args.fanout,
+                 think=f'{args.think_ms:g}ms' if args.think_ms is not None else f'recorded x{args.think_scale:g}')
+
+    print('\n[Phase 1] Recorded fan-out')
+    print(f"  {'page':<20} {'requests':>9} {'waves':>6} {'max wave':>9} {'think':>8}")
+    for page in pages:
+        print(f"  {page['name']:<20} {len(page['requests']):>9} {len(page['waves']):>6} "
+              f"{max(len(w) for w in page['waves']):>9} {page['think_ms'] / 1000:>7.1f}s")
+
+    print(f'\n[Phase 2] Replaying as {args.users} virtual user(s)')
+    auth = Auth()
+    page_stats, endpoint_stats = {}, {}
+    totals = {'pages': 0, 'lock': threading.Lock()}
+    deadline = time.monotonic() + args.duration
+    users = [VirtualUser(i, auth, args, page_stats, endpoint_stats, totals) for i in range(args.users)]
+    threads = [threading.Thread(target=u.run, args=(pages, args.ramp_up * i / args.users, deadline), daemon=True)
+               for i, u in enumerate(users)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    print(f"  {totals['pages']:,} page-equivalents in {elapsed:.0f}s ({totals['pages'] / elapsed:.1f}/s), "
+          f'{auth.generation} token refresh(es)')
+
+    names = list(dict.fromkeys(p['name'] for p in pages))
+    page_summaries = [page_stats[name].summary() for name in names if name in page_stats]
+    endpoint_summaries = sorted((s.summary() for s in endpoint_stats.values()), key=lambda s: s['p95_ms'],
+                                reverse=True)
+    print('\n  Per page-equivalent')
+    print_latency_table(page_summaries)
+    print('\n  Per endpoint (slowest p95 first)')
+    print_latency_table(endpoint_summaries)
+
+    requests_total = sum(s['count'] for s in endpoint_summaries)
+    errors_total = sum(s['errors'] for s in endpoint_summaries)
+    error_pct = errors_total / requests_total * 100 if requests_total else 100.0
+    over_budget = [s['name'] for s in page_summaries if s['p95_ms'] > args.page_budget_ms]
+    rate_limited = sum(s['statuses'].get('429', 0) for s in endpoint_summaries)
+    passed = print_checks([
+        (f'Request error rate below {args.max_error_pct:g}% ({error_pct:.2f}%)', error_pct < args.max_error_pct),
+        (f'Every page-equivalent p95 within {args.page_budget_ms:g} ms', not over_budget),
+        ('No requests rate limited (429)', rate_limited == 0),
+    ])
+    if over_budget:
+        print(f"  Over budget: {', '.join(over_budget)}")
+
+    save_results('har-replay', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'hars': args.har,
+        'settings': {k: v for k, v in vars(args).items() if k != 'har'},
+        'fanout': [{'page': p['name'], 'requests': len(p['requests']), 'waves': [len(w) for w in p['waves']],
+                    'think_ms': round(p['think_ms'], 1)} for p in pages],
+        'page_equivalents': totals['pages'],
+        'elapsed_s': round(elapsed, 1),
+        'token_refreshes': auth.generation,
+        'pages': page_summaries,
+        'endpoints': endpoint_summaries,
+        'passed': passed,
+    })
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Mobile viewport and throttled-network sweep for the delivery agent pages.
+
+Agents work from the /m/* routes (MobileDeliveries, MobileDeliveryDetail,
+AgentMyInventory, MobileCollections) on low-end Android phones over 3G, while
+every other Playwright script runs at a 1280px desktop viewport. This sweep
+loads each agent page from a cold cache under every device x network profile:
+
+  - device emulation from Playwright's descriptors (viewport, DPR, touch, UA)
+  - CPU slowdown via CDP Emulation.setCPUThrottlingRate
+  - bandwidth/latency via CDP Network.emulateNetworkConditions
+
+and reports per page FCP, time-to-interactive and the /api/deliveries calls
+the page made. TTI follows the Lighthouse definition: the end of the last
+long task before the first 5 s window after FCP with no long tasks and at most
+two requests in flight.
+
+The endpoints in AGENT_ENDPOINTS, such as the day's route from
+GET /api/deliveries/routes/:agentId for the logged-in seeded agent, are
+fetched --runs times from inside each throttled profile as well.
+
+Proof of delivery is timed the way MobileDeliveryDetail does it, inside the
+throttled page: a camera-sized JPEG is resized on a canvas (1200px, q=0.7 as
+utils/imageResize.ts), POSTed to /api/upload, and, only when
+--proof-delivery-id is given, attached with PATCH /api/deliveries/:id/proof.
+That PATCH overwrites the delivery's proof fields; use a test delivery.
+
+Usage:
+    python scripts/perf/mobile_sweep.py --agent-email agent@example.com
+    python scripts/perf/mobile_sweep.py --agent-email agent@example.com --devices "Moto G4" --networks slow-3g --runs 5
+    python scripts/perf/mobile_sweep.py --agent-email agent@example.com --proof-delivery-id 123
+"""
+import argparse
+import os
+import statistics
+from datetime import datetime
+
+from playwright.sync_api import sync_playwright
+
+from perf_common import BASE_URL, print_checks, print_header, save_results
+
+# Chrome DevTools presets; throughput in bytes/s, latency in ms
+NETWORK_PROFILES = {
+    'slow-3g': {'latency': 400, 'download': 400 * 1024 / 8, 'upload': 400 * 1024 / 8},
+    'fast-3g': {'latency': 150, 'download': 1.6 * 1024 * 1024 / 8, 'upload': 750 * 1024 / 8},
+    '4g': {'latency': 60, 'download': 9 * 1024 * 1024 / 8, 'upload': 3 * 1024 * 1024 / 8},
+}
+
+# Playwright device descriptor -> CPU slowdown relative to the machine running the sweep
+DEVICE_PROFILES = {
+    'Moto G4': 6,
+    'Galaxy S8': 4,
+    'Pixel 5': 2,
+}
+
+AGENT_PAGES = [
+    {'name': 'Deliveries', 'url': '/m/deliveries'},
+    {'name': 'Delivery Detail', 'url': '/m/deliveries/{delivery_id}'},
+    {'name': 'My Inventory', 'url': '/m/inventory'},
+    {'name': 'Collections', 'url': '/m/collections'},
+]
+
+# Fetched directly from a throttled page; {agent_id} is the logged-in (seeded) agent
+AGENT_ENDPOINTS = [
+    {'name': 'Agent Route', 'path': '/api/deliveries/routes/{agent_id}'},
+]
+
+QUIET_WINDOW_MS = 5000
+
+# Records long tasks and FCP from the first byte the page parses
+PERF_OBSERVER_SCRIPT = """
+(() => {
+  window.__perfLongTasks = [];
+  try {
+    new PerformanceObserver((list) => {
+      for (const e of list.getEntries()) window.__perfLongTasks.push([e.startTime, e.startTime + e.duration]);
+    }).observe({ type: 'longtask', buffered: true });
+  } catch (e) {}
+})();
+"""
+
+READ_TIMINGS = """
+() => {
+  const fcp = performance.getEntriesByName('first-contentful-paint')[0];
+  return {
+    now: performance.now(),
+    fcp: fcp ? fcp.startTime : null,
+    longTasks: window.__perfLongTasks || [],
+    resources: performance.getEntriesByType('resource').map(r => ({
+      name: r.name, start: r.startTime, end: r.responseEnd, transfer: r.transferSize,
+    })),
+    skeletons: document.querySelectorAll('.animate-pulse').length,
+  };
+}
+"""
+
+# Runs in the throttled page: build a phone-camera-sized JPEG, resize it like
+# utils/imageResize.ts, upload it and optionally attach it as proof.
+PROOF_UPLOAD_SCRIPT = """
+async ({ deliveryId, width, height }) => {
+  const auth = JSON.parse(localStorage.getItem('auth-storage') || '{}');
+  const headers = { Authorization: `Bearer ${auth.state && auth.state.accessToken}` };
+  const toBlob = (canvas, q) => new Promise(r => canvas.toBlob(r, 'image/jpeg', q));
+  const source = document.createElement('canvas');
+  source.width = width; source.height = height;
+  const ctx = source.getContext('2d');
+  const img = ctx.createImageData(width, height);
+  for (let i = 0; i < img.data.length; i += 4) {
+    img.data[i] = (i * 7) & 255; img.data[i + 1] = (i * 13) & 255; img.data[i + 2] = (i * 29) & 255; img.data[i + 3] = 255;
+  }
+  ctx.putImageData(img, 0, 0);
+  const original = await toBlob(source, 0.92);
+
+  const t0 = performance.now();
+  const bitmap = await createImageBitmap(original);
+  const scale = Math.min(1, 1200 / bitmap.width);
+  const resized = document.createElement('canvas');
+  resized.width = Math.round(bitmap.width * scale); resized.height = Math.round(bitmap.height * scale);
+  resized.getContext('2d').drawImage(bitmap, 0, 0, resized.width, resized.height);
+  const photo = await toBlob(resized, 0.7);
+  const t1 = performance.now();
+
+  const form = new FormData();
+  form.append('image', new File([photo], 'proof.jpg', { type: 'image/jpeg' }));
+  const up = await fetch('/api/upload', { method: 'POST', headers, body: form });
+  const upBody = await up.json().catch(() => ({}));
+  const t2 = performance.now();
+
+  let proofStatus = null;
+  if (deliveryId && up.ok) {
+    const res = await fetch(`/api/deliveries/${deliveryId}/proof`, {
+      method: 'PATCH',
+      headers: { ...headers, 'Content-Type': 'application/json' },
+      body: JSON.stringify({ proofType: 'photo', proofData: upBody.imageUrl, recipientName: 'Perf Sweep' }),
+    });
+    proofStatus = res.status;
+  }
+  const t3 = performance.now();
+  return {
+    original_bytes: original.size, upload_bytes: photo.size,
+    resize_ms: t1 - t0, upload_ms: t2 - t1, proof_ms: deliveryId ? t3 - t2 : null, total_ms: t3 - t0,
+    upload_status: up.status, proof_status: proofStatus,
+  };
+}
+"""
+
+
+# Runs in the throttled page: one uncached authenticated GET, timed from the page's clock
+FETCH_ENDPOINT_SCRIPT = """
+async (path) => {
+  const auth = JSON.parse(localStorage.getItem('auth-storage') || '{}');
+  const t0 = performance.now();
+  const res = await fetch(path, {
+    cache: 'no-store', headers: { Authorization: `Bearer ${auth.state && auth.state.accessToken}` },
+  });
+  const body = await res.text();
+  return { status: res.status, ms: performance.now() - t0, kb: body.length / 1024 };
+}
+"""
+
+
+def compute_tti(fcp, long_tasks, resources, observed_until, quiet_ms=QUIET_WINDOW_MS):
+    """
+    Lighthouse-style TTI from FCP, long tasks and resource timings.
+
+    Scans forward from FCP for a quiet window (no long task, <= 2 requests in
+    flight); TTI is the end of the last long task before it, or FCP. Returns
+    None if no quiet window was observed before `observed_until`.
+    """
+    if fcp is None:
+        return None
+    long_tasks = sorted(long_tasks)
+    candidate = fcp
+    while candidate + quiet_ms <= observed_until:
+        window_end = candidate + quiet_ms
+        blocking = [t for t in long_tasks if t[1] > candidate and t[0] < window_end]
+        if blocking:
+            candidate = blocking[-1][1]
+            continue
+        in_flight = 0
+        busy_until = None
+        for r in resources:
+            if r['start'] < window_end and r['end'] > candidate:
+                in_flight += 1
+                busy_until = max(busy_until or 0, r['end'])
+        if in_flight > 2:
+            candidate = busy_until
+            continue
+        before = [t for t in long_tasks if t[1] <= candidate]
+        return max(fcp, before[-1][1]) if before else fcp
+    return None
+
+
+def throttle(context, page, network, cpu_rate):
+    cdp = context.new_cdp_session(page)
+    cdp.send('Network.enable')
+    cdp.send('Network.emulateNetworkConditions', {
+        'offline': False,
+        'latency': network['latency'],
+        'downloadThroughput': network['download'],
+        'uploadThroughput': network['upload'],
+    })
+    cdp.send('Emulation.setCPUThrottlingRate', {'rate': cpu_rate})
+    return cdp
+
+
+def agent_login(browser, email, password):
+    """Log in through the UI at full speed and return the storage state"""
+    context = browser.new_context()
+    page = context.new_page()
+    page.goto(f'{BASE_URL}/login', wait_until='networkidle')
+    page.fill('input[type="email"]', email)
+    page.fill('input[type="password"]', password)
+    page.click('button[type="submit"]')
+    page.wait_for_load_state('networkidle')
+    page.wait_for_timeout(1000)
+    state = context.storage_state()
+    deliveries = page.evaluate("""async () => {
+      const auth = JSON.parse(localStorage.getItem('auth-storage') || '{}');
+      const res = await fetch('/api/deliveries/agent-orders?limit=5',
+        { headers: { Authorization: `Bearer ${auth.state && auth.state.accessToken}` } });
+      return { status: res.status, role: auth.state && auth.state.user && auth.state.user.role,
+               agentId: auth.state && auth.state.user && auth.state.user.id,
+               body: res.ok ? await res.json() : null };
+    }""")
+    context.close()
+    if deliveries['role'] != 'delivery_agent':
+        raise SystemExit(f"{email} is not a delivery agent (role: {deliveries['role']})")
+    items = (deliveries['body'] or {}).get('deliveries', [])
+    delivery_id = next((d['id'] for d in items if d.get('id', 0) > 0), None)
+    return state, deliveries['agentId'], delivery_id
+
+
+def measure_page(page, url, timeout_s):
+    """Navigate and poll until a quiet window after FCP yields a TTI"""
+    page.goto(url, wait_until='commit', timeout=timeout_s * 1000)
+    deadline = timeout_s * 1000
+    timings = page.evaluate(READ_TIMINGS)
+    tti = None
+    while timings['now'] < deadline:
+        page.wait_for_timeout(1000)
+        timings = page.evaluate(READ_TIMINGS)
+        tti = compute_tti(timings['fcp'], timings['longTasks'], timings['resources'], timings['now'])
+        if tti is not None and timings['skeletons'] == 0:
+            break
+    api = [r for r in timings['resources'] if '/api/' in r['name']]
+    return {
+        'fcp_ms': timings['fcp'],
+        'tti_ms': tti,
+        'long_tasks': len(timings['longTasks']),
+        'long_task_ms': sum(e - s for s, e in timings['longTasks']),
+        'transfer_kb': sum(r['transfer'] or 0 for r in timings['resources']) / 1024,
+        'requests': len(timings['resources']),
+        'skeletons_left': timings['skeletons'],
+        'api_calls': [{'path': r['name'].split('/api/', 1)[1].split('?', 1)[0],
+                       'ms': round(r['end'] - r['start'], 1)} for r in api],
+    }
+
+
+def median_of(runs, key):
+    values = [r[key] for r in runs if r.get(key) is not None]
+    return round(statistics.median(values), 1) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--agent-email', default=os.environ.get('PERF_AGENT_EMAIL'), help='a delivery_agent login')
+    parser.add_argument('--agent-password', default=os.environ.get('PERF_AGENT_PASSWORD', 'password123'))
+    parser.add_argument('--devices', default=','.join(DEVICE_PROFILES), help='comma-separated device names')
+    parser.add_argument('--networks', default=','.join(NETWORK_PROFILES), help='comma-separated network profiles')
+    parser.add_argument('--runs', type=int, default=3, help='cold loads per page per profile (median reported)')
+    parser.add_argument('--timeout-s', type=int, default=60)
+    parser.add_argument('--photo-size', default='4000x3000', help='camera resolution before resizing')
+    parser.add_argument('--proof-delivery-id', type=int, help='also PATCH /api/deliveries/:id/proof (overwrites proof)')
+    parser.add_argument('--tti-budget-ms', type=float, default=10000, help='budget on fast-3g for every device')
+    parser.add_argument('--proof-budget-ms', type=float, default=15000, help='resize + upload budget on fast-3g')
+    args = parser.parse_args()
+    if not args.agent_email:
+        parser.error('--agent-email (or PERF_AGENT_EMAIL) is required')
+
+    devices = [d.strip() for d in args.devices.split(',') if d.strip()]
+    networks = [n.strip() for n in args.networks.split(',') if n.strip()]
+    unknown = [n for n in networks if n not in NETWORK_PROFILES]
+    if unknown:
+        raise SystemExit(f'Unknown network profile(s): {unknown}; choose from {list(NETWORK_PROFILES)}')
+    width, height = (int(v) for v in args.photo_size.lower().split('x'))
+
+    print_header('📱 Mobile Agent Page Sweep', target=BASE_URL, agent=args.agent_email,
+                 devices=', '.join(devices), networks=', '.join(networks), runs=args.runs,
+                 proof_patch=args.proof_delivery_id or 'upload only')
+
+    results = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        state, agent_id, delivery_id = agent_login(browser, args.agent_email, args.agent_password)
+        pages = [pg for pg in AGENT_PAGES if delivery_id or '{delivery_id}' not in pg['url']]
+        if not delivery_id:
+            print('ℹ️  Agent has no deliveries; skipping Delivery Detail')
+
+        for device in devices:
+            if device not in p.devices:
+                raise SystemExit(f'Unknown Playwright device: {device}')
+            cpu_rate = DEVICE_PROFILES.get(device, 4)
+            for network_name in networks:
+                network = NETWORK_PROFILES[network_name]
+                print(f'\n🔍 {device} (CPU {cpu_rate}x) on {network_name}')
+                for page_info in pages:
+                    url = BASE_URL + page_info['url'].format(delivery_id=delivery_id)
+                    runs = []
+                    for _ in range(args.runs):
+                        context = browser.new_context(**p.devices[device], storage_state=state)
+                        context.add_init_script(PERF_OBSERVER_SCRIPT)
+                        page = context.new_page()
+                        throttle(context, page, network, cpu_rate)
+                        try:
+                            runs.append(measure_page(page, url, args.timeout_s))
+                        except Exception as e:
+                            runs.append({'error': str(e)})
+                        context.close()
+                    row = {
+                        'device': device, 'cpu_rate': cpu_rate, 'network': network_name,
+                        'page': page_info['name'], 'url': page_info['url'],
+                        'fcp_ms': median_of(runs, 'fcp_ms'), 'tti_ms': median_of(runs, 'tti_ms'),
+                        'long_task_ms': median_of(runs, 'long_task_ms'),
+                        'transfer_kb': median_of(runs, 'transfer_kb'),
+                        'errors': sum(1 for r in runs if 'error' in r or r.get('tti_ms') is None),
+                        'runs': runs,
+                    }
+                    results.append(row)
+                    tti = f"{row['tti_ms']:.0f}ms" if row['tti_ms'] is not None else 'n/a'
+                    fcp = f"{row['fcp_ms']:.0f}ms" if row['fcp_ms'] is not None else 'n/a'
+                    print(f"  {page_info['name']:<18} FCP {fcp:>8}  TTI {tti:>8}  "
+                          f"long tasks {row['long_task_ms'] or 0:>6.0f}ms  {row['transfer_kb'] or 0:>6.0f} KB")
+
+                # Endpoints the agent views read, timed inside the same throttled profile
+                context = browser.new_context(**p.devices[device], storage_state=state)
+                page = context.new_page()
+                page.goto(f'{BASE_URL}/m/deliveries', wait_until='networkidle', timeout=args.timeout_s * 1000)
+                throttle(context, page, network, cpu_rate)
+                for endpoint in AGENT_ENDPOINTS:
+                    path = endpoint['path'].format(agent_id=agent_id)
+                    fetches = [page.evaluate(FETCH_ENDPOINT_SCRIPT, path) for _ in range(args.runs)]
+                    row = {
+                        'device': device, 'cpu_rate': cpu_rate, 'network': network_name,
+                        'page': endpoint['name'], 'endpoint': path,
+                        'ms': median_of(fetches, 'ms'), 'kb': median_of(fetches, 'kb'),
+                        'statuses': sorted({f['status'] for f in fetches}),
+                        'runs': fetches,
+                    }
+                    results.append(row)
+                    print(f"  {endpoint['name']:<18} GET {path}  {row['ms']:.0f}ms  {row['kb']:.1f} KB  "
+                          f"(HTTP {', '.join(str(st) for st in row['statuses'])})")
+                context.close()
+
+                # Proof of delivery from the detail page, as the agent would submit it
+                context = browser.new_context(**p.devices[device], storage_state=state)
+                page = context.new_page()
+                page.goto(f'{BASE_URL}/m/deliveries', wait_until='networkidle', timeout=args.timeout_s * 1000)
+                throttle(context, page, network, cpu_rate)
+                proof = page.evaluate(PROOF_UPLOAD_SCRIPT, {
+                    'deliveryId': args.proof_delivery_id, 'width': width, 'height': height})
+                context.close()
+                proof.update({'device': device, 'network': network_name, 'page': 'Proof upload'})
+                results.append(proof)
+                print(f"  {'Proof upload':<18} resize {proof['resize_ms']:.0f}ms, upload "
+                      f"{proof['upload_bytes'] / 1024:.0f} KB in {proof['upload_ms']:.0f}ms "
+                      f"(HTTP {proof['upload_status']})"
+                      + (f", proof PATCH {proof['proof_ms']:.0f}ms (HTTP {proof['proof_status']})"
+                         if proof['proof_ms'] is not None else ''))
+        browser.close()
+
+    page_rows = [r for r in results if 'tti_ms' in r]
+    endpoint_rows = [r for r in results if 'endpoint' in r]
+    proof_rows = [r for r in results if r['page'] == 'Proof upload']
+    on_fast_3g = [r for r in page_rows if r['network'] == 'fast-3g']
+    proofs_fast_3g = [r for r in proof_rows if r['network'] == 'fast-3g']
+    over_budget = [f"{r['device']} {r['page']}" for r in on_fast_3g
+                   if r['tti_ms'] is None or r['tti_ms'] > args.tti_budget_ms]
+
+    passed = print_checks([
+        ('Every page reached TTI in every profile', all(r['errors'] == 0 for r in page_rows)),
+        ('Agent endpoints (' + ', '.join(e['name'] for e in AGENT_ENDPOINTS) + ') answered 200 in every profile',
+         bool(endpoint_rows) and all(r['statuses'] == [200] for r in endpoint_rows)),
+        (f'TTI <= {args.tti_budget_ms:.0f}ms on fast-3g for every device', bool(on_fast_3g) and not over_budget),
+        ('Proof photo uploads succeeded', all(r['upload_status'] in (200, 201) for r in proof_rows)),
+        (f'Proof resize + upload <= {args.proof_budget_ms:.0f}ms on fast-3g',
+         bool(proofs_fast_3g) and all(r['total_ms'] <= args.proof_budget_ms for r in proofs_fast_3g)),
+    ])
+    for label in over_budget:
+        print(f'  - over TTI budget: {label}')
+
+    save_results('mobile-sweep', {
+        'timestamp': datetime.now().isoformat(),
+        'base_url': BASE_URL,
+        'agent_id': agent_id,
+        'network_profiles': NETWORK_PROFILES,
+        'device_profiles': {d: DEVICE_PROFILES.get(d, 4) for d in devices},
+        'results': results,
+        'passed': passed,
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Opt-in slow-page profiler for the Playwright page scripts.
+
+test_pages.py and FinancialModuleTester (scripts/test_financial_module.py) use
+this when started with --profile. Every route or tab is recorded, and anything
+slower than the threshold is kept:
+
+  - a Playwright trace chunk (open with `npx playwright show-trace <zip>`)
+  - a Chrome DevTools CPU profile taken over CDP (load the .cpuprofile in the
+    DevTools Performance panel)
+  - JS heap usage and the size of a full heap snapshot
+  - React commit count and per-component render counts, collected by a minimal
+    __REACT_DEVTOOLS_GLOBAL_HOOK__ installed before the app boots
+
+Fast pages are discarded. summary.md / summary.json list each slow page with
+its top self-time functions and most-rendered components, so a slow
+Financial.tsx chart can be traced to the component doing the work.
+
+Component names are only readable against the Vite dev server; production
+builds minify them.
+"""
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_THRESHOLD_MS = 3000
+DEFAULT_OUTPUT_DIR = '/tmp/perf-profiles'
+
+# Installed before any page script runs so React registers with it on boot.
+# A fiber counts as rendered when its memoized props or state object changed
+# since the last commit we saw it in; re-renders with identical props and
+# state (context-only updates) are not counted, so render counts are a floor.
+REACT_HOOK_SCRIPT = """
+(() => {
+  if (window.__REACT_DEVTOOLS_GLOBAL_HOOK__) return;
+  const stats = { commits: 0, components: {} };
+  const seen = new WeakMap();
+  const nameOf = (type) => {
+    if (!type || typeof type === 'string') return null;
+    return type.displayName || type.name
+      || (type.render && (type.render.displayName || type.render.name))
+      || (type.type && nameOf(type.type)) || null;
+  };
+  window.__perfReactStats = stats;
+  window.__REACT_DEVTOOLS_GLOBAL_HOOK__ = {
+    supportsFiber: true,
+    renderers: new Map(),
+    inject(renderer) { const id = this.renderers.size + 1; this.renderers.set(id, renderer); return id; },
+    checkDCE() {},
+    onScheduleFiberRoot() {},
+    onCommitFiberUnmount() {},
+    onPostCommitFiberRoot() {},
+    onCommitFiberRoot(_id, root) {
+      stats.commits += 1;
+      const stack = [root.current];
+      while (stack.length) {
+        const fiber = stack.pop();
+        const name = nameOf(fiber.type);
+        if (name) {
+          const prev = seen.get(fiber) || (fiber.alternate && seen.get(fiber.alternate));
+          if (!prev || prev[0] !== fiber.memoizedProps || prev[1] !== fiber.memoizedState) {
+            stats.components[name] = (stats.components[name] || 0) + 1;
+          }
+          seen.set(fiber, [fiber.memoizedProps, fiber.memoizedState]);
+        }
+        if (fiber.child) stack.push(fiber.child);
+        if (fiber.sibling) stack.push(fiber.sibling);
+      }
+    },
+  };
+})();
+"""
+
+READ_REACT_STATS = """
+() => {
+  const s = window.__perfReactStats || { commits: 0, components: {} };
+  const snapshot = { commits: s.commits, components: { ...s.components } };
+  s.commits = 0;
+  s.components = {};
+  return snapshot;
+}
+"""
+
+
+def summarize_cpu_profile(profile, top=15):
+    """
+    Self time per function from a DevTools CPU profile.
+
+    Each sample lands on one node; the matching timeDeltas entry is the time
+    since the previous sample, so summing deltas per node gives self time.
+    Nodes are folded by (function, url, line) to merge identical frames reached
+    through different call paths.
+    """
+    nodes = {n['id']: n['callFrame'] for n in profile.get('nodes', [])}
+    self_us = {}
+    for node_id, delta in zip(profile.get('samples', []), profile.get('timeDeltas', [])):
+        frame = nodes.get(node_id)
+        if frame is None:
+            continue
+        key = (frame.get('functionName') or '(anonymous)', frame.get('url', ''), frame.get('lineNumber', -1))
+        self_us[key] = self_us.get(key, 0) + max(delta, 0)
+
+    total_us = sum(self_us.values()) or 1
+    ranked = sorted(self_us.items(), key=lambda kv: kv[1], reverse=True)
+    return [{
+        'function': fn,
+        'url': url,
+        'line': line + 1 if line >= 0 else None,
+        'self_ms': round(us / 1000, 2),
+        'self_pct': round(us / total_us * 100, 1),
+    } for (fn, url, line), us in ranked if fn not in ('(idle)', '(program)')][:top]
+
+
+class SlowPageProfiler:
+    """Captures trace, CPU profile, heap and React stats for pages over a threshold"""
+
+    def __init__(self, context, threshold_ms=DEFAULT_THRESHOLD_MS, output_dir=DEFAULT_OUTPUT_DIR,
+                 keep_heap_snapshots=False):
+        self.context = context
+        self.threshold_ms = threshold_ms
+        self.output_dir = os.path.join(output_dir, datetime.now().strftime('%Y%m%d-%H%M%S'))
+        self.keep_heap_snapshots = keep_heap_snapshots
+        self.results = []
+        self._cdp = {}
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Must run before the first page is created so React sees the hook on boot
+        context.add_init_script(REACT_HOOK_SCRIPT)
+        context.tracing.start(screenshots=True, snapshots=True)
+
+    def _session(self, page):
+        if page not in self._cdp:
+            cdp = self.context.new_cdp_session(page)
+            cdp.send('Profiler.enable')
+            cdp.send('Profiler.setSamplingInterval', {'interval': 200})
+            cdp.send('HeapProfiler.enable')
+            self._cdp[page] = cdp
+        return self._cdp[page]
+
+    @contextmanager
+    def capture(self, page, name):
+        """
+        Profile everything inside the block. Call the yielded `loaded()` once
+        the page counts as loaded: the time up to that call is compared with
+        the threshold, while recording continues to the end of the block so
+        post-load rendering (charts, lazy tabs) is still in the profile.
+        """
+        cdp = self._session(page)
+        slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'page'
+        page.evaluate(READ_REACT_STATS)  # reset counters for tab clicks within one document
+        self.context.tracing.start_chunk(title=name)
+        cdp.send('Profiler.start')
+        start = time.perf_counter()
+        marks = {}
+
+        def loaded():
+            marks.setdefault('load_ms', (time.perf_counter() - start) * 1000)
+
+        try:
+            yield loaded
+        finally:
+            loaded()
+            profile = cdp.send('Profiler.stop')['profile']
+            load_ms = marks['load_ms']
+            if load_ms < self.threshold_ms:
+                self.context.tracing.stop_chunk()
+                page.evaluate(READ_REACT_STATS)
+            else:
+                self.results.append(self._keep(page, cdp, name, slug, load_ms, profile))
+                print(f"  🐢 {name} took {load_ms:.0f}ms (> {self.threshold_ms}ms) - profile kept")
+
+    def _keep(self, page, cdp, name, slug, load_ms, profile):
+        trace_path = os.path.join(self.output_dir, f'{slug}.trace.zip')
+        self.context.tracing.stop_chunk(path=trace_path)
+
+        profile_path = os.path.join(self.output_dir, f'{slug}.cpuprofile')
+        with open(profile_path, 'w') as f:
+            json.dump(profile, f)
+
+        react = page.evaluate(READ_REACT_STATS)
+        heap = cdp.send('Runtime.getHeapUsage')
+        snapshot_bytes, snapshot_path = self._heap_snapshot(cdp, slug)
+
+        components = sorted(react['components'].items(), key=lambda kv: kv[1], reverse=True)
+        return {
+            'name': name,
+            'url': page.url,
+            'load_ms': round(load_ms, 1),
+            'trace': trace_path,
+            'cpu_profile': profile_path,
+            'heap_used_bytes': heap.get('usedSize'),
+            'heap_total_bytes': heap.get('totalSize'),
+            'heap_snapshot_bytes': snapshot_bytes,
+            'heap_snapshot': snapshot_path,
+            'react_commits': react['commits'],
+            'top_components': [{'component': c, 'renders': n} for c, n in components[:15]],
+            'top_self_time': summarize_cpu_profile(profile),
+        }
+
+    def _heap_snapshot(self, cdp, slug):
+        """Take a heap snapshot, counting its size and optionally writing it out"""
+        path = os.path.join(self.output_dir, f'{slug}.heapsnapshot') if self.keep_heap_snapshots else None
+        out = open(path, 'w') if path else None
+        size = [0]
+
+        def on_chunk(event):
+            size[0] += len(event['chunk'].encode('utf-8'))
+            if out:
+                out.write(event['chunk'])
+
+        cdp.on('HeapProfiler.addHeapSnapshotChunk', on_chunk)
+        try:
+            cdp.send('HeapProfiler.takeHeapSnapshot', {'reportProgress': False})
+        finally:
+            cdp.remove_listener('HeapProfiler.addHeapSnapshotChunk', on_chunk)
+            if out:
+                out.close()
+        return size[0], path
+
+    def close(self):
+        """Stop tracing and write summary.json / summary.md; returns the summary path"""
+        self.context.tracing.stop()
+        with open(os.path.join(self.output_dir, 'summary.json'), 'w') as f:
+            json.dump({'threshold_ms': self.threshold_ms, 'slow_pages': self.results}, f, indent=2)
+
+        lines = ['# Slow Page Profiles', '',
+                 f'Threshold: {self.threshold_ms}ms - {len(self.results)} slow page(s)']
+        for r in sorted(self.results, key=lambda r: r['load_ms'], reverse=True):
+            lines += ['', f"## {r['name']} - {r['load_ms']:.0f}ms", '',
+                      f"- URL: {r['url']}",
+                      f"- Heap used: {r['heap_used_bytes'] / 1e6:.1f} MB, "
+                      f"snapshot {r['heap_snapshot_bytes'] / 1e6:.1f} MB",
+                      f"- React commits: {r['react_commits']}",
+                      f"- Trace: `npx playwright show-trace {r['trace']}`",
+                      f"- CPU profile: {r['cpu_profile']}",
+                      '', '| Self time | % | Function | Source |', '|---:|---:|---|---|']
+            for fn in r['top_self_time']:
+                source = f"{os.path.basename(fn['url'])}:{fn['line']}" if fn['url'] else ''
+                lines.append(f"| {fn['self_ms']:.1f}ms | {fn['self_pct']}% | `{fn['function']}` | {source} |")
+            lines += ['', '| Component | Renders |', '|---|---:|']
+            for c in r['top_components']:
+                lines.append(f"| `{c['component']}` | {c['renders']} |")
+
+        path = os.path.join(self.output_dir, 'summary.md')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        print(f'\n🐢 {len(self.results)} slow page profile(s) saved to: {self.output_dir}')
+        return path
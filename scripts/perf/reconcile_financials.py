@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Cross-source financial reconciliation: every reported revenue, expense and collection figure recomputed from raw rows.
+
+Finance reads revenue in four places that should agree: the Analytics
+dashboard (GL 4010 by entry date), GET /api/financial/summary (GL revenue and
+expense accounts, COD transactions, open agent collections), the P&L (every
+revenue and expense account) and the GL 4010 ledger itself. The
+FinancialModuleTester in scripts/test_financial_module.py only scrapes a few
+of those numbers off the page. This tool pulls the underlying rows through the
+same API the UI uses and recomputes each figure with pandas groupbys:
+
+    orders        GET /api/orders, --window-days createdAt windows so OFFSET
+                  stays shallow, pages fetched concurrently; from
+                  --lookback-days before --start so orders created earlier
+                  but delivered inside the range are included
+    ledger        GET /api/gl/accounts/:id/ledger for every revenue and
+                  expense account, windowed by entry date; the 4010 CSV
+                  export is pulled too and diffed against every 4010 line
+                  in the pages, voided ones included (the export keeps them)
+    collections   GET /api/agent-reconciliation, windowed by collection date
+    cod           GET /api/financial/cod-collections (no date filter, all pages)
+    reported      dashboard, sales-trends, agent-performance, summary, P&L,
+                  daily reports and agent balances for --start..--end
+
+Comparisons (per scope: total, day, agent or account):
+
+    dashboard / summary / P&L revenue vs ledger 4010 net credit
+    summary expenses and P&L per account vs ledger balances per account
+    ledger 4010 credits per day vs delivered order totals per delivery day
+    daily financial reports and sales-trends vs order totals per day
+    dashboard delivered count, agent-performance completed per agent,
+    summary COD collected and outstanding receivables vs the raw rows
+    agent balances: current = collected - deposited, and with
+    --history-start, collected = every collection streamed for the agent
+
+Every endpoint gets the same plain YYYY-MM-DD range the UI sends; the raw rows
+are bucketed by UTC day with the range inclusive of --end, so an endpoint that
+treats --end as midnight shows up as a last-day mismatch. Mismatches above
+--tolerance are written to a CSV next to the JSON results. Stream rate and the
+time the vectorized stage takes are reported per source.
+
+Needs numpy and pandas. Run the backend with NODE_ENV=development: millions of
+rows at 100 per page is far beyond apiLimiter's production 500 per 15 min.
+Stop writes while it runs; OFFSET pages shift under inserts.
+
+Usage:
+    python scripts/perf/reconcile_financials.py --start 2026-09-01 --end 2026-09-30
+    python scripts/perf/reconcile_financials.py --start 2026-01-01 --end 2026-06-30 --workers 16 --window-days 3
+    python scripts/perf/reconcile_financials.py --history-start 2024-01-01 --tolerance 0.05
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from perf_common import (
+    API_URL, RESULTS_DIR, LatencyStats, login, new_session, print_checks, print_header, print_latency_table,
+    run_concurrent, save_results, timed_request,
+)
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # reported from main() so --help works without them
+    np = pd = None
+
+PRODUCT_REVENUE = '4010'
+# financialService.getFinancialSummary's expense codes; the P&L also counts 5060
+SUMMARY_EXPENSE_CODES = ('5010', '5020', '5030', '5040', '5050', '5100')
+RECOGNIZED_STATUSES = ('delivered', 'returned')
+COLLECTED_TX_STATUSES = ('collected', 'deposited', 'reconciled')
+OPEN_COLLECTION_STATUSES = ('draft', 'verified', 'approved', 'deposited')
+
+ORDER_COLUMNS = ('id', 'status', 'total', 'cod', 'agent_id', 'created_at', 'delivery_date')
+LEDGER_COLUMNS = ('id', 'code', 'entry_date', 'debit', 'credit', 'voided', 'source')
+COLLECTION_COLUMNS = ('id', 'agent_id', 'order_id', 'amount', 'status', 'collection_date')
+COD_COLUMNS = ('id', 'agent_id', 'amount', 'status', 'created_at')
+
+
+def order_row(o):
+    return (o['id'], o['status'], o['totalAmount'], o.get('codAmount'), o.get('deliveryAgentId'), o['createdAt'],
+            o.get('deliveryDate'))
+
+
+def ledger_row(code):
+    def row(t):
+        entry = t['journalEntry']
+        return (t['id'], code, entry['entryDate'], t['debitAmount'], t['creditAmount'], entry['isVoided'],
+                entry['sourceType'])
+    return row
+
+
+def collection_row(c):
+    return (c['id'], c['agentId'], c['orderId'], c['amount'], c['status'], c['collectionDate'])
+
+
+def cod_row(t):
+    agent = (t.get('order') or {}).get('deliveryAgent') or {}
+    return (t['id'], agent.get('id'), t['amount'], t['status'], t['createdAt'])
+
+
+def day_windows(first, last, days):
+    """Inclusive [lo, hi] date windows covering first..last"""
+    lo = first
+    while lo <= last:
+        hi = min(lo + timedelta(days=days - 1), last)
+        yield lo, hi
+        lo = hi + timedelta(days=1)
+
+
+def day_bounds(lo, hi):
+    return {'startDate': f'{lo.isoformat()}T00:00:00.000Z', 'endDate': f'{hi.isoformat()}T23:59:59.999Z'}
+
+
+class Streamer:
+    """Pulls every row of a paginated or windowed endpoint, converting rows to tuples on the fetching thread"""
+
+    def __init__(self, session, workers):
+        self.session = session
+        self.workers = workers
+        self.stats = {}
+        self.sources = {}
+
+    def get(self, name, path, params=None):
+        stats = self.stats.setdefault(name, LatencyStats(name))
+        resp, ms, err = timed_request(self.session, 'GET', path, params=params)
+        stats.record_response(resp, ms, err, ok_statuses=(200,))
+        if err or resp.status_code != 200:
+            raise SystemExit(f'GET {path} {params or ""} failed: {err or f"{resp.status_code} {resp.text[:200]}"}')
+        return resp
+
+    def paged(self, name, path, params, key, convert, limit=100):
+        """Every page of one query; returns (rows, total the endpoint reported)"""
+        first = self.get(name, path, {**params, 'page': 1, 'limit': limit}).json()
+
+        def page(n):
+            return [convert(r) for r in self.get(name, path, {**params, 'page': n, 'limit': limit}).json()[key]]
+
+        rows = [convert(r) for r in first[key]]
+        for chunk in run_concurrent(page, range(2, first['pagination']['pages'] + 1), self.workers):
+            rows.extend(chunk)
+        return rows, first['pagination']['total']
+
+    def frame(self, name, columns, chunks):
+        """Collect (rows, expected) chunks into a DataFrame, recording rate and paging integrity"""
+        start = time.perf_counter()
+        rows, expected = [], 0
+        for chunk, total in chunks:
+            rows.extend(chunk)
+            expected += total
+            print(f'  {name}: {len(rows):,} rows', end='\r', flush=True)
+        elapsed = time.perf_counter() - start
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        unique = df['id'].nunique() if len(df) else 0
+        self.sources[name] = {'rows': len(df), 'expected': expected, 'duplicates': len(df) - unique,
+                              'missing': max(expected - unique, 0), 'fetch_s': round(elapsed, 2),
+                              'rows_per_s': round(len(df) / elapsed) if elapsed else 0}
+        print(f'  {name}: {len(df):,} rows in {elapsed:.1f}s ({self.sources[name]["rows_per_s"]:,}/s), '
+              f'{self.sources[name]["duplicates"]:,} duplicate(s), {self.sources[name]["missing"]:,} missing')
+        return df.drop_duplicates('id')
+
+
+def load_accounts(streamer):
+    rows, _ = streamer.paged('gl accounts', '/api/gl/accounts', {}, 'accounts',
+                             lambda a: (a['id'], a['code'], a['accountType'], a['normalBalance'], a['isActive']))
+    return pd.DataFrame.from_records(rows, columns=('id', 'code', 'type', 'normal', 'active')).set_index('code')
+
+
+def load_reported(streamer, start, end):
+    """Figures exactly as the UI requests them: the same plain dates for every endpoint"""
+    plain = {'startDate': start.isoformat(), 'endDate': end.isoformat()}
+    cache_bust = {'_cb': str(time.time_ns())}
+    return {
+        'dashboard': streamer.get('dashboard', '/api/analytics/dashboard', {**plain, **cache_bust}).json()['metrics'],
+        'sales_trends': streamer.get('sales-trends', '/api/analytics/sales-trends',
+                                     {**plain, 'period': 'daily', **cache_bust}).json()['trends'],
+        'agent_performance': streamer.get('agent-performance', '/api/analytics/agent-performance',
+                                          {**plain, **cache_bust}).json()['performance'],
+        'summary': streamer.get('summary', '/api/financial/summary', plain).json()['summary'],
+        'profit_loss': streamer.get('profit-loss', '/api/financial/profit-loss', plain).json(),
+        'reports': streamer.get('reports', '/api/financial/reports', {**plain, 'period': 'daily'}).json()['reports'],
+        'agent_balances': streamer.get('agent balances', '/api/agent-reconciliation/agents/balances').json(),
+    }
+
+
+def load_raw(streamer, accounts, args, start, end):
+    orders_from = start - timedelta(days=args.lookback_days)
+    orders = streamer.frame('orders', ORDER_COLUMNS, (
+        streamer.paged('orders', '/api/orders', day_bounds(lo, hi), 'orders', order_row)
+        for lo, hi in day_windows(orders_from, end, args.window_days)))
+
+    ledger_accounts = accounts[accounts['type'].isin(['revenue', 'expense'])]
+    ledger = streamer.frame('ledger lines', LEDGER_COLUMNS, (
+        streamer.paged('ledger', f'/api/gl/accounts/{account_id}/ledger', day_bounds(lo, hi), 'transactions',
+                       ledger_row(code))
+        for code, account_id in ledger_accounts['id'].items()
+        for lo, hi in day_windows(start, end, args.window_days)))
+
+    collections_from = args.history_start or orders_from
+
+    def collection_window(lo, hi):
+        rows = [collection_row(c) for c in streamer.get('collections', '/api/agent-reconciliation',
+                                                         day_bounds(lo, hi)).json()]
+        return rows, len(rows)
+
+    collections = streamer.frame('collections', COLLECTION_COLUMNS, (
+        collection_window(lo, hi) for lo, hi in day_windows(collections_from, end, args.window_days)))
+    cod = streamer.frame('cod transactions', COD_COLUMNS, [
+        streamer.paged('cod collections', '/api/financial/cod-collections', {}, 'collections', cod_row)])
+
+    export_start = time.perf_counter()
+    export = streamer.get('ledger export', f"/api/gl/accounts/{accounts.loc[PRODUCT_REVENUE, 'id']}/ledger/export",
+                          day_bounds(start, end))
+    export_df = pd.read_csv(io.StringIO(export.text)) if export.text.strip() else pd.DataFrame(
+        columns=['Debit', 'Credit'])
+    streamer.sources['ledger export 4010'] = {'rows': len(export_df), 'fetch_s': round(time.perf_counter() -
+                                                                                        export_start, 2)}
+    return orders, ledger, collections, cod, export_df
+
+
+def normalize(orders, ledger, collections, cod):
+    """Vectorized typing: amounts to float64, timestamps to UTC day strings"""
+    for df, cols in ((orders, ('total', 'cod')), (ledger, ('debit', 'credit')), (collections, ('amount',)),
+                     (cod, ('amount',))):
+        for col in cols:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype(np.float64)
+    for df in (orders, cod):
+        df['agent_id'] = pd.to_numeric(df['agent_id']).astype('Int64')
+    orders['created_day'] = orders['created_at'].str[:10]
+    orders['delivery_day'] = orders['delivery_date'].str[:10]
+    ledger['day'] = ledger['entry_date'].str[:10]
+    ledger['voided'] = ledger['voided'].astype(bool)
+    collections['day'] = collections['collection_date'].str[:10]
+    cod['day'] = cod['created_at'].str[:10]
+
+
+def series(items, key, value):
+    return pd.Series({item[key]: float(item[value] or 0) for item in items}, dtype=np.float64)
+
+
+def scalar(value):
+    return pd.Series({'total': float(value or 0)}, dtype=np.float64)
+
+
+def compare(results, check, scope, reported, computed, tolerance):
+    """Outer-join a reported and a recomputed Series on their keys and keep rows that differ"""
+    both = pd.concat({'reported': reported, 'computed': computed}, axis=1).fillna(0.0)
+    both['diff'] = both['reported'] - both['computed']
+    bad = both[both['diff'].abs() > tolerance]
+    results['summary'].append({
+        'check': check, 'scope': scope, 'keys': len(both), 'mismatched': len(bad),
+        'reported_total': round(float(both['reported'].sum()), 2),
+        'computed_total': round(float(both['computed'].sum()), 2),
+        'max_abs_diff': round(float(both['diff'].abs().max()), 2) if len(both) else 0.0,
+    })
+    if len(bad):
+        frame = bad.rename_axis('key').reset_index()
+        frame.insert(0, 'check', check)
+        results['mismatches'].append(frame)
+
+
+def reconcile(reported, accounts, orders, ledger, collections, cod, export_df, args, start, end):
+    lo, hi = start.isoformat(), end.isoformat()
+    results = {'summary': [], 'mismatches': []}
+    tol = args.tolerance
+
+    live = ledger[~ledger['voided'] & ledger['day'].between(lo, hi)]
+    sign = np.where(live['code'].map(accounts['normal']).to_numpy() == 'debit', 1.0, -1.0)
+    balances = pd.Series(sign * (live['debit'].to_numpy() - live['credit'].to_numpy()), index=live.index) \
+        .groupby(live['code']).sum()
+    revenue = live[live['code'] == PRODUCT_REVENUE]
+    revenue_net = float(revenue['credit'].sum() - revenue['debit'].sum())
+
+    dashboard, summary, pl = reported['dashboard'], reported['summary'], reported['profit_loss']
+    compare(results, 'dashboard totalRevenue vs ledger 4010', 'total', scalar(dashboard['totalRevenue']),
+            scalar(revenue_net), tol)
+    compare(results, 'summary totalRevenue vs ledger 4010', 'total', scalar(summary['totalRevenue']),
+            scalar(revenue_net), tol)
+    compare(results, 'summary totalExpenses vs ledger expense accounts', 'total', scalar(summary['totalExpenses']),
+            scalar(balances.reindex(list(SUMMARY_EXPENSE_CODES)).fillna(0.0).sum()), tol)
+    pl_accounts = pd.Series({a['code']: float(a['balance']) for part in ('revenue', 'cogs', 'expenses')
+                             for a in pl[part]['accounts']}, dtype=np.float64)
+    compare(results, 'P&L account balances vs ledger', 'account', pl_accounts,
+            balances.reindex(pl_accounts.index).fillna(0.0), tol)
+    compare(results, 'P&L revenue total vs ledger 4010', 'total', scalar(pl_accounts.get(PRODUCT_REVENUE, 0.0)),
+            scalar(revenue_net), tol)
+
+    recognized = orders[orders['status'].isin(RECOGNIZED_STATUSES) & orders['delivery_day'].between(lo, hi)]
+    compare(results, 'ledger 4010 credits vs delivered order totals', 'day',
+            revenue.groupby('day')['credit'].sum(), recognized.groupby('delivery_day')['total'].sum(), tol)
+    compare(results, 'daily reports revenue vs ledger 4010 credits', 'day',
+            series(reported['reports'], 'date', 'revenue'), revenue.groupby('day')['credit'].sum(), tol)
+    created = orders[orders['created_day'].between(lo, hi)]
+    compare(results, 'sales-trends revenue vs orders created', 'day',
+            series(reported['sales_trends'], 'date', 'revenue'), created.groupby('created_day')['total'].sum(), tol)
+    delivered_now = orders[(orders['status'] == 'delivered') & orders['delivery_day'].between(lo, hi)]
+    compare(results, 'dashboard deliveredOrders vs orders', 'total', scalar(dashboard['deliveredOrders']),
+            scalar(len(delivered_now)), 0)
+    completed = created[created['status'] == 'delivered'].groupby('agent_id').size().astype(np.float64)
+    compare(results, 'agent-performance completed vs orders', 'agent',
+            series(reported['agent_performance'], 'userId', 'completed'), completed, 0)
+
+    cod_in_range = cod[cod['status'].isin(COLLECTED_TX_STATUSES) & cod['day'].between(lo, hi)]
+    compare(results, 'summary codCollected vs COD transactions', 'total', scalar(summary['codCollected']),
+            scalar(cod_in_range['amount'].sum()), tol)
+    compare(results, 'summary outstandingReceivables vs open collections', 'total',
+            scalar(summary['outstandingReceivables']),
+            scalar(collections.loc[collections['status'].isin(OPEN_COLLECTION_STATUSES), 'amount'].sum()), tol)
+
+    delivered_cod = recognized[recognized['status'] == 'delivered'].groupby('agent_id')['total'].sum()
+    collected = collections[collections['order_id'].isin(recognized['id'])].groupby('agent_id')['amount'].sum()
+    compare(results, 'agent collections vs delivered order totals', 'agent', collected, delivered_cod, tol)
+    balances_df = pd.DataFrame.from_records(
+        [(b['agentId'], b['totalCollected'], b['totalDeposited'], b['currentBalance'])
+         for b in reported['agent_balances']], columns=('agent_id', 'collected', 'deposited', 'current'))
+    balances_df = balances_df.set_index('agent_id').apply(pd.to_numeric).astype(np.float64)
+    compare(results, 'agent currentBalance vs collected - deposited', 'agent', balances_df['current'],
+            balances_df['collected'] - balances_df['deposited'], tol)
+    if args.history_start:
+        compare(results, 'agent totalCollected vs all collections', 'agent', balances_df['collected'],
+                collections.groupby('agent_id')['amount'].sum(), tol)
+
+    # exportAccountLedgerToCSV does not filter isVoided, so it is checked against every line, not revenue_net
+    all_revenue = ledger[(ledger['code'] == PRODUCT_REVENUE) & ledger['day'].between(lo, hi)]
+    export_net = float(pd.to_numeric(export_df['Credit']).sum() - pd.to_numeric(export_df['Debit']).sum())
+    compare(results, 'ledger 4010 CSV export vs pages (voided included)', 'total', scalar(export_net),
+            scalar(all_revenue['credit'].sum() - all_revenue['debit'].sum()), tol)
+    results['export_rows'] = len(export_df)
+    results['ledger_4010_rows'] = len(all_revenue)
+    return results
+
+
+def main():
+    today = datetime.utcnow().date()
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--start', type=date.fromisoformat, default=today - timedelta(days=29))
+    parser.add_argument('--end', type=date.fromisoformat, default=today)
+    parser.add_argument('--lookback-days', type=int, default=30,
+                        help='fetch orders created this long before --start (delivered inside the range)')
+    parser.add_argument('--history-start', type=date.fromisoformat,
+                        help='stream collections from here to check agent totalCollected against all of them')
+    parser.add_argument('--window-days', type=int, default=7, help='date window per paged query')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent page fetches')
+    parser.add_argument('--tolerance', type=float, default=0.01, help='allowed absolute difference (GHS)')
+    args = parser.parse_args()
+
+    if pd is None:
+        raise SystemExit('numpy and pandas are required for this tool: pip install numpy pandas')
+    print_header('🧮 Financial Reconciliation', target=API_URL, range=f'{args.start} .. {args.end}',
+                 orders_from=str(args.start - timedelta(days=args.lookback_days)),
+                 collections_from=str(args.history_start or args.start - timedelta(days=args.lookback_days)),
+                 window_days=args.window_days, workers=args.workers, tolerance=args.tolerance)
+
+    streamer = Streamer(new_session(login(), pool_size=args.workers), args.workers)
+
+    print('\n[Phase 1] Reported figures')
+    accounts = load_accounts(streamer)
+    if PRODUCT_REVENUE not in accounts.index:
+        raise SystemExit(f'GL account {PRODUCT_REVENUE} not found; seed the chart of accounts first')
+    reported = load_reported(streamer, args.start, args.end)
+    print(f"  dashboard revenue {reported['dashboard']['totalRevenue']:,.2f}, "
+          f"summary revenue {reported['summary']['totalRevenue']:,.2f}, "
+          f"P&L revenue {reported['profit_loss']['revenue']['total']:,.2f}")
+
+    print('\n[Phase 2] Streaming raw rows')
+    orders, ledger, collections, cod, export_df = load_raw(streamer, accounts, args, args.start, args.end)
+
+    print('\n[Phase 3] Vectorized recompute')
+    start = time.perf_counter()
+    normalize(orders, ledger, collections, cod)
+    results = reconcile(reported, accounts, orders, ledger, collections, cod, export_df, args, args.start, args.end)
+    compute_s = time.perf_counter() - start
+    rows = len(orders) + len(ledger) + len(collections) + len(cod)
+    print(f'  {rows:,} rows reconciled in {compute_s:.2f}s ({rows / compute_s if compute_s else 0:,.0f} rows/s)')
+
+    print(f"\n  {'check':<56}{'scope':>8}{'keys':>7}{'bad':>6}{'reported':>16}{'computed':>16}")
+    for s in results['summary']:
+        print(f"  {s['check'][:55]:<56}{s['scope']:>8}{s['keys']:>7}{s['mismatched']:>6}"
+              f"{s['reported_total']:>16,.2f}{s['computed_total']:>16,.2f}")
+    print_latency_table([s.summary() for s in streamer.stats.values()])
+
+    mismatch_path = None
+    if results['mismatches']:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        mismatch_path = os.path.join(RESULTS_DIR, f"financial-reconcile-mismatches-{datetime.now():%Y%m%d-%H%M%S}.csv")
+        pd.concat(results['mismatches'], ignore_index=True).to_csv(mismatch_path, index=False)
+        print(f'\n  Mismatch rows written to {mismatch_path}')
+
+    paged = {k: v for k, v in streamer.sources.items() if 'expected' in v}
+    checks = [(f"{s['check']} ({s['mismatched']} of {s['keys']} {s['scope']} keys differ)", s['mismatched'] == 0)
+              for s in results['summary']]
+    checks += [
+        ('Paged streams returned every row exactly once',
+         all(v['duplicates'] == 0 and v['missing'] == 0 for v in paged.values())),
+        (f"Ledger 4010 export has every line ({results['export_rows']:,} vs {results['ledger_4010_rows']:,})",
+         results['export_rows'] == results['ledger_4010_rows']),
+    ]
+    passed = print_checks(checks)
+
+    save_results('financial-reconcile', {
+        'timestamp': datetime.now().isoformat(),
+        'api_url': API_URL,
+        'settings': {**vars(args), 'start': str(args.start), 'end': str(args.end),
+                     'history_start': str(args.history_start) if args.history_start else None},
+        'sources': streamer.sources,
+        'compute_s': round(compute_s, 3),
+        'comparisons': results['summary'],
+        'mismatch_csv': mismatch_path,
+        'latency': [s.summary() for s in streamer.stats.values()],
+        'passed': passed,
+    })
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
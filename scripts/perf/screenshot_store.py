@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Content-addressed screenshot store with perceptual diffing.
+
+test_pages.py, qa-recon.py, qa-tests.py and FinancialModuleTester
+(scripts/test_financial_module.py) use this when started with
+--screenshot-store; captures already sitting in /tmp can be folded in with the
+`ingest` command. Each frame is keyed by name and viewport ("financial-overview@1280x720") and compared with
+the last baseline kept for that key:
+
+  - identical bytes (SHA-256) are dropped without decoding
+  - otherwise the frame is decoded once to grayscale, a 64-bit DCT perceptual
+    hash is taken from a 32x32 thumbnail, and a grid of mean luminance per
+    --tile pixels is diffed against the baseline's grid. Tiles that moved more
+    than --pixel-threshold levels are grouped into connected regions; regions
+    smaller than --min-region-tiles (a blinking cursor, a clock) are ignored
+  - frames with no significant region and a hash within --phash-threshold bits
+    count as unchanged and are not written
+  - changed frames are stored under objects/<sha[:2]>/<sha>.png, become the new
+    baseline, and get a half-scale preview with the regions outlined under
+    diffs/<sha>.png
+
+Only the current frame is ever held in memory; baselines are represented by
+their hash and tile grid (grids/<sha>.npy, a few KB). close() prunes every key
+to its last --keep frames so the store stays bounded however often the
+scripts run.
+
+Needs numpy and Pillow (pip install numpy pillow).
+
+Usage:
+    python test_pages.py --screenshot-store /tmp/screenshot-store
+    python scripts/test_financial_module.py --screenshot-store /tmp/screenshot-store
+    python qa-recon.py --screenshot-store /tmp/screenshot-store
+    python scripts/perf/screenshot_store.py ingest /tmp/qa-screenshots/*.png /tmp/financial_*.png --remove
+    python scripts/perf/screenshot_store.py status
+    python scripts/perf/screenshot_store.py prune --keep 1
+"""
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+try:
+    import numpy as np
+    from PIL import Image, ImageDraw
+except ImportError:  # reported when a store is opened so --help works without them
+    np = Image = ImageDraw = None
+
+DEFAULT_STORE_DIR = '/tmp/screenshot-store'
+HASH_SIZE = 32  # thumbnail side for the DCT; the top-left 8x8 coefficients form the hash
+
+
+def slugify(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'frame'
+
+
+def perceptual_hash(gray):
+    """64-bit DCT hash of a grayscale image, as 16 hex digits"""
+    small = np.asarray(gray.resize((HASH_SIZE, HASH_SIZE), Image.BOX), dtype=np.float64)
+    n = np.arange(HASH_SIZE)
+    dct = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * HASH_SIZE))
+    low = (dct @ small @ dct.T)[:8, :8].ravel()
+    bits = low > np.median(low[1:])  # the DC term only tracks overall brightness
+    return np.packbits(bits).tobytes().hex()
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def changed_regions(old, new, pixel_threshold, min_tiles):
+    """
+    Connected groups of tiles whose mean luminance moved by more than the
+    threshold, as (row0, col0, row1, col1) tile boxes with their tile counts.
+    Rows a taller frame gained count as changed; rows it lost are reported by
+    the caller as a resize.
+    """
+    rows, cols = min(old.shape[0], new.shape[0]), min(old.shape[1], new.shape[1])
+    mask = np.ones(new.shape, dtype=bool)
+    mask[:rows, :cols] = np.abs(old[:rows, :cols].astype(np.int16) - new[:rows, :cols]) > pixel_threshold
+    seen = np.zeros_like(mask)
+    regions = []
+    for r, c in np.argwhere(mask):
+        if seen[r, c]:
+            continue
+        seen[r, c] = True
+        stack, tiles, box = [(r, c)], 0, [r, c, r, c]
+        while stack:
+            y, x = stack.pop()
+            tiles += 1
+            box = [min(box[0], y), min(box[1], x), max(box[2], y), max(box[3], x)]
+            for ny in (y - 1, y, y + 1):
+                for nx in (x - 1, x, x + 1):
+                    if 0 <= ny < mask.shape[0] and 0 <= nx < mask.shape[1] and mask[ny, nx] and not seen[ny, nx]:
+                        seen[ny, nx] = True
+                        stack.append((ny, nx))
+        if tiles >= min_tiles:
+            regions.append((box, tiles))
+    return regions
+
+
+class ScreenshotStore:
+    """Keeps only screenshots that changed, diffing each against its key's last baseline"""
+
+    def __init__(self, root=DEFAULT_STORE_DIR, tile=16, pixel_threshold=24, min_region_tiles=4, phash_threshold=6,
+                 keep=3):
+        if np is None:
+            raise SystemExit('numpy and Pillow are required for the screenshot store: pip install numpy pillow')
+        self.root = root
+        self.tile = tile
+        self.pixel_threshold = pixel_threshold
+        self.min_region_tiles = min_region_tiles
+        self.phash_threshold = phash_threshold
+        self.keep = keep
+        self.results = []
+        for sub in ('objects', 'grids', 'diffs'):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+        self.index_path = os.path.join(root, 'index.json')
+        self.index = {'frames': {}}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+
+    def object_path(self, sha):
+        return os.path.join(self.root, 'objects', sha[:2], f'{sha}.png')
+
+    def _grid_path(self, sha):
+        return os.path.join(self.root, 'grids', f'{sha}.npy')
+
+    def _diff_path(self, sha):
+        return os.path.join(self.root, 'diffs', f'{sha}.png')
+
+    def _save_index(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def capture(self, page, name, full_page=True, mask=None):
+        """Screenshot a Playwright page into the store; `mask` locators (clocks, avatars) are blanked first"""
+        viewport = page.viewport_size
+        png = page.screenshot(full_page=full_page, mask=mask or [], animations='disabled')
+        return self.add(name, png, f"{viewport['width']}x{viewport['height']}" if viewport else None)
+
+    def add(self, name, png, viewport=None):
+        """Compare PNG bytes with the key's baseline, storing them only if they changed"""
+        key = f'{slugify(name)}@{viewport}' if viewport else slugify(name)
+        sha = hashlib.sha256(png).hexdigest()
+        entry = self.index['frames'].get(key)
+        result = {'key': key, 'sha256': sha, 'phash_distance': 0, 'changed_pct': 0.0, 'regions': [],
+                  'diff': None}
+        if entry and entry['baseline'] == sha:
+            return self._record(result, 'identical', self.object_path(sha))
+
+        with Image.open(io.BytesIO(png)) as img:
+            size = img.size
+            gray = img.convert('L')
+        frame_hash = perceptual_hash(gray)
+        grid = np.asarray(gray.reduce(self.tile), dtype=np.uint8)
+        del gray
+
+        status = 'new'
+        if entry:
+            old = np.load(self._grid_path(entry['baseline']))
+            regions = changed_regions(old, grid, self.pixel_threshold, self.min_region_tiles)
+            resized = tuple(entry['size']) != size
+            distance = hamming(entry['phash'], frame_hash)
+            result.update(
+                phash_distance=distance,
+                changed_pct=round(100 * sum(tiles for _, tiles in regions) / grid.size, 2),
+                regions=[self._pixel_box(box) for box, _ in regions],
+            )
+            if not regions and not resized and distance <= self.phash_threshold:
+                return self._record(result, 'unchanged', self.object_path(entry['baseline']))
+            status = 'changed'
+
+        path = self.object_path(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(png)
+            np.save(self._grid_path(sha), grid)
+        if result['regions']:
+            result['diff'] = self._write_diff(png, sha, result['regions'])
+        history = (entry or {}).get('history', []) + [sha]
+        self.index['frames'][key] = {'baseline': sha, 'phash': frame_hash, 'size': list(size), 'history': history,
+                                     'updated': datetime.now().isoformat()}
+        self._save_index()
+        return self._record(result, status, path)
+
+    def _pixel_box(self, box):
+        r0, c0, r1, c1 = (int(v) for v in box)
+        return {'x': c0 * self.tile, 'y': r0 * self.tile,
+                'width': (c1 - c0 + 1) * self.tile, 'height': (r1 - r0 + 1) * self.tile}
+
+    def _write_diff(self, png, sha, regions):
+        """Half-scale preview of the new frame with the changed regions outlined"""
+        with Image.open(io.BytesIO(png)) as img:
+            preview = img.convert('RGB').reduce(2)
+        draw = ImageDraw.Draw(preview)
+        for r in regions:
+            draw.rectangle([r['x'] // 2, r['y'] // 2, (r['x'] + r['width']) // 2, (r['y'] + r['height']) // 2],
+                           outline=(220, 38, 38), width=3)
+        path = self._diff_path(sha)
+        preview.save(path, optimize=True)
+        return path
+
+    def _record(self, result, status, path):
+        result.update(status=status, path=path)
+        self.results.append(result)
+        marker = {'new': '🆕', 'changed': '🔶', 'unchanged': '✅', 'identical': '✅'}[status]
+        detail = f", {len(result['regions'])} region(s), {result['changed_pct']}% of tiles" if status == 'changed' \
+            else ''
+        print(f"  {marker} {result['key']}: {status}{detail}")
+        return result
+
+    def prune(self, keep=None):
+        """Keep the last `keep` frames per key; returns (files removed, bytes freed)"""
+        keep = self.keep if keep is None else keep
+        live = set()
+        for entry in self.index['frames'].values():
+            entry['history'] = entry['history'][-max(keep, 1):]
+            live.update(entry['history'])
+        self._save_index()
+        removed = freed = 0
+        pattern = os.path.join(self.root, '*', '**', '*.*')
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.basename(path).split('.')[0] not in live:
+                freed += os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+        return removed, freed
+
+    def disk_usage(self):
+        return sum(os.path.getsize(p) for p in glob.glob(os.path.join(self.root, '*', '**', '*.*'), recursive=True))
+
+    def close(self):
+        """Prune, write last-run.json and print a summary; returns the results"""
+        removed, freed = self.prune()
+        counts = {}
+        for r in self.results:
+            counts[r['status']] = counts.get(r['status'], 0) + 1
+        with open(os.path.join(self.root, 'last-run.json'), 'w') as f:
+            json.dump({'timestamp': datetime.now().isoformat(), 'counts': counts, 'frames': self.results}, f,
+                      indent=2)
+        breakdown = ', '.join(f'{n} {status}' for status, n in sorted(counts.items()))
+        print(f'\n🖼️  {len(self.results)} screenshot(s): {breakdown}; pruned {removed} file(s) '
+              f'({freed / 1e6:.1f} MB), store {self.disk_usage() / 1e6:.1f} MB at {self.root}')
+        for r in self.results:
+            if r['diff']:
+                print(f"  🔶 {r['key']}: {r['diff']}")
+        return self.results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+    ingest = sub.add_parser('ingest', help='add PNG files, keyed by file name')
+    ingest.add_argument('paths', nargs='+')
+    ingest.add_argument('--viewport', help='viewport label for the keys, e.g. 1280x720')
+    ingest.add_argument('--remove', action='store_true', help='delete each file once it is in the store')
+    ingest.add_argument('--fail-on-change', action='store_true', help='exit 1 if any frame changed')
+    ingest.add_argument('--tile', type=int, default=16, help='diff grid cell size in pixels')
+    ingest.add_argument('--pixel-threshold', type=int, default=24, help='luminance change (0-255) that marks a tile')
+    ingest.add_argument('--min-region-tiles', type=int, default=4, help='smallest region that is reported')
+    ingest.add_argument('--phash-threshold', type=int, default=6, help='hash bits that may differ when unchanged')
+    ingest.add_argument('--keep', type=int, default=3, help='frames kept per key')
+    sub.add_parser('status', help='list keys, their baselines and disk usage')
+    prune = sub.add_parser('prune', help='drop all but the last frames per key')
+    prune.add_argument('--keep', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        store = ScreenshotStore(args.store, tile=args.tile, pixel_threshold=args.pixel_threshold,
+                                min_region_tiles=args.min_region_tiles, phash_threshold=args.phash_threshold,
+                                keep=args.keep)
+        for path in args.paths:
+            with open(path, 'rb') as f:
+                store.add(os.path.splitext(os.path.basename(path))[0], f.read(), args.viewport)
+            if args.remove:
+                os.remove(path)
+        results = store.close()
+        if args.fail_on_change and any(r['status'] == 'changed' for r in results):
+            sys.exit(1)
+    elif args.command == 'prune':
+        removed, freed = ScreenshotStore(args.store).prune(args.keep)
+        print(f'Removed {removed} file(s), {freed / 1e6:.1f} MB')
+    else:
+        store = ScreenshotStore(args.store)
+        frames = store.index['frames']
+        print(f"{'key':<48}{'frames':>7}  {'size':<12}updated")
+        for key, entry in sorted(frames.items()):
+            print(f"{key:<48}{len(entry['history']):>7}  {'x'.join(map(str, entry['size'])):<12}{entry['updated']}")
+        print(f'\n{len(frames)} key(s), {store.disk_usage() / 1e6:.1f} MB at {store.root}')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,15 +3,30 @@
 Comprehensive Financial Module Testing Script
 Tests all 8 tabs: General Ledger, Overview, Cash Flow, Agent Reconciliation,
 Agent Aging, Expense Management, Profitability Analysis, Financial Statements
+
+Pass --profile to keep a Playwright trace, CPU profile, heap snapshot size and
+React render counts for every tab slower than --profile-threshold-ms
+(see scripts/perf/page_profiler.py).
+
+Pass --screenshot-store DIR to diff each tab's screenshot against the previous
+run and keep only the ones that changed (see scripts/perf/screenshot_store.py).
 """
 
 from playwright.sync_api import sync_playwright, Page
+from contextlib import nullcontext
+import argparse
 import json
+import os
+import sys
 import time
 from datetime import datetime
 
 class FinancialModuleTester:
-    def __init__(self):
+    def __init__(self, profile_threshold_ms=None, screenshot_store=None):
+        self.profile_threshold_ms = profile_threshold_ms
+        self.profiler = None
+        self.screenshot_store = screenshot_store
+        self.store = None
         self.test_results = {
             "timestamp": datetime.now().isoformat(),
             "tabs_tested": [],
@@ -22,6 +37,16 @@ class FinancialModuleTester:
             "summary": {}
         }
 
+    def screenshot(self, page: Page, name: str):
+        """Full-page screenshot to /tmp, or into the screenshot store (kept only if it changed)"""
+        if self.store:
+            screenshot_path = self.store.capture(page, f'financial-{name}')['path']
+        else:
+            screenshot_path = f'/tmp/financial_{name}.png'
+            page.screenshot(path=screenshot_path, full_page=True)
+            print(f"📸 Screenshot saved: {screenshot_path}")
+        self.test_results["screenshots"].append(screenshot_path)
+
     def login(self, page: Page):
         """Login as admin user"""
         print("🔐 Logging in as admin@codadmin.com...")
@@ -44,11 +69,27 @@ class FinancialModuleTester:
     def navigate_to_financial(self, page: Page):
         """Navigate to Financial page"""
         print("📊 Navigating to Financial module...")
-        page.goto('http://localhost:5173/financial')
-        page.wait_for_load_state('networkidle')
-        time.sleep(2)  # Extra wait for charts to render
+        with self.profile(page, "Financial (initial load)") as loaded:
+            page.goto('http://localhost:5173/financial')
+            page.wait_for_load_state('networkidle')
+            loaded()
+            time.sleep(2)  # Extra wait for charts to render
         print("✅ Financial module loaded")
 
+    def profile(self, page: Page, name: str):
+        """Profiling scope when --profile is on, a no-op otherwise"""
+        if self.profiler:
+            return self.profiler.capture(page, name)
+        return nullcontext(lambda: None)
+
+    def open_tab(self, page: Page, label: str, settle_s: float = 1):
+        """Click a Financial tab and give its charts time to render"""
+        with self.profile(page, f"Financial - {label}") as loaded:
+            page.click(f'text={label}')
+            page.wait_for_load_state('networkidle')
+            loaded()
+            time.sleep(settle_s)
+
     def extract_text_safely(self, page: Page, selector: str, default="N/A"):
         """Safely extract text from element"""
         try:
@@ -76,15 +117,10 @@ class FinancialModuleTester:
         print("="*60)
 
         # Click General Ledger tab
-        page.click('text=General Ledger')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
+        self.open_tab(page, 'General Ledger')
 
         # Take screenshot
-        screenshot_path = '/tmp/financial_general_ledger.png'
-        page.screenshot(path=screenshot_path, full_page=True)
-        self.test_results["screenshots"].append(screenshot_path)
-        print(f"📸 Screenshot saved: {screenshot_path}")
+        self.screenshot(page, 'general_ledger')
 
         tab_result = {
             "tab_name": "General Ledger",
@@ -173,15 +209,10 @@ class FinancialModuleTester:
         print("="*60)
 
         # Click Overview tab
-        page.click('text=Overview')
-        page.wait_for_load_state('networkidle')
-        time.sleep(2)  # Wait for charts
+        self.open_tab(page, 'Overview', settle_s=2)
 
         # Take screenshot
-        screenshot_path = '/tmp/financial_overview.png'
-        page.screenshot(path=screenshot_path, full_page=True)
-        self.test_results["screenshots"].append(screenshot_path)
-        print(f"📸 Screenshot saved: {screenshot_path}")
+        self.screenshot(page, 'overview')
 
         tab_result = {
             "tab_name": "Overview",
@@ -253,14 +284,9 @@ class FinancialModuleTester:
         print("💰 Testing Tab 3: CASH FLOW")
         print("="*60)
 
-        page.click('text=Cash Flow')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
+        self.open_tab(page, 'Cash Flow')
 
-        screenshot_path = '/tmp/financial_cash_flow.png'
-        page.screenshot(path=screenshot_path, full_page=True)
-        self.test_results["screenshots"].append(screenshot_path)
-        print(f"📸 Screenshot saved: {screenshot_path}")
+        self.screenshot(page, 'cash_flow')
 
         tab_result = {
             "tab_name": "Cash Flow",
@@ -310,14 +336,9 @@ class FinancialModuleTester:
         print("🤝 Testing Tab 4: AGENT RECONCILIATION")
         print("="*60)
 
-        page.click('text=Agent Reconciliation')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
+        self.open_tab(page, 'Agent Reconciliation')
 
-        screenshot_path = '/tmp/financial_agent_reconciliation.png'
-        page.screenshot(path=screenshot_path, full_page=True)
-        self.test_results["screenshots"].append(screenshot_path)
-        print(f"📸 Screenshot saved: {screenshot_path}")
+        self.screenshot(page, 'agent_reconciliation')
 
         tab_result = {
             "tab_name": "Agent Reconciliation",
@@ -347,14 +368,9 @@ class FinancialModuleTester:
         print("📅 Testing Tab 5: AGENT AGING")
         print("="*60)
 
-        page.click('text=Agent Aging')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
+        self.open_tab(page, 'Agent Aging')
 
-        screenshot_path = '/tmp/financial_agent_aging.png'
-        page.screenshot(path=screenshot_path, full_page=True)
-        self.test_results["screenshots"].append(screenshot_path)
-        print(f"📸 Screenshot saved: {screenshot_path}")
+        self.screenshot(page, 'agent_aging')
 
         tab_result = {
             "tab_name": "Agent Aging",
@@ -384,14 +400,9 @@ class FinancialModuleTester:
         print("💸 Testing Tab 6: EXPENSE MANAGEMENT")
         print("="*60)
 
-        page.click('text=Expense Management')
-        page.wait_for_load_state('networkidle')
-        time.sleep(1)
+        self.open_tab(page, 'Expense Management')
 
-        screenshot_path = '/tmp/financial_expense_management.png'
-        page.screenshot(path=screenshot_path, full_page=True)
-        self.test_results["screenshots"].append(screenshot_path)
-        print(f"📸 Screenshot saved: {screenshot_path}")
+        self.screenshot(page, 'expense_management')
 
         tab_result = {
             "tab_name": "Expense Management",
@@ -436,14 +447,9 @@ class FinancialModuleTester:
         print("📈 Testing Tab 7: PROFITABILITY ANALYSIS")
         print("="*60)
 
-        page.click('text=Profitability Analysis')
-        page.wait_for_load_state('networkidle')
-        time.sleep(2)
+        self.open_tab(page, 'Profitability Analysis', settle_s=2)
 
-        screenshot_path = '/tmp/financial_profitability.png'
-        page.screenshot(path=screenshot_path, full_page=True)
-        self.test_results["screenshots"].append(screenshot_path)
-        print(f"📸 Screenshot saved: {screenshot_path}")
+        self.screenshot(page, 'profitability')
 
         tab_result = {
             "tab_name": "Profitability Analysis",
@@ -474,14 +480,9 @@ class FinancialModuleTester:
         print("📄 Testing Tab 8: FINANCIAL STATEMENTS")
         print("="*60)
 
-        page.click('text=Financial Statements')
-        page.wait_for_load_state('networkidle')
-        time.sleep(2)
+        self.open_tab(page, 'Financial Statements', settle_s=2)
 
-        screenshot_path = '/tmp/financial_statements.png'
-        page.screenshot(path=screenshot_path, full_page=True)
-        self.test_results["screenshots"].append(screenshot_path)
-        print(f"📸 Screenshot saved: {screenshot_path}")
+        self.screenshot(page, 'statements')
 
         tab_result = {
             "tab_name": "Financial Statements",
@@ -674,7 +675,15 @@ class FinancialModuleTester:
 
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+            context = browser.new_context()
+            sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perf'))
+            if self.profile_threshold_ms is not None:
+                from page_profiler import SlowPageProfiler
+                self.profiler = SlowPageProfiler(context, threshold_ms=self.profile_threshold_ms)
+            if self.screenshot_store:
+                from screenshot_store import ScreenshotStore
+                self.store = ScreenshotStore(self.screenshot_store)
+            page = context.new_page()
 
             try:
                 # Login
@@ -700,15 +709,27 @@ class FinancialModuleTester:
                 print("✅ TESTING COMPLETE")
                 print("="*60)
                 print(f"\nView full report at: /tmp/financial_module_test_report.md")
-                print(f"View screenshots in: /tmp/financial_*.png")
+                print(f"View screenshots in: {self.screenshot_store or '/tmp/financial_*.png'}")
 
             except Exception as e:
                 print(f"\n❌ Test execution failed: {e}")
                 import traceback
                 traceback.print_exc()
             finally:
+                if self.profiler:
+                    self.profiler.close()
+                if self.store:
+                    self.store.close()
                 browser.close()
 
 if __name__ == "__main__":
-    tester = FinancialModuleTester()
+    parser = argparse.ArgumentParser(description="Financial module tests")
+    parser.add_argument("--profile", action="store_true", help="profile tabs slower than the threshold")
+    parser.add_argument("--profile-threshold-ms", type=int, default=3000)
+    parser.add_argument("--screenshot-store", metavar="DIR",
+                        help="keep only screenshots that changed since the last run, with the changes outlined")
+    args = parser.parse_args()
+
+    tester = FinancialModuleTester(args.profile_threshold_ms if args.profile else None,
+                                   screenshot_store=args.screenshot_store)
     tester.run_all_tests()
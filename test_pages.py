@@ -1,12 +1,42 @@
 #!/usr/bin/env python3
 """
 Test all frontend pages and capture errors after ID migration from CUID to Int.
+
+Pass --profile to keep a Playwright trace, CPU profile, heap snapshot size and
+React render counts for every page slower than --profile-threshold-ms
+(see scripts/perf/page_profiler.py).
+
+Pass --record-har PATH to save every page's /api/ traffic as a HAR for
+scripts/perf/har_replay.py (see scripts/perf/har_recorder.py).
+
+Pass --screenshot-store DIR to screenshot every page at each --viewports size
+and keep only the frames that changed since the last run, with the changed
+regions outlined (see scripts/perf/screenshot_store.py).
 """
 from playwright.sync_api import sync_playwright
+import argparse
 import json
+import os
+import sys
+from contextlib import nullcontext
 from datetime import datetime
 
-def test_application():
+# List of pages to test (also used by scripts/perf/check_bundle_budgets.py)
+PAGES_TO_TEST = [
+    {'name': 'Dashboard', 'url': '/'},
+    {'name': 'Orders', 'url': '/orders'},
+    {'name': 'Customers', 'url': '/customers'},
+    {'name': 'Products', 'url': '/products'},
+    {'name': 'Customer Reps', 'url': '/customer-reps'},
+    {'name': 'Delivery Agents', 'url': '/delivery-agents'},
+    {'name': 'Financial', 'url': '/financial'},
+    {'name': 'Analytics', 'url': '/analytics'},
+    {'name': 'Workflows', 'url': '/workflows'},
+    {'name': 'Checkout Forms', 'url': '/checkout-forms'},
+    {'name': 'Settings', 'url': '/settings'},
+]
+
+def test_application(profile_threshold_ms=None, har_path=None, screenshot_store=None, viewports=()):
     results = {
         "test_time": datetime.now().isoformat(),
         "pages_tested": [],
@@ -18,6 +48,19 @@ def test_application():
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         context = browser.new_context()
+        profiler = None
+        recorder = None
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts', 'perf'))
+        if profile_threshold_ms is not None:
+            from page_profiler import SlowPageProfiler
+            profiler = SlowPageProfiler(context, threshold_ms=profile_threshold_ms)
+        if har_path:
+            from har_recorder import HarRecorder
+            recorder = HarRecorder(context, har_path)
+        store = None
+        if screenshot_store:
+            from screenshot_store import ScreenshotStore
+            store = ScreenshotStore(screenshot_store)
         page = context.new_page()
 
         # Capture console messages
@@ -58,30 +101,19 @@ def test_application():
             except Exception as e:
                 print(f"⚠️  Login failed or not needed: {e}")
 
-            # List of pages to test
-            pages_to_test = [
-                {'name': 'Dashboard', 'url': '/'},
-                {'name': 'Orders', 'url': '/orders'},
-                {'name': 'Customers', 'url': '/customers'},
-                {'name': 'Products', 'url': '/products'},
-                {'name': 'Customer Reps', 'url': '/customer-reps'},
-                {'name': 'Delivery Agents', 'url': '/delivery-agents'},
-                {'name': 'Financial', 'url': '/financial'},
-                {'name': 'Analytics', 'url': '/analytics'},
-                {'name': 'Workflows', 'url': '/workflows'},
-                {'name': 'Checkout Forms', 'url': '/checkout-forms'},
-                {'name': 'Settings', 'url': '/settings'},
-            ]
-
-            for page_info in pages_to_test:
+            for page_info in PAGES_TO_TEST:
                 console_before = len(console_messages)
                 network_before = len(network_failures)
 
                 print(f"\n🔍 Testing {page_info['name']}...")
 
                 try:
-                    page.goto(f"http://localhost:5173{page_info['url']}", wait_until='networkidle', timeout=10000)
-                    page.wait_for_timeout(2000)  # Wait for React to render
+                    capture = profiler.capture(page, page_info['name']) if profiler else nullcontext(lambda: None)
+                    recording = recorder.capture(page_info['name']) if recorder else nullcontext()
+                    with recording, capture as loaded:
+                        page.goto(f"http://localhost:5173{page_info['url']}", wait_until='networkidle', timeout=10000)
+                        loaded()
+                        page.wait_for_timeout(2000)  # Wait for React to render
 
                     # Check if page has content
                     has_content = page.locator('body').inner_text()
@@ -90,6 +122,17 @@ def test_application():
                     # Check for loading indicators still present
                     loading_elements = page.locator('[class*="loading"], [class*="skeleton"]').count()
 
+                    if store:
+                        default_viewport = page.viewport_size
+                        for width, height in viewports or [(default_viewport['width'], default_viewport['height'])]:
+                            page.set_viewport_size({'width': width, 'height': height})
+                            # Let the responsive re-layout (and any fetches it triggers) finish first,
+                            # or the diff reports layout still in flight as changed regions
+                            page.wait_for_load_state('networkidle')
+                            page.wait_for_timeout(500)
+                            store.capture(page, page_info['name'])
+                        page.set_viewport_size(default_viewport)
+
                     # Capture console errors for this page
                     page_console_errors = console_messages[console_before:]
                     page_network_errors = network_failures[network_before:]
@@ -127,6 +170,13 @@ def test_application():
                     })
 
         finally:
+            if profiler:
+                results["slow_page_profiles"] = profiler.results
+                profiler.close()
+            if recorder:
+                results["har"] = recorder.close()
+            if store:
+                results["screenshots"] = store.close()
             browser.close()
 
         # Compile all unique console errors
@@ -148,11 +198,21 @@ def test_application():
         return results
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test all frontend pages")
+    parser.add_argument("--profile", action="store_true", help="profile pages slower than the threshold")
+    parser.add_argument("--profile-threshold-ms", type=int, default=3000)
+    parser.add_argument("--record-har", metavar="PATH", help="record each page's /api/ traffic to a HAR file")
+    parser.add_argument("--screenshot-store", metavar="DIR", help="keep only screenshots that changed since last run")
+    parser.add_argument("--viewports", default="", help="WxH sizes to screenshot, e.g. 1280x720,390x844")
+    args = parser.parse_args()
+    viewports = [tuple(int(v) for v in size.split("x")) for size in args.viewports.split(",") if size]
+
     print("=" * 60)
     print("🧪 E-Commerce COD Admin - Page Testing")
     print("=" * 60)
 
-    results = test_application()
+    results = test_application(args.profile_threshold_ms if args.profile else None, har_path=args.record_har,
+                               screenshot_store=args.screenshot_store, viewports=viewports)
 
     # Save results to file
     output_file = "/Users/mac/Downloads/claude/ecommerce-cod-admin/test_results.json"